@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: usmerjanje poizvedb v omnicore-global AIRouter (50 modulov × 200 ključnih besed)
+
+Primerja prejšnjo zanko (vsak modul, vsaka beseda, ``in`` + nov ``re.search``) z
+Aho-Corasick indeksom (en prehod čez poizvedbo) in z LRU predpomnilnikom ponovljenih poizvedb.
+Rezultati usmerjanja se preverijo, da so enaki.
+
+Zagon:  python benchmarks/bench_ai_router.py [--modules 50] [--keywords 200] [--queries 2000]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "omnicore-global" / "backend"))
+logging.disable(logging.CRITICAL)
+
+from ai_router import AIRouter
+
+
+def legacy_route(routing_rules, normalized_query):
+    module_scores = {}
+    for module_name, keywords in routing_rules.items():
+        score = 0
+        for keyword in keywords:
+            if keyword in normalized_query:
+                if keyword == normalized_query:
+                    score += 10
+                elif re.search(r'\b' + re.escape(keyword) + r'\b', normalized_query):
+                    score += 5
+                else:
+                    score += 1
+        if score > 0:
+            module_scores[module_name] = score
+    return max(module_scores, key=module_scores.get) if module_scores else "analytics"
+
+
+def make_rules(modules: int, keywords: int, rng: random.Random):
+    syllables = ["ka", "ro", "mi", "te", "lo", "sa", "vi", "ne", "du", "pa", "ri", "zo", "be", "go", "fu"]
+    rules = {}
+    for m in range(modules):
+        rules[f"module_{m:02d}"] = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+                                    for _ in range(keywords)]
+    return rules
+
+
+def make_queries(rules, count: int, rng: random.Random):
+    vocabulary = [keyword for keywords in rules.values() for keyword in keywords]
+    filler = ["please", "show", "me", "the", "latest", "for", "our", "team", "today"]
+    return [" ".join(rng.choice(vocabulary if rng.random() < 0.3 else filler) for _ in range(rng.randint(4, 10)))
+            for _ in range(count)]
+
+
+def bench(label: str, fn, queries, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            fn(query)
+        best = min(best, time.perf_counter() - start)
+    per_query_us = best / len(queries) * 1e6
+    print(f"{label:<28} {per_query_us:10.1f} µs/poizvedbo")
+    return per_query_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--keywords", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rules = make_rules(args.modules, args.keywords, rng)
+    queries = make_queries(rules, args.queries, rng)
+
+    uncached = AIRouter({}, None, route_cache_size=0)
+    uncached.routing_rules = rules
+    cached = AIRouter({}, None, route_cache_size=4096)
+    cached.routing_rules = rules
+
+    loop = asyncio.new_event_loop()
+    mismatches = sum(legacy_route(rules, q) != loop.run_until_complete(uncached.route(q)) for q in queries)
+    print(f"{args.modules} modulov × {args.keywords} besed, {len(queries)} poizvedb, razlik: {mismatches}")
+
+    legacy = bench("prej (zanka + re.search)", lambda q: legacy_route(rules, q), queries)
+    index = bench("Aho-Corasick indeks", lambda q: loop.run_until_complete(uncached.route(q)), queries)
+    # Vroče poizvedbe: 20 različnih poizvedb, ponovljenih
+    hot = [queries[i % 20] for i in range(len(queries))]
+    cache = bench("indeks + LRU (vroče)", lambda q: loop.run_until_complete(cached.route(q)), hot)
+    loop.close()
+    print(f"pohitritev: indeks {legacy / index:.0f}×, LRU {legacy / cache:.0f}×")
+
+
+if __name__ == "__main__":
+    main()
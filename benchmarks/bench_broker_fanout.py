@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latenca publish_event pri 1000 povezanih WebSocketih, od katerih je 1% počasnih
+
+Primerja prejšnje zaporedno pošiljanje (json.dumps in await send_text za vsak socket)
+z vrstami in dostavnimi nalogami po socketu.
+
+Zagon:  python benchmarks/bench_broker_fanout.py [--sockets 1000] [--slow-ratio 0.01] [--events 200]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+logging.disable(logging.CRITICAL)
+
+from omni_message_broker import EventPriority, EventType, MessageBroker, OmniEvent
+
+
+class FakeWebSocket:
+    """Socket, ki pošiljanje "opravi" takoj ali z zakasnitvijo (počasen odjemalec)"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent = 0
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.sent += 1
+
+    async def close(self):
+        pass
+
+
+def make_event(i: int) -> OmniEvent:
+    return OmniEvent(
+        event_id=str(uuid.uuid4()),
+        event_type=EventType.ANALYTICS,
+        priority=EventPriority.MEDIUM,
+        tenant_id="bench",
+        source_service="bench",
+        target_service=None,
+        payload={"i": i, "values": list(range(20))},
+        timestamp=datetime.now()
+    )
+
+
+async def sequential_broadcast(sockets, topic: str, event: OmniEvent):
+    """Prejšnja implementacija _broadcast_to_websockets"""
+    message = {
+        "topic": topic,
+        "event": {
+            "event_id": event.event_id,
+            "event_type": event.event_type.value,
+            "priority": event.priority.value,
+            "tenant_id": event.tenant_id,
+            "source_service": event.source_service,
+            "target_service": event.target_service,
+            "payload": event.payload,
+            "timestamp": event.timestamp.isoformat()
+        }
+    }
+    for websocket in sockets:
+        await websocket.send_text(json.dumps(message))
+
+
+def make_sockets(count: int, slow_ratio: float, slow_delay: float):
+    slow_every = max(1, int(1 / slow_ratio)) if slow_ratio > 0 else 0
+    return [FakeWebSocket(slow_delay if slow_every and i % slow_every == 0 else 0.0) for i in range(count)]
+
+
+def summarize(name: str, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{name:<26}{p50:>12.3f}{p99:>12.3f}")
+
+
+async def bench_sequential(args):
+    sockets = make_sockets(args.sockets, args.slow_ratio, args.slow_delay)
+    latencies = []
+    for i in range(args.sequential_events):
+        start = time.perf_counter()
+        await sequential_broadcast(sockets, "bench", make_event(i))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def bench_queued(args):
+    broker = MessageBroker(data_dir=None, websocket_queue_size=256)
+    sockets = make_sockets(args.sockets, args.slow_ratio, args.slow_delay)
+    for ws in sockets:
+        await broker.add_websocket(ws)
+
+    latencies = []
+    for i in range(args.events):
+        start = time.perf_counter()
+        await broker.publish_event("bench", make_event(i))
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(args.interval)  # čas za dostavne naloge med objavami
+
+    fast = [ws for ws in sockets if not ws.delay]
+    await asyncio.gather(*(broker.websocket_connections[ws].queue.join() for ws in fast))
+    delivered = sum(ws.sent for ws in fast)
+    stats = broker.get_delivery_stats()
+    broker.close()
+    return latencies, delivered / (len(fast) * args.events), stats["websocket_dropped"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--slow-ratio", type=float, default=0.01)
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="zakasnitev počasnega socketa (s)")
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--sequential-events", type=int, default=20,
+                        help="število objav za zaporedni način (je počasen)")
+    parser.add_argument("--interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    sequential = asyncio.run(bench_sequential(args))
+    queued, fast_delivery, dropped = asyncio.run(bench_queued(args))
+
+    print(f"{args.sockets} socketov, {args.slow_ratio:.0%} počasnih ({args.slow_delay * 1000:.0f} ms na sporočilo)")
+    print(f"{'način':<26}{'p50 ms':>12}{'p99 ms':>12}")
+    summarize("zaporedno pošiljanje", sequential)
+    summarize("vrste po socketu", queued)
+    print(f"dostava hitrim socketom: {fast_delivery:.1%}, zavrženih pri počasnih: {dropped}")
+
+
+if __name__ == "__main__":
+    main()
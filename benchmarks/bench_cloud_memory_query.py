@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: globoke strani in pregled cele kategorije v OmniCloudMemory
+
+Primerja LIMIT/OFFSET stran (query_data) s keyset stranjo (query_page) na isti globini
+ter največjo porabo pomnilnika pri pregledu vseh vrstic: query_data v enem kosu
+proti pretočnemu iter_data.
+
+Zagon:  python benchmarks/bench_cloud_memory_query.py [--rows 1000000] [--page 100]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+logging.disable(logging.CRITICAL)
+
+from omni_cloud_memory import DataCategory, OmniCloudMemory, encode_cursor
+
+CATEGORY = DataCategory.ANALYTICS
+
+
+def fill(memory: OmniCloudMemory, rows: int, chunk: int = 50_000):
+    start = datetime(2026, 1, 1)
+    blob = pickle.dumps({"value": 1.0, "label": "x" * 64})
+    conn = memory.sqlite_conn
+    for chunk_start in range(0, rows, chunk):
+        conn.executemany('''
+            INSERT INTO cloud_data (id, category, data, metadata, created_at, compressed, codec)
+            VALUES (?, ?, ?, ?, ?, 0, 'pickle')
+        ''', [(f"row{i:08d}", CATEGORY.value, blob, f'{{"score": {i % 100}}}',
+               start + timedelta(milliseconds=i))
+              for i in range(chunk_start, min(rows, chunk_start + chunk))])
+        conn.commit()
+
+
+def timed(coroutine_factory, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        asyncio.run(coroutine_factory())
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def peak_memory(coroutine_factory) -> float:
+    tracemalloc.start()
+    asyncio.run(coroutine_factory())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = OmniCloudMemory(db_path=os.path.join(tmp, "bench.db"))
+        memory.init_sqlite_database()
+        start = time.perf_counter()
+        fill(memory, args.rows)
+        print(f"Napolnjeno {args.rows} vrstic v {time.perf_counter() - start:.1f} s")
+
+        depth = args.rows - args.page
+        # Kazalec za isto globino, kot bi ga vrnila prejšnja stran
+        last_id, last_created = memory.sqlite_conn.execute(
+            "SELECT id, created_at FROM cloud_data WHERE category = ? ORDER BY created_at DESC, id DESC "
+            "LIMIT 1 OFFSET ?", (CATEGORY.value, depth - 1)).fetchone()
+        cursor = encode_cursor(last_created, last_id)
+
+        offset_ms = timed(lambda: memory.query_data(CATEGORY, limit=args.page, offset=depth))
+        keyset_ms = timed(lambda: memory.query_page(CATEGORY, limit=args.page, cursor=cursor))
+        print(f"Stran na globini {depth}:  OFFSET {offset_ms:8.2f} ms   keyset {keyset_ms:8.2f} ms")
+
+        async def scan_stream():
+            count = 0
+            async for _ in memory.iter_data(CATEGORY, batch_size=1000):
+                count += 1
+            assert count == args.rows
+
+        async def scan_list():
+            assert len(await memory.query_data(CATEGORY, limit=args.rows)) == args.rows
+
+        list_mb = peak_memory(scan_list)
+        stream_mb = peak_memory(scan_stream)
+        print(f"Pregled vseh vrstic (vrh pomnilnika):  query_data {list_mb:8.1f} MB   iter_data {stream_mb:8.1f} MB")
+
+        start = time.perf_counter()
+        columns = asyncio.run(memory.export_metadata_columns(CATEGORY, ["score"]))
+        print(f"Stolpčni izvoz 'score': {len(columns['score'])} vrstic v "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms (povprečje {columns['score'].mean():.1f})")
+        memory.sqlite_conn.close()
+
+
+if __name__ == "__main__":
+    main()
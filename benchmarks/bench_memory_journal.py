@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latenca vnosa spomina v OmniCore pri 1k -> 1M obstoječih spominih
+
+Primerja "json" (prepis celotne long_term.json) in "journal" (append-only dnevnik).
+JSON način se meri le do 10k, ker je vsak vnos O(n).
+
+Zagon:  python benchmarks/bench_memory_journal.py [--max 1000000] [--samples 2000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+logging.disable(logging.CRITICAL)
+
+from omni.core.engine import OmniCore
+
+
+def prefill_legacy(data_dir: str, count: int):
+    """Ustvari long_term.json z ``count`` spomini (obstoječa namestitev)"""
+    os.makedirs(os.path.join(data_dir, "memory"), exist_ok=True)
+    now = datetime.now().isoformat()
+    with open(os.path.join(data_dir, "memory", "long_term.json"), 'w', encoding='utf-8') as f:
+        json.dump([{"id": f"mem_{i}", "content": f"Spomin številka {i}", "timestamp": now,
+                    "category": "bench", "importance": 0.5, "metadata": {"i": i}}
+                   for i in range(count)], f)
+
+
+def measure(backend: str, existing: int, samples: int):
+    data_dir = tempfile.mkdtemp(prefix="omni_bench_")
+    try:
+        prefill_legacy(data_dir, existing)
+        open_start = time.perf_counter()
+        core = OmniCore(data_dir=data_dir, memory_backend=backend)
+        open_time = time.perf_counter() - open_start
+        if backend == "journal":
+            # Prvo odprtje pretvori long_term.json; meri se ponovni zagon
+            core.shutdown()
+            open_start = time.perf_counter()
+            core = OmniCore(data_dir=data_dir, memory_backend=backend)
+            open_time = time.perf_counter() - open_start
+
+        latencies = []
+        for i in range(samples):
+            start = time.perf_counter()
+            core.add_memory(f"Benchmark vnos {i}", "bench", 0.5, {"i": i})
+            latencies.append(time.perf_counter() - start)
+        core.shutdown()
+
+        latencies.sort()
+        return {
+            "open_ms": open_time * 1000,
+            "p50_us": latencies[len(latencies) // 2] * 1e6,
+            "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= args.max]
+    print(f"{'backend':<8} {'obstoječi':>10} {'odprtje ms':>11} {'p50 µs':>9} {'p99 µs':>9}")
+    for backend in ("json", "journal"):
+        for size in sizes:
+            if backend == "json" and size > 10_000:
+                continue
+            samples = args.samples if backend == "journal" else min(args.samples, 100)
+            r = measure(backend, size, samples)
+            print(f"{backend:<8} {size:>10} {r['open_ms']:>11.1f} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
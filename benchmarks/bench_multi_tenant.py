@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sočasni zapisi in branja čez 50 najemnikov v MultiTenantDatabase
+
+Primerja prejšnji način (ena deljena povezava na najemnika pod globalno ključavnico,
+commit po vsakem stavku, revizijski zapis v ločeni povezavi in commitu) s
+TenantConnectionPool (WAL, en pisalec z group commitom, N bralcev, delo izven
+event loopa). Meri prepustnost in zakasnitve (p50/p99) zahtevkov.
+
+Zagon:  python benchmarks/bench_multi_tenant.py [--tenants 50] [--clients 200] [--requests 20]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+logging.disable(logging.CRITICAL)
+
+# Modul ob uvozu ustvari privzeto bazo v trenutni mapi
+_import_dir = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+os.chdir(_import_dir.name)
+try:
+    from omni_multi_tenant_database import MultiTenantDatabase, TenantConfig, TenantType, db_manager
+finally:
+    os.chdir(_cwd)
+db_manager.close()
+
+
+def make_tenant(tenant_id: str) -> TenantConfig:
+    return TenantConfig(
+        tenant_id=tenant_id, name=tenant_id, type=TenantType.SME, created_at=datetime.utcnow(),
+        subscription_tier="Professional", data_retention_days=365, max_users=10, max_storage_gb=10,
+        features_enabled=["finance"], compliance_requirements=["GDPR"], encryption_level="AES-256",
+        backup_frequency="daily"
+    )
+
+
+class LegacyStore:
+    """Stari način: deljena povezava, globalna ključavnica, commit po stavku, ločen audit"""
+
+    def __init__(self, db: MultiTenantDatabase):
+        self.db = db
+        self.lock = threading.RLock()
+        self.connections = {
+            tenant_id: sqlite3.connect(str(db.tenant_dir / f"tenant_{tenant_id}.db"), check_same_thread=False)
+            for tenant_id in db.tenants
+        }
+
+    def _audit(self, tenant_id, action, resource):
+        with sqlite3.connect(self.db.db_path) as conn:
+            conn.execute("""
+                INSERT INTO access_logs
+                (log_id, tenant_id, user_id, action, resource, timestamp, ip_address, user_agent, success)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (secrets.token_urlsafe(16), tenant_id, "user", action, resource,
+                  datetime.utcnow().isoformat(), "", "", True))
+
+    async def store_data(self, tenant_id, data):
+        data_json = json.dumps(data)
+        with self.lock:
+            conn = self.connections[tenant_id]
+            try:
+                conn.execute("""
+                    INSERT INTO finance_transactions
+                    (transaction_id, amount, currency, type, description, account_id,
+                     created_at, classification, encrypted_data, checksum)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (secrets.token_urlsafe(16), data["amount"], "EUR", "unknown", "", "",
+                      datetime.utcnow().isoformat(), "internal", data_json,
+                      self.db.calculate_checksum(data_json)))
+            finally:
+                conn.commit()
+        self._audit(tenant_id, "CREATE", "finance/transaction")
+
+    async def retrieve_data(self, tenant_id):
+        with self.lock:
+            conn = self.connections[tenant_id]
+            try:
+                rows = conn.execute("SELECT * FROM finance_transactions ORDER BY created_at DESC LIMIT 100").fetchall()
+            finally:
+                conn.commit()
+        self._audit(tenant_id, "READ", "finance/transaction")
+        return rows
+
+    def close(self):
+        for conn in self.connections.values():
+            conn.close()
+
+
+class PooledStore:
+    def __init__(self, db: MultiTenantDatabase):
+        self.db = db
+
+    async def store_data(self, tenant_id, data):
+        await self.db.store_data(tenant_id, "finance", "transaction", data, "user")
+
+    async def retrieve_data(self, tenant_id):
+        return await self.db.retrieve_data(tenant_id, "finance", "transaction", user_id="user")
+
+    def close(self):
+        pass
+
+
+async def run_clients(store, tenants, clients: int, requests: int, read_every: int):
+    latencies = []
+
+    async def client(index: int):
+        tenant_id = tenants[index % len(tenants)]
+        for i in range(requests):
+            start = time.perf_counter()
+            if i % read_every == read_every - 1:
+                await store.retrieve_data(tenant_id)
+            else:
+                await store.store_data(tenant_id, {"amount": i})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(clients)])
+    return time.perf_counter() - start, latencies
+
+
+def report(label: str, elapsed: float, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<10} {len(latencies) / elapsed:10.0f} zahtevkov/s   p50 {p50:8.2f} ms   p99 {p99:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="zahtevkov na odjemalca")
+    parser.add_argument("--read-every", type=int, default=5, help="vsak n-ti zahtevek je branje")
+    args = parser.parse_args()
+
+    print(f"{args.tenants} najemnikov, {args.clients} odjemalcev × {args.requests} zahtevkov")
+    for label, factory in (("prej", LegacyStore), ("pool", PooledStore)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = MultiTenantDatabase(db_path=os.path.join(tmp, "master.db"), tenant_dir=tmp, load_samples=False)
+            tenants = [f"tenant-{i:02d}" for i in range(args.tenants)]
+            for tenant_id in tenants:
+                db.register_tenant(make_tenant(tenant_id))
+            store = factory(db)
+            elapsed, latencies = asyncio.run(run_clients(store, tenants, args.clients, args.requests,
+                                                         args.read_every))
+            report(label, elapsed, latencies)
+            if label == "pool":
+                stats = db.get_pool_stats().values()
+                units = sum(s["units"] for s in stats)
+                transactions = sum(s["transactions"] for s in stats)
+                print(f"{'':<10} group commit: {units} enot v {transactions} transakcijah")
+            store.close()
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
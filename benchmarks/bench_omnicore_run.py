@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latenca OmniCore.run - zaporedne faze vs. mode="concurrent"
+
+AI klic je StubAIClient z zakasnitvijo (brez omrežja), moduli in iskanje so
+simulirani z zakasnitvami, kot bi jih imeli zunanji klici.
+
+Zagon:  python benchmarks/bench_omnicore_run.py [--runs 10] [--modules 6] [--ai-latency 0.4]
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+logging.disable(logging.CRITICAL)
+
+from omni.core.engine import OmniCore
+from omni.core.stub_ai import StubAIClient
+
+
+class SimulatedModule:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def run(self, text: str):
+        time.sleep(self.latency)
+        return {"ok": True, "latency": self.latency}
+
+
+class SimulatedSearch:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def search(self, text: str, count: int = 5):
+        time.sleep(self.latency)
+        return [{"title": f"rezultat {i}", "snippet": text} for i in range(count)]
+
+
+def measure(core: OmniCore, runs: int, **kwargs):
+    latencies = []
+    result = None
+    for i in range(runs):
+        start = time.perf_counter()
+        result = core.run(f"poizvedba {i}", **kwargs)
+        latencies.append(time.perf_counter() - start)
+    return latencies, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--modules", type=int, default=6)
+    parser.add_argument("--ai-latency", type=float, default=0.4)
+    parser.add_argument("--module-latency", type=float, default=0.15)
+    parser.add_argument("--search-latency", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        core = OmniCore(data_dir=data_dir, ai_client=StubAIClient(latency=args.ai_latency),
+                        stage_workers=args.modules + 2)
+        for i in range(args.modules):
+            core.register_module(f"modul_{i}", SimulatedModule(args.module_latency))
+        core.register_integration("search_bing", SimulatedSearch(args.search_latency))
+
+        sequential, _ = measure(core, args.runs)
+        concurrent, last = measure(core, args.runs, mode="concurrent")
+        core.shutdown()
+
+    print(f"AI {args.ai_latency}s, {args.modules} modulov po {args.module_latency}s, iskanje {args.search_latency}s")
+    print(f"{'način':<14}{'p50 s':>10}{'max s':>10}")
+    for name, latencies in (("zaporedno", sequential), ("sočasno", concurrent)):
+        print(f"{name:<14}{statistics.median(latencies):>10.3f}{max(latencies):>10.3f}")
+    print("faze (zadnji sočasni klic):")
+    for stage, timing in last["timings"].items():
+        print(f"  {stage:<16}{timing['duration']:>8.3f}s  {timing['status']}")
+
+
+if __name__ == "__main__":
+    main()
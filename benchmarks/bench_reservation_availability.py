@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: iskanje prostih sob za vikend v ReservationSystem
+
+Primerja prejšnji find_available_resources (poizvedba s prekrivanjem v bazi za
+vsak vir posebej) z indeksom zasedenosti (en prehod po pomnilniškem indeksu).
+
+Zagon:  python benchmarks/bench_reservation_availability.py [--rooms 500] [--reservations 50000] [--queries 50]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from omni.modules.tourism.reservation_system import ReservationSystem, ReservationType
+
+logging.disable(logging.CRITICAL)
+
+
+def find_available_sql(db_path, resource_type, start, end, party_size):
+    """Prejšnji pristop: ena poizvedba prekrivanja na vir"""
+    available = []
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('''
+            SELECT resource_id FROM resources
+            WHERE resource_type = ? AND capacity >= ? AND is_active = 1
+        ''', (resource_type.value, party_size)).fetchall()
+        for (resource_id,) in rows:
+            with sqlite3.connect(db_path) as check:
+                conflicts = check.execute('''
+                    SELECT COUNT(*) FROM reservations
+                    WHERE resource_id = ? AND status NOT IN ('cancelled', 'no_show')
+                    AND ((start_datetime <= ? AND end_datetime > ?) OR
+                         (start_datetime < ? AND end_datetime >= ?) OR
+                         (start_datetime >= ? AND start_datetime < ?))
+                ''', (resource_id, start.isoformat(), start.isoformat(), end.isoformat(), end.isoformat(),
+                      start.isoformat(), end.isoformat())).fetchone()[0]
+            if conflicts == 0:
+                available.append(resource_id)
+    return available
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--reservations", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    base = datetime(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "reservations.db")
+        ReservationSystem(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany("INSERT INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                             [(f"ROOM{i}", f"Soba {i}", "room", rng.randint(1, 4), "[]", 80.0, "")
+                              for i in range(args.rooms)])
+            rows = []
+            for i in range(args.reservations):
+                start = base + timedelta(days=rng.randrange(365), hours=14)
+                end = start + timedelta(days=rng.randint(1, 7), hours=-4)
+                status = rng.choice(["confirmed"] * 8 + ["cancelled", "completed"])
+                rows.append((f"R{i}", "CUST", f"ROOM{rng.randrange(args.rooms)}", "room", start.isoformat(),
+                             end.isoformat(), 2, status, "", 0, 0, "", ""))
+            conn.executemany("INSERT INTO reservations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+        start_load = time.perf_counter()
+        system = ReservationSystem(db_path)
+        load_time = time.perf_counter() - start_load
+
+        weekends = [base + timedelta(days=4 + 7 * rng.randrange(50), hours=14) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        old = [find_available_sql(db_path, ReservationType.ROOM, w, w + timedelta(days=2), 2) for w in weekends]
+        old_time = (time.perf_counter() - start) / args.queries
+
+        start = time.perf_counter()
+        new = [[r["resource_id"] for r in system.find_available_resources(
+            ReservationType.ROOM, w, w + timedelta(days=2), 2)] for w in weekends]
+        new_time = (time.perf_counter() - start) / args.queries
+
+        assert old == new
+        print(f"{args.rooms} sob, {args.reservations} rezervacij, nalaganje indeksa {load_time:.2f} s")
+        print(f"{'prej (SQL na vir)':<22} {old_time * 1000:9.2f} ms/iskanje")
+        print(f"{'indeks zasedenosti':<22} {new_time * 1000:9.2f} ms/iskanje")
+        print(f"pohitritev: {old_time / new_time:.0f}×")
+
+
+if __name__ == "__main__":
+    main()
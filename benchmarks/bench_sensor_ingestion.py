@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prepustnost zapisa senzorskih podatkov (zapisi/s)
+
+Primerja prejšnji način (en INSERT + commit na zapis) s SensorIngestionPipeline
+(vrsta, ena pisalna nit, paketni commit in sprotni agregati).
+
+Zagon:  python benchmarks/bench_sensor_ingestion.py [--readings 200000] [--devices 500]
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "omni"))
+logging.disable(logging.CRITICAL)
+
+from modules.iot.sensor_ingestion import SensorIngestionPipeline, ensure_ingestion_schema
+
+
+class Reading:
+    __slots__ = ("device_id", "sensor_type", "value", "unit", "timestamp", "quality")
+
+    def __init__(self, device_id, sensor_type, value, unit, timestamp, quality="good"):
+        self.device_id = device_id
+        self.sensor_type = sensor_type
+        self.value = value
+        self.unit = unit
+        self.timestamp = timestamp
+        self.quality = quality
+
+
+def make_readings(count: int, devices: int):
+    start = datetime.now() - timedelta(seconds=count // devices)
+    return [Reading(f"device_{i % devices}", "temperature", 20.0 + (i % 13) * 0.5, "°C",
+                    start + timedelta(seconds=i // devices))
+            for i in range(count)]
+
+
+def bench_per_row(db_path: Path, readings) -> float:
+    """Stari način: povezava, INSERT in commit za vsak zapis"""
+    start = time.perf_counter()
+    for reading in readings:
+        conn = sqlite3.connect(str(db_path))
+        conn.execute('''
+            INSERT INTO sensor_data (device_id, sensor_type, value, unit, quality, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (reading.device_id, reading.sensor_type, reading.value, reading.unit,
+              reading.quality, reading.timestamp.isoformat(sep=' ')))
+        conn.commit()
+        conn.close()
+    return len(readings) / (time.perf_counter() - start)
+
+
+def bench_pipeline(db_path: Path, readings) -> float:
+    pipeline = SensorIngestionPipeline(db_path)
+    start = time.perf_counter()
+    for reading in readings:
+        pipeline.submit_reading(reading)
+    pipeline.flush()
+    elapsed = time.perf_counter() - start
+    pipeline.close()
+    return len(readings) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readings", type=int, default=200_000)
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--per-row", type=int, default=2_000,
+                        help="število zapisov za stari način (je počasen)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = Path(tmp) / "legacy.db"
+        conn = sqlite3.connect(str(legacy_db))
+        ensure_ingestion_schema(conn)
+        conn.commit()
+        conn.close()
+
+        per_row = bench_per_row(legacy_db, make_readings(args.per_row, args.devices))
+        batched = bench_pipeline(Path(tmp) / "pipeline.db", make_readings(args.readings, args.devices))
+
+    print(f"{'način':<28}{'zapisi/s':>14}")
+    print(f"{'INSERT + commit na zapis':<28}{per_row:>14,.0f}")
+    print(f"{'SensorIngestionPipeline':<28}{batched:>14,.0f}")
+    print(f"pospešitev: {batched / per_row:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
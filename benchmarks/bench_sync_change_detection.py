@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: zaznavanje sprememb v Omni Cloud Sync
+
+Primerja prejšnji check_for_changes (MD5 vseh datotek po 4 KB v vsakem ciklu)
+s FileChangeDetector (predfilter podpisov + zgoščevanje spremenjenih datotek v
+thread poolu) za miren cikel in cikel z nekaj spremenjenimi datotekami.
+
+Zagon:  python benchmarks/bench_sync_change_detection.py [--files 2000] [--size-kb 256] [--changed 20]
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from omni.modules.tourism.sync_change_detector import FileChangeDetector
+
+logging.disable(logging.CRITICAL)
+
+
+def old_checksum(path):
+    hash_md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--changed", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_time = time.time() - 60
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp, f"module_{i}.py")
+            Path(path).write_bytes(os.urandom(args.size_kb * 1024))
+            os.utime(path, (old_time, old_time))
+            paths.append(path)
+        total_mb = args.files * args.size_kb / 1024
+
+        detector = FileChangeDetector()
+        for path in paths:
+            detector.record(path)
+
+        start = time.perf_counter()
+        for path in paths:
+            old_checksum(path)
+        previous = time.perf_counter() - start
+
+        start = time.perf_counter()
+        idle = detector.hash_files(detector.changed_paths(paths))
+        idle_time = time.perf_counter() - start
+        assert not idle
+
+        for path in paths[:args.changed]:
+            with open(path, "r+b") as f:
+                f.write(b"#")
+        start = time.perf_counter()
+        changed = detector.hash_files(detector.changed_paths(paths))
+        changed_time = time.perf_counter() - start
+        assert len(changed) == args.changed
+
+        print(f"{args.files} datotek, {total_mb:.0f} MB")
+        print(f"{'prej (MD5 vseh)':<28} {previous * 1000:9.1f} ms/cikel")
+        print(f"{'podpisi, miren cikel':<28} {idle_time * 1000:9.1f} ms/cikel")
+        print(f"{f'podpisi, {args.changed} spremenjenih':<28} {changed_time * 1000:9.1f} ms/cikel")
+        detector.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: delta prenos po kosih v Omni Cloud Sync
+
+Primerja količino prenesenih podatkov pri prejšnjem prenosu celotne (gzip)
+datoteke s prenosom manifesta in manjkajočih kosov, ko je bila datoteka na
+drugem vozlišču spremenjena na nekaj mestih (vstavljanje in brisanje bajtov).
+
+Zagon:  python benchmarks/bench_sync_delta.py [--size-mb 32] [--edits 5]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from omni.modules.tourism import sync_chunking as sc
+
+
+def make_content(size: int, rng: random.Random) -> bytes:
+    """Polovica naključnih bajtov, polovica besedila (delno stisljivo kot realne datoteke)"""
+    words = [f"rezervacija_{i}" for i in range(5000)]
+    text = " ".join(rng.choice(words) for _ in range(size // 24)).encode()
+    return (rng.randbytes(size // 2) + text)[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--edits", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    local = make_content(args.size_mb * 1024 * 1024, rng)
+    remote = local
+    for _ in range(args.edits):
+        position = rng.randrange(len(remote))
+        remote = remote[:position] + rng.randbytes(rng.randint(1, 200)) + remote[position + rng.randint(0, 200):]
+
+    start = time.perf_counter()
+    full_bytes = len(gzip.compress(remote, compresslevel=6))
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    remote_manifest = sc.build_manifest(remote)
+    manifest_time = time.perf_counter() - start
+    local_manifest = sc.build_manifest(local)
+    missing = sc.missing_chunks(remote_manifest, local_manifest)
+    payload = b"".join(remote[c["offset"]:c["offset"] + c["size"]] for c in missing)
+    fetched = sc.split_chunks(payload, missing)
+    assert sc.assemble(remote_manifest, fetched, local, local_manifest) == remote
+    delta_time = time.perf_counter() - start
+
+    manifest_bytes = len(gzip.compress(json.dumps(remote_manifest).encode(), compresslevel=1))
+    chunk_bytes = len(gzip.compress(payload, compresslevel=1))
+    delta_bytes = manifest_bytes + chunk_bytes
+
+    print(f"Datoteka: {args.size_mb} MB, {args.edits} sprememb, {len(remote_manifest['chunks'])} kosov")
+    print(f"  prej (cela datoteka, gzip):  {full_bytes / 1024:10.1f} KB  ({full_time * 1000:.0f} ms stiskanja)")
+    print(f"  delta (manifest + kosi):     {delta_bytes / 1024:10.1f} KB  "
+          f"(manifest {manifest_bytes / 1024:.1f} KB, {len(missing)} kosov)")
+    print(f"  chunking pošiljatelja:       {manifest_time * 1000:10.0f} ms  "
+          f"({len(remote) / manifest_time / 1e6:.0f} MB/s)")
+    print(f"  chunking + sestava prejemnika: {delta_time * 1000:8.0f} ms")
+    print(f"  prenesenih podatkov manj: {100 * (1 - delta_bytes / full_bytes):.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prepustnost obdelave Thea queue (prompti/s) - sekvenčno vs. vzporedno
+
+Sekvenčni način ima med prompti pavzo 0.1 s in dva ločena zapisa v SQLite na prompt,
+zato se meri na vzorcu (--sequential-sample) in preračuna na prompte/s.
+Vzporedni način obdela celotnih --prompts promptov.
+
+Zagon:  python benchmarks/bench_thea_queue.py [--prompts 10000] [--workers 8]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Modul ob uvozu ustvari log datoteko v trenutnem direktoriju
+os.chdir(tempfile.mkdtemp())
+from thea_advanced_queue_system import Priority, PromptItem, PromptStatus, TheaAdvancedQueueSystem
+
+logging.disable(logging.CRITICAL)
+
+TOPICS = ["analiza podatkov", "finance proračun", "hotel turizem", "iot senzor", "splošno vprašanje"]
+PRIORITIES = [Priority.LOW, Priority.MEDIUM, Priority.HIGH, Priority.CRITICAL]
+
+
+def fill(thea: TheaAdvancedQueueSystem, count: int):
+    """Napolni queue z eno transakcijo (priprava se ne meri)"""
+    now = time.time()
+    prompts = [
+        PromptItem(id=f"prompt-{i:06d}", content=f"{TOPICS[i % len(TOPICS)]} #{i}", status=PromptStatus.PENDING,
+                   priority=PRIORITIES[i % len(PRIORITIES)], timestamp=now + i * 1e-6, metadata={})
+        for i in range(count)
+    ]
+    thea.queue.update((prompt.id, prompt) for prompt in prompts)
+    thea._save_prompts_to_storage(prompts)
+    thea.stats['total_prompts'] += count
+
+
+def bench_sequential(directory: str, count: int) -> float:
+    thea = TheaAdvancedQueueSystem(os.path.join(directory, "sequential.db"))
+    fill(thea, count)
+    start = time.perf_counter()
+    result = thea.process_queue_sequential()
+    return result["processed"] / (time.perf_counter() - start)
+
+
+def bench_parallel(directory: str, count: int, workers: int, mode: str, batch_size: int) -> float:
+    thea = TheaAdvancedQueueSystem(os.path.join(directory, f"parallel_{mode}.db"))
+    fill(thea, count)
+    start = time.perf_counter()
+    result = thea.process_queue_parallel(workers=workers, mode=mode, batch_size=batch_size)
+    return result["processed"] / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=10_000)
+    parser.add_argument("--sequential-sample", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sequential = bench_sequential(directory, args.sequential_sample)
+        threads = bench_parallel(directory, args.prompts, args.workers, "thread", args.batch_size)
+        coroutines = bench_parallel(directory, args.prompts, args.workers, "asyncio", args.batch_size)
+
+    print(f"{'način':<34}{'prompti/s':>12}{f'čas za {args.prompts}':>16}")
+    for name, rate in ((f"sekvenčno (vzorec {args.sequential_sample})", sequential),
+                       (f"vzporedno, {args.workers} niti", threads),
+                       (f"vzporedno, {args.workers} asyncio workerjev", coroutines)):
+        print(f"{name:<34}{rate:>12,.1f}{args.prompts / rate:>15.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ Glavno jedro Omni inteligence z NLP, spominom in učenjem
 import os
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
@@ -43,17 +45,26 @@ class OmniCore:
     - Modularni sistem
     """
     
-    def __init__(self, data_dir: str = "data", debug: bool = False, data_path: str = None):
+    def __init__(self, data_dir: str = "data", debug: bool = False, data_path: str = None,
+                 memory_backend: str = "json", ai_client: Any = None, stage_workers: int = 8):
         self.data_dir = data_path or data_dir
         self.debug = debug
+        self.memory_backend = memory_backend  # "json" (celotna datoteka) ali "journal" (append-only dnevnik)
+        self.memory_store = None
         self.memory: List[OmniMemory] = []
         self.modules: Dict[str, OmniModule] = {}
+        self.module_instances: Dict[str, Any] = {}
         self.integrations: Dict[str, Any] = {}
         self.learning_data: Dict[str, Any] = {}
         
-        # OpenAI client inicializacija
-        self.client = None
-        self._init_openai_client()
+        # Bazen niti za sočasne faze v run(mode="concurrent"), ustvarjen leno
+        self.stage_workers = stage_workers
+        self._stage_executor: Optional[ThreadPoolExecutor] = None
+        
+        # OpenAI client inicializacija (ai_client npr. StubAIClient za delo brez omrežja)
+        self.client = ai_client
+        if self.client is None:
+            self._init_openai_client()
         
         # Inicializacija
         self._init_directories()
@@ -88,36 +99,60 @@ class OmniCore:
         os.makedirs(f"{self.data_dir}/learning", exist_ok=True)
         os.makedirs(f"{self.data_dir}/logs", exist_ok=True)
     
+    @staticmethod
+    def _memory_to_record(memory: OmniMemory) -> Dict[str, Any]:
+        memory_dict = asdict(memory)
+        memory_dict['timestamp'] = memory.timestamp.isoformat()
+        return memory_dict
+    
+    @staticmethod
+    def _memory_from_record(item: Dict[str, Any]) -> OmniMemory:
+        return OmniMemory(
+            id=item['id'],
+            content=item['content'],
+            timestamp=datetime.fromisoformat(item['timestamp']),
+            category=item['category'],
+            importance=item['importance'],
+            metadata=item['metadata']
+        )
+    
     def _load_memory(self):
         """Naloži spomine iz datoteke"""
+        if self.memory_backend == "journal":
+            from .memory.journal import JournaledMemoryStore
+            
+            try:
+                self.memory_store = JournaledMemoryStore(
+                    f"{self.data_dir}/memory",
+                    to_record=self._memory_to_record,
+                    from_record=self._memory_from_record
+                )
+                self.memory = self.memory_store.memories
+                logger.info(f"📒 Odprt dnevnik spominov ({len(self.memory)} spominov)")
+            except Exception as e:
+                logger.error(f"❌ Napaka pri odpiranju dnevnika spominov: {e}")
+            return
+        
         memory_file = f"{self.data_dir}/memory/long_term.json"
         if os.path.exists(memory_file):
             try:
                 with open(memory_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.memory = [
-                        OmniMemory(
-                            id=item['id'],
-                            content=item['content'],
-                            timestamp=datetime.fromisoformat(item['timestamp']),
-                            category=item['category'],
-                            importance=item['importance'],
-                            metadata=item['metadata']
-                        ) for item in data
-                    ]
+                    self.memory = [self._memory_from_record(item) for item in data]
                 logger.info(f"📚 Naloženih {len(self.memory)} spominov")
             except Exception as e:
                 logger.error(f"❌ Napaka pri nalaganju spominov: {e}")
     
     def _save_memory(self):
         """Shrani spomine v datoteko"""
+        if self.memory_store is not None:
+            # Dnevnik je že zapisan ob vsakem vnosu; tu le poskrbimo, da je na disku
+            self.memory_store.flush()
+            return
+        
         memory_file = f"{self.data_dir}/memory/long_term.json"
         try:
-            data = []
-            for memory in self.memory:
-                memory_dict = asdict(memory)
-                memory_dict['timestamp'] = memory.timestamp.isoformat()
-                data.append(memory_dict)
+            data = [self._memory_to_record(memory) for memory in self.memory]
             
             with open(memory_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
@@ -151,8 +186,10 @@ class OmniCore:
             metadata=metadata
         )
         
+        # Pri dnevniku append() že zapiše vnos; JSON način prepiše celotno datoteko
         self.memory.append(memory)
-        self._save_memory()
+        if self.memory_store is None:
+            self._save_memory()
         logger.info(f"🧠 Dodan spomin: {content[:50]}...")
     
     def search_memory(self, query: str, category: Optional[str] = None) -> List[OmniMemory]:
@@ -183,6 +220,7 @@ class OmniCore:
             )
             
             self.modules[module_name] = module
+            self.module_instances[module_name] = module_instance
             logger.info(f"📦 Registriran modul: {module_name}")
             
             # Dodaj v spomin
@@ -241,7 +279,6 @@ Uporabnik: {user_prompt}
 """
         
         try:
-            import time
             start_time = time.time()
             
             response = self.client.chat.completions.create(
@@ -292,53 +329,140 @@ Uporabnik: {user_prompt}
             metadata={"timestamp": datetime.now().isoformat()}
         )
     
-    def run(self, input_text: str) -> Dict[str, Any]:
+    # Nadomestne vrednosti faz, ki ne končajo v roku
+    STAGE_TIMEOUT_RESULTS = {
+        "ai": {"ai_response": "⏱️ AI ni odgovoril v roku", "execution_time": None},
+        "module": "⏱️ Timeout: modul ni odgovoril v roku",
+        "search": [{"error": "Bing Search ni odgovoril v roku"}],
+    }
+    
+    def _run_module(self, module_name: str, input_text: str) -> Any:
+        # Instanca modula (register_module), sicer opisnik OmniModule
+        module = self.module_instances.get(module_name, self.modules.get(module_name))
+        try:
+            # Poskusi poklicati run metodo modula
+            if hasattr(module, "run"):
+                return module.run(input_text)
+            return f"{module_name} modul pripravljen"
+        except Exception as e:
+            return f"❌ Error: {str(e)}"
+    
+    def _run_search(self, input_text: str) -> List[Dict[str, Any]]:
+        try:
+            if 'search_bing' in self.integrations:
+                search_results = self.integrations['search_bing'].search(input_text, count=5)
+                logger.info(f"🔍 Bing Search: {len(search_results)} rezultatov")
+                return search_results
+            return [{"info": "Bing Search integracija ni registrirana"}]
+        except Exception as e:
+            logger.error(f"❌ Bing Search napaka: {e}")
+            return [{"error": f"Bing Search napaka: {str(e)}"}]
+    
+    def _run_stages(self, input_text: str) -> Dict[str, Any]:
+        """Faze run() kot {ime_faze: (funkcija, argumenti)}"""
+        stages = {"ai": (self.ask_ai, (input_text,))}
+        for module_name in self.modules:
+            stages[f"module:{module_name}"] = (self._run_module, (module_name, input_text))
+        stages["search"] = (self._run_search, (input_text,))
+        return stages
+    
+    def _run_stages_sequential(self, stages: Dict[str, Any]):
+        outputs, timings = {}, {}
+        for stage, (func, args) in stages.items():
+            stage_start = time.perf_counter()
+            outputs[stage] = func(*args)
+            timings[stage] = {"status": "ok", "duration": round(time.perf_counter() - stage_start, 4)}
+        return outputs, timings
+    
+    def _run_stages_concurrent(self, stages: Dict[str, Any], deadline: Optional[float],
+                               stage_deadlines: Dict[str, float]):
+        """
+        Vse faze se zaženejo hkrati v bazenu niti. Faza, ki ne konča do svojega roka
+        (sekunde od začetka; ``stage_deadlines`` po imenu faze ali "module" za vse module,
+        sicer ``deadline``), dobi nadomestno vrednost, rezultat pa se vrne brez nje.
+        """
+        if self._stage_executor is None:
+            self._stage_executor = ThreadPoolExecutor(max_workers=self.stage_workers,
+                                                      thread_name_prefix="omni-stage")
+        start = time.perf_counter()
+        pending = {}
+        limits = {}
+        submitted_at = {}
+        for stage, (func, args) in stages.items():
+            future = self._stage_executor.submit(func, *args)
+            pending[future] = stage
+            submitted_at[stage] = time.perf_counter()
+            limit = stage_deadlines.get(stage, stage_deadlines.get(stage.split(":", 1)[0], deadline))
+            limits[stage] = None if limit is None else start + limit
+        
+        outputs, timings = {}, {}
+        while pending:
+            now = time.perf_counter()
+            open_limits = [limits[stage] for stage in pending.values() if limits[stage] is not None]
+            timeout = max(0.0, min(open_limits) - now) if open_limits else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            finished = time.perf_counter()
+            for future in done:
+                stage = pending.pop(future)
+                try:
+                    outputs[stage] = future.result()
+                    status = "ok"
+                except Exception as e:
+                    outputs[stage] = {"error": str(e)}
+                    status = "error"
+                timings[stage] = {"status": status, "duration": round(finished - submitted_at[stage], 4)}
+            
+            # Potekli roki: faza teče naprej v ozadju, njen rezultat se ne čaka
+            for future, stage in list(pending.items()):
+                if limits[stage] is not None and finished >= limits[stage]:
+                    del pending[future]
+                    future.cancel()
+                    outputs[stage] = self.STAGE_TIMEOUT_RESULTS[stage.split(":", 1)[0]]
+                    timings[stage] = {"status": "timeout", "duration": round(finished - submitted_at[stage], 4)}
+                    logger.warning(f"⏱️ Faza {stage} ni končala v roku")
+        return outputs, timings
+    
+    def run(self, input_text: str, mode: str = "sequential", deadline: Optional[float] = None,
+            stage_deadlines: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
         """
         Glavna funkcija za izvajanje Omni zahtev
         Vključuje AI analizo, module in Bing Search integracijo
+        
+        mode="concurrent" izvede AI klic, module in iskanje hkrati; ``deadline`` in
+        ``stage_deadlines`` (sekunde) omejita čakanje, rezultat je lahko delni.
+        
+        V obeh načinih se kliče ``run`` registrirane instance modula. Prej se je
+        klical le opisnik OmniModule, ki metode ``run`` nima, zato je bil izhod
+        modula vedno "<ime> modul pripravljen". Moduli brez ``run`` ga vračajo še naprej.
         """
-        import time
         start_time = time.time()
         
         # Shrani v spomin
         self.remember(input_text)
         
-        # Pridobi AI analizo
-        ai_result = self.ask_ai(input_text)
-        
-        # Asinhrono izvajanje modulov
-        modules_output = {}
-        for module_name, module in self.modules.items():
-            try:
-                # Poskusi poklicati run metodo modula
-                if hasattr(module, "run"):
-                    modules_output[module_name] = module.run(input_text)
-                else:
-                    modules_output[module_name] = f"{module_name} modul pripravljen"
-            except Exception as e:
-                modules_output[module_name] = f"❌ Error: {str(e)}"
+        stages = self._run_stages(input_text)
+        if mode == "concurrent":
+            outputs, timings = self._run_stages_concurrent(stages, deadline, stage_deadlines or {})
+        else:
+            outputs, timings = self._run_stages_sequential(stages)
         
-        # Bing Search integracija
-        search_results = []
-        try:
-            if 'search_bing' in self.integrations:
-                search_results = self.integrations['search_bing'].search(input_text, count=5)
-                logger.info(f"🔍 Bing Search: {len(search_results)} rezultatov")
-            else:
-                search_results = [{"info": "Bing Search integracija ni registrirana"}]
-        except Exception as e:
-            search_results = [{"error": f"Bing Search napaka: {str(e)}"}]
-            logger.error(f"❌ Bing Search napaka: {e}")
+        modules_output = {
+            stage.split(":", 1)[1]: output for stage, output in outputs.items() if stage.startswith("module:")
+        }
         
         total_time = round(time.time() - start_time, 2)
         
         result = {
             "input": input_text,
-            "ai_response": ai_result["ai_response"],
+            "ai_response": outputs["ai"].get("ai_response", f"❌ AI error: {outputs['ai'].get('error')}"),
             "modules": modules_output,
-            "search_results": search_results,
+            "search_results": outputs["search"],
             "memory_length": len(self.memory),
-            "execution_time": total_time
+            "execution_time": total_time,
+            "mode": mode,
+            "partial": any(timing["status"] == "timeout" for timing in timings.values()),
+            "timings": timings
         }
         
         # Shrani rezultat za učenje
@@ -413,7 +537,11 @@ Uporabnik: {user_prompt}
     def shutdown(self):
         """Varno zaustavitev sistema"""
         logger.info("🛑 Zaustavitev OmniCore...")
+        if self._stage_executor is not None:
+            self._stage_executor.shutdown(wait=False)
         self._save_memory()
+        if self.memory_store is not None:
+            self.memory_store.close()
         logger.info("✅ OmniCore zaustavljen")
 
 if __name__ == "__main__":
@@ -5,11 +5,13 @@ Sistem za samo-učenje in evolucijo
 
 import json
 import os
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import statistics
 
+from .pattern_index import PatternIndex
+
 @dataclass
 class LearningPattern:
     """Vzorec učenja"""
@@ -45,6 +47,10 @@ class OmniAdaptiveLearning:
         self.data_dir = data_dir
         self.learning_dir = os.path.join(data_dir, "learning")
         self.patterns: Dict[str, LearningPattern] = {}
+        self.pattern_index = PatternIndex()
+        self._dirty_patterns: Set[str] = set()  # Vzorci, ki še niso zapisani v dnevnik
+        self._pattern_log_entries = 0
+        self.pattern_compact_after = 1000  # Najmanjše število zapisov v dnevniku pred kompaktiranjem
         self.performance_history: List[PerformanceMetric] = []
         self.user_preferences: Dict[str, Dict[str, Any]] = {}
         
@@ -60,44 +66,103 @@ class OmniAdaptiveLearning:
         os.makedirs(os.path.join(self.learning_dir, "performance"), exist_ok=True)
         os.makedirs(os.path.join(self.learning_dir, "users"), exist_ok=True)
     
+    @property
+    def _patterns_file(self) -> str:
+        return os.path.join(self.learning_dir, "patterns", "learned_patterns.json")
+    
+    @property
+    def _patterns_log_file(self) -> str:
+        return os.path.join(self.learning_dir, "patterns", "learned_patterns.log.jsonl")
+    
+    @staticmethod
+    def _pattern_from_dict(pattern_data: Dict[str, Any]) -> LearningPattern:
+        return LearningPattern(
+            id=pattern_data['id'],
+            pattern_type=pattern_data['pattern_type'],
+            input_data=pattern_data['input_data'],
+            output_data=pattern_data['output_data'],
+            success_rate=pattern_data['success_rate'],
+            usage_count=pattern_data['usage_count'],
+            last_used=datetime.fromisoformat(pattern_data['last_used']),
+            confidence=pattern_data['confidence'],
+            metadata=pattern_data['metadata']
+        )
+    
+    @staticmethod
+    def _pattern_to_dict(pattern: LearningPattern) -> Dict[str, Any]:
+        pattern_dict = asdict(pattern)
+        pattern_dict['last_used'] = pattern.last_used.isoformat()
+        return pattern_dict
+    
     def _load_patterns(self):
-        """Naloži naučene vzorce"""
-        patterns_file = os.path.join(self.learning_dir, "patterns", "learned_patterns.json")
+        """Naloži naučene vzorce (posnetek + dnevnik sprememb)"""
+        patterns_file = self._patterns_file
         if os.path.exists(patterns_file):
             try:
                 with open(patterns_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     for pattern_data in data:
-                        pattern = LearningPattern(
-                            id=pattern_data['id'],
-                            pattern_type=pattern_data['pattern_type'],
-                            input_data=pattern_data['input_data'],
-                            output_data=pattern_data['output_data'],
-                            success_rate=pattern_data['success_rate'],
-                            usage_count=pattern_data['usage_count'],
-                            last_used=datetime.fromisoformat(pattern_data['last_used']),
-                            confidence=pattern_data['confidence'],
-                            metadata=pattern_data['metadata']
-                        )
+                        pattern = self._pattern_from_dict(pattern_data)
                         self.patterns[pattern.id] = pattern
             except Exception as e:
                 print(f"❌ Napaka pri nalaganju vzorcev: {e}")
+        
+        # Spremembe po zadnjem posnetku; zadnji zapis za ID velja
+        log_file = self._patterns_log_file
+        if os.path.exists(log_file):
+            try:
+                with open(log_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            pattern = self._pattern_from_dict(json.loads(line))
+                        except ValueError:
+                            continue  # Nedokončana zadnja vrstica
+                        self.patterns[pattern.id] = pattern
+                        self._pattern_log_entries += 1
+            except Exception as e:
+                print(f"❌ Napaka pri nalaganju dnevnika vzorcev: {e}")
+        
+        self.pattern_index.add_many(
+            (pattern.id, pattern.input_data) for pattern in self.patterns.values()
+        )
+    
+    def _mark_dirty(self, pattern: LearningPattern):
+        self._dirty_patterns.add(pattern.id)
     
     def _save_patterns(self):
-        """Shrani naučene vzorce"""
-        patterns_file = os.path.join(self.learning_dir, "patterns", "learned_patterns.json")
+        """Shrani spremenjene vzorce (dopiše jih v dnevnik, občasno kompaktira)"""
+        if not self._dirty_patterns:
+            return
         try:
-            data = []
-            for pattern in self.patterns.values():
-                pattern_dict = asdict(pattern)
-                pattern_dict['last_used'] = pattern.last_used.isoformat()
-                data.append(pattern_dict)
+            lines = [
+                json.dumps(self._pattern_to_dict(self.patterns[pattern_id]), ensure_ascii=False) + "\n"
+                for pattern_id in self._dirty_patterns if pattern_id in self.patterns
+            ]
+            with open(self._patterns_log_file, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+            self._pattern_log_entries += len(lines)
+            self._dirty_patterns.clear()
             
-            with open(patterns_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if self._pattern_log_entries > max(self.pattern_compact_after, len(self.patterns)):
+                self._compact_patterns()
         except Exception as e:
             print(f"❌ Napaka pri shranjevanju vzorcev: {e}")
     
+    def _compact_patterns(self):
+        """Prepiši posnetek vseh vzorcev in izprazni dnevnik"""
+        try:
+            data = [self._pattern_to_dict(pattern) for pattern in self.patterns.values()]
+            tmp_file = self._patterns_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self._patterns_file)
+            open(self._patterns_log_file, 'w').close()
+            self._pattern_log_entries = 0
+        except Exception as e:
+            print(f"❌ Napaka pri kompaktiranju vzorcev: {e}")
+    
     def _load_performance_history(self):
         """Naloži zgodovino uspešnosti"""
         performance_file = os.path.join(self.learning_dir, "performance", "metrics.json")
@@ -175,6 +240,8 @@ class OmniAdaptiveLearning:
             )
             
             self.patterns[pattern_id] = pattern
+            self.pattern_index.add(pattern_id, pattern.input_data)
+            self._mark_dirty(pattern)
             self._save_patterns()
             
             # Posodobi uporabniške preference
@@ -232,16 +299,15 @@ class OmniAdaptiveLearning:
         """Poišči podobne vzorce"""
         similar_patterns = []
         
-        for pattern in self.patterns.values():
+        # Indeks vrne le vzorce s podobnostjo nad pragom (enako kot _calculate_similarity)
+        for pattern_id, similarity_score in self.pattern_index.query(input_data, threshold=0.3):
+            pattern = self.patterns[pattern_id]
             if pattern_type and pattern.pattern_type != pattern_type:
                 continue
             
-            # Preprosta podobnost na podlagi ključnih besed
-            similarity_score = self._calculate_similarity(input_data, pattern.input_data)
-            
-            if similarity_score > 0.3:  # Prag podobnosti
-                pattern.confidence = similarity_score * pattern.success_rate
-                similar_patterns.append(pattern)
+            pattern.confidence = similarity_score * pattern.success_rate
+            self._mark_dirty(pattern)
+            similar_patterns.append(pattern)
         
         # Razvrsti po zaupljivosti
         similar_patterns.sort(key=lambda x: x.confidence, reverse=True)
@@ -293,6 +359,7 @@ class OmniAdaptiveLearning:
         # Posodobi statistike uporabe
         best_pattern.usage_count += 1
         best_pattern.last_used = datetime.now()
+        self._mark_dirty(best_pattern)
         self._save_patterns()
         
         return {
@@ -366,12 +433,14 @@ class OmniAdaptiveLearning:
             if pattern.usage_count > 10:
                 # Vzorci z več uporabami so bolj zanesljivi
                 pattern.confidence = min(1.0, pattern.confidence + 0.1)
+                self._mark_dirty(pattern)
                 optimized_count += 1
             
             # Zmanjšaj zaupljivost starih vzorcev
             days_old = (datetime.now() - pattern.last_used).days
             if days_old > 30:
                 pattern.confidence = max(0.1, pattern.confidence - 0.05)
+                self._mark_dirty(pattern)
                 optimized_count += 1
         
         self._save_patterns()
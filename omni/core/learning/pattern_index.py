@@ -0,0 +1,117 @@
+"""
+🗂️ OMNI PATTERN INDEX
+Invertni indeks besed za hitro iskanje podobnih vzorcev
+
+Podobnost je enaka kot v ``OmniAdaptiveLearning._calculate_similarity`` (Jaccard nad
+besedami iz ``str(data).lower()``), le da se podpisi izračunajo enkrat ob dodajanju.
+Kandidati se izberejo s filtriranjem predpone in velikosti, zato rezultat ostane
+natančen, prebere pa se le majhen del zbirke.
+"""
+
+import math
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple
+
+
+def tokenize(data: Any) -> FrozenSet[str]:
+    """Podpis vzorca: množica besed iz tekstovne oblike podatkov"""
+    return frozenset(str(data).lower().split())
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+class PatternIndex:
+    """
+    Invertni indeks: beseda -> (velikost podpisa -> ID-ji vzorcev).
+
+    Vzorec s podobnostjo nad pragom ``t`` mora deliti vsaj eno od
+    ``|q| - floor(t*|q|)`` najredkejših besed poizvedbe (filtriranje predpone).
+    Za pogoste besede v predponi (npr. ``{'query':``) se preberejo samo vzorci
+    dovolj majhne velikosti, da bi lahko prag dosegli brez redkih besed.
+    """
+
+    def __init__(self, rare_limit: int = 1000):
+        self.rare_limit = rare_limit
+        self.signatures: Dict[str, FrozenSet[str]] = {}
+        self.postings: Dict[str, Dict[int, Set[str]]] = {}
+        self.document_frequency: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, pattern_id: str) -> bool:
+        return pattern_id in self.signatures
+
+    def add(self, pattern_id: str, input_data: Any):
+        """Dodaj ali posodobi vzorec"""
+        if pattern_id in self.signatures:
+            self.remove(pattern_id)
+        signature = tokenize(input_data)
+        size = len(signature)
+        self.signatures[pattern_id] = signature
+        for token in signature:
+            self.postings.setdefault(token, {}).setdefault(size, set()).add(pattern_id)
+            self.document_frequency[token] = self.document_frequency.get(token, 0) + 1
+
+    def add_many(self, items: Iterable[Tuple[str, Any]]):
+        for pattern_id, input_data in items:
+            self.add(pattern_id, input_data)
+
+    def remove(self, pattern_id: str):
+        signature = self.signatures.pop(pattern_id, None)
+        if signature is None:
+            return
+        size = len(signature)
+        for token in signature:
+            buckets = self.postings[token]
+            buckets[size].discard(pattern_id)
+            if not buckets[size]:
+                del buckets[size]
+            self.document_frequency[token] -= 1
+            if not self.document_frequency[token]:
+                del self.postings[token]
+                del self.document_frequency[token]
+
+    def candidates(self, signature: FrozenSet[str], threshold: float) -> Set[str]:
+        """ID-ji vzorcev, ki lahko presežejo prag podobnosti"""
+        size = len(signature)
+        # Jaccard > t zahteva presek > t*|q|, torej vsaj floor(t*|q|) + 1 skupnih besed,
+        # zato mora biti vsaj ena skupna beseda med |q| - floor(t*|q|) najredkejšimi.
+        prefix_length = size - math.floor(threshold * size)
+        ordered = sorted(signature, key=lambda token: self.document_frequency.get(token, 0))
+        prefix = ordered[:prefix_length]
+        rare = [token for token in prefix if self.document_frequency.get(token, 0) <= self.rare_limit]
+        frequent = [token for token in prefix if self.document_frequency.get(token, 0) > self.rare_limit]
+
+        result: Set[str] = set()
+        for token in rare:
+            for ids in self.postings.get(token, {}).values():
+                result |= ids
+
+        if frequent:
+            # Brez redkih besed je presek največ |q| - |rare|, kar omeji velikost vzorca:
+            # I / (|q| + |p| - I) > t  =>  |p| < I * (1 + t) / t - |q|
+            max_shared = size - len(rare)
+            max_size = max_shared * (1 + threshold) / threshold - size
+            min_size = threshold * size
+            for token in frequent:
+                for pattern_size, ids in self.postings[token].items():
+                    if min_size < pattern_size < max_size:
+                        result |= ids
+        return result
+
+    def query(self, input_data: Any, threshold: float = 0.3) -> List[Tuple[str, float]]:
+        """Vrni (id, podobnost) za vse vzorce s podobnostjo nad pragom"""
+        signature = tokenize(input_data)
+        if not signature:
+            return []
+        hits = []
+        for pattern_id in self.candidates(signature, threshold):
+            score = jaccard(signature, self.signatures[pattern_id])
+            if score > threshold:
+                hits.append((pattern_id, score))
+        return hits
@@ -0,0 +1,391 @@
+"""
+📒 OMNI MEMORY JOURNAL
+Append-only dnevnik spominov s kompaktiranjem v ozadju
+
+Zapisi:
+- ``long_term.journal.jsonl``   - tekoči dnevnik (en spomin na vrstico, samo dodajanje)
+- ``long_term.snapshot.jsonl``  - kompaktiran posnetek (JSONL, bere se prek mmap)
+- ``long_term.snapshot.idx``    - odmiki vrstic v posnetku (uint64)
+- ``long_term.manifest.json``   - potrjena dolžina posnetka in število zapisov
+
+Obstoječa ``long_term.json`` datoteka se ob prvem odprtju enkrat pretvori v posnetek.
+"""
+
+import os
+import json
+import mmap
+import threading
+import logging
+from array import array
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = "long_term.journal.jsonl"
+PENDING_FILE = "long_term.journal.pending.jsonl"
+SNAPSHOT_FILE = "long_term.snapshot.jsonl"
+INDEX_FILE = "long_term.snapshot.idx"
+MANIFEST_FILE = "long_term.manifest.json"
+LEGACY_FILE = "long_term.json"
+
+
+class LazyMemoryList(Sequence):
+    """
+    Seznam spominov, ki dekodira zapise iz posnetka šele ob dostopu.
+    Novi spomini iz tekoče seje ostanejo kot objekti, dokler jih kompaktiranje ne premakne v posnetek.
+    """
+
+    def __init__(self, store: "JournaledMemoryStore"):
+        self._store = store
+        self._tail: List[Any] = []
+
+    def __len__(self) -> int:
+        return self._store.snapshot_count + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        with self._store._lock:
+            size = len(self)
+            if index < 0:
+                index += size
+            if not 0 <= index < size:
+                raise IndexError("memory index out of range")
+            snapshot_count = self._store.snapshot_count
+            if index >= snapshot_count:
+                return self._tail[index - snapshot_count]
+        return self._store.read_snapshot_record(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, memory: Any):
+        """Dodaj spomin in ga zapiši v dnevnik"""
+        with self._store._lock:
+            self._store.append(memory)
+            self._tail.append(memory)
+
+    def _promote(self, count: int):
+        """Odstrani prvih ``count`` objektov iz repa, ker so zdaj v posnetku"""
+        del self._tail[:count]
+
+
+class JournaledMemoryStore:
+    """
+    Shramba spominov z append-only dnevnikom:
+    - vsak vnos je en ``write`` v dnevnik (O(1) ne glede na velikost spomina)
+    - ko dnevnik preseže ``compact_threshold`` bajtov, se zamenja in kompaktira v ozadju
+    - ob zagonu se posnetek mapira v pomnilnik, zapisi se dekodirajo leno
+    """
+
+    def __init__(self, memory_dir: str,
+                 to_record: Callable[[Any], Dict[str, Any]],
+                 from_record: Callable[[Dict[str, Any]], Any],
+                 compact_threshold: int = 4 * 1024 * 1024,
+                 fsync: bool = False):
+        self.memory_dir = memory_dir
+        self.to_record = to_record
+        self.from_record = from_record
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+
+        self.journal_path = os.path.join(memory_dir, JOURNAL_FILE)
+        self.pending_path = os.path.join(memory_dir, PENDING_FILE)
+        self.snapshot_path = os.path.join(memory_dir, SNAPSHOT_FILE)
+        self.index_path = os.path.join(memory_dir, INDEX_FILE)
+        self.manifest_path = os.path.join(memory_dir, MANIFEST_FILE)
+        self.legacy_path = os.path.join(memory_dir, LEGACY_FILE)
+
+        self._lock = threading.RLock()
+        self._compact_event = threading.Event()
+        self._compact_done = threading.Condition(self._lock)
+        self._compacting = False
+        self._closed = False
+
+        self._offsets = array('Q', [0])
+        self._snapshot_file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._journal = None
+        self._journal_bytes = 0
+        self._pending_records = 0
+
+        os.makedirs(memory_dir, exist_ok=True)
+        self.memories = LazyMemoryList(self)
+        self._recover()
+        self._open_journal()
+
+        self._worker = threading.Thread(target=self._compaction_loop,
+                                        name="omni-memory-compactor", daemon=True)
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # Zagon in obnova
+    # ------------------------------------------------------------------
+
+    def _recover(self):
+        """Pripravi posnetek: migracija, popravilo nedokončanega kompaktiranja, nalaganje indeksa"""
+        if not os.path.exists(self.manifest_path):
+            self._migrate_legacy()
+
+        manifest = self._read_manifest()
+        committed_bytes = manifest.get("snapshot_bytes", 0)
+        committed_count = manifest.get("record_count", 0)
+
+        # Nedokončano kompaktiranje: odreži nepotrjen del posnetka
+        if os.path.exists(self.snapshot_path) and os.path.getsize(self.snapshot_path) > committed_bytes:
+            with open(self.snapshot_path, 'r+b') as f:
+                f.truncate(committed_bytes)
+        elif not os.path.exists(self.snapshot_path):
+            open(self.snapshot_path, 'wb').close()
+            committed_bytes, committed_count = 0, 0
+
+        self._load_index(committed_bytes, committed_count)
+        self._remap()
+
+        # Dnevnika iz prejšnje seje se vlijeta v posnetek še pred prvim vnosom
+        for path in (self.pending_path, self.journal_path):
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                self._merge_into_snapshot(path)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _migrate_legacy(self):
+        """Enkratna pretvorba obstoječe long_term.json datoteke v posnetek"""
+        records = []
+        if os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                    records = json.load(f)
+            except Exception as e:
+                logger.error(f"❌ Napaka pri branju {self.legacy_path}: {e}")
+                records = []
+
+        offsets = array('Q', [0])
+        with open(self.snapshot_path, 'wb') as f:
+            for record in records:
+                f.write(self._encode(record))
+                offsets.append(f.tell())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._write_index(offsets)
+        self._write_manifest(offsets[-1], len(offsets) - 1)
+        if records:
+            logger.info(f"📒 Pretvorjenih {len(records)} spominov v dnevniški format")
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, snapshot_bytes: int, record_count: int):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"snapshot_bytes": snapshot_bytes, "record_count": record_count,
+                       "updated": datetime.now().isoformat()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _write_index(self, offsets: array):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            offsets.tofile(f)
+        os.replace(tmp_path, self.index_path)
+
+    def _load_index(self, snapshot_bytes: int, record_count: int):
+        """Naloži odmike iz .idx datoteke; če ne ustrezajo manifestu, jih zgradi s pregledom posnetka"""
+        offsets = array('Q')
+        try:
+            with open(self.index_path, 'rb') as f:
+                offsets.frombytes(f.read())
+        except OSError:
+            offsets = array('Q')
+
+        if len(offsets) != record_count + 1 or offsets[-1] != snapshot_bytes:
+            offsets = self._scan_offsets(snapshot_bytes)
+            self._write_index(offsets)
+        self._offsets = offsets
+
+    def _scan_offsets(self, limit: int) -> array:
+        offsets = array('Q', [0])
+        if limit == 0:
+            return offsets
+        with open(self.snapshot_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find(b'\n', 0, limit)
+                while pos != -1:
+                    offsets.append(pos + 1)
+                    pos = mm.find(b'\n', pos + 1, limit)
+        return offsets
+
+    def _remap(self):
+        """Ponovno mapiraj posnetek po spremembi velikosti"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._snapshot_file is not None:
+            self._snapshot_file.close()
+        self._snapshot_file = open(self.snapshot_path, 'rb')
+        if self._offsets[-1] > 0:
+            self._mmap = mmap.mmap(self._snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _open_journal(self):
+        self._journal = open(self.journal_path, 'ab')
+        self._journal_bytes = self._journal.tell()
+
+    # ------------------------------------------------------------------
+    # Branje
+    # ------------------------------------------------------------------
+
+    @property
+    def snapshot_count(self) -> int:
+        return len(self._offsets) - 1
+
+    def read_snapshot_record(self, index: int) -> Any:
+        """Dekodiraj en zapis iz mapiranega posnetka"""
+        with self._lock:
+            start, end = self._offsets[index], self._offsets[index + 1]
+            raw = self._mmap[start:end]
+        return self.from_record(json.loads(raw))
+
+    # ------------------------------------------------------------------
+    # Pisanje
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+
+    def append(self, memory: Any):
+        """Zapiši en spomin na konec dnevnika"""
+        line = self._encode(self.to_record(memory))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Memory journal is closed")
+            self._journal.write(line)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._journal_bytes += len(line)
+            self._pending_records += 1
+            if self._journal_bytes >= self.compact_threshold and not self._compacting:
+                self._rotate_journal()
+
+    def _rotate_journal(self):
+        """Zamenjaj dnevnik z novim in sproži kompaktiranje (klicano pod ključavnico)"""
+        self._journal.close()
+        os.replace(self.journal_path, self.pending_path)
+        self._compacting = True
+        self._rotated_records = self._pending_records
+        self._pending_records = 0
+        self._open_journal()
+        self._compact_event.set()
+
+    def _merge_into_snapshot(self, journal_path: str) -> int:
+        """Pripni vsebino dnevnika na posnetek in potrdi novo dolžino v manifestu"""
+        with open(journal_path, 'rb') as src:
+            data = src.read()
+        # Nedokončana zadnja vrstica (npr. po padcu) se zavrže
+        cut = data.rfind(b'\n') + 1
+        data = data[:cut]
+        if not data:
+            return 0
+
+        base = self._offsets[-1]
+        new_offsets = array('Q')
+        pos = data.find(b'\n')
+        while pos != -1:
+            new_offsets.append(base + pos + 1)
+            pos = data.find(b'\n', pos + 1)
+
+        with open(self.snapshot_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with open(self.index_path, 'ab') as f:
+            new_offsets.tofile(f)
+
+        with self._lock:
+            self._offsets.extend(new_offsets)
+            self._write_manifest(self._offsets[-1], self.snapshot_count)
+            self._remap()
+            self.memories._promote(len(new_offsets))
+        return len(new_offsets)
+
+    def _compaction_loop(self):
+        while True:
+            self._compact_event.wait()
+            self._compact_event.clear()
+            if not os.path.exists(self.pending_path):
+                with self._lock:
+                    self._compacting = False
+                    self._compact_done.notify_all()
+                if self._closed:
+                    return
+                continue
+            try:
+                merged = self._merge_into_snapshot(self.pending_path)
+                os.remove(self.pending_path)
+                logger.info(f"📒 Kompaktiranih {merged} spominov v posnetek")
+            except Exception as e:
+                logger.error(f"❌ Napaka pri kompaktiranju spominov: {e}")
+            finally:
+                with self._lock:
+                    self._compacting = False
+                    self._compact_done.notify_all()
+            if self._closed:
+                return
+
+    def compact(self, wait: bool = True):
+        """Vsili kompaktiranje tekočega dnevnika"""
+        with self._lock:
+            while self._compacting:
+                self._compact_done.wait()
+            if self._journal_bytes == 0:
+                return
+            self._rotate_journal()
+            if wait:
+                while self._compacting:
+                    self._compact_done.wait()
+
+    def flush(self):
+        """Zagotovi, da je dnevnik na disku"""
+        with self._lock:
+            if self._journal and not self._journal.closed:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+
+    def close(self):
+        """Kompaktiraj preostanek dnevnika in sprosti vire"""
+        if self._closed:
+            return
+        self.compact(wait=True)
+        with self._lock:
+            self._closed = True
+            self._compact_event.set()
+            self._journal.close()
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if self._snapshot_file is not None:
+                self._snapshot_file.close()
+                self._snapshot_file = None
+        self._worker.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistike shrambe"""
+        with self._lock:
+            return {
+                "snapshot_records": self.snapshot_count,
+                "snapshot_bytes": self._offsets[-1],
+                "journal_bytes": self._journal_bytes,
+                "journal_records": self._pending_records,
+                "compacting": self._compacting
+            }
@@ -4,9 +4,11 @@ Upravljanje kratkoročnega in dolgoročnega spomina
 """
 
 import os
+import re
 import json
 import sqlite3
-from typing import Dict, List, Any, Optional
+import threading
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import hashlib
@@ -34,11 +36,17 @@ class OmniMemoryManager:
     - Pomembnostno razvrščanje
     """
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", embedder: Any = None):
         self.data_dir = data_dir
         self.db_path = os.path.join(data_dir, "memory", "memory.db")
         self.working_memory: List[MemoryItem] = []
         self.working_memory_limit = 20  # Maksimalno število elementov v kratkoročnem spominu
+        self.fts_enabled = False  # Nastavi se v _init_database, če SQLite podpira FTS5
+        self._local = threading.local()
+        self._pending_access: Dict[str, Any] = {}  # id -> (število dostopov, zadnji dostop)
+        self._access_lock = threading.Lock()
+        self.embedder = embedder  # Objekt z ``dim`` in ``embed(texts)``; privzeto HashingEmbedder
+        self._vector_store = None  # Ustvari se ob prvem semantičnem iskanju
         
         self._init_database()
         self._load_working_memory()
@@ -66,6 +74,52 @@ class OmniMemoryManager:
             conn.execute('CREATE INDEX IF NOT EXISTS idx_category ON memories(category)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_importance ON memories(importance)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON memories(timestamp)')
+            
+            self._init_fts(conn)
+    
+    def _init_fts(self, conn: sqlite3.Connection):
+        """Ustvari FTS5 indeks nad vsebino spominov in sprožilce, ki ga držijo usklajenega"""
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+            ).fetchone()
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+                    content,
+                    content='memories',
+                    content_rowid='rowid',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite brez FTS5 - ostane iskanje z LIKE
+            return
+        
+        conn.executescript('''
+            CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts(rowid, content) VALUES (new.rowid, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE OF content ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                INSERT INTO memories_fts(rowid, content) VALUES (new.rowid, new.content);
+            END;
+        ''')
+        
+        if not exists:
+            # Obstoječa baza: zgradi indeks iz že shranjenih spominov
+            conn.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+        self.fts_enabled = True
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Trajna povezava za iskalne poti (ena na nit)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            self._local.conn = conn
+        return conn
     
     def _generate_id(self, content: str) -> str:
         """Generiraj unikaten ID za spomin"""
@@ -127,15 +181,28 @@ class OmniMemoryManager:
         # Shrani v dolgoročni spomin
         self._save_to_long_term(memory_item)
         
+        if self._vector_store is not None:
+            self._vector_store.add([memory_id], self.embedder.embed([content]))
+        
         return memory_id
     
     def _save_to_long_term(self, memory_item: MemoryItem):
         """Shrani spomin v dolgoročno bazo"""
+        # UPSERT ohrani rowid, zato FTS sprožilci ostanejo usklajeni (REPLACE bi vrstico izbrisal)
         with sqlite3.connect(self.db_path) as conn:
             conn.execute('''
-                INSERT OR REPLACE INTO memories 
+                INSERT INTO memories 
                 (id, content, timestamp, category, importance, access_count, last_accessed, metadata, embedding)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    content = excluded.content,
+                    timestamp = excluded.timestamp,
+                    category = excluded.category,
+                    importance = excluded.importance,
+                    access_count = excluded.access_count,
+                    last_accessed = excluded.last_accessed,
+                    metadata = excluded.metadata,
+                    embedding = excluded.embedding
             ''', (
                 memory_item.id,
                 memory_item.content,
@@ -159,9 +226,73 @@ class OmniMemoryManager:
             # Obdrži samo najvažnejše
             self.working_memory = self.working_memory[:self.working_memory_limit]
     
+    @staticmethod
+    def _build_fts_query(query: str) -> Optional[str]:
+        """Pretvori uporabnikov niz v FTS5 poizvedbo: vsi izrazi (AND), vsak kot predpona"""
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return None
+        return ' AND '.join(f'"{term}"*' for term in terms)
+    
+    def _record_access(self, memory_item: MemoryItem):
+        """Posodobi statistiko dostopa v pomnilniku in jo uvrsti v čakalno vrsto za zapis"""
+        now = datetime.now()
+        memory_item.access_count += 1
+        memory_item.last_accessed = now
+        with self._access_lock:
+            count, _ = self._pending_access.get(memory_item.id, (0, now))
+            self._pending_access[memory_item.id] = (count + 1, now)
+    
+    def flush_access_stats(self) -> int:
+        """Zapiši zbrane statistike dostopa v eni transakciji"""
+        with self._access_lock:
+            pending, self._pending_access = self._pending_access, {}
+        if not pending:
+            return 0
+        
+        conn = self._get_connection()
+        with conn:
+            conn.executemany('''
+                UPDATE memories 
+                SET access_count = access_count + ?, last_accessed = ? 
+                WHERE id = ?
+            ''', [(count, last.isoformat(), memory_id) for memory_id, (count, last) in pending.items()])
+        return len(pending)
+    
     def search_memory(self, query: str, category: Optional[str] = None, 
                      limit: int = 10) -> List[MemoryItem]:
         """Poišči spomine po vsebini"""
+        fts_query = self._build_fts_query(query) if self.fts_enabled else None
+        if fts_query is None:
+            return self._search_memory_like(query, category, limit)
+        
+        # Rangirano iskanje prek FTS5 (BM25), nato po pomembnosti
+        sql = '''
+            SELECT m.* FROM memories_fts 
+            JOIN memories m ON m.rowid = memories_fts.rowid 
+            WHERE memories_fts MATCH ? 
+        '''
+        params: List[Any] = [fts_query]
+        if category:
+            sql += ' AND m.category = ?'
+            params.append(category)
+        sql += ' ORDER BY bm25(memories_fts), m.importance DESC LIMIT ?'
+        params.append(limit)
+        
+        working = {memory.id: memory for memory in self.working_memory}
+        results = []
+        for row in self._get_connection().execute(sql, params).fetchall():
+            # Če je spomin v kratkoročnem spominu, vrni ta objekt
+            memory_item = working.get(row[0]) or self._row_to_memory_item(row)
+            self._record_access(memory_item)
+            results.append(memory_item)
+        
+        self.flush_access_stats()
+        return results
+    
+    def _search_memory_like(self, query: str, category: Optional[str] = None, 
+                            limit: int = 10) -> List[MemoryItem]:
+        """Iskanje s podnizom (LIKE), kadar FTS5 ni na voljo"""
         results = []
         query_lower = query.lower()
         
@@ -169,36 +300,32 @@ class OmniMemoryManager:
         for memory in self.working_memory:
             if query_lower in memory.content.lower():
                 if category is None or memory.category == category:
-                    memory.access_count += 1
-                    memory.last_accessed = datetime.now()
+                    self._record_access(memory)
                     results.append(memory)
         
         # Iskanje v dolgoročnem spominu
-        with sqlite3.connect(self.db_path) as conn:
-            sql = '''
-                SELECT * FROM memories 
-                WHERE content LIKE ? 
-            '''
-            params = [f'%{query}%']
-            
-            if category:
-                sql += ' AND category = ?'
-                params.append(category)
-            
-            sql += ' ORDER BY importance DESC, last_accessed DESC LIMIT ?'
-            params.append(limit)
-            
-            cursor = conn.execute(sql, params)
-            
-            for row in cursor.fetchall():
-                memory_item = self._row_to_memory_item(row)
-                # Preveri, če ni že v rezultatih
-                if not any(r.id == memory_item.id for r in results):
-                    # Posodobi statistike dostopa
-                    memory_item.access_count += 1
-                    memory_item.last_accessed = datetime.now()
-                    self._save_to_long_term(memory_item)
-                    results.append(memory_item)
+        sql = '''
+            SELECT * FROM memories 
+            WHERE content LIKE ? 
+        '''
+        params = [f'%{query}%']
+        
+        if category:
+            sql += ' AND category = ?'
+            params.append(category)
+        
+        sql += ' ORDER BY importance DESC, last_accessed DESC LIMIT ?'
+        params.append(limit)
+        
+        seen = {r.id for r in results}
+        for row in self._get_connection().execute(sql, params).fetchall():
+            memory_item = self._row_to_memory_item(row)
+            # Preveri, če ni že v rezultatih
+            if memory_item.id not in seen:
+                self._record_access(memory_item)
+                results.append(memory_item)
+        
+        self.flush_access_stats()
         
         # Razvrsti po pomembnosti
         results.sort(key=lambda x: (x.importance, x.access_count), reverse=True)
@@ -227,6 +354,94 @@ class OmniMemoryManager:
         
         return None
     
+    def _get_vector_store(self):
+        """Odpri vektorsko shrambo in dodaj manjkajoče spomine"""
+        if self._vector_store is None:
+            from .vectors import HashingEmbedder, VectorStore
+            
+            if self.embedder is None:
+                self.embedder = HashingEmbedder()
+            self._vector_store = VectorStore(os.path.dirname(self.db_path), self.embedder.dim)
+            self._sync_vector_store()
+        return self._vector_store
+    
+    def _sync_vector_store(self, batch_size: int = 1000):
+        """Vektoriziraj spomine, ki jih shramba še nima (obstoječa baza ali drug proces)"""
+        store = self._vector_store
+        batch: List[Tuple[str, str, Optional[List[float]]]] = []
+        
+        cursor = self._get_connection().execute('SELECT id, content, embedding FROM memories')
+        for memory_id, content, embedding in cursor:
+            if memory_id in store:
+                continue
+            # Obstoječ embedding iz JSON stolpca, če se ujema z dimenzijo
+            vector = json.loads(embedding) if embedding else None
+            if vector is not None and len(vector) != self.embedder.dim:
+                vector = None
+            batch.append((memory_id, content, vector))
+            if len(batch) >= batch_size:
+                self._add_vectors(batch)
+                batch = []
+        self._add_vectors(batch)
+    
+    def _add_vectors(self, batch: List[Tuple[str, str, Optional[List[float]]]]):
+        """Dodaj paket (id, vsebina, vektor ali None) v vektorsko shrambo"""
+        if not batch:
+            return
+        missing = [content for _, content, vector in batch if vector is None]
+        embedded = iter(self.embedder.embed(missing)) if missing else iter(())
+        rows = [vector if vector is not None else next(embedded) for _, _, vector in batch]
+        self._vector_store.add([memory_id for memory_id, _, _ in batch], rows)
+    
+    def _fetch_memories(self, memory_ids: List[str]) -> Dict[str, MemoryItem]:
+        """Naloži več spominov po ID-jih z eno poizvedbo"""
+        if not memory_ids:
+            return {}
+        placeholders = ','.join('?' * len(memory_ids))
+        cursor = self._get_connection().execute(
+            f'SELECT * FROM memories WHERE id IN ({placeholders})', memory_ids
+        )
+        return {row[0]: self._row_to_memory_item(row) for row in cursor.fetchall()}
+    
+    def _resolve_hits(self, hits: List[Tuple[str, float]], category: Optional[str],
+                      limit: int, min_score: float) -> List[Tuple[MemoryItem, float]]:
+        items = self._fetch_memories([memory_id for memory_id, _ in hits])
+        results = []
+        for memory_id, score in hits:
+            item = items.get(memory_id)
+            if item is None or score < min_score:
+                continue
+            if category is not None and item.category != category:
+                continue
+            results.append((item, round(score, 4)))
+            if len(results) >= limit:
+                break
+        return results
+    
+    def semantic_search_batch(self, queries: List[str], limit: int = 10,
+                              category: Optional[str] = None,
+                              min_score: float = 0.0) -> List[List[Tuple[MemoryItem, float]]]:
+        """Semantično iskanje za več poizvedb hkrati (kosinusna podobnost)"""
+        store = self._get_vector_store()
+        # Pri filtru kategorije vzamemo več kandidatov, ker se filtrira po iskanju
+        k = limit * 4 if category else limit
+        all_hits = store.search(self.embedder.embed(queries), k=k)
+        return [self._resolve_hits(hits, category, limit, min_score) for hits in all_hits]
+    
+    def semantic_search(self, query: str, limit: int = 10, category: Optional[str] = None,
+                        min_score: float = 0.0) -> List[Tuple[MemoryItem, float]]:
+        """Poišči pomensko sorodne spomine; vrne pare (spomin, podobnost)"""
+        return self.semantic_search_batch([query], limit, category, min_score)[0]
+    
+    def find_related_memories(self, memory_id: str, limit: int = 5) -> List[Tuple[MemoryItem, float]]:
+        """Vrni spomine, najbolj podobne podanemu spominu"""
+        store = self._get_vector_store()
+        vector = store.get_vector(memory_id)
+        if vector is None:
+            return []
+        hits = [hit for hit in store.search(vector, k=limit + 1)[0] if hit[0] != memory_id]
+        return self._resolve_hits(hits, None, limit, 0.0)
+    
     def get_memories_by_category(self, category: str, limit: int = 20) -> List[MemoryItem]:
         """Pridobi spomine po kategoriji"""
         results = []
@@ -273,13 +488,20 @@ class OmniMemoryManager:
         cutoff_date = datetime.now() - timedelta(days=days_old)
         
         with sqlite3.connect(self.db_path) as conn:
+            params = (cutoff_date.isoformat(), min_importance)
+            deleted_ids = [row[0] for row in conn.execute(
+                'SELECT id FROM memories WHERE timestamp < ? AND importance < ?', params
+            )]
             cursor = conn.execute('''
                 DELETE FROM memories 
                 WHERE timestamp < ? AND importance < ?
-            ''', (cutoff_date.isoformat(), min_importance))
+            ''', params)
             
             deleted_count = cursor.rowcount
         
+        if self._vector_store is not None and deleted_ids:
+            self._vector_store.remove(deleted_ids)
+        
         # Odstrani tudi iz kratkoročnega spomina
         self.working_memory = [
             m for m in self.working_memory 
@@ -0,0 +1,430 @@
+"""
+🧭 OMNI MEMORY VECTORS
+Vektorska shramba za semantično iskanje spominov
+
+- Vektorji so v float32 matriki, mapirani iz datoteke (np.memmap), ne kot JSON nizi
+- Iskanje je paketni kosinusni top-k; nad ``ivf_threshold`` vrsticami se uporabi IVF indeks
+- ``HashingEmbedder`` je lokalni embedder brez omrežja (razpršeni n-grami)
+"""
+
+import os
+import json
+import zlib
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class HashingEmbedder:
+    """
+    Lokalni embedder: besede in znakovni n-grami se razpršijo v vektor fiksne dolžine.
+    Deluje brez omrežja in brez modela; primeren za "sorodne spomine".
+    Vsak drug embedder mora imeti atribut ``dim`` in metodo ``embed(texts) -> ndarray``.
+    """
+
+    def __init__(self, dim: int = 256, ngram_sizes: Sequence[int] = (3, 4)):
+        self.dim = dim
+        self.ngram_sizes = tuple(ngram_sizes)
+
+    def _features(self, text: str) -> Iterable[str]:
+        words = re.findall(r'\w+', text.lower())
+        for word in words:
+            yield "w:" + word
+            padded = f"#{word}#"
+            for n in self.ngram_sizes:
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i + n]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Vrni L2-normirano matriko (len(texts), dim) tipa float32"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode('utf-8'))
+                # Predznak iz višjega bita zmanjša vpliv trkov
+                matrix[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return normalize(matrix)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2 normiranje po vrsticah (ničelne vrstice ostanejo ničelne)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorStore:
+    """
+    Shramba vektorjev na disku:
+    - ``<name>.f32``       - float32 matrika (capacity × dim), raste s podvajanjem
+    - ``<name>.ids``       - ID-ji vrstic, ena vrstica na ID (samo dodajanje)
+    - ``<name>.deleted``   - izbrisane vrstice, ena na vrstico (samo dodajanje)
+    - ``<name>.meta.json`` - dim, število vrstic
+
+    Ko izbrisane vrstice presežejo ``compact_ratio`` vseh, se matrika, ID-ji in
+    IVF seznami stisnejo, zato stroški iskanja ne rastejo z zgodovino brisanj.
+    """
+
+    def __init__(self, directory: str, dim: int, name: str = "embeddings",
+                 ivf_threshold: int = 50_000, nprobe: int = 8, chunk_rows: int = 65_536,
+                 compact_ratio: float = 0.2):
+        self.directory = directory
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.chunk_rows = chunk_rows
+        self.compact_ratio = compact_ratio
+
+        self.matrix_path = os.path.join(directory, f"{name}.f32")
+        self.ids_path = os.path.join(directory, f"{name}.ids")
+        self.deleted_path = os.path.join(directory, f"{name}.deleted")
+        self.meta_path = os.path.join(directory, f"{name}.meta.json")
+
+        self._lock = threading.RLock()
+        self.count = 0
+        self.capacity = 0
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.deleted: set = set()
+        self._dead = np.zeros(0, dtype=bool)  # Maska izbrisanih vrstic (dolžina = capacity)
+        self._matrix: Optional[np.memmap] = None
+
+        # IVF indeks (v pomnilniku, zgrajen leno)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._assign: Optional[np.ndarray] = None
+        self._ivf_built_at = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Nalaganje in rast
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("dim") != self.dim:
+                raise ValueError(f"Vector store dim {meta.get('dim')} != embedder dim {self.dim}")
+            if meta.get("compacting"):
+                self._finish_compaction(meta)
+            self.count = meta.get("count", 0)
+            self.ids = self._load_ids(self.count)
+            self.count = len(self.ids)
+            self.deleted = {row for row in self._load_deleted() if row < self.count}
+            legacy = {row for row in meta.get("deleted", []) if row < self.count} - self.deleted
+            if legacy:
+                # Starejše shrambe imajo izbrisane vrstice v meta.json
+                with open(self.deleted_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(f"{row}\n" for row in sorted(legacy)))
+                self.deleted |= legacy
+            self.row_of = {memory_id: row for row, memory_id in enumerate(self.ids)
+                           if row not in self.deleted}
+        for path in (self.matrix_path + ".tmp", self.ids_path + ".tmp"):
+            # Ostanki stiskanja, ki se ni začelo uveljavljati
+            if os.path.exists(path):
+                os.remove(path)
+
+        if os.path.exists(self.matrix_path):
+            self.capacity = os.path.getsize(self.matrix_path) // (4 * self.dim)
+        if self.capacity < max(self.count, 1):
+            self._grow(max(self.count, 1024))
+        else:
+            self._open_matrix()
+        self._dead = np.zeros(self.capacity, dtype=bool)
+        if self.deleted:
+            self._dead[sorted(self.deleted)] = True
+
+    def _load_deleted(self) -> set:
+        if not os.path.exists(self.deleted_path):
+            return set()
+        with open(self.deleted_path, 'r', encoding='utf-8') as f:
+            return {int(line) for line in f.read().split("\n")[:-1] if line.isdigit()}
+
+    def _load_ids(self, count: int) -> List[str]:
+        """
+        Preberi prvih ``count`` ID-jev. ID-ji se zapišejo pred metapodatki, zato po
+        prekinitvi med obojim v datoteki ostanejo odvečne vrstice; te se odrežejo,
+        da naslednja dodajanja ne zamaknejo preslikave vrstica -> ID.
+        """
+        if not os.path.exists(self.ids_path):
+            return []
+        with open(self.ids_path, 'rb') as f:
+            data = f.read()
+        # Zadnji element je nedokončana vrstica (ali prazen niz)
+        lines = data.split(b"\n")[:-1][:count]
+        ids = [line.decode('utf-8') for line in lines]
+        valid_size = sum(len(line) + 1 for line in lines)
+        if len(data) > valid_size:
+            with open(self.ids_path, 'r+b') as f:
+                f.truncate(valid_size)
+        return ids
+
+    def _open_matrix(self):
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r+',
+                                 shape=(self.capacity, self.dim))
+
+    def _grow(self, min_capacity: int):
+        new_capacity = max(min_capacity, self.capacity * 2, 1024)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.matrix_path, 'ab') as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self.capacity = new_capacity
+        self._open_matrix()
+        self._dead = np.concatenate([self._dead, np.zeros(new_capacity - len(self._dead), dtype=bool)])
+
+    def _save_meta(self, **extra):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"dim": self.dim, "count": self.count, **extra}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    # ------------------------------------------------------------------
+    # Pisanje
+    # ------------------------------------------------------------------
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        """Dodaj (ali zamenjaj) vektorje za podane ID-je"""
+        vectors = normalize(vectors)
+        with self._lock:
+            new_ids = []
+            new_rows = []
+            for memory_id, vector in zip(ids, vectors):
+                row = self.row_of.get(memory_id)
+                if row is not None:
+                    self._matrix[row] = vector
+                else:
+                    new_ids.append(memory_id)
+                    new_rows.append(vector)
+
+            if new_ids:
+                start = self.count
+                end = start + len(new_ids)
+                if end > self.capacity:
+                    self._grow(end)
+                self._matrix[start:end] = np.stack(new_rows)
+                with open(self.ids_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(f"{memory_id}\n" for memory_id in new_ids))
+                for offset, memory_id in enumerate(new_ids):
+                    self.row_of[memory_id] = start + offset
+                self.ids.extend(new_ids)
+                self.count = end
+                self._assign_to_ivf(start, end)
+
+            self._matrix.flush()
+            self._save_meta()
+
+    def remove(self, ids: Iterable[str]):
+        """Označi vektorje kot izbrisane; nad ``compact_ratio`` izbrisanih se shramba stisne"""
+        with self._lock:
+            rows = []
+            for memory_id in ids:
+                row = self.row_of.pop(memory_id, None)
+                if row is not None:
+                    rows.append(row)
+            if not rows:
+                return
+            self.deleted.update(rows)
+            self._dead[rows] = True
+            with open(self.deleted_path, 'a', encoding='utf-8') as f:
+                f.write("".join(f"{row}\n" for row in rows))
+            if len(self.deleted) > self.compact_ratio * self.count:
+                self.compact()
+
+    def compact(self):
+        """
+        Odstrani izbrisane vrstice iz matrike, ID-jev in IVF seznamov
+
+        Nova matrika in ID-ji se zapišejo v .tmp datoteki, meta z oznako
+        ``compacting`` pa določi, da se ob prekinitvi zamenjava dokonča pri nalaganju.
+        """
+        with self._lock:
+            if not self.deleted:
+                return
+            live = np.flatnonzero(~self._dead[:self.count])
+            new_count = len(live)
+            new_capacity = max(1024, new_count)
+
+            matrix_tmp = self.matrix_path + ".tmp"
+            with open(matrix_tmp, 'wb') as f:
+                f.truncate(new_capacity * self.dim * 4)
+            target = np.memmap(matrix_tmp, dtype=np.float32, mode='r+', shape=(new_capacity, self.dim))
+            for start in range(0, new_count, self.chunk_rows):
+                rows = live[start:start + self.chunk_rows]
+                target[start:start + len(rows)] = self._matrix[rows]
+            target.flush()
+            del target
+
+            new_ids = [self.ids[row] for row in live]
+            with open(self.ids_path + ".tmp", 'w', encoding='utf-8') as f:
+                f.write("".join(f"{memory_id}\n" for memory_id in new_ids))
+
+            self._matrix.flush()
+            self._matrix = None
+            self.count = new_count
+            self._save_meta(compacting=True)
+            self._finish_compaction()
+
+            # IVF: stare vrstice preslikaj v nove, izbrisane izpadejo
+            if self._centroids is not None:
+                new_row = np.full(len(self._dead), -1, dtype=np.int64)
+                new_row[live] = np.arange(new_count)
+                self._lists = [new_row[rows][new_row[rows] >= 0] for rows in self._lists]
+                self._assign = self._assign[live]
+                self._ivf_built_at = min(self._ivf_built_at, new_count)
+
+            self.ids = new_ids
+            self.row_of = {memory_id: row for row, memory_id in enumerate(new_ids)}
+            self.deleted = set()
+            self.capacity = new_capacity
+            self._dead = np.zeros(new_capacity, dtype=bool)
+            self._open_matrix()
+
+    def _finish_compaction(self, meta: Optional[dict] = None):
+        """Uveljavi stisnjeni datoteki (tudi po prekinitvi med stiskanjem)"""
+        for path in (self.matrix_path, self.ids_path):
+            if os.path.exists(path + ".tmp"):
+                os.replace(path + ".tmp", path)
+        with open(self.deleted_path, 'w', encoding='utf-8'):
+            pass
+        if meta is not None:
+            meta.pop("compacting", None)
+            meta.pop("deleted", None)
+            self.count = meta.get("count", 0)
+        self._save_meta()
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self.row_of
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def get_vector(self, memory_id: str) -> Optional[np.ndarray]:
+        row = self.row_of.get(memory_id)
+        return None if row is None else np.array(self._matrix[row])
+
+    # ------------------------------------------------------------------
+    # IVF indeks
+    # ------------------------------------------------------------------
+
+    def build_ivf(self, nlist: Optional[int] = None, iterations: int = 8, sample_size: int = 100_000):
+        """Zgradi IVF indeks s k-means nad vzorcem vrstic"""
+        with self._lock:
+            count = self.count
+            if count == 0:
+                return
+            nlist = nlist or max(1, int(np.sqrt(count)))
+            rng = np.random.default_rng(0)
+            sample_rows = rng.choice(count, size=min(sample_size, count), replace=False)
+            sample = np.asarray(self._matrix[np.sort(sample_rows)])
+            centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)].copy()
+
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(len(centroids)):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids = normalize(centroids)
+
+            self._centroids = centroids
+            self._assign = np.empty(0, dtype=np.int32)
+            self._ivf_built_at = count
+            self._assign_to_ivf(0, count)
+
+    def _assign_to_ivf(self, start: int, end: int):
+        """Dodeli vrstice [start, end) najbližjemu centroidu"""
+        if self._centroids is None or start >= end:
+            return
+        labels = []
+        for chunk_start in range(start, end, self.chunk_rows):
+            chunk = np.asarray(self._matrix[chunk_start:min(end, chunk_start + self.chunk_rows)])
+            labels.append(np.argmax(chunk @ self._centroids.T, axis=1).astype(np.int32))
+        labels = np.concatenate(labels)
+        self._assign = np.concatenate([self._assign[:start], labels])
+
+        rows = np.arange(start, end)
+        if start == 0:
+            order = np.argsort(labels, kind='stable')
+            bounds = np.searchsorted(labels[order], np.arange(len(self._centroids) + 1))
+            self._lists = [rows[order[bounds[c]:bounds[c + 1]]] for c in range(len(self._centroids))]
+            return
+        # Inkrementalno: nove vrstice se pripnejo le na prizadete sezname
+        for c in np.unique(labels):
+            self._lists[c] = np.concatenate([self._lists[c], rows[labels == c]])
+
+    def _ensure_ivf(self):
+        if self.count < self.ivf_threshold:
+            return False
+        # Ponovna gradnja, ko se zbirka podvoji (centroidi zastarajo)
+        if self._centroids is None or self.count >= 2 * self._ivf_built_at:
+            self.build_ivf()
+        return True
+
+    # ------------------------------------------------------------------
+    # Iskanje
+    # ------------------------------------------------------------------
+
+    def search(self, queries: np.ndarray, k: int = 10,
+               exact: bool = False) -> List[List[Tuple[str, float]]]:
+        """Paketni kosinusni top-k; vrne seznam (id, podobnost) za vsako poizvedbo"""
+        queries = normalize(queries)
+        with self._lock:
+            if self.count == 0:
+                return [[] for _ in range(len(queries))]
+            if not exact and self._ensure_ivf():
+                return [self._search_ivf(query, k) for query in queries]
+            return self._search_exact(queries, k)
+
+    def _top_k(self, scores: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        if len(scores) > k:
+            part = np.argpartition(-scores, k)[:k]
+        else:
+            part = np.arange(len(scores))
+        part = part[np.argsort(-scores[part])]
+        return [(int(rows[i]), float(scores[i])) for i in part]
+
+    def _live(self, hits: List[Tuple[int, float]], k: int) -> List[Tuple[str, float]]:
+        return [(self.ids[row], score) for row, score in hits if score != -np.inf][:k]
+
+    def _search_exact(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        fetch = min(k, self.count)
+        best: List[List[Tuple[int, float]]] = [[] for _ in range(len(queries))]
+        for start in range(0, self.count, self.chunk_rows):
+            end = min(self.count, start + self.chunk_rows)
+            block = np.asarray(self._matrix[start:end])
+            scores = queries @ block.T
+            # Izbrisane vrstice ne morejo priti v top-k
+            scores[:, self._dead[start:end]] = -np.inf
+            rows = np.arange(start, end)
+            for q in range(len(queries)):
+                merged = best[q] + self._top_k(scores[q], rows, fetch)
+                merged.sort(key=lambda hit: -hit[1])
+                best[q] = merged[:fetch]
+        return [self._live(hits, k) for hits in best]
+
+    def _search_ivf(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        centroid_scores = self._centroids @ query
+        probe = np.argsort(-centroid_scores)[:self.nprobe]
+        rows = np.concatenate([self._lists[c] for c in probe])
+        rows = rows[~self._dead[rows]]
+        if len(rows) == 0:
+            return []
+        rows.sort()
+        scores = np.asarray(self._matrix[rows]) @ query
+        return self._live(self._top_k(scores, rows, k), k)
+
+    def flush(self):
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._save_meta()
@@ -0,0 +1,35 @@
+"""
+🧪 OMNI STUB AI
+Lokalni nadomestek OpenAI klienta za teste in benchmarke brez omrežja
+
+Posnema del vmesnika ``openai.OpenAI``, ki ga uporablja ``OmniCore.ask_ai``:
+``client.chat.completions.create(model=..., messages=[...])``.
+"""
+
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+
+class _StubCompletions:
+    def __init__(self, owner: "StubAIClient"):
+        self._owner = owner
+
+    def create(self, model: str, messages: List[Dict[str, Any]], **kwargs) -> SimpleNamespace:
+        owner = self._owner
+        owner.calls += 1
+        if owner.latency:
+            time.sleep(owner.latency)
+        prompt = messages[-1]["content"] if messages else ""
+        content = owner.reply.format(model=model, prompt=prompt.strip()[-200:])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class StubAIClient:
+    """Odgovori po fiksni zakasnitvi ``latency`` (sekunde) z besedilom iz predloge ``reply``"""
+
+    def __init__(self, latency: float = 0.0, reply: str = "🧪 Stub odgovor ({model})"):
+        self.latency = latency
+        self.reply = reply
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_StubCompletions(self))
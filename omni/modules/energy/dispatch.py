@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚡ Omni Energy Dispatch
+======================
+
+Večurna razporeditev energetskih virov (24–168 ur) v enem izračunu:
+- napovedana poraba in obnovljiva proizvodnja
+- zmogljivosti in cene virov s časovno odvisnimi tarifami (ToU)
+- stanje napolnjenosti baterij (SoC)
+
+Nebaterijski viri se v vsaki uri razporedijo po vrstnem redu cen (merit order),
+zato je strošek ure odsekoma linearna funkcija preostale porabe. Baterije so
+združene v en navidezni hranilnik, katerega potek SoC se optimizira z dinamičnim
+programiranjem po diskretnih nivojih. Vsi prehodi SoC v uri se ovrednotijo
+hkrati z NumPy, zato je izračun neodvisen od števila virov in naprav.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+# Kazen za nepokrito porabo (EUR/kWh)
+UNSERVED_PENALTY_EUR_KWH = 10.0
+
+# Privzeti ToU faktorji cene omrežja po urah dneva:
+# noč 22–07 cenejša, jutranja (07–10) in večerna (17–22) konica dražja
+DEFAULT_TOU_FACTORS = np.array([0.75] * 7 + [1.5] * 3 + [1.0] * 7 + [1.5] * 5 + [0.75] * 2)
+
+
+def merit_order_curves(prices: np.ndarray, capacities: np.ndarray):
+    """
+    Vrstni red virov po ceni za vsako uro
+
+    Args:
+        prices: Cene virov po urah [viri, ure]
+        capacities: Zmogljivosti virov (kWh na uro) [viri]
+
+    Returns:
+        (order, sorted_caps, cum_caps, cum_cost), vse oblike [viri, ure]
+    """
+    order = np.argsort(prices, axis=0, kind="stable")
+    sorted_caps = capacities[order]
+    sorted_prices = np.take_along_axis(prices, order, axis=0)
+    cum_caps = np.cumsum(sorted_caps, axis=0)
+    cum_cost = np.cumsum(sorted_caps * sorted_prices, axis=0)
+    return order, sorted_caps, cum_caps, cum_cost
+
+
+def supply_cost(residual: np.ndarray, cum_caps: np.ndarray, cum_cost: np.ndarray,
+                unserved_penalty: float = UNSERVED_PENALTY_EUR_KWH) -> np.ndarray:
+    """Strošek pokritja preostale porabe v eni uri (vektorsko čez vse vrednosti residual)"""
+    total_capacity = cum_caps[-1] if len(cum_caps) else 0.0
+    served = np.clip(residual, 0.0, total_capacity)
+    cost = np.interp(served, np.concatenate(([0.0], cum_caps)), np.concatenate(([0.0], cum_cost)))
+    return cost + unserved_penalty * np.maximum(residual - served, 0.0)
+
+
+def solve_dispatch(demand_kwh, renewable_kwh, prices, capacities,
+                   battery_capacity_kwh: float = 0.0, battery_power_kw: float = 0.0,
+                   charge_efficiency: float = 0.95, discharge_efficiency: float = 0.95,
+                   initial_soc_kwh: float = 0.0, battery_cost_per_kwh: float = 0.0,
+                   soc_levels: int = 101,
+                   unserved_penalty: float = UNSERVED_PENALTY_EUR_KWH) -> Dict[str, np.ndarray]:
+    """
+    Optimalna razporeditev virov in baterije čez celoten horizont
+
+    Končni SoC ne sme biti nižji od začetnega, sicer bi optimizacija baterijo
+    na koncu horizonta izpraznila brez stroška.
+
+    Args:
+        demand_kwh: Napovedana poraba po urah [ure]
+        renewable_kwh: Obnovljiva proizvodnja po urah [ure] (brezplačna, presežek se lahko shrani)
+        prices: Cene nebaterijskih virov po urah [viri, ure]
+        capacities: Zmogljivosti nebaterijskih virov (kWh na uro) [viri]
+        battery_capacity_kwh: Skupna kapaciteta baterij
+        battery_power_kw: Največja moč polnjenja/praznjenja (na strani omrežja)
+        charge_efficiency: Izkoristek polnjenja
+        discharge_efficiency: Izkoristek praznjenja
+        initial_soc_kwh: Začetno stanje napolnjenosti
+        battery_cost_per_kwh: Strošek obrabe na izpraznjeno kWh
+        soc_levels: Število diskretnih nivojev SoC
+        unserved_penalty: Kazen za nepokrito kWh
+
+    Returns:
+        Slovar NumPy polj: soc_kwh [ure+1], battery_flow_kwh (pozitivno = polnjenje),
+        source_dispatch_kwh [viri, ure], unserved_kwh, curtailed_kwh, cost_per_hour,
+        baseline_cost_per_hour (brez baterije) ter total_cost in baseline_cost
+    """
+    demand = np.asarray(demand_kwh, dtype=float)
+    hours = len(demand)
+    net = demand - np.asarray(renewable_kwh, dtype=float)
+    prices = np.asarray(prices, dtype=float).reshape(-1, hours)
+    capacities = np.asarray(capacities, dtype=float)
+    order, sorted_caps, cum_caps, cum_cost = merit_order_curves(prices, capacities)
+
+    # Nivoji SoC in spremembe SoC, ki so možne v eni uri
+    if battery_capacity_kwh > 0 and battery_power_kw > 0 and soc_levels > 1:
+        levels = np.linspace(0.0, battery_capacity_kwh, soc_levels)
+        step = levels[1]
+    else:
+        levels = np.zeros(1)
+        step = 0.0
+    n = len(levels)
+    deltas = np.arange(-(n - 1), n) * step
+    flows = np.where(deltas > 0, deltas / charge_efficiency, deltas * discharge_efficiency)
+    feasible = np.abs(flows) <= battery_power_kw + 1e-9
+    wear = battery_cost_per_kwh * np.maximum(-flows, 0.0)
+
+    # Strošek vsake ure za vse spremembe SoC [ure, 2n-1]
+    hour_cost = np.empty((hours, len(deltas)))
+    for t in range(hours):
+        hour_cost[t] = supply_cost(net[t] + flows, cum_caps[:, t], cum_cost[:, t], unserved_penalty)
+    hour_cost += wear
+    hour_cost[:, ~feasible] = np.inf
+
+    # Dinamično programiranje nazaj po urah; transition[i, j] je indeks spremembe i -> j
+    start = min(max(int(round(initial_soc_kwh / step)), 0), n - 1) if step else 0
+    transition = np.arange(n)[None, :] - np.arange(n)[:, None] + (n - 1)
+    value = np.where(np.arange(n) >= start, 0.0, np.inf)
+    choice = np.empty((hours, n), dtype=np.int64)
+    rows = np.arange(n)
+    for t in range(hours - 1, -1, -1):
+        total = hour_cost[t][transition] + value[None, :]
+        choice[t] = np.argmin(total, axis=1)
+        value = total[rows, choice[t]]
+
+    # Optimalna pot SoC naprej
+    soc_index = np.empty(hours + 1, dtype=np.int64)
+    soc_index[0] = start
+    for t in range(hours):
+        soc_index[t + 1] = choice[t, soc_index[t]]
+    delta_index = soc_index[1:] - soc_index[:-1] + (n - 1)
+
+    battery_flow = flows[delta_index]
+    residual = net + battery_flow
+    total_capacity = cum_caps[-1] if len(cum_caps) else np.zeros(hours)
+    served = np.clip(residual, 0.0, total_capacity)
+
+    # Razporeditev po virih: v vrstnem redu cen, do zmogljivosti vira
+    sorted_dispatch = np.clip(served[None, :] - (cum_caps - sorted_caps), 0.0, sorted_caps)
+    dispatch = np.empty_like(sorted_dispatch)
+    np.put_along_axis(dispatch, order, sorted_dispatch, axis=0)
+
+    cost_per_hour = hour_cost[np.arange(hours), delta_index]
+    baseline_cost_per_hour = hour_cost[:, n - 1]
+    return {
+        "soc_kwh": levels[soc_index],
+        "battery_flow_kwh": battery_flow,
+        "source_dispatch_kwh": dispatch,
+        "unserved_kwh": np.maximum(residual - served, 0.0),
+        "curtailed_kwh": np.maximum(-residual, 0.0),
+        "cost_per_hour": cost_per_hour,
+        "baseline_cost_per_hour": baseline_cost_per_hour,
+        "total_cost": float(cost_per_hour.sum()),
+        "baseline_cost": float(baseline_cost_per_hour.sum())
+    }
@@ -25,15 +25,24 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
-import statistics
 import random
 import math
+import time
+import numpy as np
+
+try:
+    from .dispatch import solve_dispatch, DEFAULT_TOU_FACTORS
+except ImportError:
+    from dispatch import solve_dispatch, DEFAULT_TOU_FACTORS
 
 # Konfiguracija
 ENERGY_DB = "omni/data/energy.db"
 ENERGY_LOG = "omni/logs/energy.log"
 DEVICES_FILE = "omni/data/energy_devices.json"
 CONSUMPTION_FILE = "omni/data/energy_consumption.json"
+BATTERY_DURATION_HOURS = 2.0  # Kapaciteta baterije = moč × trajanje
+MAX_DISPATCH_HORIZON = 168    # Najdaljši horizont razporeditve (ur)
+RENEWABLE_TYPES = ("solar", "wind", "hydro")
 
 # Logging
 os.makedirs(os.path.dirname(ENERGY_LOG), exist_ok=True)
@@ -42,7 +51,7 @@ logger = logging.getLogger(__name__)
 def __name__():
     return "energy_manager"
 
-class EnergySource(Enum):
+class EnergySourceType(Enum):
     GRID = "grid"
     SOLAR = "solar"
     WIND = "wind"
@@ -89,7 +98,7 @@ class EnergyDevice:
 class EnergySource:
     id: str
     name: str
-    source_type: EnergySource
+    source_type: EnergySourceType
     capacity_kw: float
     current_output_kw: float
     efficiency: float
@@ -105,7 +114,7 @@ class EnergyConsumption:
     device_id: str
     consumption_kwh: float
     cost: float
-    source: EnergySource
+    source: EnergySourceType
     efficiency: float
 
 @dataclass
@@ -289,7 +298,7 @@ class EnergyManager:
                 {
                     "id": "SRC_SOLAR_001",
                     "name": "Sončna elektrarna",
-                    "source_type": EnergySource.SOLAR,
+                    "source_type": EnergySourceType.SOLAR,
                     "capacity_kw": 10.0,
                     "current_output_kw": 6.5,
                     "efficiency": 0.22,
@@ -302,7 +311,7 @@ class EnergyManager:
                 {
                     "id": "SRC_GRID_001",
                     "name": "Električno omrežje",
-                    "source_type": EnergySource.GRID,
+                    "source_type": EnergySourceType.GRID,
                     "capacity_kw": 50.0,
                     "current_output_kw": 8.2,
                     "efficiency": 0.95,
@@ -315,7 +324,7 @@ class EnergyManager:
                 {
                     "id": "SRC_BATTERY_001",
                     "name": "Baterijski sistem",
-                    "source_type": EnergySource.BATTERY,
+                    "source_type": EnergySourceType.BATTERY,
                     "capacity_kw": 15.0,
                     "current_output_kw": 0.0,
                     "efficiency": 0.90,
@@ -349,7 +358,7 @@ class EnergyManager:
                     device_id="TOTAL",
                     consumption_kwh=base_consumption * consumption_factor,
                     cost=base_consumption * consumption_factor * 0.12,
-                    source=EnergySource.GRID,
+                    source=EnergySourceType.GRID,
                     efficiency=0.95
                 )
                 self.consumption_history.append(consumption)
@@ -434,7 +443,7 @@ class EnergyManager:
             source = EnergySource(
                 id=source_id,
                 name=name,
-                source_type=EnergySource(source_type),
+                source_type=EnergySourceType(source_type),
                 capacity_kw=capacity_kw,
                 current_output_kw=0.0,
                 efficiency=0.90,  # Privzeta učinkovitost
@@ -602,6 +611,141 @@ class EnergyManager:
             logger.error(f"❌ Napaka pri optimizaciji distribucije energije: {e}")
             return {"error": str(e)}
     
+    def _hourly_profile(self, history_hours: int = 168):
+        """Povprečna poraba po urah dneva iz zadnjih zapisov (povprečja, števila zapisov)"""
+        recent = self.consumption_history[-history_hours:]
+        hours = np.fromiter((c.timestamp.hour for c in recent), dtype=np.int64, count=len(recent))
+        values = np.fromiter((c.consumption_kwh for c in recent), dtype=float, count=len(recent))
+        counts = np.bincount(hours, minlength=24)
+        sums = np.bincount(hours, weights=values, minlength=24)
+        return sums / np.maximum(counts, 1), counts
+    
+    def _forecast_demand(self, start_time: datetime, hours: int) -> np.ndarray:
+        """Deterministična napoved porabe po urah (urni profil × sezonski faktor)"""
+        hour_of_day = (start_time.hour + np.arange(hours)) % 24
+        
+        if self.consumption_history:
+            profile, counts = self._hourly_profile()
+            profile = np.where(counts > 0, profile, profile[counts > 0].mean() if counts.any() else 3.0)
+            demand = profile[hour_of_day]
+        else:
+            # Brez zgodovine: trenutna poraba aktivnih naprav
+            active_kw = sum(d.current_consumption_w for d in self.devices.values() if d.status == "on") / 1000
+            demand = np.full(hours, active_kw)
+        
+        months = np.array([(start_time + timedelta(hours=int(i))).month for i in range(0, hours, 24)])
+        seasonal = np.select([np.isin(months, [12, 1, 2]), np.isin(months, [6, 7, 8])], [1.3, 1.1], 1.0)
+        return demand * np.repeat(seasonal, 24)[:hours]
+    
+    def optimize_dispatch(self, horizon_hours: int = 24, tou_factors: Optional[List[float]] = None,
+                          demand_kwh: Optional[List[float]] = None, peak_threshold_kw: Optional[float] = None,
+                          initial_soc: float = 0.5, soc_levels: int = 101) -> Dict[str, Any]:
+        """
+        Večurna razporeditev virov (24–168 ur) v enem izračunu
+        
+        Združi napoved porabe, obnovljivo proizvodnjo, zmogljivosti virov, SoC baterij
+        in ToU cene omrežja. Za razliko od optimize_energy_distribution (samo trenutek)
+        baterija polni v poceni urah in prazni v dragih, peak_threshold_kw pa omeji
+        uvoz iz omrežja v vseh urah horizonta.
+        
+        Args:
+            horizon_hours: Dolžina horizonta v urah (največ 168)
+            tou_factors: Faktorji cene omrežja za 24 ur dneva (privzeto DEFAULT_TOU_FACTORS)
+            demand_kwh: Lastna napoved porabe po urah (privzeto iz zgodovine porabe)
+            peak_threshold_kw: Največji uvoz iz omrežja
+            initial_soc: Začetna napolnjenost baterij (0.0 - 1.0)
+            soc_levels: Število diskretnih nivojev SoC
+        """
+        try:
+            solve_start = time.perf_counter()
+            hours = max(1, min(int(horizon_hours), MAX_DISPATCH_HORIZON))
+            start_time = datetime.now().replace(minute=0, second=0, microsecond=0)
+            hour_of_day = (start_time.hour + np.arange(hours)) % 24
+            tou = np.asarray(tou_factors if tou_factors is not None else DEFAULT_TOU_FACTORS, dtype=float)
+            
+            if demand_kwh is not None:
+                demand = np.asarray(demand_kwh, dtype=float)[:hours]
+                hours = len(demand)
+                hour_of_day = hour_of_day[:hours]
+            else:
+                demand = self._forecast_demand(start_time, hours)
+            
+            sources = list(self.energy_sources.values())
+            types = np.array([s.source_type.value for s in sources])
+            capacity = np.array([s.capacity_kw * s.availability for s in sources], dtype=float)
+            cost = np.array([s.cost_per_kwh for s in sources], dtype=float)
+            renewable = np.isin(types, RENEWABLE_TYPES)
+            battery = types == EnergySourceType.BATTERY.value
+            dispatchable = ~(renewable | battery)
+            grid = types == EnergySourceType.GRID.value
+            
+            # Obnovljiva proizvodnja: sončna po dnevni krivulji, veter in voda enakomerno
+            solar_shape = np.clip(np.sin(np.pi * (hour_of_day - 6) / 14), 0.0, None) * (hour_of_day >= 6) * (hour_of_day <= 20)
+            shape = np.where((types == EnergySourceType.SOLAR.value)[:, None], solar_shape[None, :], 1.0)
+            generation = (capacity[renewable, None] * shape[renewable]).sum(axis=0) if renewable.any() else np.zeros(hours)
+            
+            # Nebaterijski viri: cene omrežja po ToU, omejitev uvoza iz omrežja
+            prices = np.repeat(cost[dispatchable, None], hours, axis=1)
+            prices[grid[dispatchable]] *= tou[hour_of_day]
+            caps = capacity[dispatchable].copy()
+            if peak_threshold_kw is not None and caps[grid[dispatchable]].sum() > peak_threshold_kw:
+                caps[grid[dispatchable]] *= peak_threshold_kw / caps[grid[dispatchable]].sum()
+            
+            # Baterije kot en navidezni hranilnik
+            battery_power = capacity[battery].sum()
+            battery_capacity = np.array([s.capacity_kw for s in sources])[battery].sum() * BATTERY_DURATION_HOURS \
+                if battery.any() else 0.0
+            weights = capacity[battery] / battery_power if battery_power > 0 else np.zeros(battery.sum())
+            one_way = float(np.sqrt(np.array([s.efficiency for s in sources])[battery]) @ weights) if battery_power > 0 else 1.0
+            
+            result = solve_dispatch(
+                demand, generation, prices, caps,
+                battery_capacity_kwh=battery_capacity,
+                battery_power_kw=battery_power,
+                charge_efficiency=one_way,
+                discharge_efficiency=one_way,
+                initial_soc_kwh=battery_capacity * initial_soc,
+                battery_cost_per_kwh=float(cost[battery] @ weights) if battery_power > 0 else 0.0,
+                soc_levels=soc_levels
+            )
+            
+            # Razdelitev baterijskega toka po baterijah sorazmerno z močjo
+            source_ids = [s.id for s in sources]
+            source_dispatch = {}
+            for source_id, row in zip(np.array(source_ids)[dispatchable], result["source_dispatch_kwh"]):
+                source_dispatch[source_id] = np.round(row, 3).tolist()
+            for source_id, share in zip(np.array(source_ids)[battery], weights):
+                source_dispatch[source_id] = np.round(-result["battery_flow_kwh"] * share, 3).tolist()
+            for source_id, row in zip(np.array(source_ids)[renewable], capacity[renewable, None] * shape[renewable]):
+                source_dispatch[source_id] = np.round(row, 3).tolist()
+            
+            grid_import = result["source_dispatch_kwh"][grid[dispatchable]].sum(axis=0)
+            solve_ms = (time.perf_counter() - solve_start) * 1000
+            logger.info(f"⚡ Razporeditev za {hours} ur ({len(sources)} virov) izračunana v {solve_ms:.0f} ms")
+            
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "horizon_hours": hours,
+                "hours": [(start_time + timedelta(hours=i)).isoformat() for i in range(hours)],
+                "demand_kwh": np.round(demand, 3).tolist(),
+                "renewable_kwh": np.round(generation, 3).tolist(),
+                "battery_soc_kwh": np.round(result["soc_kwh"], 3).tolist(),
+                "battery_flow_kwh": np.round(result["battery_flow_kwh"], 3).tolist(),
+                "source_dispatch": source_dispatch,
+                "grid_import_kwh": np.round(grid_import, 3).tolist(),
+                "peak_grid_import_kw": round(float(grid_import.max()), 3) if hours else 0.0,
+                "unserved_kwh": round(float(result["unserved_kwh"].sum()), 3),
+                "curtailed_kwh": round(float(result["curtailed_kwh"].sum()), 3),
+                "total_cost": round(result["total_cost"], 2),
+                "baseline_cost": round(result["baseline_cost"], 2),
+                "cost_savings": round(result["baseline_cost"] - result["total_cost"], 2),
+                "solve_time_ms": round(solve_ms, 1)
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Napaka pri večurni razporeditvi energije: {e}")
+            return {"error": str(e)}
+    
     def predict_consumption(self, hours_ahead: int = 24) -> List[EnergyForecast]:
         """Napovej porabo energije"""
         try:
@@ -611,18 +755,9 @@ class EnergyManager:
             if not self.consumption_history:
                 return forecasts
             
-            # Izračunaj povprečno porabo po urah
-            hourly_patterns = {}
-            for consumption in self.consumption_history[-168:]:  # Zadnji teden
-                hour = consumption.timestamp.hour
-                if hour not in hourly_patterns:
-                    hourly_patterns[hour] = []
-                hourly_patterns[hour].append(consumption.consumption_kwh)
-            
-            # Izračunaj povprečja
-            hourly_averages = {}
-            for hour, consumptions in hourly_patterns.items():
-                hourly_averages[hour] = statistics.mean(consumptions)
+            # Izračunaj povprečno porabo po urah (zadnji teden)
+            profile, counts = self._hourly_profile()
+            hourly_averages = {hour: profile[hour] for hour in np.flatnonzero(counts)}
             
             # Generiraj napovedi
             for i in range(hours_ahead):
@@ -698,7 +833,7 @@ class EnergyManager:
                 
                 # 1. Preklopi na baterije, če so na voljo
                 battery_sources = [s for s in self.energy_sources.values() 
-                                 if s.source_type == EnergySource.BATTERY and s.availability > 0.8]
+                                 if s.source_type == EnergySourceType.BATTERY and s.availability > 0.8]
                 
                 if battery_sources:
                     battery_capacity = sum(s.capacity_kw for s in battery_sources)
@@ -871,7 +1006,7 @@ class EnergyManager:
                     elif 10 <= current_hour <= 16:
                         # Če imamo sončno energijo, lahko povečamo porabo
                         solar_available = sum(s.current_output_kw for s in self.energy_sources.values() 
-                                            if s.source_type == EnergySource.SOLAR)
+                                            if s.source_type == EnergySourceType.SOLAR)
                         if solar_available > 5:
                             device.current_consumption_w = min(device.power_rating_w, 
                                                              device.current_consumption_w * 1.1)
@@ -885,14 +1020,14 @@ class EnergyManager:
             # 4. Optimiziraj energetske vire
             for source in self.energy_sources.values():
                 # Simuliraj optimizacijo vira
-                if source.source_type == EnergySource.SOLAR:
+                if source.source_type == EnergySourceType.SOLAR:
                     # Optimiziraj sončne panele glede na vreme
                     if 10 <= datetime.now().hour <= 16:
                         source.current_output_kw = min(source.capacity_kw, 
                                                      source.capacity_kw * 0.8)
                         optimization_results["sources_optimized"] += 1
                 
-                elif source.source_type == EnergySource.BATTERY:
+                elif source.source_type == EnergySourceType.BATTERY:
                     # Optimiziraj baterije - polni čez dan, razpolni zvečer
                     if 10 <= datetime.now().hour <= 16:
                         source.current_output_kw = -source.capacity_kw * 0.3  # Polnjenje
@@ -975,9 +1110,9 @@ class EnergyManager:
                 },
                 "renewable_energy": {
                     "solar_capacity_kw": sum(s.capacity_kw for s in self.energy_sources.values() 
-                                           if s.source_type == EnergySource.SOLAR),
+                                           if s.source_type == EnergySourceType.SOLAR),
                     "battery_capacity_kw": sum(s.capacity_kw for s in self.energy_sources.values() 
-                                             if s.source_type == EnergySource.BATTERY),
+                                             if s.source_type == EnergySourceType.BATTERY),
                     "renewable_percentage": round((current_generation / max(current_consumption, 0.1)) * 100, 1)
                 },
                 "generated_at": datetime.now().isoformat()
@@ -1006,6 +1141,9 @@ def optimize_energy_distribution():
 def predict_consumption(hours_ahead: int = 24):
     return energy_manager.predict_consumption(hours_ahead)
 
+def optimize_dispatch(horizon_hours: int = 24, peak_threshold_kw: Optional[float] = None):
+    return energy_manager.optimize_dispatch(horizon_hours, peak_threshold_kw=peak_threshold_kw)
+
 def implement_peak_shaving(peak_threshold_kw: float = 15.0):
     return energy_manager.implement_peak_shaving(peak_threshold_kw)
 
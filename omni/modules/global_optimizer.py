@@ -31,6 +31,7 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import statistics
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Konfiguracija
 GLOBAL_DB = "omni/data/global_optimizer.db"
@@ -39,6 +40,10 @@ GLOBAL_CONFIG = "omni/data/global_config.json"
 OPTIMIZATION_INTERVAL = 300  # 5 minut
 CRITICAL_INTERVAL = 60      # 1 minuta za kritične sisteme
 LEARNING_THRESHOLD = 0.85   # 85% uspešnost za napredovanje
+MAX_OPTIMIZATION_WORKERS = 4  # Sočasne optimizacije nekritičnih panog
+CRITICAL_LANE_WORKERS = 2     # Ločen pas za kritične panoge
+DOMAIN_TIMEOUT = 120          # Privzeta časovna omejitev optimizacije panoge (s)
+METRICS_BATCH_SIZE = 100      # Največ metrik v enem paketnem zapisu
 
 # Logging setup
 os.makedirs(os.path.dirname(GLOBAL_LOG), exist_ok=True)
@@ -78,6 +83,15 @@ class Priority(Enum):
     CRITICAL = 4
     EMERGENCY = 5
 
+# Delež osnovnega intervala optimizacije glede na prioriteto panoge
+PRIORITY_INTERVAL_FACTORS = {
+    Priority.LOW: 1.5,
+    Priority.MEDIUM: 1.0,
+    Priority.HIGH: 0.75,
+    Priority.CRITICAL: 0.5,
+    Priority.EMERGENCY: 0.25
+}
+
 @dataclass
 class DomainMetrics:
     """Metriki posamezne panoge"""
@@ -112,7 +126,8 @@ class GlobalOptimizer:
     Koordinira vse panoge in procese za maksimalno učinkovitost
     """
     
-    def __init__(self):
+    def __init__(self, max_workers: int = MAX_OPTIMIZATION_WORKERS,
+                 critical_workers: int = CRITICAL_LANE_WORKERS):
         self.domains = {
             "iot_autonomous_learning": {"priority": Priority.HIGH, "critical": True},
             "finance_optimizer": {"priority": Priority.HIGH, "critical": True},
@@ -133,8 +148,29 @@ class GlobalOptimizer:
         self.global_config = self._load_global_config()
         self.optimization_history = []
         
+        # Razporejevalnik: sočasne optimizacije v prioritetnih pasovih
+        self.max_workers = max_workers
+        self.critical_workers = critical_workers
+        self.domain_intervals = {}
+        self.domain_timeouts = {}
+        self.next_run = {}
+        self.in_flight = {}
+        self.scheduler_stats = {
+            "cycles": 0,
+            "timeouts": 0,
+            "skipped_in_flight": 0,
+            "last_cycle_seconds": 0.0,
+            "metrics_batches": 0
+        }
+        self._lanes = None
+        self._wake_event = threading.Event()
+        self._metrics_lock = threading.Lock()
+        self._pending_metrics = []
+        self._batch_metrics = False
+        
         # Inicializacija baze podatkov
         self._init_database()
+        self._adjust_optimization_intervals()
         
         logger.info("🌍 Globalni optimizator Omni inicializiran")
     
@@ -309,31 +345,49 @@ class GlobalOptimizer:
             logger.error(f"❌ Napaka pri posodabljanju metrik {domain_name}: {e}")
     
     def _save_domain_metrics(self, metrics: DomainMetrics):
-        """Shrani metriki panoge v bazo"""
+        """Shrani metriki panoge v bazo (med ciklom optimizacije paketno)"""
+        row = (
+            datetime.now().isoformat(),
+            metrics.domain,
+            metrics.status.value,
+            metrics.efficiency,
+            metrics.cost_savings,
+            metrics.energy_usage,
+            metrics.performance_score,
+            metrics.optimization_count,
+            metrics.error_count,
+            metrics.uptime_percentage
+        )
+        
+        with self._metrics_lock:
+            self._pending_metrics.append(row)
+            flush = not self._batch_metrics or len(self._pending_metrics) >= METRICS_BATCH_SIZE
+        
+        if flush:
+            self._flush_domain_metrics()
+    
+    def _flush_domain_metrics(self):
+        """Zapiši čakajoče metrike panog v eni transakciji"""
+        with self._metrics_lock:
+            rows, self._pending_metrics = self._pending_metrics, []
+        
+        if not rows:
+            return
+        
         try:
             conn = sqlite3.connect(GLOBAL_DB)
             cursor = conn.cursor()
             
-            cursor.execute('''
+            cursor.executemany('''
                 INSERT INTO domain_metrics 
                 (timestamp, domain, status, efficiency, cost_savings, energy_usage, 
                  performance_score, optimization_count, error_count, uptime_percentage)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datetime.now().isoformat(),
-                metrics.domain,
-                metrics.status.value,
-                metrics.efficiency,
-                metrics.cost_savings,
-                metrics.energy_usage,
-                metrics.performance_score,
-                metrics.optimization_count,
-                metrics.error_count,
-                metrics.uptime_percentage
-            ))
+            ''', rows)
             
             conn.commit()
             conn.close()
+            self.scheduler_stats["metrics_batches"] += 1
             
         except Exception as e:
             logger.error(f"❌ Napaka pri shranjevanju metrik: {e}")
@@ -354,30 +408,141 @@ class GlobalOptimizer:
         """
         🌍 Glavna zanka globalne optimizacije
         
-        Izvaja optimizacijo vseh panog v rednih intervalih
+        Izvaja cikle optimizacije in med njimi počaka do prve zapadle panoge
         """
         logger.info("🌍 Začenjam globalno optimizacijo sveta...")
         
         while self.is_running:
             try:
-                start_time = time.time()
-                now = datetime.now()
+                self.run_optimization_cycle()
                 
-                logger.info(f"[{now.isoformat()}] 🌍 Omni izvaja globalno optimizacijo...")
+                # Avtonomno učenje in prilagajanje
+                self._autonomous_learning()
                 
-                # Statistike optimizacije
-                total_domains = len(self.domains)
-                optimized_domains = 0
-                failed_domains = 0
-                total_savings = 0.0
-                energy_reduction = 0.0
-                critical_issues = []
-                recommendations = []
+                # Počakaj do naslednje zapadle panoge
+                self._wake_event.wait(self._seconds_until_next_run())
                 
-                # Optimiziraj vsako panogo
-                for domain_name, domain_config in self.domains.items():
+            except Exception as e:
+                logger.error(f"❌ Kritična napaka v globalni optimizaciji: {e}")
+                logger.error(traceback.format_exc())
+                self._wake_event.wait(60)  # Počakaj minuto pred ponovnim poskusom
+    
+    def _get_lanes(self) -> Dict[str, ThreadPoolExecutor]:
+        """Pasova izvajanja: kritične panoge ne čakajo za nekritičnimi"""
+        if self._lanes is None:
+            self._lanes = {
+                "critical": ThreadPoolExecutor(max_workers=self.critical_workers,
+                                               thread_name_prefix="omni-optimizer-critical"),
+                "standard": ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="omni-optimizer")
+            }
+        return self._lanes
+    
+    def _due_domains(self, now: float, force: bool = False) -> List[str]:
+        """Zapadle panoge, urejene po prioriteti (kritične in najvišje prioritete prve)"""
+        due = []
+        for domain_name in self.domains:
+            if not force and self.next_run.get(domain_name, 0.0) > now:
+                continue
+            if domain_name in self.in_flight:
+                # Prejšnja optimizacija (po časovni omejitvi) še teče
+                self.scheduler_stats["skipped_in_flight"] += 1
+                self.next_run[domain_name] = now + self.domain_intervals.get(domain_name, OPTIMIZATION_INTERVAL)
+                continue
+            due.append(domain_name)
+        
+        return sorted(due, key=lambda d: (not self.domains[d].get("critical", False),
+                                          -self.domains[d].get("priority", Priority.MEDIUM).value))
+    
+    def _seconds_until_next_run(self) -> float:
+        """Čas do naslednje zapadle panoge"""
+        if not self.next_run:
+            return OPTIMIZATION_INTERVAL
+        return max(0.1, min(self.next_run.values()) - time.time())
+    
+    def run_optimization_cycle(self, force: bool = False) -> Optional[GlobalOptimizationResult]:
+        """
+        Izvedi en cikel optimizacije vseh zapadlih panog
+        
+        Panoge se optimizirajo sočasno v omejenih pasovih (kritični / standardni),
+        vsaka s svojo časovno omejitvijo, ki teče od začetka njene optimizacije.
+        Cikel zato traja približno toliko kot najpočasnejša panoga, ne vsota vseh.
+        Metrike panog se v bazo zapišejo paketno ob koncu cikla.
+        
+        Args:
+            force: Optimiziraj vse panoge ne glede na njihov interval
+        """
+        start_time = time.time()
+        now = datetime.now()
+        due = self._due_domains(start_time, force)
+        if not due:
+            return None
+        
+        logger.info(f"[{now.isoformat()}] 🌍 Omni izvaja globalno optimizacijo ({len(due)} panog)...")
+        
+        # Statistike optimizacije
+        total_domains = len(due)
+        optimized_domains = 0
+        failed_domains = 0
+        total_savings = 0.0
+        energy_reduction = 0.0
+        critical_issues = []
+        recommendations = []
+        
+        lanes = self._get_lanes()
+        started = {}
+        pending = {}
+        
+        def run_domain(domain_name: str) -> Dict[str, Any]:
+            started[domain_name] = time.time()
+            return self.optimize_domain(domain_name)
+        
+        def release(future, domain_name):
+            if self.in_flight.get(domain_name) is future:
+                del self.in_flight[domain_name]
+        
+        self._batch_metrics = True
+        try:
+            for domain_name in due:
+                lane = lanes["critical" if self.domains[domain_name].get("critical", False) else "standard"]
+                future = lane.submit(run_domain, domain_name)
+                self.in_flight[domain_name] = future
+                future.add_done_callback(lambda f, d=domain_name: release(f, d))
+                self.next_run[domain_name] = start_time + self.domain_intervals.get(domain_name, OPTIMIZATION_INTERVAL)
+                pending[future] = domain_name
+            
+            while pending:
+                # Panoge, ki so presegle časovno omejitev
+                current = time.time()
+                deadlines = []
+                for future, domain_name in list(pending.items()):
+                    if future.done() or domain_name not in started:
+                        continue
+                    deadline = started[domain_name] + self.domain_timeouts.get(domain_name, DOMAIN_TIMEOUT)
+                    if deadline <= current:
+                        del pending[future]
+                        self.scheduler_stats["timeouts"] += 1
+                        error_msg = f"Optimizacija {domain_name} je presegla časovno omejitev " \
+                                    f"{self.domain_timeouts.get(domain_name, DOMAIN_TIMEOUT):.1f}s"
+                        logger.error(f"⏱️ {error_msg}")
+                        self._record_domain_error(domain_name, error_msg)
+                        failed_domains += 1
+                        if self.domains[domain_name].get("critical", False):
+                            critical_issues.append(f"Kritična panoga {domain_name}: {error_msg}")
+                    else:
+                        deadlines.append(deadline)
+                
+                if not pending:
+                    break
+                
+                timeout = min(deadlines) - current if deadlines else 1.0
+                done, _ = wait(list(pending), timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    domain_name = pending.pop(future)
+                    domain_config = self.domains[domain_name]
                     try:
-                        result = self.optimize_domain(domain_name)
+                        result = future.result()
                         
                         if result["success"]:
                             optimized_domains += 1
@@ -395,52 +560,48 @@ class GlobalOptimizer:
                         logger.error(f"❌ {error_msg}")
                         if domain_config.get("critical", False):
                             critical_issues.append(error_msg)
-                
-                # Izračunaj izboljšanje učinkovitosti
-                efficiency_improvement = self._calculate_efficiency_improvement()
-                
-                # Generiraj priporočila
-                recommendations = self._generate_recommendations()
-                
-                # Ustvari rezultat globalne optimizacije
-                global_result = GlobalOptimizationResult(
-                    timestamp=now,
-                    total_domains=total_domains,
-                    optimized_domains=optimized_domains,
-                    failed_domains=failed_domains,
-                    total_savings=total_savings,
-                    energy_reduction=energy_reduction,
-                    efficiency_improvement=efficiency_improvement,
-                    critical_issues=critical_issues,
-                    recommendations=recommendations
-                )
-                
-                # Shrani rezultat
-                self._save_global_optimization(global_result)
-                self.optimization_history.append(asdict(global_result))
-                
-                # Prikaži rezultate
-                optimization_time = time.time() - start_time
-                logger.info(f"✅ Globalna optimizacija dokončana v {optimization_time:.2f}s")
-                logger.info(f"📊 Optimizirane panoge: {optimized_domains}/{total_domains}")
-                logger.info(f"💰 Skupni prihranki: {total_savings:.2f}€")
-                logger.info(f"⚡ Zmanjšanje energije: {energy_reduction:.2f}kWh")
-                
-                if critical_issues:
-                    logger.warning(f"🚨 Kritične težave: {len(critical_issues)}")
-                    for issue in critical_issues:
-                        logger.warning(f"   - {issue}")
-                
-                # Avtonomno učenje in prilagajanje
-                self._autonomous_learning()
-                
-                # Počakaj do naslednje optimizacije
-                time.sleep(OPTIMIZATION_INTERVAL)
-                
-            except Exception as e:
-                logger.error(f"❌ Kritična napaka v globalni optimizaciji: {e}")
-                logger.error(traceback.format_exc())
-                time.sleep(60)  # Počakaj minuto pred ponovnim poskusom
+        finally:
+            self._batch_metrics = False
+            self._flush_domain_metrics()
+        
+        # Izračunaj izboljšanje učinkovitosti
+        efficiency_improvement = self._calculate_efficiency_improvement()
+        
+        # Generiraj priporočila
+        recommendations = self._generate_recommendations()
+        
+        # Ustvari rezultat globalne optimizacije
+        global_result = GlobalOptimizationResult(
+            timestamp=now,
+            total_domains=total_domains,
+            optimized_domains=optimized_domains,
+            failed_domains=failed_domains,
+            total_savings=total_savings,
+            energy_reduction=energy_reduction,
+            efficiency_improvement=efficiency_improvement,
+            critical_issues=critical_issues,
+            recommendations=recommendations
+        )
+        
+        # Shrani rezultat
+        self._save_global_optimization(global_result)
+        self.optimization_history.append(asdict(global_result))
+        
+        # Prikaži rezultate
+        optimization_time = time.time() - start_time
+        self.scheduler_stats["cycles"] += 1
+        self.scheduler_stats["last_cycle_seconds"] = optimization_time
+        logger.info(f"✅ Globalna optimizacija dokončana v {optimization_time:.2f}s")
+        logger.info(f"📊 Optimizirane panoge: {optimized_domains}/{total_domains}")
+        logger.info(f"💰 Skupni prihranki: {total_savings:.2f}€")
+        logger.info(f"⚡ Zmanjšanje energije: {energy_reduction:.2f}kWh")
+        
+        if critical_issues:
+            logger.warning(f"🚨 Kritične težave: {len(critical_issues)}")
+            for issue in critical_issues:
+                logger.warning(f"   - {issue}")
+        
+        return global_result
     
     def _calculate_efficiency_improvement(self) -> float:
         """Izračuna izboljšanje učinkovitosti"""
@@ -551,6 +712,15 @@ class GlobalOptimizer:
                 OPTIMIZATION_INTERVAL = 300  # 5 minut
             else:
                 OPTIMIZATION_INTERVAL = 360  # 6 minut
+            
+            # Interval in časovna omejitev posamezne panoge glede na prioriteto
+            for domain_name, domain_config in self.domains.items():
+                priority = domain_config.get("priority", Priority.MEDIUM)
+                interval = domain_config.get(
+                    "interval", max(CRITICAL_INTERVAL, OPTIMIZATION_INTERVAL * PRIORITY_INTERVAL_FACTORS[priority])
+                )
+                self.domain_intervals[domain_name] = interval
+                self.domain_timeouts[domain_name] = domain_config.get("timeout", min(DOMAIN_TIMEOUT, interval))
                 
         except Exception as e:
             logger.error(f"❌ Napaka pri prilagajanju intervalov: {e}")
@@ -681,6 +851,7 @@ class GlobalOptimizer:
                 return "⚠️ Globalni optimizator že teče"
             
             self.is_running = True
+            self._wake_event.clear()
             
             # Zaženi glavno optimizacijsko nit
             self.optimization_thread = threading.Thread(target=self.optimize_world)
@@ -705,6 +876,7 @@ class GlobalOptimizer:
         """Ustavi globalni optimizator"""
         try:
             self.is_running = False
+            self._wake_event.set()
             
             # Počakaj, da se niti ustavijo
             if self.optimization_thread and self.optimization_thread.is_alive():
@@ -713,6 +885,13 @@ class GlobalOptimizer:
             if self.critical_thread and self.critical_thread.is_alive():
                 self.critical_thread.join(timeout=5)
             
+            # Ustavi pasova izvajanja (optimizacije, ki že tečejo, se dokončajo v ozadju)
+            if self._lanes:
+                for lane in self._lanes.values():
+                    lane.shutdown(wait=False, cancel_futures=True)
+                self._lanes = None
+            self._flush_domain_metrics()
+            
             logger.info("🛑 Globalni optimizator ustavljen")
             return "🛑 Globalni optimizator ustavljen ✅"
             
@@ -731,7 +910,13 @@ class GlobalOptimizer:
                 "active_domains": len([d for d in self.domain_metrics.values() if d.get("status") == "active"]),
                 "domain_metrics": self.domain_metrics,
                 "recent_optimizations": self.optimization_history[-5:] if self.optimization_history else [],
-                "global_config": self.global_config
+                "global_config": self.global_config,
+                "scheduler": {
+                    **self.scheduler_stats,
+                    "in_flight": sorted(self.in_flight),
+                    "domain_intervals": self.domain_intervals,
+                    "domain_timeouts": self.domain_timeouts
+                }
             }
             
         except Exception as e:
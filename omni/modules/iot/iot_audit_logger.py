@@ -7,6 +7,7 @@ Verzija: 1.0
 import json
 import os
 import time
+import bisect
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -15,6 +16,7 @@ import hashlib
 import hmac
 from dataclasses import dataclass, asdict
 from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
 
 class LogLevel(Enum):
     """Nivoji logiranja"""
@@ -55,103 +57,367 @@ class LogEntry:
         """Pretvori v slovar"""
         return asdict(self)
 
+def _chain_seed(secret_key: str, segment_name: str, previous_chain: str) -> str:
+    """Začetna vrednost HMAC verige segmenta (veže segment na prejšnjega)"""
+    return hmac.new(
+        secret_key.encode(),
+        f"{segment_name}:{previous_chain}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def _chain_next(secret_key: str, previous_chain: str, payload: str) -> str:
+    """Naslednji člen HMAC verige"""
+    return hmac.new(
+        secret_key.encode(),
+        f"{previous_chain}:{payload}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def _entry_payload(entry: Dict) -> str:
+    """Kanonična oblika vnosa brez verižnega hasha"""
+    return json.dumps({k: v for k, v in entry.items() if k != 'chain_hash'},
+                      sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+
+def _entry_security_hash(secret_key: str, log: Dict) -> str:
+    """Per-vnos varnostni hash (enak izračun kot IoTAuditLogger._generate_security_hash)"""
+    data = f"{log.get('timestamp')}:{log.get('user')}:{log.get('device_id')}:{log.get('command')}:{secret_key}"
+    return hmac.new(secret_key.encode(), data.encode(), hashlib.sha256).hexdigest()
+
+
+def _verify_segment(path: str, secret_key: str, seed: str) -> Dict:
+    """
+    Preveri en segment: vsak člen HMAC verige in per-vnos security_hash.
+    Člen se preverja glede na shranjeni hash predhodnika, zato prekinitev
+    označi natanko spremenjene ali manjkajoče vnose.
+    Funkcija je na nivoju modula, da jo lahko izvede tudi ProcessPoolExecutor.
+    """
+    result = {'total_logs': 0, 'verified': 0, 'failed': 0,
+              'corrupted_entries': [], 'broken_links': []}
+    previous = seed
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f):
+            if not line.strip():
+                continue
+            result['total_logs'] += 1
+            try:
+                log = json.loads(line)
+            except ValueError:
+                result['failed'] += 1
+                result['broken_links'].append(line_number)
+                continue
+
+            link_ok = hmac.compare_digest(
+                _chain_next(secret_key, previous, _entry_payload(log)), log.get('chain_hash') or ''
+            )
+            hash_ok = (not log.get('security_hash')
+                       or log['security_hash'] == _entry_security_hash(secret_key, log))
+            previous = log.get('chain_hash') or previous
+
+            if not link_ok:
+                result['broken_links'].append(line_number)
+            if link_ok and hash_ok:
+                result['verified'] += 1
+            else:
+                result['failed'] += 1
+                result['corrupted_entries'].append({
+                    'timestamp': log.get('timestamp'),
+                    'user': log.get('user'),
+                    'device_id': log.get('device_id')
+                })
+    return result
+
+
+class _SegmentIndex:
+    """Indeks enega segmenta: odmiki vrstic, časi in seznami pozicij po uporabniku/napravi/akciji"""
+
+    def __init__(self, name: str, previous_chain: str = ""):
+        self.name = name
+        self.previous_chain = previous_chain
+        self.final_chain = ""
+        self.offsets: List[int] = []
+        self.timestamps: List[str] = []
+        self.users: Dict[str, List[int]] = {}
+        self.devices: Dict[str, List[int]] = {}
+        self.actions: Dict[str, List[int]] = {}
+        self.levels: Dict[str, int] = {}
+
+    def add(self, offset: int, entry: Dict):
+        position = len(self.offsets)
+        self.offsets.append(offset)
+        self.timestamps.append(entry.get('timestamp', ''))
+        self.users.setdefault(entry.get('user') or 'unknown', []).append(position)
+        if entry.get('device_id'):
+            self.devices.setdefault(entry['device_id'], []).append(position)
+        self.actions.setdefault(entry.get('action_type') or 'unknown', []).append(position)
+        level = entry.get('level') or 'unknown'
+        self.levels[level] = self.levels.get(level, 0) + 1
+        self.final_chain = entry.get('chain_hash') or self.final_chain
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def overlaps(self, start_time: Optional[str], end_time: Optional[str]) -> bool:
+        if not self.timestamps:
+            return False
+        if start_time and self.timestamps[-1] < start_time:
+            return False
+        if end_time and self.timestamps[0] > end_time:
+            return False
+        return True
+
+    def candidate_positions(self, user: str = None, device_id: str = None,
+                            action_type: str = None, start_time: str = None,
+                            end_time: str = None) -> List[int]:
+        """Pozicije vnosov, ki ustrezajo filtrom (naraščajoče)"""
+        # Časovno okno z bisekcijo (vnosi so dopisani v časovnem zaporedju)
+        low = bisect.bisect_left(self.timestamps, start_time) if start_time else 0
+        high = bisect.bisect_right(self.timestamps, end_time) if end_time else len(self.timestamps)
+
+        lists = []
+        if user:
+            lists.append(self.users.get(user, []))
+        if device_id:
+            lists.append(self.devices.get(device_id, []))
+        if action_type:
+            lists.append(self.actions.get(action_type, []))
+        if not lists:
+            return list(range(low, high))
+
+        lists.sort(key=len)
+        positions = lists[0][bisect.bisect_left(lists[0], low):bisect.bisect_left(lists[0], high)]
+        for other in lists[1:]:
+            other_set = set(other)
+            positions = [p for p in positions if p in other_set]
+        return positions
+
+    def to_dict(self) -> Dict:
+        return {
+            'segment': self.name,
+            'previous_chain': self.previous_chain,
+            'final_chain': self.final_chain,
+            'offsets': self.offsets,
+            'timestamps': self.timestamps,
+            'users': self.users,
+            'devices': self.devices,
+            'actions': self.actions,
+            'levels': self.levels
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> '_SegmentIndex':
+        index = cls(data['segment'], data.get('previous_chain', ''))
+        index.final_chain = data.get('final_chain', '')
+        index.offsets = data.get('offsets', [])
+        index.timestamps = data.get('timestamps', [])
+        index.users = data.get('users', {})
+        index.devices = data.get('devices', {})
+        index.actions = data.get('actions', {})
+        index.levels = data.get('levels', {})
+        return index
+
+
 class IoTAuditLogger:
     """Glavni razred za audit logiranje IoT aktivnosti"""
-    
-    def __init__(self, log_file: str = "iot_logs.json", 
+
+    def __init__(self, log_file: str = "iot_logs.json",
                  max_file_size: int = 10 * 1024 * 1024,  # 10MB
                  backup_count: int = 5,
                  enable_encryption: bool = True,
                  secret_key: str = None):
         """
         Inicializiraj audit logger
-        
+
+        Loge zapisuje v JSONL segmente v direktoriju ``<log_file>.segments``.
+        Segmenti se samo dopisujejo; ko aktivni segment preseže ``max_file_size``,
+        se zapečati (skupaj s stranskim indeksom) in začne se nov.
+        Obstoječa ``log_file`` JSON datoteka se ob prvem zagonu uvozi.
+
         Args:
             log_file: Pot do log datoteke
-            max_file_size: Maksimalna velikost datoteke v bytih
-            backup_count: Število backup datotek
+            max_file_size: Maksimalna velikost segmenta v bytih
+            backup_count: Število zapečatenih segmentov, ki se ohranijo
             enable_encryption: Ali omogočiti enkripcijo
             secret_key: Skrivni ključ za hash
         """
         self.log_file = Path(log_file)
+        self.segments_dir = self.log_file.with_suffix('.segments')
         self.max_file_size = max_file_size
         self.backup_count = backup_count
         self.enable_encryption = enable_encryption
         self.secret_key = secret_key or "omni_iot_secret_2024"
-        
+
         # Thread safety
         self._lock = threading.Lock()
-        
+
+        # Zapečateni segmenti (najstarejši prvi) in aktivni segment
+        self._sealed: List[_SegmentIndex] = []
+        self._active: Optional[_SegmentIndex] = None
+        self._active_file = None
+        self._active_size = 0
+        self._chain = ""
+        # Uspešno preverjeni zapečateni segmenti: ime -> ((velikost, mtime_ns, final_chain), rezultat)
+        self._verified_segments: Dict[str, tuple] = {}
+
         # Ustvari direktorij če ne obstaja
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
-        
+
         # Inicializiraj log datoteko
         self._init_log_file()
-        
+
         print(f"✅ IoT Audit Logger inicializiran: {self.log_file}")
-    
+
     def _init_log_file(self):
-        """Inicializiraj log datoteko"""
-        if not self.log_file.exists():
-            initial_data = {
-                "metadata": {
-                    "created": datetime.now(timezone.utc).isoformat(),
-                    "version": "1.0",
-                    "encryption_enabled": self.enable_encryption
-                },
-                "logs": []
-            }
-            
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                json.dump(initial_data, f, indent=2, ensure_ascii=False)
-    
+        """Inicializiraj segmente (in uvozi obstoječo JSON datoteko)"""
+        first_run = not self.segments_dir.exists()
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+
+        segment_files = sorted(self.segments_dir.glob('segment-*.jsonl'))
+        for path in segment_files[:-1]:
+            self._sealed.append(self._load_segment_index(path))
+
+        if segment_files:
+            self._open_active(segment_files[-1], rebuild=True)
+        else:
+            self._start_segment(1)
+
+        if first_run and self.log_file.exists():
+            self._import_legacy_file()
+
+    def _segment_path(self, number: int) -> Path:
+        return self.segments_dir / f"segment-{number:06d}.jsonl"
+
+    @staticmethod
+    def _index_path(segment_path: Path) -> Path:
+        return segment_path.with_suffix('.idx.json')
+
+    def _load_segment_index(self, path: Path) -> _SegmentIndex:
+        """Naloži stranski indeks zapečatenega segmenta (ali ga zgradi, če manjka)"""
+        index_path = self._index_path(path)
+        if index_path.exists():
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    return _SegmentIndex.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError):
+                pass
+        previous = self._sealed[-1].final_chain if self._sealed else ""
+        index = self._scan_segment(path, previous)
+        self._write_index(path, index)
+        return index
+
+    def _scan_segment(self, path: Path, previous_chain: str) -> _SegmentIndex:
+        index = _SegmentIndex(path.name, previous_chain)
+        offset = 0
+        with open(path, 'rb') as f:
+            for raw in f:
+                if raw.endswith(b'\n'):
+                    try:
+                        index.add(offset, json.loads(raw))
+                    except ValueError:
+                        pass
+                offset += len(raw)
+        return index
+
+    def _write_index(self, path: Path, index: _SegmentIndex):
+        index_path = self._index_path(path)
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+
+    def _open_active(self, path: Path, rebuild: bool = False):
+        previous = self._sealed[-1].final_chain if self._sealed else ""
+        if rebuild:
+            # Odreži morebitno nedokončano zadnjo vrstico (npr. po padcu)
+            with open(path, 'rb') as f:
+                data = f.read()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                with open(path, 'r+b') as f:
+                    f.truncate(complete)
+            self._active = self._scan_segment(path, previous)
+        else:
+            self._active = _SegmentIndex(path.name, previous)
+
+        self._chain = self._active.final_chain or _chain_seed(self.secret_key, path.name, previous)
+        self._active_file = open(path, 'ab')
+        self._active_size = self._active_file.tell()
+
+    def _start_segment(self, number: int):
+        path = self._segment_path(number)
+        path.touch()
+        self._open_active(path)
+
+    def _import_legacy_file(self):
+        """Uvozi vnose iz stare iot_logs.json datoteke v segmente"""
+        try:
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            legacy_logs = sorted(data.get('logs', []), key=lambda x: x.get('timestamp', ''))
+            with self._lock:
+                for log in legacy_logs:
+                    self._append(log)
+            if legacy_logs:
+                print(f"📁 Uvoženih {len(legacy_logs)} logov iz {self.log_file}")
+        except (OSError, ValueError) as e:
+            print(f"❌ Napaka pri uvozu starih logov: {e}")
+
     def _generate_security_hash(self, entry: LogEntry) -> str:
         """Generiraj varnostni hash za integriteto"""
         if not self.enable_encryption:
             return None
-            
+
         # Ustvari hash iz ključnih podatkov
-        data = f"{entry.timestamp}:{entry.user}:{entry.device_id}:{entry.command}:{self.secret_key}"
-        return hmac.new(
-            self.secret_key.encode(),
-            data.encode(),
-            hashlib.sha256
-        ).hexdigest()
-    
+        return _entry_security_hash(self.secret_key, entry.to_dict())
+
     def _rotate_logs(self):
-        """Rotiraj log datoteke če so prevelike"""
-        if not self.log_file.exists():
+        """Zapečati aktivni segment, če je prevelik, in začni novega"""
+        if self._active_size <= self.max_file_size:
             return
-            
-        if self.log_file.stat().st_size > self.max_file_size:
-            # Premakni obstoječe backup datoteke
-            for i in range(self.backup_count - 1, 0, -1):
-                old_backup = self.log_file.with_suffix(f'.{i}.json')
-                new_backup = self.log_file.with_suffix(f'.{i + 1}.json')
-                
-                if old_backup.exists():
-                    if new_backup.exists():
-                        new_backup.unlink()
-                    old_backup.rename(new_backup)
-            
-            # Premakni trenutno datoteko v .1 backup
-            backup_file = self.log_file.with_suffix('.1.json')
-            if backup_file.exists():
-                backup_file.unlink()
-            self.log_file.rename(backup_file)
-            
-            # Ustvari novo datoteko
-            self._init_log_file()
-            print(f"📁 Log datoteke rotirane, backup: {backup_file}")
-    
-    def log_device_action(self, user: str, device_id: str, command: str, 
+
+        self._active_file.close()
+        sealed_path = self.segments_dir / self._active.name
+        self._write_index(sealed_path, self._active)
+        self._sealed.append(self._active)
+
+        number = int(sealed_path.stem.split('-')[1]) + 1
+        self._start_segment(number)
+
+        # Ohrani le backup_count zapečatenih segmentov
+        while len(self._sealed) > self.backup_count:
+            oldest = self._sealed.pop(0)
+            oldest_path = self.segments_dir / oldest.name
+            oldest_path.unlink(missing_ok=True)
+            self._index_path(oldest_path).unlink(missing_ok=True)
+            self._verified_segments.pop(oldest.name, None)
+
+        print(f"📁 Log segment zapečaten: {sealed_path.name}")
+
+    def _append(self, entry_dict: Dict):
+        """Dopiši vnos v aktivni segment (klicano pod ključavnico)"""
+        entry_dict = dict(entry_dict)
+        entry_dict.pop('chain_hash', None)
+        self._chain = _chain_next(self.secret_key, self._chain, _entry_payload(entry_dict))
+        entry_dict['chain_hash'] = self._chain
+
+        line = (json.dumps(entry_dict, ensure_ascii=False) + "\n").encode('utf-8')
+        self._active_file.write(line)
+        self._active_file.flush()
+        self._active.add(self._active_size, entry_dict)
+        self._active_size += len(line)
+
+        self._rotate_logs()
+
+    def log_device_action(self, user: str, device_id: str, command: str,
                          parameters: Dict = None, result: Dict = None,
                          ip_address: str = None, user_agent: str = None,
                          session_id: str = None, execution_time: float = None,
                          level: LogLevel = LogLevel.INFO) -> bool:
         """
         Logiraj akcijo na napravi
-        
+
         Args:
             user: Uporabnik ki je izvedel akcijo
             device_id: ID naprave
@@ -177,13 +443,13 @@ class IoTAuditLogger:
             session_id=session_id,
             execution_time=execution_time
         )
-    
+
     def log_authentication(self, user: str, success: bool, method: str = "unknown",
                           ip_address: str = None, user_agent: str = None,
                           error_message: str = None) -> bool:
         """Logiraj avtentikacijski dogodek"""
         level = LogLevel.INFO if success else LogLevel.WARNING
-        
+
         return self._log_entry(
             level=level,
             action_type=ActionType.AUTHENTICATION,
@@ -194,7 +460,7 @@ class IoTAuditLogger:
             user_agent=user_agent,
             error_message=error_message
         )
-    
+
     def log_security_event(self, user: str, event_type: str, details: Dict = None,
                           severity: LogLevel = LogLevel.WARNING) -> bool:
         """Logiraj varnostni dogodek"""
@@ -205,7 +471,7 @@ class IoTAuditLogger:
             command=event_type,
             parameters=details
         )
-    
+
     def log_system_event(self, event_type: str, details: Dict = None,
                         level: LogLevel = LogLevel.INFO) -> bool:
         """Logiraj sistemski dogodek"""
@@ -216,7 +482,7 @@ class IoTAuditLogger:
             command=event_type,
             parameters=details
         )
-    
+
     def log_error(self, user: str, error_message: str, details: Dict = None,
                  device_id: str = None, command: str = None) -> bool:
         """Logiraj napako"""
@@ -229,7 +495,7 @@ class IoTAuditLogger:
             parameters=details,
             error_message=error_message
         )
-    
+
     def _log_entry(self, level: LogLevel, action_type: ActionType, user: str,
                    device_id: str = None, command: str = None,
                    parameters: Dict = None, result: Dict = None,
@@ -238,6 +504,8 @@ class IoTAuditLogger:
                    error_message: str = None) -> bool:
         """Interni method za logiranje"""
         try:
+            # Vnos in časovni žig nastaneta pod ključavnico, da so vrstice v segmentu urejene
+            # po času (na tem temelji bisect v indeksih segmentov); dopis je O(1)
             with self._lock:
                 # Ustvari log entry
                 entry = LogEntry(
@@ -256,41 +524,32 @@ class IoTAuditLogger:
                     error_message=error_message,
                     security_hash=None
                 )
-                
+
                 # Generiraj varnostni hash
                 entry.security_hash = self._generate_security_hash(entry)
-                
-                # Preberi obstoječe loge
-                try:
-                    with open(self.log_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                except (FileNotFoundError, json.JSONDecodeError):
-                    self._init_log_file()
-                    with open(self.log_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                
-                # Dodaj nov log
-                data['logs'].append(entry.to_dict())
-                
-                # Zapiši nazaj
-                with open(self.log_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                
-                # Preveri ali je potrebna rotacija
-                self._rotate_logs()
-                
-                return True
-                
+
+                self._append(entry.to_dict())
+
+            return True
+
         except Exception as e:
             print(f"❌ Napaka pri logiranju: {e}")
             return False
-    
-    def get_logs(self, limit: int = 100, user: str = None, 
+
+    def _segment_files(self) -> List[tuple]:
+        """Pari (indeks, pot) za vse segmente, najnovejši prvi"""
+        with self._lock:
+            segments = self._sealed + [self._active]
+        return [(index, self.segments_dir / index.name) for index in reversed(segments)]
+
+    def get_logs(self, limit: int = 100, user: str = None,
                 device_id: str = None, action_type: str = None,
                 start_time: str = None, end_time: str = None) -> List[Dict]:
         """
         Pridobi loge z filtriranjem
-        
+
+        Filtri se razrešijo prek indeksov segmentov; prebrane so le ujemajoče vrstice.
+
         Args:
             limit: Maksimalno število logov
             user: Filtriraj po uporabniku
@@ -300,130 +559,134 @@ class IoTAuditLogger:
             end_time: Končni čas (ISO format)
         """
         try:
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            logs = data.get('logs', [])
-            
-            # Filtriraj
-            if user:
-                logs = [log for log in logs if log.get('user') == user]
-            
-            if device_id:
-                logs = [log for log in logs if log.get('device_id') == device_id]
-            
-            if action_type:
-                logs = [log for log in logs if log.get('action_type') == action_type]
-            
-            if start_time:
-                logs = [log for log in logs if log.get('timestamp', '') >= start_time]
-            
-            if end_time:
-                logs = [log for log in logs if log.get('timestamp', '') <= end_time]
-            
+            logs = []
+            with self._lock:
+                self._active_file.flush()
+
+            for index, path in self._segment_files():
+                if len(logs) >= limit:
+                    break
+                if not index.overlaps(start_time, end_time):
+                    continue
+                positions = index.candidate_positions(user, device_id, action_type, start_time, end_time)
+                if not positions:
+                    continue
+
+                with open(path, 'rb') as f:
+                    # Najnovejši prvi
+                    for position in reversed(positions):
+                        f.seek(index.offsets[position])
+                        log = json.loads(f.readline())
+                        log.pop('chain_hash', None)
+                        logs.append(log)
+                        if len(logs) >= limit:
+                            break
+
             # Sortiraj po času (najnovejši prvi)
             logs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            
+
             return logs[:limit]
-            
+
         except Exception as e:
             print(f"❌ Napaka pri branju logov: {e}")
             return []
-    
+
     def get_statistics(self) -> Dict:
-        """Pridobi statistike logiranja"""
+        """Pridobi statistike logiranja (iz indeksov, brez branja vnosov)"""
         try:
-            logs = self.get_logs(limit=10000)  # Pridobi vse loge
-            
             stats = {
-                'total_logs': len(logs),
+                'total_logs': 0,
                 'users': {},
                 'devices': {},
                 'actions': {},
                 'levels': {},
                 'recent_activity': []
             }
-            
-            for log in logs:
-                # Uporabniki
-                user = log.get('user', 'unknown')
-                stats['users'][user] = stats['users'].get(user, 0) + 1
-                
-                # Naprave
-                device = log.get('device_id')
-                if device:
-                    stats['devices'][device] = stats['devices'].get(device, 0) + 1
-                
-                # Akcije
-                action = log.get('action_type', 'unknown')
-                stats['actions'][action] = stats['actions'].get(action, 0) + 1
-                
-                # Nivoji
-                level = log.get('level', 'unknown')
-                stats['levels'][level] = stats['levels'].get(level, 0) + 1
-            
+
+            for index, _ in self._segment_files():
+                stats['total_logs'] += len(index)
+                for key, mapping in (('users', index.users), ('devices', index.devices),
+                                     ('actions', index.actions)):
+                    for name, positions in mapping.items():
+                        stats[key][name] = stats[key].get(name, 0) + len(positions)
+                for level, count in index.levels.items():
+                    stats['levels'][level] = stats['levels'].get(level, 0) + count
+
             # Nedavna aktivnost (zadnjih 10)
-            stats['recent_activity'] = logs[:10]
-            
+            stats['recent_activity'] = self.get_logs(limit=10)
+
             return stats
-            
+
         except Exception as e:
             print(f"❌ Napaka pri pridobivanju statistik: {e}")
             return {}
-    
-    def verify_integrity(self) -> Dict:
-        """Preveri integriteto logov"""
+
+    def verify_integrity(self, full: bool = False, workers: int = 1) -> Dict:
+        """
+        Preveri integriteto logov
+
+        Vsak segment ima svojo HMAC verigo (začetek je vezan na konec prejšnjega
+        segmenta), zato se segmenti preverjajo neodvisno - ob ``workers > 1``
+        vzporedno v ločenih procesih. Nespremenjeni zapečateni segmenti, ki so bili
+        že uspešno preverjeni, se preskočijo, razen če je ``full=True``.
+        """
         try:
-            logs = self.get_logs(limit=10000)
-            
             result = {
-                'total_logs': len(logs),
+                'total_logs': 0,
                 'verified': 0,
                 'failed': 0,
-                'corrupted_entries': []
+                'corrupted_entries': [],
+                'segments': {'checked': 0, 'skipped': 0, 'broken_chains': []}
             }
-            
+
             if not self.enable_encryption:
                 result['message'] = "Enkripcija ni omogočena"
+                result['total_logs'] = sum(len(index) for index, _ in self._segment_files())
                 return result
-            
-            for log in logs:
-                if 'security_hash' not in log or not log['security_hash']:
+
+            with self._lock:
+                self._active_file.flush()
+                sealed_names = {index.name for index in self._sealed}
+
+            jobs = []
+            for index, path in reversed(self._segment_files()):
+                stat = path.stat()
+                signature = (stat.st_size, stat.st_mtime_ns, index.final_chain)
+                cached = self._verified_segments.get(index.name)
+                if not full and cached and cached[0] == signature:
+                    # Nespremenjen in že preverjen zapečaten segment
+                    result['segments']['skipped'] += 1
+                    for key in ('total_logs', 'verified'):
+                        result[key] += cached[1][key]
                     continue
-                
-                # Rekonstruiraj entry za preverjanje
-                entry = LogEntry(
-                    timestamp=log.get('timestamp'),
-                    level=log.get('level'),
-                    action_type=log.get('action_type'),
-                    user=log.get('user'),
-                    device_id=log.get('device_id'),
-                    command=log.get('command'),
-                    parameters=log.get('parameters'),
-                    result=log.get('result'),
-                    ip_address=log.get('ip_address'),
-                    user_agent=log.get('user_agent'),
-                    session_id=log.get('session_id'),
-                    execution_time=log.get('execution_time'),
-                    error_message=log.get('error_message'),
-                    security_hash=None
-                )
-                
-                expected_hash = self._generate_security_hash(entry)
-                actual_hash = log.get('security_hash')
-                
-                if expected_hash == actual_hash:
-                    result['verified'] += 1
-                else:
-                    result['failed'] += 1
-                    result['corrupted_entries'].append({
-                        'timestamp': log.get('timestamp'),
-                        'user': log.get('user'),
-                        'device_id': log.get('device_id')
+                seed = _chain_seed(self.secret_key, index.name, index.previous_chain)
+                jobs.append((index, path, signature, seed))
+
+            paths = [str(path) for _, path, _, _ in jobs]
+            seeds = [seed for _, _, _, seed in jobs]
+            if workers > 1 and len(jobs) > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    segment_results = list(pool.map(_verify_segment, paths,
+                                                    [self.secret_key] * len(jobs), seeds))
+            else:
+                segment_results = [_verify_segment(path, self.secret_key, seed)
+                                   for path, seed in zip(paths, seeds)]
+
+            for (index, _, signature, _), segment_result in zip(jobs, segment_results):
+                result['segments']['checked'] += 1
+                for key in ('total_logs', 'verified', 'failed'):
+                    result[key] += segment_result[key]
+                result['corrupted_entries'].extend(segment_result['corrupted_entries'])
+                if segment_result['broken_links']:
+                    result['segments']['broken_chains'].append({
+                        'segment': index.name,
+                        'lines': segment_result['broken_links']
                     })
-            
+                elif index.name in sealed_names and segment_result['failed'] == 0:
+                    self._verified_segments[index.name] = (signature, segment_result)
+
             return result
-            
+
         except Exception as e:
             return {'error': str(e)}
 
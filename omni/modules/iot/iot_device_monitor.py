@@ -27,6 +27,11 @@ import schedule
 import psutil
 import socket
 
+try:
+    from .sensor_ingestion import SensorIngestionPipeline, ROLLUP_TABLES, ensure_ingestion_schema
+except ImportError:
+    from sensor_ingestion import SensorIngestionPipeline, ROLLUP_TABLES, ensure_ingestion_schema
+
 # Nastavi logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -55,11 +60,17 @@ class DeviceStatus:
 class RealTimeMonitor:
     """Realno spremljanje naprav"""
     
-    def __init__(self):
-        self.db_path = Path("omni/data/device_monitoring.db")
+    # Največ točk, ki jih vrne get_device_history pri samodejni izbiri ločljivosti
+    HISTORY_MAX_POINTS = 1440
+    
+    def __init__(self, db_path: str = "omni/data/device_monitoring.db"):
+        self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.setup_database()
         
+        # Zapisi gredo prek vrste in ene pisalne niti (paketni commit + agregati)
+        self.ingestion = SensorIngestionPipeline(self.db_path)
+        
         self.monitoring_active = False
         self.sensor_threads = {}
         self.device_cache = {}
@@ -118,6 +129,9 @@ class RealTimeMonitor:
             )
         ''')
         
+        # Agregati (1 min / 1 h / 1 dan) in zadnje vrednosti
+        ensure_ingestion_schema(conn)
+        
         # Tabela za urnikovanje
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS device_schedules (
@@ -394,33 +408,12 @@ class RealTimeMonitor:
         return random.randint(3600, 86400 * 30)  # 1 ura do 30 dni
     
     def save_sensor_reading(self, reading: SensorReading):
-        """Shrani senzorski podatek"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO sensor_readings (device_id, sensor_type, value, unit, quality, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (reading.device_id, reading.sensor_type, reading.value, 
-              reading.unit, reading.quality, reading.timestamp))
-        
-        conn.commit()
-        conn.close()
+        """Shrani senzorski podatek (paketno, prek pisalne niti)"""
+        self.ingestion.submit_reading(reading)
     
     def update_device_status(self, status: DeviceStatus):
-        """Posodobi status naprave"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO device_status 
-            (device_id, online, last_seen, battery_level, signal_strength, uptime, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (status.device_id, status.online, status.last_seen,
-              status.battery_level, status.signal_strength, status.uptime, datetime.now()))
-        
-        conn.commit()
-        conn.close()
+        """Posodobi status naprave (paketno, prek pisalne niti)"""
+        self.ingestion.submit_status(status)
     
     def check_device_alarms(self, device: Dict, readings: List[SensorReading]):
         """Preveri alarme za napravo"""
@@ -482,48 +475,77 @@ class RealTimeMonitor:
         }
         return intervals.get(device_type, intervals['default'])
     
-    def get_device_history(self, device_id: str, sensor_type: str, hours: int = 24) -> List[Tuple]:
-        """Pridobi zgodovino senzorja"""
+    def _select_resolution(self, hours: float) -> str:
+        """Izberi najgrobejšo ločljivost, ki še ne preseže HISTORY_MAX_POINTS točk"""
+        if hours <= 1:
+            return 'raw'
+        window = hours * 3600
+        for table, width in ROLLUP_TABLES.items():
+            if window / width <= self.HISTORY_MAX_POINTS:
+                return table
+        return 'sensor_rollup_1d'
+    
+    def get_device_history(self, device_id: str, sensor_type: str, hours: int = 24,
+                           resolution: str = "auto") -> List[Tuple]:
+        """
+        Pridobi zgodovino senzorja kot (vrednost, čas), najnovejše prvo
+        
+        Pri ``resolution="auto"`` se daljša okna berejo iz agregatov (povprečje vedra),
+        kratka (do 1 ure) iz surovih podatkov. Možnosti: auto, raw, 1m, 1h, 1d.
+        """
+        if resolution == "auto":
+            table = self._select_resolution(hours)
+        else:
+            table = 'raw' if resolution == 'raw' else f'sensor_rollup_{resolution}'
+        cutoff = datetime.now() - timedelta(hours=hours)
+        
         conn = sqlite3.connect(str(self.db_path))
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT value, timestamp FROM sensor_readings
-            WHERE device_id = ? AND sensor_type = ?
-            AND timestamp > datetime('now', '-{} hours')
-            ORDER BY timestamp DESC
-        '''.format(hours), (device_id, sensor_type))
+        if table == 'raw':
+            cursor.execute('''
+                SELECT value, timestamp FROM sensor_data
+                WHERE device_id = ? AND sensor_type = ?
+                AND timestamp > ?
+                ORDER BY timestamp DESC
+            ''', (device_id, sensor_type, cutoff.isoformat(sep=' ')))
+            results = cursor.fetchall()
+        else:
+            width = ROLLUP_TABLES[table]
+            first_bucket = int(cutoff.timestamp()) // width * width
+            cursor.execute(f'''
+                SELECT sum / count, bucket FROM {table}
+                WHERE device_id = ? AND sensor_type = ? AND bucket >= ?
+                ORDER BY bucket DESC
+            ''', (device_id, sensor_type, first_bucket))
+            results = [(value, datetime.fromtimestamp(bucket).isoformat(sep=' '))
+                       for value, bucket in cursor.fetchall()]
         
-        results = cursor.fetchall()
         conn.close()
         return results
     
     def get_device_statistics(self, device_id: str) -> Dict:
-        """Pridobi statistike naprave"""
+        """Pridobi statistike naprave (iz tabele zadnjih vrednosti in urnih agregatov)"""
         conn = sqlite3.connect(str(self.db_path))
         cursor = conn.cursor()
         
         # Zadnji podatki
         cursor.execute('''
             SELECT sensor_type, value, unit, timestamp
-            FROM sensor_readings
+            FROM sensor_latest
             WHERE device_id = ?
-            AND timestamp = (
-                SELECT MAX(timestamp) FROM sensor_readings sr2
-                WHERE sr2.device_id = sensor_readings.device_id
-                AND sr2.sensor_type = sensor_readings.sensor_type
-            )
         ''', (device_id,))
         
         latest_readings = cursor.fetchall()
         
-        # Povprečja zadnjih 24 ur
+        # Povprečja zadnjih 24 ur (24 urnih veder namesto pregleda surovih podatkov)
+        first_bucket = int((datetime.now() - timedelta(hours=24)).timestamp()) // 3600 * 3600
         cursor.execute('''
-            SELECT sensor_type, AVG(value) as avg_value, MIN(value) as min_value, MAX(value) as max_value
-            FROM sensor_readings
-            WHERE device_id = ? AND timestamp > datetime('now', '-24 hours')
+            SELECT sensor_type, SUM(sum) / SUM(count) as avg_value, MIN(min) as min_value, MAX(max) as max_value
+            FROM sensor_rollup_1h
+            WHERE device_id = ? AND bucket >= ?
             GROUP BY sensor_type
-        ''', (device_id,))
+        ''', (device_id, first_bucket))
         
         daily_stats = cursor.fetchall()
         
@@ -541,12 +563,14 @@ class RealTimeMonitor:
             'latest_readings': latest_readings,
             'daily_statistics': daily_stats,
             'active_alarms': active_alarms,
+            'ingestion': self.ingestion.get_stats(),
             'last_updated': datetime.now().isoformat()
         }
     
     def stop_monitoring(self):
         """Ustavi spremljanje"""
         self.monitoring_active = False
+        self.ingestion.flush()
         logger.info("🛑 Spremljanje naprav ustavljeno")
 
 # Globalna instanca
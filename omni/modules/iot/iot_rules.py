@@ -5,11 +5,14 @@ Omogoča if-then logiko, pogojno izvrševanje in kompleksne scenarije
 """
 
 import json
+import math
 import os
+import queue
 import threading
 import time
+from bisect import bisect_left
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Set, Tuple
 import logging
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -20,6 +23,12 @@ import operator
 RULES_CONFIG_FILE = "data/automation_rules_config.json"
 RULES_LOG_FILE = "data/logs/automation_rules_logs.json"
 
+# Meje histograma latence evalvacije (ms); zadnji razred je "več kot 1000 ms"
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+# Lastnosti časovnih pogojev, ki jih osvežuje časovno kolo
+TIME_PROPERTIES = ("hour", "minute", "weekday", "time")
+
 class ConditionType(Enum):
     TIME = "time"
     DEVICE_STATE = "device_state"
@@ -92,8 +101,41 @@ class Rule:
     execution_count: int = 0
     execution_count_today: int = 0
 
+class TimerWheel:
+    """
+    Zgoščeno časovno kolo: ``slots`` rež po ``tick`` sekund.
+    Zamiki, daljši od enega obrata, počakajo ustrezno število obratov.
+    """
+    
+    def __init__(self, slots: int = 60, tick: float = 1.0):
+        self.tick = tick
+        self.slots: List[List[List[Any]]] = [[] for _ in range(slots)]
+        self.cursor = 0
+    
+    def schedule(self, delay_seconds: float, item: Any):
+        """Sproži ``item`` čez ``delay_seconds`` (zaokroženo navzgor na tick)"""
+        ticks = max(1, math.ceil(delay_seconds / self.tick))
+        slot = (self.cursor + ticks) % len(self.slots)
+        rounds = (ticks - 1) // len(self.slots)
+        self.slots[slot].append([rounds, item])
+    
+    def advance(self) -> List[Any]:
+        """Premakni kolo za en tick in vrni zapadle elemente"""
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        due = []
+        pending = []
+        for entry in self.slots[self.cursor]:
+            if entry[0] == 0:
+                due.append(entry[1])
+            else:
+                entry[0] -= 1
+                pending.append(entry)
+        self.slots[self.cursor] = pending
+        return due
+
 class IoTRulesEngine:
-    def __init__(self, iot_secure_module=None, automation_engine=None, group_manager=None):
+    def __init__(self, iot_secure_module=None, automation_engine=None, group_manager=None,
+                 evaluation_mode: str = "polling"):
         self.iot_secure = iot_secure_module
         self.automation_engine = automation_engine
         self.group_manager = group_manager
@@ -103,13 +145,30 @@ class IoTRulesEngine:
         self.running = False
         self.evaluation_thread = None
         
+        # "polling" (privzeto): vsa pravila vsako sekundo, pravilo, ki ostane izpolnjeno, se
+        # sproži znova po izteku ohlajanja; "event": evalvacija samo ob spremembi vhodov
+        # (izpolnjeno pravilo se sproži enkrat na spremembo)
+        self.evaluation_mode = evaluation_mode
+        
         # Cache za device states
         self.device_states: Dict[str, Dict[str, Any]] = {}
         self.sensor_values: Dict[str, Dict[str, Any]] = {}
         
+        # Indeks pogojev: ključ vhoda -> (rule_id, indeks pogoja) ter zadnji rezultati pogojev
+        self._index_lock = threading.RLock()
+        self._condition_index: Dict[Tuple, Set[Tuple[str, int]]] = {}
+        self._condition_results: Dict[str, List[bool]] = {}
+        self._events: "queue.Queue[Tuple]" = queue.Queue()
+        self._timer_wheel = TimerWheel()
+        self._time_values = self._current_time_values()
+        
+        # Števci evalvacij in histogrami latence po pravilih
+        self.rule_metrics: Dict[str, Dict[str, Any]] = {}
+        
         # Nastavi logging
         logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
+        # Modul prepiše __name__ s funkcijo za nalagalnik modulov, zato ime loggerja podamo izrecno
+        self.logger = logging.getLogger("iot_rules")
         
         # Naloži konfiguracijo
         self.load_configuration()
@@ -135,6 +194,7 @@ class IoTRulesEngine:
                     
                     rule = Rule(**rule_data)
                     self.rules[rule.id] = rule
+                    self._index_rule(rule)
                     
                 # Naloži spremenljivke
                 self.variables = config.get('variables', {})
@@ -201,6 +261,7 @@ class IoTRulesEngine:
             rule.updated_at = datetime.now().isoformat()
             
             self.rules[rule.id] = rule
+            self._index_rule(rule)
             self.save_configuration()
             
             self.log_rules_event("rule_added", {
@@ -221,6 +282,7 @@ class IoTRulesEngine:
             if rule_id in self.rules:
                 rule = self.rules[rule_id]
                 del self.rules[rule_id]
+                self._unindex_rule(rule_id)
                 self.save_configuration()
                 
                 self.log_rules_event("rule_removed", {
@@ -240,6 +302,8 @@ class IoTRulesEngine:
                 rule = self.rules[rule_id]
                 rule.enabled = not rule.enabled
                 rule.updated_at = datetime.now().isoformat()
+                if rule.enabled:
+                    self._events.put(('rule', rule_id, time.perf_counter()))
                 self.save_configuration()
                 
                 self.log_rules_event("rule_toggled", {
@@ -252,6 +316,116 @@ class IoTRulesEngine:
             self.logger.error(f"Napaka pri preklapljanju pravila: {e}")
             return False
 
+    # ==================== INDEKS POGOJEV IN VHODI ====================
+    
+    def _condition_key(self, condition: Condition) -> Tuple:
+        """Ključ vhoda, od katerega je odvisen pogoj"""
+        condition_type = ConditionType(condition.type)
+        if condition_type == ConditionType.TIME:
+            return ('time', condition.property)
+        if condition_type == ConditionType.DEVICE_STATE:
+            return ('device', condition.target, condition.property)
+        if condition_type == ConditionType.SENSOR_VALUE:
+            return ('sensor', condition.target, condition.property)
+        if condition_type == ConditionType.CUSTOM:
+            return ('variable', condition.target)
+        # Skupine in vreme nimajo dogodkov spremembe, zato se preverjajo ob vsakem ticku
+        return ('poll',)
+    
+    def _index_rule(self, rule: Rule):
+        """Dodaj pogoje pravila v indeks in ga označi za začetno evalvacijo"""
+        with self._index_lock:
+            self._unindex_rule(rule.id)
+            for i, condition in enumerate(rule.conditions):
+                self._condition_index.setdefault(self._condition_key(condition), set()).add((rule.id, i))
+            self._condition_results[rule.id] = [False] * len(rule.conditions)
+            self.rule_metrics.setdefault(rule.id, self._new_metrics())
+        self._events.put(('rule', rule.id, time.perf_counter()))
+    
+    def _unindex_rule(self, rule_id: str):
+        with self._index_lock:
+            for key in list(self._condition_index):
+                refs = self._condition_index[key]
+                refs.difference_update({ref for ref in refs if ref[0] == rule_id})
+                if not refs:
+                    del self._condition_index[key]
+            self._condition_results.pop(rule_id, None)
+    
+    def _notify_change(self, key: Tuple):
+        if key in self._condition_index:
+            self._events.put(('key', key, time.perf_counter()))
+    
+    def update_device_state(self, device_id: str, property: str, value: Any):
+        """Posodobi stanje naprave in sproži evalvacijo odvisnih pravil"""
+        states = self.device_states.setdefault(device_id, {})
+        if property not in states or states[property] != value:
+            states[property] = value
+            self._notify_change(('device', device_id, property))
+    
+    def update_sensor_value(self, sensor_id: str, property: str, value: Any):
+        """Posodobi vrednost senzorja in sproži evalvacijo odvisnih pravil"""
+        values = self.sensor_values.setdefault(sensor_id, {})
+        if property not in values or values[property] != value:
+            values[property] = value
+            self._notify_change(('sensor', sensor_id, property))
+    
+    def set_variable(self, name: str, value: Any, persist: bool = True):
+        """Nastavi spremenljivko in sproži evalvacijo odvisnih pravil"""
+        changed = name not in self.variables or self.variables[name] != value
+        self.variables[name] = value
+        if persist:
+            self.save_configuration()
+        if changed:
+            self._notify_change(('variable', name))
+    
+    def _current_time_values(self) -> Dict[str, Any]:
+        now = datetime.now()
+        return {
+            "hour": now.hour,
+            "minute": now.minute,
+            "weekday": now.weekday(),
+            "time": now.strftime("%H:%M")
+        }
+    
+    def _schedule_minute_tick(self):
+        """Časovni pogoji se lahko spremenijo le ob začetku minute"""
+        now = datetime.now()
+        self._timer_wheel.schedule(60 - now.second - now.microsecond / 1_000_000, ('time',))
+    
+    # ==================== METRIKE ====================
+    
+    @staticmethod
+    def _new_metrics() -> Dict[str, Any]:
+        return {
+            "evaluations": 0,
+            "condition_evaluations": 0,
+            "executions": 0,
+            "latency_histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        }
+    
+    def _record_evaluation(self, rule_id: str, conditions_evaluated: int, latency_ms: float):
+        metrics = self.rule_metrics.setdefault(rule_id, self._new_metrics())
+        metrics["evaluations"] += 1
+        metrics["condition_evaluations"] += conditions_evaluated
+        metrics["latency_histogram"][bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+    
+    def get_rule_metrics(self, rule_id: str = None) -> Dict[str, Any]:
+        """Števci evalvacij in histogram latence (od spremembe vhoda do odločitve) po pravilih"""
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        
+        def describe(metrics):
+            return {
+                "evaluations": metrics["evaluations"],
+                "condition_evaluations": metrics["condition_evaluations"],
+                "executions": metrics["executions"],
+                "latency_histogram": dict(zip(labels, metrics["latency_histogram"]))
+            }
+        
+        if rule_id is not None:
+            metrics = self.rule_metrics.get(rule_id)
+            return describe(metrics) if metrics else {"error": f"Pravilo {rule_id} ne obstaja"}
+        return {rid: describe(metrics) for rid, metrics in self.rule_metrics.items()}
+    
     # ==================== EVALVACIJA PRAVIL ====================
     
     def start_evaluation(self):
@@ -271,6 +445,10 @@ class IoTRulesEngine:
 
     def _evaluation_loop(self):
         """Glavna zanka za evalvacijo pravil"""
+        if self.evaluation_mode == "event":
+            self._event_loop()
+            return
+        
         while self.running:
             try:
                 # Posodobi device states
@@ -279,13 +457,127 @@ class IoTRulesEngine:
                 # Evalviraj vsa pravila
                 for rule in list(self.rules.values()):
                     if rule.enabled and self._should_evaluate_rule(rule):
-                        if self._evaluate_rule(rule):
+                        start = time.perf_counter()
+                        matched = self._evaluate_rule(rule)
+                        self._record_evaluation(rule.id, len(rule.conditions),
+                                                (time.perf_counter() - start) * 1000)
+                        if matched:
                             self._execute_rule(rule)
                 
                 time.sleep(1)  # Evalviraj vsako sekundo
                 
             except Exception as e:
                 self.logger.error(f"Napaka v evalvacijski zanki: {e}")
+    
+    def _event_loop(self):
+        """
+        Inkrementalna evalvacija: spremembe vhodov prihajajo v vrsto dogodkov,
+        ponovno se izračunajo le pogoji z ustreznim ključem (rezultati ostalih so shranjeni).
+        Časovni pogoji in ohlajanje pravil tečejo prek časovnega kolesa.
+        """
+        self._schedule_minute_tick()
+        next_tick = time.monotonic() + self._timer_wheel.tick
+        
+        while self.running:
+            try:
+                try:
+                    events = [self._events.get(timeout=max(0.0, next_tick - time.monotonic()))]
+                    # Poberi še vse, kar se je nabralo, in jih obdelaj skupaj
+                    while True:
+                        events.append(self._events.get_nowait())
+                except queue.Empty:
+                    pass
+                
+                now = time.monotonic()
+                while now >= next_tick:
+                    events.extend(self._advance_timer())
+                    next_tick += self._timer_wheel.tick
+                
+                if events:
+                    self._process_events(events)
+                    
+            except Exception as e:
+                self.logger.error(f"Napaka v evalvacijski zanki: {e}")
+    
+    def _advance_timer(self) -> List[Tuple]:
+        """Premakni časovno kolo in pretvori zapadle elemente v dogodke"""
+        events = []
+        started = time.perf_counter()
+        for item in self._timer_wheel.advance():
+            if item[0] == 'time':
+                values = self._current_time_values()
+                for prop in TIME_PROPERTIES:
+                    if values[prop] != self._time_values.get(prop):
+                        events.append(('key', ('time', prop), started))
+                self._time_values = values
+                self._schedule_minute_tick()
+            else:
+                events.append(item[:2] + (started,))
+        if ('poll',) in self._condition_index:
+            events.append(('key', ('poll',), started))
+        return events
+    
+    def _process_events(self, events: List[Tuple]):
+        """Ponovno izračunaj prizadete pogoje in preveri pravila, katerih vhodi so se spremenili"""
+        # rule_id -> (indeksi pogojev ali None za vse, najzgodnejši čas dogodka)
+        affected: Dict[str, Tuple[Optional[Set[int]], float]] = {}
+        with self._index_lock:
+            for kind, ref, enqueued in events:
+                if kind == 'key':
+                    for rule_id, i in self._condition_index.get(ref, ()):
+                        indices, first = affected.get(rule_id, (set(), enqueued))
+                        if indices is not None:
+                            indices.add(i)
+                        affected[rule_id] = (indices, min(first, enqueued))
+                elif kind == 'rule' and ref in self.rules:
+                    first = affected.get(ref, (None, enqueued))[1]
+                    affected[ref] = (None, min(first, enqueued))
+        
+        for rule_id in sorted(affected, key=lambda rid: -getattr(self.rules.get(rid), 'priority', 0)):
+            rule = self.rules.get(rule_id)
+            if rule is None or not rule.enabled:
+                continue
+            indices, enqueued = affected[rule_id]
+            if self._evaluate_rule_incremental(rule, indices, enqueued) and self._check_rule_limits(rule):
+                self._execute_rule(rule)
+    
+    def _evaluate_rule_incremental(self, rule: Rule, indices: Optional[Set[int]], enqueued: float) -> bool:
+        """Posodobi shranjene rezultate izbranih pogojev (None = vseh) in jih združi"""
+        with self._index_lock:
+            results = self._condition_results.get(rule.id)
+            if results is None or len(results) != len(rule.conditions):
+                results = self._condition_results[rule.id] = [False] * len(rule.conditions)
+                indices = None
+        
+        targets = range(len(rule.conditions)) if indices is None else indices
+        for i in targets:
+            results[i] = self._evaluate_condition(rule.conditions[i])
+        
+        # Enako kot _evaluate_rule: neznan logični operator ne izpolni pravila
+        if not results:
+            matched = True
+        elif rule.logic_operator == LogicOperator.AND:
+            matched = all(results)
+        elif rule.logic_operator == LogicOperator.OR:
+            matched = any(results)
+        elif rule.logic_operator == LogicOperator.NOT:
+            matched = not all(results)
+        else:
+            matched = False
+        
+        self._record_evaluation(rule.id, len(targets), (time.perf_counter() - enqueued) * 1000)
+        return matched
+    
+    def _check_rule_limits(self, rule: Rule) -> bool:
+        """Kot _should_evaluate_rule, le da se ob ohlajanju pravilo ponovno preveri, ko poteče"""
+        if self._should_evaluate_rule(rule):
+            return True
+        if rule.last_executed and rule.cooldown_seconds > 0:
+            elapsed = (datetime.now() - datetime.fromisoformat(rule.last_executed)).total_seconds()
+            remaining = rule.cooldown_seconds - elapsed
+            if remaining > 0:
+                self._timer_wheel.schedule(remaining, ('rule', rule.id))
+        return False
 
     def _update_device_states(self):
         """Posodobi stanja naprav"""
@@ -451,6 +743,7 @@ class IoTRulesEngine:
             rule.last_executed = datetime.now().isoformat()
             rule.execution_count += 1
             rule.execution_count_today += 1
+            self.rule_metrics.setdefault(rule.id, self._new_metrics())["executions"] += 1
             rule.updated_at = datetime.now().isoformat()
             
             self.save_configuration()
@@ -507,8 +800,7 @@ class IoTRulesEngine:
             elif action.type == ActionType.VARIABLE_SET:
                 variable_name = action.target
                 variable_value = action.parameters.get("value")
-                self.variables[variable_name] = variable_value
-                self.save_configuration()
+                self.set_variable(variable_name, variable_value)
                 
                 return {"type": "variable_set", "variable": variable_name, "value": variable_value}
                 
@@ -537,10 +829,13 @@ class IoTRulesEngine:
         
         return {
             "engine_running": self.running,
+            "evaluation_mode": self.evaluation_mode,
             "total_rules": len(self.rules),
             "active_rules": len(active_rules),
             "disabled_rules": len(self.rules) - len(active_rules),
             "total_executions": sum(r.execution_count for r in self.rules.values()),
+            "total_evaluations": sum(m["evaluations"] for m in self.rule_metrics.values()),
+            "indexed_keys": len(self._condition_index),
             "variables_count": len(self.variables),
             "recent_executions": self._get_recent_executions()
         }
@@ -585,7 +880,8 @@ class IoTRulesEngine:
             "created_at": rule.created_at,
             "updated_at": rule.updated_at,
             "cooldown_seconds": rule.cooldown_seconds,
-            "max_executions_per_day": rule.max_executions_per_day
+            "max_executions_per_day": rule.max_executions_per_day,
+            "metrics": self.get_rule_metrics(rule.id)
         }
 
 # Glavna instanca rules engine
@@ -597,11 +893,13 @@ rules_engine = None
 def __name__():
     return "iot_rules"
 
-def initialize_rules_engine(iot_secure_module=None, automation_engine=None, group_manager=None):
+def initialize_rules_engine(iot_secure_module=None, automation_engine=None, group_manager=None,
+                            evaluation_mode: str = "polling"):
     """Inicializiraj rules engine"""
     global rules_engine_instance, rules_engine
     if rules_engine_instance is None:
-        rules_engine_instance = IoTRulesEngine(iot_secure_module, automation_engine, group_manager)
+        rules_engine_instance = IoTRulesEngine(iot_secure_module, automation_engine, group_manager,
+                                               evaluation_mode)
         rules_engine = rules_engine_instance  # Alias za kompatibilnost
     return rules_engine_instance
 
@@ -633,8 +931,7 @@ def set_variable(name: str, value: Any) -> bool:
     if rules_engine_instance is None:
         return False
     
-    rules_engine_instance.variables[name] = value
-    rules_engine_instance.save_configuration()
+    rules_engine_instance.set_variable(name, value)
     return True
 
 def get_variable(name: str) -> Any:
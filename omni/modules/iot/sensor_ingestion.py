@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+📥 Omni IoT Sensor Ingestion
+Paketni zapis senzorskih podatkov z agregati (rollupi)
+
+Funkcionalnosti:
+- Omejena vrsta v pomnilniku in ena pisalna nit (brez tekmovanja za disk)
+- SQLite WAL način, paketni commit z executemany (po velikosti ali času)
+- Sprotni agregati 1 min / 1 h / 1 dan (count, sum, min, max)
+- Tabela zadnjih vrednosti po napravi in senzorju
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ime tabele -> širina vedra v sekundah (od najfinejše do najgrobejše)
+ROLLUP_TABLES = {
+    'sensor_rollup_1m': 60,
+    'sensor_rollup_1h': 3600,
+    'sensor_rollup_1d': 86400,
+}
+
+_STOP = object()
+
+
+def _format_timestamp(value: datetime) -> str:
+    """Enak format kot privzeti sqlite3 adapter za datetime"""
+    return value.isoformat(sep=' ')
+
+
+def ensure_ingestion_schema(conn: sqlite3.Connection):
+    """Ustvari tabele za surove podatke, agregate in zadnje vrednosti"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_data (
+            id INTEGER PRIMARY KEY,
+            device_id TEXT,
+            sensor_type TEXT,
+            value REAL,
+            unit TEXT,
+            quality TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS device_status (
+            id INTEGER PRIMARY KEY,
+            device_id TEXT UNIQUE,
+            online BOOLEAN,
+            last_seen TIMESTAMP,
+            battery_level REAL,
+            signal_strength REAL,
+            firmware_version TEXT,
+            uptime INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for table in ROLLUP_TABLES:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                device_id TEXT NOT NULL,
+                sensor_type TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                sum REAL NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                PRIMARY KEY (device_id, sensor_type, bucket)
+            ) WITHOUT ROWID
+        ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_latest (
+            device_id TEXT NOT NULL,
+            sensor_type TEXT NOT NULL,
+            value REAL,
+            unit TEXT,
+            timestamp TIMESTAMP,
+            PRIMARY KEY (device_id, sensor_type)
+        ) WITHOUT ROWID
+    ''')
+
+
+class SensorIngestionPipeline:
+    """
+    Vrsta + pisalna nit za senzorske podatke in statuse naprav.
+
+    ``submit_reading``/``submit_status`` le postavita zapis v vrsto. Pisalna nit
+    zbere do ``batch_size`` zapisov (ali kar se nabere v ``flush_interval`` sekundah)
+    in jih zapiše v eni transakciji skupaj s posodobitvijo agregatov.
+    """
+
+    def __init__(self, db_path: Path, max_queue: int = 100_000, batch_size: int = 2_000,
+                 flush_interval: float = 0.5, overflow: str = "block"):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow  # "block" (povratni pritisk) ali "drop"
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self.stats = {
+            'submitted': 0,
+            'written_readings': 0,
+            'written_statuses': 0,
+            'dropped': 0,
+            'batches': 0,
+            'last_batch_size': 0,
+            'last_commit_ms': 0.0,
+        }
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        ensure_ingestion_schema(self._conn)
+        self._conn.commit()
+
+        self._writer = threading.Thread(target=self._writer_loop, name="sensor-ingestion", daemon=True)
+        self._writer.start()
+
+    def _put(self, item: Tuple[str, Any]) -> bool:
+        if self.overflow == "drop":
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.stats['dropped'] += 1
+                return False
+        else:
+            self._queue.put(item)
+        self.stats['submitted'] += 1
+        return True
+
+    def submit_reading(self, reading) -> bool:
+        """Postavi senzorski podatek v vrsto za zapis"""
+        return self._put(('reading', reading))
+
+    def submit_status(self, status) -> bool:
+        """Postavi status naprave v vrsto za zapis"""
+        return self._put(('status', status))
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            # Zberi paket do velikosti ali časovne meje
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(timeout, 0)) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"❌ Napaka pri zapisu paketa senzorjev ({len(batch)}): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Tuple[str, Any]]):
+        start = time.perf_counter()
+        readings = [payload for kind, payload in batch if kind == 'reading']
+        # Za isto napravo velja zadnji status v paketu
+        statuses = {payload.device_id: payload for kind, payload in batch if kind == 'status'}
+
+        # Zapisi se agregirajo v najfinejša vedra, grobejša se izpeljejo iz njih
+        tables = list(ROLLUP_TABLES.items())
+        finest_table, finest_width = tables[0]
+        rollups: Dict[str, Dict[Tuple[str, str, int], List[float]]] = {finest_table: {}}
+        finest = rollups[finest_table]
+        latest: Dict[Tuple[str, str], Any] = {}
+        rows = []
+        for reading in readings:
+            value = reading.value
+            timestamp = reading.timestamp
+            rows.append((reading.device_id, reading.sensor_type, value,
+                         reading.unit, reading.quality, _format_timestamp(timestamp)))
+            epoch = int(timestamp.timestamp())
+            key = (reading.device_id, reading.sensor_type, epoch - epoch % finest_width)
+            agg = finest.get(key)
+            if agg is None:
+                finest[key] = [1, value, value, value]
+            else:
+                agg[0] += 1
+                agg[1] += value
+                if value < agg[2]:
+                    agg[2] = value
+                elif value > agg[3]:
+                    agg[3] = value
+            series = key[:2]
+            current = latest.get(series)
+            if current is None or timestamp >= current.timestamp:
+                latest[series] = reading
+
+        for table, width in tables[1:]:
+            coarse: Dict[Tuple[str, str, int], List[float]] = {}
+            for (device_id, sensor_type, bucket), (count, total, low, high) in finest.items():
+                key = (device_id, sensor_type, bucket - bucket % width)
+                agg = coarse.get(key)
+                if agg is None:
+                    coarse[key] = [count, total, low, high]
+                else:
+                    agg[0] += count
+                    agg[1] += total
+                    agg[2] = min(agg[2], low)
+                    agg[3] = max(agg[3], high)
+            rollups[table] = coarse
+
+        conn = self._conn
+        with conn:
+            if rows:
+                conn.executemany('''
+                    INSERT INTO sensor_data (device_id, sensor_type, value, unit, quality, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                for table, aggregates in rollups.items():
+                    conn.executemany(f'''
+                        INSERT INTO {table} (device_id, sensor_type, bucket, count, sum, min, max)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(device_id, sensor_type, bucket) DO UPDATE SET
+                            count = count + excluded.count,
+                            sum = sum + excluded.sum,
+                            min = MIN(min, excluded.min),
+                            max = MAX(max, excluded.max)
+                    ''', [key + tuple(agg) for key, agg in aggregates.items()])
+                conn.executemany('''
+                    INSERT INTO sensor_latest (device_id, sensor_type, value, unit, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(device_id, sensor_type) DO UPDATE SET
+                        value = excluded.value, unit = excluded.unit, timestamp = excluded.timestamp
+                    WHERE excluded.timestamp >= sensor_latest.timestamp
+                ''', [(r.device_id, r.sensor_type, r.value, r.unit, _format_timestamp(r.timestamp))
+                      for r in latest.values()])
+            if statuses:
+                now = _format_timestamp(datetime.now())
+                conn.executemany('''
+                    INSERT OR REPLACE INTO device_status
+                    (device_id, online, last_seen, battery_level, signal_strength, uptime, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(s.device_id, s.online, _format_timestamp(s.last_seen), s.battery_level,
+                       s.signal_strength, s.uptime, now) for s in statuses.values()])
+
+        self.stats['written_readings'] += len(rows)
+        self.stats['written_statuses'] += len(statuses)
+        self.stats['batches'] += 1
+        self.stats['last_batch_size'] = len(batch)
+        self.stats['last_commit_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+    def flush(self):
+        """Počakaj, da so vsi zapisi v vrsti zapisani"""
+        self._queue.join()
+
+    def close(self):
+        """Zapiši preostanek vrste in ustavi pisalno nit"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['queue_size'] = self._queue.qsize()
+        return stats
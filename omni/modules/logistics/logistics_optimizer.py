@@ -14,6 +14,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 
+try:
+    from .vrp import solve_vrp
+except ImportError:
+    from vrp import solve_vrp
+
 # Nastavi logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,14 +44,21 @@ def add_product(name, quantity):
     }
 
 # Funkcija za beleženje dostav 
-def add_delivery(product, quantity, destination): 
-    inventory["deliveries"].append({ 
+def add_delivery(product, quantity, destination, location: Optional[Dict] = None, weight: Optional[float] = None,
+                 volume: float = 0.0): 
+    delivery = { 
         "time": datetime.utcnow().isoformat(), 
         "product": product, 
         "quantity": quantity, 
         "destination": destination,
         "status": "pending"
-    }) 
+    }
+    # Koordinate in teža omogočajo razporejanje po vozilih (VRP)
+    if location is not None:
+        delivery["location"] = {"lat": location["lat"], "lng": location["lng"]}
+        delivery["weight"] = quantity if weight is None else weight
+        delivery["volume"] = volume
+    inventory["deliveries"].append(delivery) 
     add_product(product, -quantity)
     
     logger.info(f"🚚 Dodana dostava: {product} ({quantity}) -> {destination}")
@@ -197,14 +209,24 @@ def calculate_logistics_stats():
         "destinations_served": len(destinations)
     }
 
-def optimize_delivery_routes(deliveries_list=None):
-    """Optimiziraj dostave poti (simulacija)"""
+def optimize_delivery_routes(deliveries_list=None, vehicles: Optional[List[Dict]] = None,
+                             depot: Optional[Dict] = None, time_budget: float = 10.0):
+    """
+    Optimiziraj dostavne poti
+    
+    Če so podana vozila (v obliki LogisticsModule.fleet_management) in imajo vse
+    dostave koordinate, se poti izračunajo z VRP (kapaciteta vozil, razdalje,
+    vrstni red postankov). Sicer se dostave le grupirajo po destinaciji.
+    """
     if deliveries_list is None:
         deliveries_list = [d for d in inventory["deliveries"] if d.get("status") == "pending"]
     
     if not deliveries_list:
         return {"message": "Ni dostav za optimizacijo", "optimized_routes": []}
     
+    if vehicles and all("location" in d for d in deliveries_list):
+        return _optimize_vehicle_routes(deliveries_list, vehicles, depot, time_budget)
+    
     # Grupiranje po destinacijah
     destinations = {}
     for delivery in deliveries_list:
@@ -243,6 +265,50 @@ def optimize_delivery_routes(deliveries_list=None):
         "estimated_total_time": sum(r["estimated_time"] for r in optimized_routes)
     }
 
+def _optimize_vehicle_routes(deliveries_list, vehicles, depot, time_budget):
+    """Razporedi dostave po vozilih z VRP"""
+    stops = [{
+        "lat": d["location"]["lat"],
+        "lng": d["location"]["lng"],
+        "weight": d.get("weight", d["quantity"]),
+        "volume": d.get("volume", 0.0)
+    } for d in deliveries_list]
+    solution = solve_vrp(stops, vehicles, depot=depot, time_budget=time_budget)
+    
+    optimized_routes = []
+    for route_id, route in enumerate(solution["routes"], 1):
+        route_deliveries = [deliveries_list[i] for i in route["stops"]]
+        total_quantity = sum(d["quantity"] for d in route_deliveries)
+        optimized_routes.append({
+            "route_id": route_id,
+            "vehicle_id": route["vehicle_id"],
+            "trip": route["trip"],
+            "destinations": [d["destination"] for d in route_deliveries],
+            "stops": route["stops"],
+            "total_quantity": total_quantity,
+            "products": list(set(d["product"] for d in route_deliveries)),
+            "delivery_count": len(route_deliveries),
+            "distance_km": route["distance_km"],
+            "load": route["load"],
+            "estimated_time": route["duration_minutes"],
+            "priority": "high" if total_quantity > 50 else "normal"
+        })
+    
+    unassigned = [deliveries_list[i] for i in solution["unassigned"]]
+    if unassigned:
+        logger.warning(f"⚠️ {len(unassigned)} dostav presega kapaciteto vseh vozil")
+    
+    logger.info(f"🗺️ VRP: {len(deliveries_list)} dostav v {len(optimized_routes)} poteh, "
+                f"{solution['total_distance_km']:.1f} km ({solution['timings']['total_seconds']:.1f}s)")
+    return {
+        "message": f"Optimizirane poti za {len(deliveries_list)} dostav z {len(vehicles)} vozili",
+        "optimized_routes": optimized_routes,
+        "total_deliveries": len(deliveries_list),
+        "estimated_total_time": sum(r["estimated_time"] for r in optimized_routes),
+        "total_distance_km": solution["total_distance_km"],
+        "unassigned_deliveries": unassigned
+    }
+
 def generate_restock_recommendations():
     """Generiraj priporočila za dopolnitev zalog"""
     recommendations = []
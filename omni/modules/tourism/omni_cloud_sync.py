@@ -2,6 +2,13 @@
 """
 Omni Cloud Sync - Avtomatska sinhronizacija vseh modulov preko oblaka
 Omogoča real-time sinhronizacijo, backup, replikacijo in distribuirano upravljanje
+
+Izmenjava med vozlišči:
+- seznam elementov je inkrementalen (GET /api/sync/items?since=N&epoch=E vrne
+  le elemente, spremenjene po zaporedni številki N)
+- datoteke se prenašajo po vsebinsko določenih kosih: prejemnik pridobi
+  manifest kosov in zahteva le kose, ki jih lokalno še nima
+- vozlišča se sinhronizirajo vzporedno v omejenem thread poolu
 """
 
 import os
@@ -22,10 +29,10 @@ from pathlib import Path
 import secrets
 import uuid
 from contextlib import contextmanager
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Flask in dodatne knjižnice
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, flash
 import psutil
 from functools import wraps
 try:
@@ -33,6 +40,16 @@ try:
 except ImportError:
     requests = None
 
+try:
+    from .sync_change_detector import FileChangeDetector, file_checksum
+except ImportError:
+    from sync_change_detector import FileChangeDetector, file_checksum
+
+try:
+    from .sync_chunking import assemble, build_file_manifest, build_manifest, missing_chunks, split_chunks
+except ImportError:
+    from sync_chunking import assemble, build_file_manifest, build_manifest, missing_chunks, split_chunks
+
 # Nastavi logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +57,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CHUNK_BATCH_SIZE = 256  # največ kosov na en zahtevek
+
 class SyncStatus(Enum):
     """Status sinhronizacije"""
     IDLE = "idle"
@@ -81,6 +100,7 @@ class SyncItem:
     status: SyncStatus
     version: int
     metadata: Dict[str, Any]
+    sync_seq: int = 0  # lokalna zaporedna številka zadnje spremembe
     
     def to_dict(self) -> Dict:
         return {
@@ -93,7 +113,8 @@ class SyncItem:
             'priority': self.priority.value,
             'status': self.status.value,
             'version': self.version,
-            'metadata': self.metadata
+            'metadata': self.metadata,
+            'sync_seq': self.sync_seq
         }
 
 @dataclass
@@ -147,9 +168,19 @@ class SyncConflict:
 class OmniCloudSync:
     """Napredni sistem za avtomatsko sinhronizacijo modulov"""
     
-    def __init__(self, db_path: str = "omni_cloud_sync.db", node_id: str = None):
+    def __init__(self, db_path: str = "omni_cloud_sync.db", node_id: str = None,
+                 sync_root: str = None, max_concurrent_node_syncs: int = 4):
+        """
+        Args:
+            db_path: Pot do SQLite baze
+            node_id: ID vozlišča (privzeto naključen)
+            sync_root: Korenski direktorij sinhronizacije; moduli so v <sync_root>/<tip modula>,
+                       poti med vozlišči pa se izmenjujejo relativno na koren
+            max_concurrent_node_syncs: Največ hkratnih sinhronizacij z vozlišči
+        """
         self.db_path = db_path
         self.node_id = node_id or str(uuid.uuid4())
+        self.sync_root = Path(sync_root).resolve() if sync_root else None
         self.secret_key = secrets.token_hex(32)
         
         # Inicializiraj Flask aplikacijo
@@ -160,6 +191,22 @@ class OmniCloudSync:
         self.sync_items: Dict[str, SyncItem] = {}
         self.sync_nodes: Dict[str, SyncNode] = {}
         self.sync_conflicts: Dict[str, SyncConflict] = {}
+        self.items_lock = threading.RLock()
+        
+        # Inkrementalni seznam: vsaka sprememba elementa dobi novo zaporedno številko.
+        # Epoha se ob ponovnem zagonu spremeni, zato vozlišča takrat zahtevajo poln seznam.
+        self.sync_sequence = 0
+        self.sync_epoch = uuid.uuid4().hex
+        self.node_sequences: Dict[str, Tuple[str, int]] = {}  # node_id -> (epoha, zaporedna številka)
+        
+        # Manifesti kosov (pot -> manifest), veljavni dokler se size/mtime ne spremenita
+        self.manifest_cache: Dict[str, Dict] = {}
+        self.transfer_stats = {
+            'delta_downloads': 0,
+            'full_downloads': 0,
+            'bytes_transferred': 0,
+            'bytes_reused': 0
+        }
         
         # Konfiguracija
         self.sync_interval = 30  # sekund
@@ -169,6 +216,11 @@ class OmniCloudSync:
         
         # Thread pool za asinhrone operacije
         self.executor = ThreadPoolExecutor(max_workers=10)
+        self.node_executor = ThreadPoolExecutor(max_workers=max_concurrent_node_syncs, thread_name_prefix="sync-node")
+        self.node_syncs_running: Set[str] = set()
+        
+        # Zaznavanje sprememb (podpisi datotek + opazovanje direktorijev)
+        self.change_detector = FileChangeDetector(hash_workers=4)
         
         # Inicializiraj sistem
         self.init_database()
@@ -269,12 +321,41 @@ class OmniCloudSync:
                 'items_count': len(self.sync_items),
                 'nodes_count': len(self.sync_nodes),
                 'conflicts_count': len(self.sync_conflicts),
-                'last_sync': self.get_last_sync_time()
+                'last_sync': self.get_last_sync_time(),
+                'change_detection': self.change_detector.get_stats(),
+                'sequence': self.sync_sequence,
+                'transfer': dict(self.transfer_stats)
             })
         
         @self.app.route('/api/sync/items')
         def get_sync_items():
-            return jsonify([item.to_dict() for item in self.sync_items.values()])
+            since = request.args.get('since', type=int)
+            if since is None:
+                with self.items_lock:
+                    return jsonify([item.to_dict() for item in self.sync_items.values()])
+            return jsonify(self.get_items_since(since, request.args.get('epoch')))
+        
+        @self.app.route('/api/sync/manifest/<item_id>')
+        def get_item_manifest(item_id):
+            manifest = self.get_item_manifest(item_id)
+            if manifest is None:
+                return jsonify({'error': 'File not found'}), 404
+            return jsonify(manifest)
+        
+        @self.app.route('/api/sync/chunks/<item_id>', methods=['POST'])
+        def get_item_chunks(item_id):
+            content = self.read_chunks(item_id, (request.json or {}).get('hashes', []))
+            if content is None:
+                return jsonify({'error': 'Chunks not found'}), 404
+            return self._binary_response(content)
+        
+        @self.app.route('/api/heartbeat', methods=['POST'])
+        def heartbeat():
+            node = self.sync_nodes.get((request.json or {}).get('node_id'))
+            if node:
+                node.last_seen = datetime.now()
+                node.status = 'active'
+            return jsonify({'node_id': self.node_id, 'status': 'active'})
         
         @self.app.route('/api/sync/nodes')
         def get_sync_nodes():
@@ -317,8 +398,8 @@ class OmniCloudSync:
         @self.app.route('/api/sync/download/<item_id>')
         def download_file(item_id):
             content = self.download_file(item_id)
-            if content:
-                return content
+            if content is not None:
+                return self._binary_response(content, compressed=self.compression_enabled)
             else:
                 return jsonify({'error': 'File not found'}), 404
     
@@ -329,18 +410,26 @@ class OmniCloudSync:
             base_dir = Path(__file__).parent.parent.parent
             
             # Definiraj module in njihove poti
-            module_paths = {
-                ModuleType.CORE: base_dir / "omnicore-global",
-                ModuleType.TOURISM: base_dir / "omni" / "modules" / "tourism",
-                ModuleType.SECURITY: base_dir / "omni" / "security",
-                ModuleType.ADMIN: base_dir / "omni" / "admin",
-                ModuleType.API: base_dir / "api",
-                ModuleType.DATABASE: base_dir / "database"
-            }
+            if self.sync_root is not None:
+                module_paths = {module_type: self.sync_root / module_type.value for module_type in ModuleType}
+            else:
+                module_paths = {
+                    ModuleType.CORE: base_dir / "omnicore-global",
+                    ModuleType.TOURISM: base_dir / "omni" / "modules" / "tourism",
+                    ModuleType.SECURITY: base_dir / "omni" / "security",
+                    ModuleType.ADMIN: base_dir / "omni" / "admin",
+                    ModuleType.API: base_dir / "api",
+                    ModuleType.DATABASE: base_dir / "database"
+                }
             
+            watched_paths = []
             for module_type, module_path in module_paths.items():
                 if module_path.exists():
                     self.scan_module_files(module_type, module_path)
+                    watched_paths.append(module_path)
+            
+            # Opazuj direktorije modulov, da mirni cikli ne pregledujejo datotek
+            self.change_detector.watch(watched_paths)
             
             logger.info(f"Odkritih {len(self.sync_items)} datotek za sinhronizacijo")
             
@@ -361,7 +450,9 @@ class OmniCloudSync:
                     # Ustvari sync item
                     item = self.create_sync_item(module_type, file_path)
                     if item:
-                        self.sync_items[item.id] = item
+                        with self.items_lock:
+                            self.sync_items[item.id] = item
+                            self._touch_item(item)
                         self.save_sync_item(item)
                         
         except Exception as e:
@@ -370,13 +461,24 @@ class OmniCloudSync:
     def create_sync_item(self, module_type: ModuleType, file_path: Path) -> Optional[SyncItem]:
         """Ustvari sinhronizacijski element"""
         try:
+            # Metadata pred checksum, da sprememba med računanjem ne ostane neopažena
+            stat = file_path.stat()
+            
             # Izračunaj checksum
             checksum = self.calculate_checksum(file_path)
             if not checksum:
                 return None
             
-            # Pridobi metadata
-            stat = file_path.stat()
+            self.change_detector.record(str(file_path), stat)
+            
+            metadata = {
+                'extension': file_path.suffix,
+                'relative_path': str(file_path.relative_to(file_path.parent.parent)),
+                'encoding': 'utf-8'
+            }
+            sync_path = self._sync_path_for(file_path)
+            if sync_path:
+                metadata['sync_path'] = sync_path
             
             item = SyncItem(
                 id=str(uuid.uuid4()),
@@ -388,11 +490,7 @@ class OmniCloudSync:
                 priority=self.determine_priority(file_path),
                 status=SyncStatus.IDLE,
                 version=1,
-                metadata={
-                    'extension': file_path.suffix,
-                    'relative_path': str(file_path.relative_to(file_path.parent.parent)),
-                    'encoding': 'utf-8'
-                }
+                metadata=metadata
             )
             
             return item
@@ -403,15 +501,97 @@ class OmniCloudSync:
     
     def calculate_checksum(self, file_path: Path) -> Optional[str]:
         """Izračunaj checksum datoteke"""
+        return file_checksum(str(file_path))
+    
+    def _sync_path_for(self, file_path: Path) -> Optional[str]:
+        """Pot datoteke relativno na sync_root (enaka na vseh vozliščih)"""
+        if self.sync_root is None:
+            return None
         try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
-        except Exception as e:
-            logger.error(f"Napaka pri računanju checksum za {file_path}: {e}")
+            return Path(file_path).resolve().relative_to(self.sync_root).as_posix()
+        except ValueError:
+            return None
+    
+    def _local_path_for(self, remote_item_data: Dict) -> Optional[Path]:
+        """Lokalna pot za oddaljeni element"""
+        sync_path = remote_item_data.get('metadata', {}).get('sync_path')
+        if self.sync_root is None or not sync_path:
+            return Path(remote_item_data['file_path'])
+        
+        target = (self.sync_root / sync_path).resolve()
+        if self.sync_root not in target.parents:
+            logger.warning(f"Zavrnjena pot izven sync_root: {sync_path}")
             return None
+        return target
+    
+    def _touch_item(self, item: SyncItem):
+        """Dodeli elementu novo zaporedno številko (element pride v naslednji inkrementalni seznam)"""
+        with self.items_lock:
+            self.sync_sequence += 1
+            item.sync_seq = self.sync_sequence
+    
+    def get_items_since(self, since: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Elementi, spremenjeni po zaporedni številki since
+        
+        Če epoha ne ustreza trenutni (vozlišče se je medtem ponovno zagnalo),
+        se vrnejo vsi elementi.
+        """
+        with self.items_lock:
+            if epoch != self.sync_epoch:
+                since = 0
+            return {
+                'node_id': self.node_id,
+                'epoch': self.sync_epoch,
+                'sequence': self.sync_sequence,
+                'items': [item.to_dict() for item in self.sync_items.values() if item.sync_seq > since]
+            }
+    
+    def get_item_manifest(self, item_id: str) -> Optional[Dict]:
+        """Manifest kosov datoteke elementa (predpomnjen, dokler se datoteka ne spremeni)"""
+        item = self.sync_items.get(item_id)
+        if item is None:
+            return None
+        try:
+            stat = os.stat(item.file_path)
+            manifest = self.manifest_cache.get(item.file_path)
+            if manifest is None or manifest['size'] != stat.st_size or manifest['mtime_ns'] != stat.st_mtime_ns:
+                manifest = build_file_manifest(item.file_path)
+                self.manifest_cache[item.file_path] = manifest
+            return manifest
+        except OSError as e:
+            logger.error(f"Napaka pri izdelavi manifesta za {item.file_path}: {e}")
+            return None
+    
+    def read_chunks(self, item_id: str, hashes: List[str]) -> Optional[bytes]:
+        """Vsebina zahtevanih kosov v podanem vrstnem redu"""
+        manifest = self.get_item_manifest(item_id)
+        if manifest is None:
+            return None
+        chunks = {chunk['hash']: chunk for chunk in manifest['chunks']}
+        if any(chunk_hash not in chunks for chunk_hash in hashes):
+            return None
+        
+        parts = []
+        try:
+            with open(self.sync_items[item_id].file_path, 'rb') as f:
+                for chunk_hash in hashes:
+                    f.seek(chunks[chunk_hash]['offset'])
+                    parts.append(f.read(chunks[chunk_hash]['size']))
+        except (OSError, KeyError) as e:
+            logger.error(f"Napaka pri branju kosov: {e}")
+            return None
+        return b"".join(parts)
+    
+    def _binary_response(self, content: bytes, compressed: bool = False) -> Response:
+        """Binaren odgovor; stisnjena vsebina je označena s Content-Encoding"""
+        if self.compression_enabled and not compressed:
+            content = gzip.compress(content, compresslevel=1)
+            compressed = True
+        response = Response(content, mimetype='application/octet-stream')
+        if compressed:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
     
     def determine_priority(self, file_path: Path) -> SyncPriority:
         """Določi prioriteto datoteke"""
@@ -464,19 +644,32 @@ class OmniCloudSync:
                 time.sleep(60)
     
     def check_for_changes(self):
-        """Preveri za spremembe v datotekah"""
+        """
+        Preveri za spremembe v datotekah
+        
+        Checksum se ponovno izračuna le za datoteke, ki jih je označilo opazovanje
+        direktorijev ali katerih (size, mtime_ns, inode) se je spremenil.
+        """
         try:
             changed_items = []
             
-            for item in self.sync_items.values():
-                if Path(item.file_path).exists():
-                    current_checksum = self.calculate_checksum(Path(item.file_path))
+            items_by_path = {}
+            for item in list(self.sync_items.values()):
+                items_by_path.setdefault(item.file_path, []).append(item)
+            
+            candidates = self.change_detector.changed_paths(items_by_path)
+            checksums = self.change_detector.hash_files(candidates)
+            
+            for file_path, current_checksum in checksums.items():
+                for item in items_by_path[file_path]:
                     if current_checksum and current_checksum != item.checksum:
                         # Datoteka se je spremenila
                         item.checksum = current_checksum
+                        item.size = candidates[file_path].st_size
                         item.last_modified = datetime.now()
                         item.version += 1
                         item.status = SyncStatus.SYNCING
+                        self._touch_item(item)
                         changed_items.append(item)
             
             # Shrani spremembe
@@ -490,62 +683,149 @@ class OmniCloudSync:
         except Exception as e:
             logger.error(f"Napaka pri preverjanju sprememb: {e}")
     
+    def register_node(self, node_id: str, name: str, endpoint: str,
+                      modules: Optional[Set[ModuleType]] = None) -> SyncNode:
+        """Dodaj vozlišče, s katerim se sinhronizira"""
+        node = SyncNode(
+            id=node_id,
+            name=name,
+            endpoint=endpoint.rstrip('/'),
+            status='active',
+            last_seen=datetime.now(),
+            modules=modules or set(ModuleType),
+            capabilities=['sync', 'upload', 'download', 'conflict_resolution', 'chunked_transfer']
+        )
+        self.sync_nodes[node.id] = node
+        self.save_node(node)
+        return node
+    
     def sync_with_nodes(self):
-        """Sinhroniziraj z drugimi vozlišči"""
+        """
+        Sinhroniziraj z drugimi vozlišči
+        
+        Vozlišča se obdelajo vzporedno v omejenem poolu; vozlišče, katerega
+        prejšnja sinhronizacija še teče, se preskoči.
+        """
         try:
-            for node in self.sync_nodes.values():
-                if node.status == 'active':
-                    self.sync_with_node(node)
+            futures = []
+            for node in list(self.sync_nodes.values()):
+                if node.status == 'active' and node.id not in self.node_syncs_running:
+                    self.node_syncs_running.add(node.id)
+                    futures.append(self.node_executor.submit(self._sync_node_task, node))
+            wait(futures)
                     
         except Exception as e:
             logger.error(f"Napaka pri sinhronizaciji z vozlišči: {e}")
     
-    def sync_with_node(self, node: SyncNode):
-        """Sinhroniziraj z določenim vozliščem"""
+    def _sync_node_task(self, node: SyncNode) -> bool:
+        try:
+            return self.sync_with_node(node)
+        finally:
+            self.node_syncs_running.discard(node.id)
+    
+    def sync_with_node(self, node: SyncNode) -> bool:
+        """
+        Sinhroniziraj z določenim vozliščem
+        
+        Zahteva le elemente, spremenjene od zadnje uspešne sinhronizacije. Zaporedna
+        številka se premakne naprej le, če so bili vsi elementi uspešno obdelani.
+        """
         try:
             if not requests:
                 logger.warning("Requests knjižnica ni na voljo - preskačem sinhronizacijo")
-                return
-                
-            # Pridobi seznam datotek z vozlišča
-            response = requests.get(f"{node.endpoint}/api/sync/items", timeout=30)
-            if response.status_code == 200:
-                remote_items = response.json()
+                return False
+            
+            epoch, since = self.node_sequences.get(node.id, (None, 0))
+            params = {'since': since}
+            if epoch:
+                params['epoch'] = epoch
                 
-                # Primerjaj z lokalnimi datotekami
-                for remote_item_data in remote_items:
-                    self.process_remote_item(remote_item_data, node)
+            # Pridobi seznam spremenjenih datotek z vozlišča
+            response = requests.get(f"{node.endpoint}/api/sync/items", params=params, timeout=30)
+            if response.status_code != 200:
+                return False
+            
+            data = response.json()
+            if isinstance(data, list):
+                # Vozlišče brez inkrementalnega seznama vrne vse elemente
+                remote_items, epoch, sequence = data, None, 0
+            else:
+                remote_items, epoch, sequence = data['items'], data['epoch'], data['sequence']
+            
+            # Primerjaj z lokalnimi datotekami
+            results = [self.process_remote_item(remote_item_data, node) for remote_item_data in remote_items]
+            success = all(results)
+            if success and epoch:
+                self.node_sequences[node.id] = (epoch, sequence)
+            
+            node.last_seen = datetime.now()
+            self.log_sync_action("sync_completed", None, "success" if success else "partial",
+                                 f"{node.name}: {len(remote_items)} elementov")
+            return success
             
         except Exception as e:
             logger.error(f"Napaka pri sinhronizaciji z vozliščem {node.name}: {e}")
+            return False
     
-    def process_remote_item(self, remote_item_data: Dict, node: SyncNode):
-        """Obdelaj oddaljeni element"""
-        try:
-            remote_item_id = remote_item_data['id']
-            
-            # Poišči lokalni element
-            local_item = None
+    def _find_local_item(self, remote_item_data: Dict) -> Optional[SyncItem]:
+        """Lokalni element, ki ustreza oddaljenemu (po sync_path oziroma poti datoteke)"""
+        sync_path = remote_item_data.get('metadata', {}).get('sync_path')
+        with self.items_lock:
+            item = self.sync_items.get(remote_item_data['id'])
+            if item is not None:
+                return item
             for item in self.sync_items.values():
-                if (item.file_path == remote_item_data['file_path'] and
-                    item.module_type.value == remote_item_data['module_type']):
-                    local_item = item
-                    break
-            
-            if local_item:
-                # Preveri za konflikte
-                if (local_item.checksum != remote_item_data['checksum'] and
-                    local_item.version != remote_item_data['version']):
-                    self.create_conflict(local_item, remote_item_data)
-                elif remote_item_data['version'] > local_item.version:
-                    # Prenesi novejšo verzijo
-                    self.download_from_node(remote_item_data, node)
-            else:
+                if item.module_type.value != remote_item_data['module_type']:
+                    continue
+                if sync_path and self.sync_root is not None:
+                    if item.metadata.get('sync_path') == sync_path:
+                        return item
+                elif item.file_path == remote_item_data['file_path']:
+                    return item
+        return None
+    
+    def process_remote_item(self, remote_item_data: Dict, node: SyncNode) -> bool:
+        """
+        Obdelaj oddaljeni element
+        
+        base_checksum je vsebina, o kateri sta se vozlišči nazadnje strinjali: če je
+        lokalna datoteka od takrat nespremenjena, se prenese oddaljena, če se je
+        spremenila le lokalna, se ne naredi nič, če sta se obe, nastane konflikt.
+        """
+        try:
+            local_item = self._find_local_item(remote_item_data)
+            if local_item is None:
                 # Nova datoteka - prenesi
-                self.download_from_node(remote_item_data, node)
+                return self.download_from_node(remote_item_data, node)
+            
+            remote_checksum = remote_item_data['checksum']
+            base_checksum = local_item.metadata.get('base_checksum')
+            
+            if local_item.checksum == remote_checksum:
+                if base_checksum != remote_checksum:
+                    local_item.metadata['base_checksum'] = remote_checksum
+                    self.save_sync_item(local_item)
+                return True
+            
+            if base_checksum == local_item.checksum:
+                # Spremenjena je le oddaljena datoteka
+                return self.download_from_node(remote_item_data, node)
+            if base_checksum == remote_checksum:
+                # Spremenjena je le lokalna datoteka - prenese jo drugo vozlišče
+                return True
+            
+            if base_checksum is None:
+                if remote_item_data['version'] > local_item.version:
+                    return self.download_from_node(remote_item_data, node)
+                if remote_item_data['version'] < local_item.version:
+                    return True
+            
+            self.create_conflict(local_item, remote_item_data)
+            return True
                 
         except Exception as e:
             logger.error(f"Napaka pri obdelavi oddaljenega elementa: {e}")
+            return False
     
     def create_conflict(self, local_item: SyncItem, remote_item_data: Dict):
         """Ustvari konflikt"""
@@ -570,36 +850,100 @@ class OmniCloudSync:
         except Exception as e:
             logger.error(f"Napaka pri ustvarjanju konflikta: {e}")
     
-    def download_from_node(self, remote_item_data: Dict, node: SyncNode):
-        """Prenesi datoteko z vozlišča"""
+    def download_from_node(self, remote_item_data: Dict, node: SyncNode) -> bool:
+        """
+        Prenesi datoteko z vozlišča
+        
+        Če lokalna datoteka obstaja, se prenesejo le kosi, ki jih lokalno ni; ob
+        napaki se prenese celotna datoteka. Zapis je atomaren (začasna datoteka + replace).
+        """
         try:
             if not requests:
                 logger.warning("Requests knjižnica ni na voljo - preskačem prenos")
-                return
-                
-            response = requests.get(
-                f"{node.endpoint}/api/sync/download/{remote_item_data['id']}", 
-                timeout=60
-            )
+                return False
+            
+            local_item = self._find_local_item(remote_item_data)
+            file_path = Path(local_item.file_path) if local_item else self._local_path_for(remote_item_data)
+            if file_path is None:
+                return False
             
-            if response.status_code == 200:
-                # Shrani datoteko
-                file_path = Path(remote_item_data['file_path'])
+            content = None
+            if file_path.exists():
+                content = self._download_delta(remote_item_data, node, file_path)
+            if content is None:
+                content = self._download_full(remote_item_data, node)
+            if content is None:
+                return False
+            
+            if hashlib.md5(content).hexdigest() != remote_item_data['checksum']:
+                # Datoteka se je na vozlišču medtem spremenila; nova različica pride v naslednjem ciklu
+                logger.warning(f"Checksum prenesene datoteke se ne ujema: {file_path}")
+                return False
+            
+            with self.items_lock:
                 file_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                content = response.content
-                if self.compression_enabled and 'compressed' in remote_item_data.get('metadata', {}):
-                    content = gzip.decompress(content)
-                
-                file_path.write_bytes(content)
+                tmp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.tmp")
+                tmp_path.write_bytes(content)
+                os.replace(tmp_path, file_path)
                 
                 # Posodobi sync item
-                self.update_sync_item_from_remote(remote_item_data)
-                
-                logger.info(f"Prenesena datoteka: {file_path}")
+                self.update_sync_item_from_remote(remote_item_data, file_path)
+            
+            logger.info(f"Prenesena datoteka: {file_path}")
+            return True
                 
         except Exception as e:
             logger.error(f"Napaka pri prenosu datoteke: {e}")
+            return False
+    
+    def _download_delta(self, remote_item_data: Dict, node: SyncNode, file_path: Path) -> Optional[bytes]:
+        """Sestavi novo različico iz lokalnih kosov in manjkajočih kosov z vozlišča"""
+        try:
+            response = requests.get(f"{node.endpoint}/api/sync/manifest/{remote_item_data['id']}", timeout=30)
+            if response.status_code != 200:
+                return None
+            remote_manifest = response.json()
+            
+            local_data = file_path.read_bytes()
+            local_manifest = build_manifest(local_data)
+            missing = missing_chunks(remote_manifest, local_manifest)
+            
+            fetched = {}
+            for start in range(0, len(missing), CHUNK_BATCH_SIZE):
+                batch = missing[start:start + CHUNK_BATCH_SIZE]
+                response = requests.post(
+                    f"{node.endpoint}/api/sync/chunks/{remote_item_data['id']}",
+                    json={'hashes': [chunk['hash'] for chunk in batch]},
+                    timeout=60
+                )
+                if response.status_code != 200:
+                    return None
+                fetched.update(split_chunks(response.content, batch))
+            
+            content = assemble(remote_manifest, fetched, local_data, local_manifest)
+            transferred = sum(chunk['size'] for chunk in missing)
+            self.transfer_stats['delta_downloads'] += 1
+            self.transfer_stats['bytes_transferred'] += transferred
+            self.transfer_stats['bytes_reused'] += len(content) - transferred
+            return content
+        
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Delta prenos ni uspel, prenašam celotno datoteko: {e}")
+            return None
+    
+    def _download_full(self, remote_item_data: Dict, node: SyncNode) -> Optional[bytes]:
+        """Prenesi celotno datoteko (gzip dekodira requests po Content-Encoding)"""
+        response = requests.get(
+            f"{node.endpoint}/api/sync/download/{remote_item_data['id']}", 
+            timeout=60
+        )
+        if response.status_code != 200:
+            return None
+        
+        content = response.content
+        self.transfer_stats['full_downloads'] += 1
+        self.transfer_stats['bytes_transferred'] += len(content)
+        return content
     
     def upload_file(self, file, module_type: ModuleType) -> Tuple[bool, Optional[str]]:
         """Naloži datoteko"""
@@ -613,7 +957,9 @@ class OmniCloudSync:
             # Ustvari sync item
             item = self.create_sync_item(module_type, file_path)
             if item:
-                self.sync_items[item.id] = item
+                with self.items_lock:
+                    self.sync_items[item.id] = item
+                    self._touch_item(item)
                 self.save_sync_item(item)
                 return True, item.id
             
@@ -741,6 +1087,28 @@ class OmniCloudSync:
         except Exception as e:
             logger.error(f"Napaka pri čiščenju vozlišč: {e}")
     
+    def save_node(self, node: SyncNode):
+        """Shrani vozlišče v bazo"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO sync_nodes 
+                    (id, name, endpoint, status, last_seen, modules, capabilities)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    node.id,
+                    node.name,
+                    node.endpoint,
+                    node.status,
+                    node.last_seen,
+                    json.dumps([m.value for m in node.modules]),
+                    json.dumps(node.capabilities)
+                ))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Napaka pri shranjevanju vozlišča: {e}")
+    
     def save_sync_item(self, item: SyncItem):
         """Shrani sync item v bazo"""
         try:
@@ -832,35 +1200,38 @@ class OmniCloudSync:
         
         return None
     
-    def update_sync_item_from_remote(self, remote_item_data: Dict):
+    def update_sync_item_from_remote(self, remote_item_data: Dict, file_path: Optional[Path] = None):
         """Posodobi sync item iz oddaljenih podatkov"""
         try:
-            # Poišči ali ustvari lokalni item
-            item_id = remote_item_data['id']
-            
-            if item_id in self.sync_items:
-                item = self.sync_items[item_id]
-            else:
-                item = SyncItem(
-                    id=item_id,
-                    module_type=ModuleType(remote_item_data['module_type']),
-                    file_path=remote_item_data['file_path'],
-                    checksum=remote_item_data['checksum'],
-                    size=remote_item_data['size'],
-                    last_modified=datetime.fromisoformat(remote_item_data['last_modified']),
-                    priority=SyncPriority(remote_item_data['priority']),
-                    status=SyncStatus(remote_item_data['status']),
-                    version=remote_item_data['version'],
-                    metadata=remote_item_data['metadata']
-                )
-                self.sync_items[item_id] = item
-            
-            # Posodobi podatke
-            item.checksum = remote_item_data['checksum']
-            item.version = remote_item_data['version']
-            item.last_modified = datetime.fromisoformat(remote_item_data['last_modified'])
-            item.status = SyncStatus.COMPLETED
+            with self.items_lock:
+                # Poišči ali ustvari lokalni item
+                item = self._find_local_item(remote_item_data)
+                if item is None:
+                    item = SyncItem(
+                        id=remote_item_data['id'],
+                        module_type=ModuleType(remote_item_data['module_type']),
+                        file_path=str(file_path or remote_item_data['file_path']),
+                        checksum=remote_item_data['checksum'],
+                        size=remote_item_data['size'],
+                        last_modified=datetime.fromisoformat(remote_item_data['last_modified']),
+                        priority=SyncPriority(remote_item_data['priority']),
+                        status=SyncStatus(remote_item_data['status']),
+                        version=remote_item_data['version'],
+                        metadata=dict(remote_item_data['metadata'])
+                    )
+                    self.sync_items[item.id] = item
+                
+                # Posodobi podatke
+                item.checksum = remote_item_data['checksum']
+                item.size = remote_item_data['size']
+                item.version = remote_item_data['version']
+                item.last_modified = datetime.fromisoformat(remote_item_data['last_modified'])
+                item.status = SyncStatus.COMPLETED
+                item.metadata['base_checksum'] = item.checksum
+                self._touch_item(item)
             
+            # Zapisana datoteka ne sme biti v naslednjem ciklu zaznana kot lokalna sprememba
+            self.change_detector.record(item.file_path)
             self.save_sync_item(item)
             
         except Exception as e:
@@ -879,6 +1250,8 @@ class OmniCloudSync:
         """Ustavi cloud sync"""
         self.sync_active = False
         self.executor.shutdown(wait=True)
+        self.node_executor.shutdown(wait=True)
+        self.change_detector.stop()
         logger.info("Cloud Sync ustavljen")
 
 def demo_cloud_sync():
@@ -23,6 +23,9 @@ import base64
 import os
 import time
 import threading
+import queue
+import atexit
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import asyncio
 import platform
@@ -53,6 +56,23 @@ class OmniLicenseSystemEnhanced:
         self.encryption_key = Fernet.generate_key()
         self.fernet = Fernet(self.encryption_key)
         
+        # Predpomnilnik uspešnih preverjanj licenc (client_id, license_key, fingerprint)
+        self.validation_cache_ttl = 30  # sekund
+        self.validation_cache_max_entries = 10000
+        self.validation_cache = OrderedDict()
+        self.validation_cache_lock = threading.Lock()
+        self.validation_cache_generation = {}  # client_id -> števec invalidacij
+        self.validation_cache_epoch = 0  # števec invalidacij celotnega predpomnilnika
+        self.validation_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        
+        # Odloženi zapisi (števci uporabe, last_seen naprav, audit logi) se pišejo v paketih
+        self.write_flush_interval = 1.0  # sekund
+        self.write_batch_size = 500
+        self.pending_writes = queue.Queue()
+        self.pending_writes_lock = threading.Lock()
+        self.pending_writes_event = threading.Event()
+        atexit.register(self.flush_pending_writes)
+        
         # Licenčni paketi
         self.license_plans = {
             "demo": {
@@ -399,46 +419,67 @@ class OmniLicenseSystemEnhanced:
             conn.close()
 
     def validate_license(self, client_id, license_key, hardware_fingerprint=None, request_ip=None):
-        """Preveri veljavnost licence"""
+        """
+        Preveri veljavnost licence
+        
+        Uspešna preverjanja se za validation_cache_ttl sekund shranijo v predpomnilnik,
+        zato ponavljajoči heartbeati ne berejo baze. Števec uporabe, last_seen naprave
+        in audit zapis uspešnega preverjanja se zapišejo odloženo v paketu.
+        """
+        cache_key = (client_id, license_key, hardware_fingerprint)
+        now = datetime.now()
+        
+        with self.validation_cache_lock:
+            cached = self.validation_cache.get(cache_key)
+            if cached and time.monotonic() < cached["cached_until"] and now <= cached["expires_at"]:
+                self.validation_cache.move_to_end(cache_key)
+                self.validation_cache_stats["hits"] += 1
+                response = dict(cached["response"])
+            else:
+                if cached:
+                    del self.validation_cache[cache_key]
+                self.validation_cache_stats["misses"] += 1
+                response = None
+            generation = (self.validation_cache_epoch, self.validation_cache_generation.get(client_id, 0))
+        
+        if response is not None:
+            response.update(self._expiry_fields(cached["expires_at"], now))
+            self._record_successful_validation(client_id, hardware_fingerprint, request_ip)
+            return response
+        
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT * FROM licenses 
+            SELECT * FROM licenses
             WHERE client_id = ? AND license_key = ? AND is_active = 1
         ''', (client_id, license_key))
         
         license_data = cursor.fetchone()
         
         if not license_data:
-            self.log_audit(client_id, None, "LICENSE_VALIDATION_FAILED", "Licenca ni najdena", 
+            self.log_audit(client_id, None, "LICENSE_VALIDATION_FAILED", "Licenca ni najdena",
                           ip_address=request_ip, success=False, risk_level="medium")
             conn.close()
             return {"valid": False, "error": "Licenca ni najdena"}
         
         # Preveri datum poteka
-        expires_at = datetime.fromisoformat(license_data[9])  # expires_at
-        if datetime.now() > expires_at:
-            self.log_audit(client_id, None, "LICENSE_EXPIRED", f"Potekla: {expires_at}", 
+        expires_at = datetime.fromisoformat(license_data["expires_at"])
+        if now > expires_at:
+            self.log_audit(client_id, None, "LICENSE_EXPIRED", f"Potekla: {expires_at}",
                           ip_address=request_ip, success=False, risk_level="low")
             conn.close()
             return {"valid": False, "error": "Licenca je potekla", "expired_at": expires_at.isoformat()}
         
         # Preveri plačilni status
-        payment_status = license_data[18]  # payment_status
+        payment_status = license_data["payment_status"]
         if payment_status == "suspended":
-            self.log_audit(client_id, None, "LICENSE_SUSPENDED", "Plačilo ni urejeno", 
+            self.log_audit(client_id, None, "LICENSE_SUSPENDED", "Plačilo ni urejeno",
                           ip_address=request_ip, success=False, risk_level="high")
             conn.close()
             return {"valid": False, "error": "Licenca je začasno onemogočena zaradi neplačila"}
         
-        # Posodobi zadnji preverjanje
-        cursor.execute('''
-            UPDATE licenses 
-            SET last_check = CURRENT_TIMESTAMP, usage_count = usage_count + 1
-            WHERE client_id = ?
-        ''', (client_id,))
-        
         # Če je podan hardware fingerprint, preveri aktivacije
         if hardware_fingerprint:
             activation_result = self.handle_hardware_activation(cursor, client_id, hardware_fingerprint, request_ip)
@@ -447,37 +488,148 @@ class OmniLicenseSystemEnhanced:
                 return {"valid": False, "error": activation_result["error"]}
         
         conn.commit()
+        conn.close()
         
         # Pripravi odgovor
-        active_modules = json.loads(license_data[15] or '[]')  # active_modules
-        plan = license_data[3]  # plan
-        
-        # Preveri, ali se licenca bliža poteku
-        days_until_expiry = (expires_at - datetime.now()).days
-        expiry_warning = None
-        if days_until_expiry <= 7:
-            expiry_warning = f"Licenca poteče čez {days_until_expiry} dni"
-        
         response = {
             "valid": True,
             "client_id": client_id,
-            "plan": plan,
+            "plan": license_data["plan"],
             "expires_at": expires_at.isoformat(),
-            "days_until_expiry": days_until_expiry,
-            "active_modules": active_modules,
-            "max_users": license_data[12],  # max_users
-            "max_locations": license_data[13],  # max_locations
-            "company_name": license_data[4],  # company_name
-            "payment_status": payment_status,
-            "expiry_warning": expiry_warning
-        }
+            "active_modules": json.loads(license_data["active_modules"] or '[]'),
+            "max_users": license_data["max_users"],
+            "max_locations": license_data["max_locations"],
+            "company_name": license_data["company_name"],
+            "payment_status": payment_status
+        }
+        
+        # Shrani v predpomnilnik, če licenca medtem ni bila spremenjena
+        with self.validation_cache_lock:
+            if (self.validation_cache_epoch, self.validation_cache_generation.get(client_id, 0)) == generation:
+                self.validation_cache[cache_key] = {
+                    "response": dict(response),
+                    "expires_at": expires_at,
+                    "cached_until": time.monotonic() + self.validation_cache_ttl
+                }
+                while len(self.validation_cache) > self.validation_cache_max_entries:
+                    self.validation_cache.popitem(last=False)
         
-        self.log_audit(client_id, None, "LICENSE_VALIDATED", "Uspešno preverjanje", 
-                      ip_address=request_ip, success=True, risk_level="low")
-        conn.close()
+        response.update(self._expiry_fields(expires_at, now))
+        self._record_successful_validation(client_id, hardware_fingerprint, request_ip)
         
         return response
 
+    def _expiry_fields(self, expires_at, now):
+        """Dnevi do poteka in opozorilo, če se licenca bliža poteku"""
+        days_until_expiry = (expires_at - now).days
+        expiry_warning = None
+        if days_until_expiry <= 7:
+            expiry_warning = f"Licenca poteče čez {days_until_expiry} dni"
+        return {"days_until_expiry": days_until_expiry, "expiry_warning": expiry_warning}
+
+    def _record_successful_validation(self, client_id, hardware_fingerprint, request_ip):
+        """Odloženo posodobi last_check/usage_count, last_seen naprave in audit log"""
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        self._queue_write(("usage", client_id, hardware_fingerprint, timestamp))
+        self.log_audit(client_id, None, "LICENSE_VALIDATED", "Uspešno preverjanje",
+                      ip_address=request_ip, success=True, risk_level="low", defer=True)
+
+    def invalidate_validation_cache(self, client_id=None):
+        """Odstrani predpomnjena preverjanja licence (ali vseh licenc)"""
+        with self.validation_cache_lock:
+            if client_id is None:
+                removed = len(self.validation_cache)
+                self.validation_cache.clear()
+                self.validation_cache_epoch += 1
+            else:
+                keys = [key for key in self.validation_cache if key[0] == client_id]
+                for key in keys:
+                    del self.validation_cache[key]
+                removed = len(keys)
+                self.validation_cache_generation[client_id] = self.validation_cache_generation.get(client_id, 0) + 1
+            self.validation_cache_stats["invalidations"] += 1
+        return removed
+
+    def get_validation_cache_stats(self):
+        """Statistika predpomnilnika preverjanj in odloženih zapisov"""
+        with self.validation_cache_lock:
+            stats = dict(self.validation_cache_stats)
+            stats["entries"] = len(self.validation_cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups * 100 if lookups else 0
+        stats["pending_writes"] = self.pending_writes.qsize()
+        return stats
+
+    def _queue_write(self, item):
+        """Dodaj zapis v vrsto za paketno pisanje"""
+        self.pending_writes.put(item)
+        if self.pending_writes.qsize() >= self.write_batch_size:
+            self.pending_writes_event.set()
+
+    def flush_pending_writes(self):
+        """Zapiši vse odložene zapise v enem paketu (ena povezava, ena transakcija)"""
+        with self.pending_writes_lock:
+            items = []
+            while True:
+                try:
+                    items.append(self.pending_writes.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if not items:
+                return 0
+            
+            # Združi števce uporabe po licenci in last_seen po napravi
+            usage = {}
+            device_seen = {}
+            audit_rows = []
+            for item in items:
+                if item[0] == "usage":
+                    _, client_id, hardware_fingerprint, timestamp = item
+                    count, _ = usage.get(client_id, (0, None))
+                    usage[client_id] = (count + 1, timestamp)
+                    if hardware_fingerprint:
+                        device_seen[(client_id, hardware_fingerprint)] = timestamp
+                else:
+                    audit_rows.append(item[1])
+            
+            # Ob napaki (npr. "database is locked") se zapisi vrnejo v vrsto za naslednji paket
+            conn = None
+            try:
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                
+                cursor.executemany('''
+                    UPDATE licenses
+                    SET last_check = ?, usage_count = usage_count + ?
+                    WHERE client_id = ?
+                ''', [(timestamp, count, client_id) for client_id, (count, timestamp) in usage.items()])
+                
+                cursor.executemany('''
+                    UPDATE license_activations
+                    SET last_seen = ?
+                    WHERE client_id = ? AND hardware_fingerprint = ?
+                ''', [(timestamp, client_id, fingerprint) for (client_id, fingerprint), timestamp in device_seen.items()])
+                
+                cursor.executemany('''
+                    INSERT INTO audit_logs (client_id, admin_user, action, details, ip_address, user_agent, success, risk_level, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', audit_rows)
+                
+                conn.commit()
+            except sqlite3.Error as e:
+                if conn is not None:
+                    conn.rollback()
+                for item in items:
+                    self.pending_writes.put(item)
+                logging.getLogger(__name__).error(f"Pending writes error ({len(items)} zapisov vrnjenih v vrsto): {e}")
+                return 0
+            finally:
+                if conn is not None:
+                    conn.close()
+            
+            return len(items)
+
     def handle_hardware_activation(self, cursor, client_id, hardware_fingerprint, request_ip=None):
         """Obravnava aktivacijo na določeni napravi"""
         # Preveri obstoječo aktivacijo
@@ -515,7 +667,7 @@ class OmniLicenseSystemEnhanced:
             if max_users != -1 and active_count >= max_users:
                 self.log_audit(client_id, None, "ACTIVATION_LIMIT_EXCEEDED", 
                               f"Poskus aktivacije {active_count + 1}/{max_users}", 
-                              ip_address=request_ip, success=False, risk_level="medium")
+                              ip_address=request_ip, success=False, risk_level="medium", defer=True)
                 return {"success": False, "error": f"Dosežena omejitev aktivacij ({max_users})"}
             
             # Nova aktivacija
@@ -534,7 +686,7 @@ class OmniLicenseSystemEnhanced:
             
             self.log_audit(client_id, None, "DEVICE_ACTIVATED", 
                           f"Nova naprava aktivirana: {hardware_fingerprint[:8]}...", 
-                          ip_address=request_ip, success=True, risk_level="low")
+                          ip_address=request_ip, success=True, risk_level="low", defer=True)
             
             return {"success": True}
 
@@ -558,6 +710,7 @@ class OmniLicenseSystemEnhanced:
         
         conn.commit()
         conn.close()
+        self.invalidate_validation_cache(client_id)
         
         self.log_audit(client_id, admin_user, "LICENSE_DEACTIVATED", reason, 
                       success=True, risk_level="medium")
@@ -581,6 +734,7 @@ class OmniLicenseSystemEnhanced:
         
         conn.commit()
         conn.close()
+        self.invalidate_validation_cache(client_id)
         
         self.log_audit(client_id, admin_user, "LICENSE_EXTENDED", 
                       f"Podaljšano za {additional_days} dni", success=True, risk_level="low")
@@ -604,6 +758,7 @@ class OmniLicenseSystemEnhanced:
         
         conn.commit()
         conn.close()
+        self.invalidate_validation_cache(client_id)
         
         self.log_audit(client_id, admin_user, "LICENSE_SUSPENDED", reason, 
                       success=True, risk_level="high")
@@ -627,6 +782,7 @@ class OmniLicenseSystemEnhanced:
         
         conn.commit()
         conn.close()
+        self.invalidate_validation_cache(client_id)
         
         self.log_audit(client_id, admin_user, "LICENSE_REACTIVATED", "Licenca ponovno aktivirana", 
                       success=True, risk_level="low")
@@ -639,6 +795,7 @@ class OmniLicenseSystemEnhanced:
 
     def get_all_licenses(self):
         """Pridobi vse licence za admin konzolo"""
+        self.flush_pending_writes()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -716,8 +873,13 @@ class OmniLicenseSystemEnhanced:
         conn.commit()
         conn.close()
 
-    def log_audit(self, client_id, admin_user, action, details, ip_address=None, user_agent=None, success=True, risk_level="low"):
-        """Zabeleži audit log"""
+    def log_audit(self, client_id, admin_user, action, details, ip_address=None, user_agent=None, success=True, risk_level="low", defer=False):
+        """Zabeleži audit log (defer=True: zapis v naslednjem paketu odloženih zapisov)"""
+        if defer:
+            timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            self._queue_write(("audit", (client_id, admin_user, action, details, ip_address, user_agent, success, risk_level, timestamp)))
+            return
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -731,6 +893,7 @@ class OmniLicenseSystemEnhanced:
 
     def get_audit_logs(self, client_id=None, limit=100):
         """Pridobi audit loge"""
+        self.flush_pending_writes()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -780,6 +943,8 @@ class OmniLicenseSystemEnhanced:
         ''')
         
         demo_deactivated = cursor.rowcount
+        if demo_deactivated > 0:
+            self.invalidate_validation_cache()
         
         # Opozori na licence, ki potekajo v 7 dneh
         cursor.execute('''
@@ -836,6 +1001,18 @@ class OmniLicenseSystemEnhanced:
         
         thread = threading.Thread(target=background_worker, daemon=True)
         thread.start()
+        
+        def pending_writes_worker():
+            while True:
+                self.pending_writes_event.wait(self.write_flush_interval)
+                self.pending_writes_event.clear()
+                try:
+                    self.flush_pending_writes()
+                except Exception as e:
+                    logging.getLogger(__name__).error(f"Pending writes error: {e}")
+        
+        writer = threading.Thread(target=pending_writes_worker, daemon=True)
+        writer.start()
 
     def setup_routes(self):
         """Nastavi Flask route-e"""
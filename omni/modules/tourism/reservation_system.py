@@ -6,15 +6,17 @@ Napredni sistem za upravljanje rezervacij v gostinstvu in turizmu
 import sqlite3
 import json
 import logging
+import math
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta, date, time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 import uuid
-from threading import Lock
+from threading import Lock, RLock
 import smtplib
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +34,9 @@ class ReservationStatus(Enum):
     CANCELLED = "cancelled"
     NO_SHOW = "no_show"
 
+# Statusi, ki vira ne zasedajo
+INACTIVE_STATUSES = (ReservationStatus.CANCELLED.value, ReservationStatus.NO_SHOW.value)
+
 @dataclass
 class Customer:
     """Podatki o stranki"""
@@ -72,14 +77,168 @@ class Resource:
     location: str = ""
     is_active: bool = True
 
+def _to_datetime(value: Union[str, datetime]) -> datetime:
+    """Pretvori ISO niz ali datetime v lokalni naivni datetime (medsebojno primerljiv)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+class _ResourceTimeline:
+    """Aktivne rezervacije enega vira, urejene po začetku"""
+    
+    __slots__ = ("starts", "ends", "ids", "max_end")
+    
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.ids: List[str] = []
+        # max_end[i] = najpoznejši konec med rezervacijami 0..i (nepadajoče)
+        self.max_end: List[datetime] = []
+    
+    def _rebuild_max_end(self, position: int):
+        del self.max_end[position:]
+        current = self.max_end[-1] if self.max_end else None
+        for end in self.ends[position:]:
+            if current is None or end > current:
+                current = end
+            self.max_end.append(current)
+    
+    def add(self, start: datetime, end: datetime, reservation_id: str):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, reservation_id)
+        self._rebuild_max_end(position)
+    
+    def remove(self, start: datetime, reservation_id: str) -> bool:
+        position = bisect_left(self.starts, start)
+        while position < len(self.starts) and self.starts[position] == start:
+            if self.ids[position] == reservation_id:
+                del self.starts[position], self.ends[position], self.ids[position]
+                self._rebuild_max_end(position)
+                return True
+            position += 1
+        return False
+    
+    def overlapping(self, start: datetime, end: datetime) -> List[int]:
+        """Indeksi rezervacij, ki se prekrivajo z [start, end)"""
+        last = bisect_left(self.starts, end)
+        # Rezervacije pred first se vse končajo najkasneje ob start
+        first = bisect_right(self.max_end, start, 0, last)
+        return [i for i in range(first, last) if self.ends[i] > start]
+    
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        last = bisect_left(self.starts, end)
+        return last == 0 or self.max_end[last - 1] <= start
+
+class ResourceIntervalIndex:
+    """
+    Pomnilniški indeks zasedenosti virov
+    
+    Za vsak vir hrani aktivne rezervacije kot urejen seznam intervalov
+    [začetek, konec) s sprotnim maksimumom koncev, zato je preverjanje
+    prekrivanja dvojiško iskanje namesto poizvedbe v bazo. SQLite ostaja vir
+    resnice: indeks se napolni ob zagonu in posodobi šele po uspešnem zapisu.
+    """
+    
+    def __init__(self):
+        self.lock = RLock()
+        self.resources: Dict[str, Dict[str, Any]] = {}
+        self.timelines: Dict[str, _ResourceTimeline] = {}
+        self.reservations: Dict[str, Tuple[str, datetime]] = {}
+    
+    def load(self, resource_rows: List[Tuple], reservation_rows: List[Tuple]):
+        """Napolni indeks iz vrstic tabele resources in aktivnih vrstic reservations"""
+        with self.lock:
+            self.resources.clear()
+            self.timelines.clear()
+            self.reservations.clear()
+            for row in resource_rows:
+                self.set_resource(*row)
+            for reservation_id, resource_id, start, end in reservation_rows:
+                self.add_reservation(reservation_id, resource_id, start, end)
+    
+    def set_resource(self, resource_id: str, name: str, resource_type: str, capacity: int,
+                     features: Any, base_price: float, location: str, is_active: bool):
+        if isinstance(features, str):
+            features = json.loads(features) if features else []
+        with self.lock:
+            self.resources[resource_id] = {
+                "resource_id": resource_id,
+                "name": name,
+                "resource_type": resource_type,
+                "capacity": capacity,
+                "features": features or [],
+                "base_price": base_price,
+                "location": location,
+                "is_active": bool(is_active)
+            }
+    
+    def add_reservation(self, reservation_id: str, resource_id: str,
+                        start: Union[str, datetime], end: Union[str, datetime]):
+        start, end = _to_datetime(start), _to_datetime(end)
+        with self.lock:
+            if reservation_id in self.reservations:
+                return
+            self.timelines.setdefault(resource_id, _ResourceTimeline()).add(start, end, reservation_id)
+            self.reservations[reservation_id] = (resource_id, start)
+    
+    def remove_reservation(self, reservation_id: str) -> bool:
+        with self.lock:
+            entry = self.reservations.pop(reservation_id, None)
+            if entry is None:
+                return False
+            resource_id, start = entry
+            return self.timelines[resource_id].remove(start, reservation_id)
+    
+    def conflicts(self, resource_id: str, start: Union[str, datetime], end: Union[str, datetime]) -> int:
+        """Število aktivnih rezervacij vira, ki se prekrivajo z [start, end)"""
+        start, end = _to_datetime(start), _to_datetime(end)
+        with self.lock:
+            timeline = self.timelines.get(resource_id)
+            return len(timeline.overlapping(start, end)) if timeline else 0
+    
+    def free_resources(self, resource_type: str, start: Union[str, datetime], end: Union[str, datetime],
+                       min_capacity: int = 0) -> List[Dict[str, Any]]:
+        """Vsi aktivni prosti viri danega tipa v enem prehodu"""
+        start, end = _to_datetime(start), _to_datetime(end)
+        with self.lock:
+            free = []
+            for resource_id, resource in self.resources.items():
+                if (resource["resource_type"] != resource_type or not resource["is_active"]
+                        or resource["capacity"] < min_capacity):
+                    continue
+                timeline = self.timelines.get(resource_id)
+                if timeline is None or timeline.is_free(start, end):
+                    free.append(resource)
+            return free
+    
+    def occupancy_bitmap(self, resource_id: str, start: datetime, end: datetime,
+                         slot: timedelta) -> str:
+        """Niz '0'/'1' po časovnih rezinah [start, end); '1' = rezina je vsaj delno zasedena"""
+        slots = math.ceil((end - start) / slot)
+        bitmap = bytearray(b"0" * slots)
+        with self.lock:
+            timeline = self.timelines.get(resource_id)
+            if timeline is not None:
+                for i in timeline.overlapping(start, end):
+                    first = max(int((timeline.starts[i] - start) / slot), 0)
+                    last = min(math.ceil((timeline.ends[i] - start) / slot), slots)
+                    bitmap[first:last] = b"1" * (last - first)
+        return bitmap.decode()
+
 class ReservationSystem:
     """Rezervacijski sistem"""
     
     def __init__(self, db_path: str = "reservations.db"):
         self.db_path = db_path
         self.lock = Lock()
+        self.index = ResourceIntervalIndex()
         self._init_database()
-        
+        self.reload_index()
+    
     def _init_database(self):
         """Inicializacija baze podatkov"""
         with sqlite3.connect(self.db_path) as conn:
@@ -154,6 +313,26 @@ class ReservationSystem:
             conn.commit()
             logger.info("📅 Rezervacijska baza podatkov inicializirana")
     
+    def reload_index(self):
+        """Ponovno napolni indeks zasedenosti iz baze (npr. po zunanjih spremembah)"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT resource_id, name, resource_type, capacity, features, base_price, location, is_active
+                FROM resources ORDER BY rowid
+            ''')
+            resource_rows = cursor.fetchall()
+            
+            cursor.execute('''
+                SELECT reservation_id, resource_id, start_datetime, end_datetime
+                FROM reservations WHERE status NOT IN (?, ?)
+            ''', INACTIVE_STATUSES)
+            reservation_rows = cursor.fetchall()
+        
+        self.index.load(resource_rows, reservation_rows)
+        logger.info(f"📅 Indeks zasedenosti: {len(resource_rows)} virov, {len(reservation_rows)} aktivnih rezervacij")
+    
     def add_customer(self, customer: Customer) -> Dict[str, Any]:
         """Dodaj stranko"""
         try:
@@ -210,6 +389,11 @@ class ReservationSystem:
                 
                 conn.commit()
                 
+                self.index.set_resource(
+                    resource.resource_id, resource.name, resource.resource_type.value, resource.capacity,
+                    resource.features, resource.base_price, resource.location, resource.is_active
+                )
+                
                 return {
                     "success": True,
                     "resource_id": resource.resource_id,
@@ -222,57 +406,31 @@ class ReservationSystem:
     
     def check_availability(self, resource_id: str, start_datetime: datetime, 
                           end_datetime: datetime) -> Dict[str, Any]:
-        """Preveri razpoložljivost vira"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Preveri obstoječe rezervacije
-            cursor.execute('''
-                SELECT COUNT(*) FROM reservations 
-                WHERE resource_id = ? 
-                AND status NOT IN ('cancelled', 'no_show')
-                AND (
-                    (start_datetime <= ? AND end_datetime > ?) OR
-                    (start_datetime < ? AND end_datetime >= ?) OR
-                    (start_datetime >= ? AND start_datetime < ?)
-                )
-            ''', (
-                resource_id,
-                start_datetime.isoformat(), start_datetime.isoformat(),
-                end_datetime.isoformat(), end_datetime.isoformat(),
-                start_datetime.isoformat(), end_datetime.isoformat()
-            ))
-            
-            conflicts = cursor.fetchone()[0]
-            
-            # Pridobi podatke o viru
-            cursor.execute('''
-                SELECT name, resource_type, capacity, is_active 
-                FROM resources WHERE resource_id = ?
-            ''', (resource_id,))
-            
-            resource_data = cursor.fetchone()
-            
-            if not resource_data:
-                return {
-                    "available": False,
-                    "reason": "Vir ne obstaja"
-                }
-            
-            if not resource_data[3]:  # is_active
-                return {
-                    "available": False,
-                    "reason": "Vir ni aktiven"
-                }
-            
+        """Preveri razpoložljivost vira (iz indeksa zasedenosti)"""
+        resource_data = self.index.resources.get(resource_id)
+        
+        if not resource_data:
             return {
-                "available": conflicts == 0,
-                "resource_name": resource_data[0],
-                "resource_type": resource_data[1],
-                "capacity": resource_data[2],
-                "conflicts": conflicts,
-                "reason": "Vir je zaseden" if conflicts > 0 else "Vir je na voljo"
+                "available": False,
+                "reason": "Vir ne obstaja"
             }
+        
+        if not resource_data["is_active"]:
+            return {
+                "available": False,
+                "reason": "Vir ni aktiven"
+            }
+        
+        conflicts = self.index.conflicts(resource_id, start_datetime, end_datetime)
+        
+        return {
+            "available": conflicts == 0,
+            "resource_name": resource_data["name"],
+            "resource_type": resource_data["resource_type"],
+            "capacity": resource_data["capacity"],
+            "conflicts": conflicts,
+            "reason": "Vir je zaseden" if conflicts > 0 else "Vir je na voljo"
+        }
     
     def create_reservation(self, reservation_data: Dict[str, Any]) -> Dict[str, Any]:
         """Ustvari novo rezervacijo"""
@@ -323,6 +481,13 @@ class ReservationSystem:
                     
                     conn.commit()
                     
+                    self.index.add_reservation(
+                        reservation_id,
+                        reservation_data['resource_id'],
+                        reservation_data['start_datetime'],
+                        reservation_data['end_datetime']
+                    )
+                    
                     # Pošlji potrditev po e-pošti
                     self._send_confirmation_email(reservation_id)
                     
@@ -355,6 +520,16 @@ class ReservationSystem:
                 
                 conn.commit()
                 
+                # Posodobi indeks zasedenosti
+                if new_status.value in INACTIVE_STATUSES:
+                    self.index.remove_reservation(reservation_id)
+                elif reservation_id not in self.index.reservations:
+                    cursor.execute('''
+                        SELECT resource_id, start_datetime, end_datetime
+                        FROM reservations WHERE reservation_id = ?
+                    ''', (reservation_id,))
+                    self.index.add_reservation(reservation_id, *cursor.fetchone())
+                
                 # Če je rezervacija potrjena, posodobi število obiskov stranke
                 if new_status == ReservationStatus.COMPLETED:
                     cursor.execute('''
@@ -471,37 +646,57 @@ class ReservationSystem:
     def find_available_resources(self, resource_type: ReservationType,
                                start_datetime: datetime, end_datetime: datetime,
                                party_size: int) -> List[Dict[str, Any]]:
-        """Najdi razpoložljive vire"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Pridobi vse vire ustreznega tipa z zadostno kapaciteto
-            cursor.execute('''
-                SELECT * FROM resources 
-                WHERE resource_type = ? AND capacity >= ? AND is_active = 1
-            ''', (resource_type.value, party_size))
-            
-            available_resources = []
-            
-            for row in cursor.fetchall():
-                resource_id = row[0]
-                
-                # Preveri razpoložljivost
-                availability = self.check_availability(resource_id, start_datetime, end_datetime)
+        """Najdi razpoložljive vire (en prehod čez indeks zasedenosti)"""
+        free = self.index.free_resources(resource_type.value, start_datetime, end_datetime, party_size)
+        
+        return [
+            {
+                "resource_id": resource["resource_id"],
+                "name": resource["name"],
+                "resource_type": resource["resource_type"],
+                "capacity": resource["capacity"],
+                "features": list(resource["features"]),
+                "base_price": resource["base_price"],
+                "location": resource["location"]
+            }
+            for resource in free
+        ]
+    
+    def get_availability_calendar(self, start_datetime: datetime, end_datetime: datetime,
+                                  resource_type: Optional[ReservationType] = None,
+                                  slot_minutes: int = 60) -> Dict[str, Any]:
+        """
+        Koledarska mreža zasedenosti za obdobje [start_datetime, end_datetime)
+        
+        Za vsak aktiven vir vrne niz zasedenosti s po enim znakom na časovno
+        rezino dolžine slot_minutes ('1' = rezina je vsaj delno zasedena).
+        """
+        start, end = _to_datetime(start_datetime), _to_datetime(end_datetime)
+        slot = timedelta(minutes=slot_minutes)
+        
+        resources = {}
+        with self.index.lock:
+            for resource_id, resource in self.index.resources.items():
+                if not resource["is_active"]:
+                    continue
+                if resource_type is not None and resource["resource_type"] != resource_type.value:
+                    continue
                 
-                if availability['available']:
-                    resource = {
-                        "resource_id": resource_id,
-                        "name": row[1],
-                        "resource_type": row[2],
-                        "capacity": row[3],
-                        "features": json.loads(row[4]) if row[4] else [],
-                        "base_price": row[5],
-                        "location": row[6]
-                    }
-                    available_resources.append(resource)
-            
-            return available_resources
+                occupancy = self.index.occupancy_bitmap(resource_id, start, end, slot)
+                resources[resource_id] = {
+                    "name": resource["name"],
+                    "resource_type": resource["resource_type"],
+                    "occupancy": occupancy,
+                    "occupancy_rate": occupancy.count("1") / len(occupancy) * 100 if occupancy else 0
+                }
+        
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "slot_minutes": slot_minutes,
+            "slots": math.ceil((end - start) / slot),
+            "resources": resources
+        }
     
     def generate_occupancy_report(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """Generiraj poročilo o zasedenosti"""
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Omni Sync Change Detector - Zaznavanje sprememb datotek brez ponovnega
+računanja checksum vseh datotek
+
+- (size, mtime_ns, inode) kot hiter predfilter: datoteka se ponovno zgosti le,
+  če se je podpis spremenil
+- Opazovanje direktorijev (watchdog / inotify), kadar je knjižnica na voljo:
+  v mirnem ciklu se ne kliče niti stat
+- Občasen poln pregled podpisov kot varovalka za izgubljene dogodke
+- Zgoščevanje spremenjenih datotek v thread poolu z velikimi bralnimi bloki
+  oziroma mmap za velike datoteke
+"""
+
+import os
+import time
+import mmap
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+READ_BUFFER_SIZE = 1024 * 1024  # 1 MB
+MMAP_THRESHOLD = 4 * 1024 * 1024  # večje datoteke se zgostijo preko mmap
+RACY_WINDOW_NS = 2_000_000_000  # mtime bližje od 2 s času zapisa podpisa ni zanesljiv
+FULL_SCAN_INTERVAL = 300  # sekund med polnimi pregledi ob opazovanju
+MAX_DIRTY_PATHS = 10000  # nad tem se namesto seznama izvede poln pregled
+
+FileSignature = Tuple[int, int, int]
+
+def file_signature(stat_result: os.stat_result) -> FileSignature:
+    """Podpis datoteke: (velikost, mtime v ns, inode)"""
+    return (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+
+def file_checksum(path: str, buffer_size: int = READ_BUFFER_SIZE) -> Optional[str]:
+    """MD5 checksum datoteke z velikimi bloki oziroma mmap"""
+    try:
+        hash_md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hash_md5.update(mapped)
+            else:
+                buffer = bytearray(buffer_size)
+                view = memoryview(buffer)
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    hash_md5.update(view[:read])
+        return hash_md5.hexdigest()
+    except (OSError, ValueError) as e:
+        logger.error(f"Napaka pri računanju checksum za {path}: {e}")
+        return None
+
+class _DirtyPathHandler(FileSystemEventHandler):
+    """Watchdog handler, ki spremenjene poti preda detektorju"""
+
+    def __init__(self, detector: "FileChangeDetector"):
+        self.detector = detector
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            # Premik ali brisanje direktorija: posamezne poti niso znane
+            if event.event_type in ("moved", "deleted"):
+                self.detector.request_full_scan()
+            return
+        self.detector.mark_dirty(event.src_path)
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self.detector.mark_dirty(dest_path)
+
+class FileChangeDetector:
+    """Zaznavanje spremenjenih datotek s predfiltrom podpisov in opazovanjem direktorijev"""
+
+    def __init__(self, hash_workers: int = 4, full_scan_interval: float = FULL_SCAN_INTERVAL):
+        self.signatures: Dict[str, Tuple[FileSignature, int]] = {}  # pot -> (podpis, čas zapisa v ns)
+        self.full_scan_interval = full_scan_interval
+        self.hash_executor = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix="sync-hash")
+        self.lock = threading.Lock()
+        self.dirty: Set[str] = set()
+        self.full_scan_requested = True
+        self.last_full_scan = 0.0
+        self.observer = None
+        self.stats = {
+            "full_scans": 0,
+            "watched_cycles": 0,
+            "stat_calls": 0,
+            "hashed_files": 0,
+            "hashed_bytes": 0
+        }
+
+    @property
+    def watching(self) -> bool:
+        return self.observer is not None
+
+    def watch(self, directories: Iterable[str]) -> bool:
+        """Začni opazovati direktorije (če je watchdog na voljo)"""
+        if Observer is None:
+            logger.info("Watchdog ni na voljo - spremembe se zaznavajo s pregledom podpisov")
+            return False
+        try:
+            observer = Observer()
+            handler = _DirtyPathHandler(self)
+            for directory in directories:
+                observer.schedule(handler, str(directory), recursive=True)
+            observer.daemon = True
+            observer.start()
+        except Exception as e:
+            logger.warning(f"Opazovanje direktorijev ni mogoče, uporabljam pregled podpisov: {e}")
+            return False
+        self.observer = observer
+        self.request_full_scan()
+        return True
+
+    def mark_dirty(self, path: str):
+        """Označi pot kot potencialno spremenjeno"""
+        with self.lock:
+            if len(self.dirty) >= MAX_DIRTY_PATHS:
+                self.full_scan_requested = True
+            else:
+                self.dirty.add(os.path.abspath(path))
+
+    def request_full_scan(self):
+        with self.lock:
+            self.full_scan_requested = True
+
+    def record(self, path: str, stat_result: Optional[os.stat_result] = None):
+        """Zapomni si podpis datoteke (stat mora biti narejen PRED računanjem checksum)"""
+        if stat_result is None:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                self.forget(path)
+                return
+        with self.lock:
+            self.signatures[path] = (file_signature(stat_result), time.time_ns())
+
+    def forget(self, path: str):
+        with self.lock:
+            self.signatures.pop(path, None)
+
+    def _is_clean(self, path: str, stat_result: os.stat_result) -> bool:
+        known = self.signatures.get(path)
+        if known is None:
+            return False
+        signature, recorded_at = known
+        # Datoteka, spremenjena tik pred zapisom podpisa, je lahko bila spremenjena
+        # ponovno v isti časovni enoti mtime, zato se ji ne zaupa
+        return signature == file_signature(stat_result) and recorded_at - stat_result.st_mtime_ns > RACY_WINDOW_NS
+
+    def changed_paths(self, paths: Iterable[str]) -> Dict[str, Optional[os.stat_result]]:
+        """
+        Poti, katerih vsebina se je morda spremenila
+
+        Returns:
+            pot -> stat (None, če datoteka ne obstaja več)
+        """
+        paths = list(paths)
+        with self.lock:
+            full_scan = (not self.watching or self.full_scan_requested or
+                         time.monotonic() - self.last_full_scan >= self.full_scan_interval)
+            if full_scan:
+                self.full_scan_requested = False
+                self.dirty.clear()
+                candidates = paths
+            else:
+                dirty = self.dirty
+                self.dirty = set()
+                # Poleg dogodkov preveri še datoteke, katerih podpisi niso zanesljivi
+                candidates = [path for path in paths
+                              if os.path.abspath(path) in dirty or not self._signature_settled(path)]
+
+        if full_scan:
+            self.last_full_scan = time.monotonic()
+            self.stats["full_scans"] += 1
+        else:
+            self.stats["watched_cycles"] += 1
+
+        changed = {}
+        for path in candidates:
+            self.stats["stat_calls"] += 1
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                changed[path] = None
+                continue
+            if not self._is_clean(path, stat_result):
+                changed[path] = stat_result
+        return changed
+
+    def _signature_settled(self, path: str) -> bool:
+        """Podpis obstaja in je bil zapisan dovolj po zadnji spremembi (brez klica stat)"""
+        known = self.signatures.get(path)
+        if known is None:
+            return False
+        signature, recorded_at = known
+        return recorded_at - signature[1] > RACY_WINDOW_NS
+
+    def hash_files(self, changed: Dict[str, Optional[os.stat_result]]) -> Dict[str, Optional[str]]:
+        """Vzporedno izračunaj checksum spremenjenih datotek in posodobi podpise"""
+        existing = {path: stat_result for path, stat_result in changed.items() if stat_result is not None}
+        for path in changed:
+            if path not in existing:
+                self.forget(path)
+
+        checksums = dict(zip(existing, self.hash_executor.map(file_checksum, existing)))
+        for path, checksum in checksums.items():
+            if checksum is not None:
+                self.record(path, existing[path])
+                self.stats["hashed_files"] += 1
+                self.stats["hashed_bytes"] += existing[path].st_size
+        return checksums
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self.stats)
+        stats["tracked_files"] = len(self.signatures)
+        stats["watching"] = self.watching
+        return stats
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join(timeout=5)
+            self.observer = None
+        self.hash_executor.shutdown(wait=True)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Omni Sync Chunking - Vsebinsko določeni kosi (content-defined chunking) za
+delta prenos datotek med vozlišči Omni Cloud Sync
+
+Meje kosov določa drseča polinomska zgoščevalna funkcija čez zadnjih
+WINDOW bajtov, zato vstavljanje ali brisanje nekaj bajtov premakne le meje v
+bližini spremembe, ostali kosi ostanejo enaki. Vsaka datoteka ima manifest
+(seznam kosov z zgoščenimi vrednostmi), prejemnik pa prenese le kose, ki jih
+v svoji različici datoteke še nima.
+"""
+
+import hashlib
+import mmap
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MIN_CHUNK_SIZE = 2 * 1024
+AVG_CHUNK_BITS = 13  # povprečen kos ~8 KB
+MAX_CHUNK_SIZE = 64 * 1024
+WINDOW = 48
+BLOCK_SIZE = 8 * 1024 * 1024  # obdelava v blokih omeji porabo pomnilnika
+
+# Polinomska drseča vrednost H_i = sum(g[b_j] * BASE^(i-j)) mod 2^32 čez zadnjih WINDOW bajtov.
+# Z inverzom BASE (liho število je obrnljivo mod 2^32) se izračuna s prefiksnimi vsotami
+# v nekaj vektorskih prehodih, neodvisno od širine okna. Meja kosa je, kjer je zgornjih
+# AVG_CHUNK_BITS bitov enakih 0.
+_BASE = 0x9E3779B1
+_BASE_INV = pow(_BASE, -1, 2 ** 32)
+_CUT_THRESHOLD = np.uint32(1 << (32 - AVG_CHUNK_BITS))
+# Tabela je izpeljana iz blake2b, da je enaka na vseh vozliščih ne glede na različico NumPy
+_GEAR = np.array([int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=4).digest(), "little")
+                  for i in range(256)], dtype=np.uint32)
+
+@lru_cache(maxsize=4)
+def _powers(base: int, count: int) -> np.ndarray:
+    """BASE^0 .. BASE^(count-1) mod 2^32 (polni bloki si tabelo delijo)"""
+    powers = np.full(count, base, dtype=np.uint32)
+    powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint32)
+
+def _candidate_cuts(data) -> np.ndarray:
+    """Vse pozicije (konec kosa), kjer drseča vrednost pade pod prag"""
+    arr = np.frombuffer(data, dtype=np.uint8)
+    n = len(arr)
+    candidates = []
+    for start in range(0, n, BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, n)
+        lead = min(start, WINDOW - 1)
+        gear = _GEAR[arr[start - lead:end]]
+        prefix = np.cumsum(gear * _powers(_BASE_INV, len(gear)), dtype=np.uint32)
+        window = prefix.copy()
+        window[WINDOW:] -= prefix[:-WINDOW]
+        rolling = window * _powers(_BASE, len(gear))
+        hits = np.flatnonzero(rolling[lead:] < _CUT_THRESHOLD)
+        candidates.append(hits + start + 1)
+    return np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+
+def chunk_boundaries(data) -> List[int]:
+    """Konci kosov (izključno) za podane bajte"""
+    n = len(data)
+    if n == 0:
+        return []
+    if n <= MIN_CHUNK_SIZE:
+        return [n]
+
+    cuts = []
+    last = 0
+    for cut in _candidate_cuts(data).tolist():
+        while cut - last > MAX_CHUNK_SIZE:
+            last += MAX_CHUNK_SIZE
+            cuts.append(last)
+        if cut - last >= MIN_CHUNK_SIZE and cut < n:
+            cuts.append(cut)
+            last = cut
+    while n - last > MAX_CHUNK_SIZE:
+        last += MAX_CHUNK_SIZE
+        cuts.append(last)
+    cuts.append(n)
+    return cuts
+
+def chunk_hash(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def build_manifest(data) -> Dict:
+    """Manifest kosov: velikost, MD5 celotne vsebine in seznam kosov (hash, offset, size)"""
+    view = memoryview(data)
+    chunks = []
+    start = 0
+    for end in chunk_boundaries(data):
+        chunks.append({"hash": chunk_hash(view[start:end]), "offset": start, "size": end - start})
+        start = end
+    return {"size": len(data), "checksum": hashlib.md5(view).hexdigest(), "chunks": chunks}
+
+def build_file_manifest(path: str) -> Dict:
+    """Manifest datoteke; vsebuje tudi mtime_ns za preverjanje veljavnosti"""
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            manifest = build_manifest(b"")
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                manifest = build_manifest(mapped)
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    return manifest
+
+def missing_chunks(remote_manifest: Dict, local_manifest: Optional[Dict]) -> List[Dict]:
+    """Kosi oddaljenega manifesta, ki jih lokalna različica nima (vsak hash enkrat)"""
+    local_hashes = {chunk["hash"] for chunk in local_manifest["chunks"]} if local_manifest else set()
+    missing = {}
+    for chunk in remote_manifest["chunks"]:
+        if chunk["hash"] not in local_hashes and chunk["hash"] not in missing:
+            missing[chunk["hash"]] = chunk
+    return list(missing.values())
+
+def split_chunks(payload: bytes, chunks: List[Dict]) -> Dict[str, bytes]:
+    """Razdeli prejeti blok na kose po velikostih iz manifesta in preveri njihove zgoščene vrednosti"""
+    if len(payload) != sum(chunk["size"] for chunk in chunks):
+        raise ValueError("Velikost prejetih kosov se ne ujema z manifestom")
+    result = {}
+    offset = 0
+    for chunk in chunks:
+        data = payload[offset:offset + chunk["size"]]
+        if chunk_hash(data) != chunk["hash"]:
+            raise ValueError(f"Neveljaven kos {chunk['hash']}")
+        result[chunk["hash"]] = data
+        offset += chunk["size"]
+    return result
+
+def assemble(remote_manifest: Dict, fetched: Dict[str, bytes],
+             local_data: Optional[bytes] = None, local_manifest: Optional[Dict] = None) -> bytes:
+    """Sestavi novo različico datoteke iz lokalnih in prenesenih kosov ter preveri MD5"""
+    local_index = {}
+    if local_manifest and local_data is not None:
+        local_index = {chunk["hash"]: (chunk["offset"], chunk["size"]) for chunk in local_manifest["chunks"]}
+
+    parts = []
+    for chunk in remote_manifest["chunks"]:
+        data = fetched.get(chunk["hash"])
+        if data is None:
+            offset, size = local_index[chunk["hash"]]
+            data = local_data[offset:offset + size]
+        parts.append(data)
+
+    content = b"".join(parts)
+    if hashlib.md5(content).hexdigest() != remote_manifest["checksum"]:
+        raise ValueError("Checksum sestavljene datoteke se ne ujema z manifestom")
+    return content
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Testi za večurno razporeditev energije (dispatch) v EnergyManager
+"""
+
+import itertools
+import logging
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.modules.energy.dispatch import merit_order_curves, solve_dispatch, supply_cost
+
+# Modul ob uvozu ustvari bazo v trenutni mapi
+_IMPORT_DIR = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+os.chdir(_IMPORT_DIR.name)
+try:
+    from omni.modules.energy import energy_manager as em
+finally:
+    os.chdir(_cwd)
+logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+    _IMPORT_DIR.cleanup()
+
+
+def brute_force_cost(demand, renewable, prices, caps, capacity, power, efficiency, levels, start):
+    """Najmanjši strošek čez vse poti SoC (končni SoC >= začetni)"""
+    _, _, cum_caps, cum_cost = merit_order_curves(prices, caps)
+    soc = np.linspace(0.0, capacity, levels)
+    best = np.inf
+    for path in itertools.product(range(levels), repeat=len(demand)):
+        if path[-1] < start:
+            continue
+        previous, cost = start, 0.0
+        for t, level in enumerate(path):
+            delta = soc[level] - soc[previous]
+            flow = delta / efficiency if delta > 0 else delta * efficiency
+            if abs(flow) > power + 1e-9:
+                cost = np.inf
+                break
+            cost += supply_cost(np.array([demand[t] - renewable[t] + flow]), cum_caps[:, t], cum_cost[:, t])[0]
+            previous = level
+        best = min(best, cost)
+    return best
+
+
+class TestSolveDispatch(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        for _ in range(15):
+            demand, renewable = rng.uniform(0, 10, 5), rng.uniform(0, 6, 5)
+            prices = np.vstack([rng.uniform(0.05, 0.3, 5), np.full(5, 0.4)])
+            caps = np.array([6.0, 4.0])
+            power = rng.uniform(1, 5)
+            result = solve_dispatch(demand, renewable, prices, caps, 8.0, power, 0.9, 0.9, 4.0, soc_levels=5)
+            expected = brute_force_cost(demand, renewable, prices, caps, 8.0, power, 0.9, 5, 2)
+            self.assertAlmostEqual(result["total_cost"], expected)
+            self.assertLessEqual(result["total_cost"], result["baseline_cost"] + 1e-9)
+            self.assertGreaterEqual(result["soc_kwh"][-1], result["soc_kwh"][0])
+            # Razporejeni viri + nepokrito = preostala poraba
+            residual = np.maximum(demand - renewable + result["battery_flow_kwh"], 0.0)
+            np.testing.assert_allclose(result["source_dispatch_kwh"].sum(axis=0) + result["unserved_kwh"], residual)
+
+    def test_battery_shifts_load_to_cheap_hours(self):
+        prices = np.array([[0.1, 0.1, 0.5, 0.5]])
+        result = solve_dispatch([2, 2, 2, 2], [0, 0, 0, 0], prices, [10.0], 4.0, 2.0, 1.0, 1.0, 0.0, soc_levels=5)
+        np.testing.assert_allclose(result["source_dispatch_kwh"][0], [4, 4, 0, 0])
+        self.assertAlmostEqual(result["total_cost"], 0.8)
+        self.assertAlmostEqual(result["baseline_cost"], 2.4)
+
+    def test_large_site_horizon(self):
+        rng = np.random.default_rng(5)
+        start = time.perf_counter()
+        result = solve_dispatch(rng.uniform(100, 400, 168), rng.uniform(0, 100, 168),
+                                rng.uniform(0.05, 0.4, (500, 168)), rng.uniform(0, 2, 500),
+                                500.0, 150.0, 0.95, 0.95, 250.0, soc_levels=201)
+        self.assertLess(time.perf_counter() - start, 5.0)
+        self.assertEqual(result["source_dispatch_kwh"].shape, (500, 168))
+
+
+class TestEnergyManagerDispatch(unittest.TestCase):
+
+    def test_optimize_dispatch_with_sample_sources(self):
+        manager = em.energy_manager
+        self.assertEqual(len(manager.energy_sources), 3)
+
+        result = manager.optimize_dispatch(48, peak_threshold_kw=4.0)
+        self.assertEqual(result["horizon_hours"], 48)
+        self.assertEqual(len(result["battery_soc_kwh"]), 49)
+        self.assertLessEqual(result["peak_grid_import_kw"], 4.0 + 1e-9)
+        self.assertLessEqual(result["total_cost"], result["baseline_cost"])
+        self.assertEqual(set(result["source_dispatch"]), set(manager.energy_sources))
+
+        custom = manager.optimize_dispatch(24, demand_kwh=[1.0] * 24)
+        self.assertEqual(custom["demand_kwh"], [1.0] * 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
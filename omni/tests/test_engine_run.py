@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Testi za sočasno izvajanje faz v OmniCore.run (mode="concurrent")
+"""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.core.engine import OmniCore
+from omni.core.stub_ai import StubAIClient
+
+
+class SlowModule:
+    def __init__(self, delay, fail=False):
+        self.delay = delay
+        self.fail = fail
+
+    def run(self, text):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("okvara")
+        return f"obdelano: {text}"
+
+
+class SlowSearch:
+    def search(self, text, count=5):
+        time.sleep(0.2)
+        return [{"title": text}]
+
+
+class TestConcurrentRun(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.core = OmniCore(data_dir=self.tmp.name, ai_client=StubAIClient(latency=0.2))
+        self.core.register_module("a", SlowModule(0.2))
+        self.core.register_module("b", SlowModule(0.2))
+        self.core.register_module("broken", SlowModule(0.0, fail=True))
+        self.core.register_integration("search_bing", SlowSearch())
+
+    def tearDown(self):
+        self.core.shutdown()
+        self.tmp.cleanup()
+
+    def test_concurrent_matches_sequential_and_is_faster(self):
+        sequential = self.core.run("vprašanje")
+        concurrent = self.core.run("vprašanje", mode="concurrent")
+
+        self.assertGreaterEqual(sequential["execution_time"], 0.8)
+        self.assertLess(concurrent["execution_time"], 0.5)
+        for key in ("ai_response", "modules", "search_results"):
+            self.assertEqual(sequential[key], concurrent[key])
+        self.assertEqual(concurrent["modules"]["broken"], "❌ Error: okvara")
+        self.assertEqual(set(concurrent["timings"]), {"ai", "module:a", "module:b", "module:broken", "search"})
+        self.assertFalse(concurrent["partial"])
+
+    def test_stage_deadline_returns_partial_result(self):
+        self.core.register_module("slow", SlowModule(2.0))
+        started = time.perf_counter()
+        result = self.core.run("vprašanje", mode="concurrent", deadline=1.0, stage_deadlines={"module:slow": 0.3})
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+        self.assertTrue(result["partial"])
+        self.assertEqual(result["timings"]["module:slow"]["status"], "timeout")
+        self.assertIn("Timeout", result["modules"]["slow"])
+        self.assertEqual(result["modules"]["a"], "obdelano: vprašanje")
+        self.assertEqual(result["ai_response"], "🧪 Stub odgovor (gpt-4o-mini)")
+
+
+class TestSequentialRun(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.core = OmniCore(data_dir=self.tmp.name, ai_client=StubAIClient(latency=0.0))
+
+    def tearDown(self):
+        self.core.shutdown()
+        self.tmp.cleanup()
+
+    def test_default_mode_calls_registered_module_instance(self):
+        self.core.register_module("a", SlowModule(0.0))
+        self.core.register_module("plain", object())
+        result = self.core.run("vprašanje")
+
+        self.assertEqual(result["mode"], "sequential")
+        self.assertEqual(result["modules"]["a"], "obdelano: vprašanje")
+        # Modul brez run() vrne isto kot pred registracijo instanc
+        self.assertEqual(result["modules"]["plain"], "plain modul pripravljen")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Testi za sočasni razporejevalnik optimizacij v GlobalOptimizer
+"""
+
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+# Modul ob uvozu ustvari bazo in dnevnik v trenutni mapi
+_IMPORT_DIR = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+os.chdir(_IMPORT_DIR.name)
+try:
+    from omni.modules import global_optimizer as go
+finally:
+    os.chdir(_cwd)
+go.GLOBAL_DB = os.path.join(_IMPORT_DIR.name, go.GLOBAL_DB)
+logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.close()
+    _IMPORT_DIR.cleanup()
+
+
+class SlowModule:
+    def __init__(self, seconds: float, log=None, name=None):
+        self.seconds = seconds
+        self.log = log
+        self.name = name
+
+    def auto_optimize(self):
+        if self.log is not None:
+            self.log.append((self.name, time.perf_counter()))
+        time.sleep(self.seconds)
+        return {"efficiency": 0.9, "cost_savings": 10.0}
+
+
+class TestGlobalScheduler(unittest.TestCase):
+
+    def make_optimizer(self, domains, **kwargs):
+        optimizer = go.GlobalOptimizer(**kwargs)
+        optimizer.domains = domains
+        optimizer._adjust_optimization_intervals()
+        self.addCleanup(optimizer.stop_global_optimizer)
+        return optimizer
+
+    def test_cycle_tracks_slowest_domain(self):
+        domains = {f"d{i}": {"priority": go.Priority.MEDIUM, "critical": False, "module": SlowModule(0.2)}
+                   for i in range(4)}
+        optimizer = self.make_optimizer(domains, max_workers=4)
+        with sqlite3.connect(go.GLOBAL_DB) as conn:
+            before = conn.execute("SELECT COUNT(*) FROM domain_metrics").fetchone()[0]
+
+        start = time.perf_counter()
+        result = optimizer.run_optimization_cycle()
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual((result.optimized_domains, result.failed_domains), (4, 0))
+        self.assertEqual(result.total_savings, 40.0)
+        with sqlite3.connect(go.GLOBAL_DB) as conn:
+            after = conn.execute("SELECT COUNT(*) FROM domain_metrics").fetchone()[0]
+        self.assertEqual(after - before, 4)
+        self.assertEqual(optimizer.scheduler_stats["metrics_batches"], 1)
+
+        # Intervali še niso potekli
+        self.assertIsNone(optimizer.run_optimization_cycle())
+
+    def test_timeout_and_in_flight_skip(self):
+        domains = {
+            "slow": {"priority": go.Priority.HIGH, "critical": True, "timeout": 0.1, "module": SlowModule(0.5)},
+            "fast": {"priority": go.Priority.LOW, "critical": False, "module": SlowModule(0.0)}
+        }
+        optimizer = self.make_optimizer(domains)
+
+        start = time.perf_counter()
+        result = optimizer.run_optimization_cycle()
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual((result.optimized_domains, result.failed_domains), (1, 1))
+        self.assertEqual(len(result.critical_issues), 1)
+        self.assertEqual(optimizer.scheduler_stats["timeouts"], 1)
+
+        # Prekoračena optimizacija še teče, zato se ne zažene ponovno
+        result = optimizer.run_optimization_cycle(force=True)
+        self.assertEqual(result.total_domains, 1)
+        self.assertEqual(optimizer.scheduler_stats["skipped_in_flight"], 1)
+        for future in list(optimizer.in_flight.values()):
+            future.result(2)
+
+    def test_critical_lane_does_not_wait_for_standard_domains(self):
+        log = []
+        domains = {f"slow{i}": {"priority": go.Priority.EMERGENCY, "critical": False,
+                                "module": SlowModule(0.2, log, f"slow{i}")} for i in range(3)}
+        domains["security"] = {"priority": go.Priority.LOW, "critical": True,
+                               "module": SlowModule(0.0, log, "security")}
+        optimizer = self.make_optimizer(domains, max_workers=1, critical_workers=1)
+
+        start = time.perf_counter()
+        result = optimizer.run_optimization_cycle()
+        started = dict(log)
+        self.assertEqual(result.optimized_domains, 4)
+        self.assertLess(started["security"] - start, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
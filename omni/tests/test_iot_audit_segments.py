@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Testi za segmentiran append-only audit log (IoTAuditLogger)
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.iot.iot_audit_logger import IoTAuditLogger
+
+
+class TestSegmentedAuditLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = Path(self.tmp.name) / "iot_logs.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _logger(self, **kwargs):
+        return IoTAuditLogger(str(self.log_file), **kwargs)
+
+    def _fill(self, logger, count=60):
+        for i in range(count):
+            logger.log_device_action(f"user{i % 3}", f"device{i % 4}", "turn_on", parameters={"i": i})
+
+    def test_filters_use_index_across_segments(self):
+        logger = self._logger(max_file_size=2000, backup_count=50)
+        self._fill(logger)
+        self.assertGreater(len(logger._sealed), 2)
+
+        logs = logger.get_logs(limit=5, user="user1", device_id="device1")
+        self.assertEqual([log['parameters']['i'] for log in logs], [49, 37, 25, 13, 1])
+        self.assertNotIn('chain_hash', logs[0])
+
+        stats = logger.get_statistics()
+        self.assertEqual(stats['total_logs'], 60)
+        self.assertEqual(stats['users']['user0'], 20)
+        self.assertEqual(stats['recent_activity'][0]['parameters']['i'], 59)
+
+        middle = logger.get_logs(limit=100)[30]['timestamp']
+        self.assertTrue(all(log['timestamp'] >= middle for log in logger.get_logs(limit=100, start_time=middle)))
+
+    def test_restart_continues_chain(self):
+        logger = self._logger(max_file_size=2000)
+        self._fill(logger, 20)
+        logger = self._logger(max_file_size=2000)
+        self._fill(logger, 5)
+        result = logger.verify_integrity(full=True)
+        self.assertEqual((result['verified'], result['failed']), (25, 0))
+        self.assertEqual(result['segments']['broken_chains'], [])
+
+    def test_tampering_is_detected_and_sealed_segments_are_cached(self):
+        logger = self._logger(max_file_size=2000, backup_count=50)
+        self._fill(logger)
+        first = logger.verify_integrity()
+        self.assertEqual(first['failed'], 0)
+        second = logger.verify_integrity()
+        self.assertEqual(second['segments']['skipped'], len(logger._sealed))
+        self.assertEqual(second['verified'], 60)
+
+        segment = logger.segments_dir / logger._sealed[0].name
+        lines = segment.read_text(encoding='utf-8').splitlines(keepends=True)
+        entry = json.loads(lines[1])
+        entry['parameters'] = {"i": 999}
+        lines[1] = json.dumps(entry) + "\n"
+        segment.write_text("".join(lines), encoding='utf-8')
+
+        result = logger.verify_integrity(workers=2)
+        self.assertEqual(result['failed'], 1)
+        self.assertEqual(result['segments']['broken_chains'][0]['lines'], [1])
+
+    def test_legacy_json_is_imported(self):
+        self.log_file.write_text(json.dumps({"metadata": {}, "logs": [
+            {"timestamp": "2024-01-01T00:00:00+00:00", "level": "INFO", "action_type": "device_control",
+             "user": "old", "device_id": "lamp", "command": "turn_off", "security_hash": None}
+        ]}), encoding='utf-8')
+        logger = self._logger()
+        self.assertEqual(logger.get_logs(user="old")[0]['command'], "turn_off")
+        self.assertEqual(len(self._logger().get_logs(user="old")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Testi za dogodkovno (inkrementalno) evalvacijo pravil v IoTRulesEngine
+"""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.iot import iot_rules
+from modules.iot.iot_rules import (
+    Action, ActionType, Condition, ConditionType, IoTRulesEngine, OperatorType, Rule, TimerWheel
+)
+
+
+def _sensor_rule(rule_id, sensor_id, threshold):
+    return Rule(
+        id=rule_id,
+        name=rule_id,
+        description="",
+        conditions=[Condition(f"{rule_id}_c", ConditionType.SENSOR_VALUE, sensor_id, "value",
+                              OperatorType.GREATER_THAN, threshold)],
+        actions=[Action(f"{rule_id}_a", ActionType.NOTIFICATION, "test", "notify", {"message": rule_id})]
+    )
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_fires_after_delay_including_multiple_rounds(self):
+        wheel = TimerWheel(slots=8)
+        wheel.schedule(3, "a")
+        wheel.schedule(8, "b")
+        wheel.schedule(20, "c")
+        fired = {}
+        for tick in range(1, 25):
+            for item in wheel.advance():
+                fired[item] = tick
+        self.assertEqual(fired, {"a": 3, "b": 8, "c": 20})
+
+
+class TestEventDrivenRules(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._config, self._log = iot_rules.RULES_CONFIG_FILE, iot_rules.RULES_LOG_FILE
+        iot_rules.RULES_CONFIG_FILE = str(Path(self.tmp.name) / "rules.json")
+        iot_rules.RULES_LOG_FILE = str(Path(self.tmp.name) / "logs" / "rules.log")
+        self.engine = IoTRulesEngine(evaluation_mode="event")
+
+    def tearDown(self):
+        self.engine.stop_evaluation()
+        iot_rules.RULES_CONFIG_FILE, iot_rules.RULES_LOG_FILE = self._config, self._log
+        self.tmp.cleanup()
+
+    def _wait_for(self, predicate, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_only_affected_rules_are_reevaluated(self):
+        for i in range(50):
+            self.engine.add_rule(_sensor_rule(f"rule{i}", f"sensor{i}", 25))
+        self.assertTrue(self._wait_for(lambda: all(
+            self.engine.rule_metrics[f"rule{i}"]["evaluations"] == 1 for i in range(50))))
+
+        self.engine.update_sensor_value("sensor7", "value", 30)
+        self.assertTrue(self._wait_for(lambda: self.engine.rules["rule7"].execution_count == 1))
+
+        metrics = self.engine.get_rule_metrics()
+        self.assertEqual(metrics["rule7"]["evaluations"], 2)
+        self.assertEqual(metrics["rule7"]["executions"], 1)
+        self.assertEqual(sum(metrics["rule7"]["latency_histogram"].values()), 2)
+        self.assertEqual(sum(m["evaluations"] for m in metrics.values()), 51)
+
+        # Ista vrednost ni sprememba
+        self.engine.update_sensor_value("sensor7", "value", 30)
+        time.sleep(0.2)
+        self.assertEqual(self.engine.rule_metrics["rule7"]["evaluations"], 2)
+
+    def test_cached_condition_results_combine(self):
+        rule = Rule(
+            id="combo", name="combo", description="",
+            conditions=[
+                Condition("c1", ConditionType.DEVICE_STATE, "door", "open", OperatorType.EQUALS, True),
+                Condition("c2", ConditionType.CUSTOM, "armed", "value", OperatorType.EQUALS, True),
+            ],
+            actions=[Action("a1", ActionType.NOTIFICATION, "alarm", "notify", {"message": "alarm"})]
+        )
+        self.engine.add_rule(rule)
+        self.engine.set_variable("armed", True)
+        time.sleep(0.2)
+        self.assertEqual(rule.execution_count, 0)
+
+        self.engine.update_device_state("door", "open", True)
+        self.assertTrue(self._wait_for(lambda: rule.execution_count == 1))
+        self.assertEqual(self.engine._condition_results["combo"], [True, True])
+
+    def test_removed_rule_leaves_index(self):
+        self.engine.add_rule(_sensor_rule("gone", "sensorX", 0))
+        self.engine.remove_rule("gone")
+        self.assertNotIn(("sensor", "sensorX", "value"), self.engine._condition_index)
+
+    def test_unknown_logic_operator_does_not_match(self):
+        rule = _sensor_rule("odd", "sensorY", 0)
+        rule.logic_operator = "xor"
+        self.engine.update_sensor_value("sensorY", "value", 5)
+        self.assertFalse(self.engine._evaluate_rule_incremental(rule, None, time.perf_counter()))
+        self.assertFalse(self.engine._evaluate_rule(rule))
+
+
+class TestEvaluationModeDefault(unittest.TestCase):
+
+    def test_polling_is_default(self):
+        tmp = tempfile.TemporaryDirectory()
+        config, log = iot_rules.RULES_CONFIG_FILE, iot_rules.RULES_LOG_FILE
+        iot_rules.RULES_CONFIG_FILE = str(Path(tmp.name) / "rules.json")
+        iot_rules.RULES_LOG_FILE = str(Path(tmp.name) / "logs" / "rules.log")
+        try:
+            engine = IoTRulesEngine()
+            engine.stop_evaluation()
+            self.assertEqual(engine.evaluation_mode, "polling")
+        finally:
+            iot_rules.RULES_CONFIG_FILE, iot_rules.RULES_LOG_FILE = config, log
+            tmp.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
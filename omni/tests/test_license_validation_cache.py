@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Testi za predpomnilnik preverjanj licenc in paketne odložene zapise
+v OmniLicenseSystemEnhanced
+"""
+
+import importlib
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+def _missing_dependency_stubs():
+    """Nadomestki za neobvezne odvisnosti, ki jih preverjanje licenc ne uporablja"""
+    stubs = {}
+    for name, attributes in (("bcrypt", {}), ("jwt", {}), ("flask_cors", {"CORS": lambda app: None})):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            module = types.ModuleType(name)
+            module.__dict__.update(attributes)
+            stubs[name] = module
+    return stubs
+
+
+# Nadomestki veljajo le med uvozom, da ne vplivajo na druge teste
+with mock.patch.dict(sys.modules, _missing_dependency_stubs()):
+    from omni.modules.tourism.omni_license_system_enhanced import OmniLicenseSystemEnhanced
+
+logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+class TestLicenseValidationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            with mock.patch.object(OmniLicenseSystemEnhanced, "start_background_tasks"), \
+                    mock.patch("builtins.print"):
+                self.lic = OmniLicenseSystemEnhanced()
+        finally:
+            os.chdir(cwd)
+        self.lic.db_path = os.path.join(self.tmp.name, "omni_license_system_enhanced.db")
+        self.key = self._query("SELECT license_key FROM licenses WHERE client_id = 'HOTEL003'")[0][0]
+
+    def tearDown(self):
+        self.lic.flush_pending_writes()
+        self.tmp.cleanup()
+
+    def _query(self, sql, params=()):
+        with sqlite3.connect(self.lic.db_path) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _usage_count(self):
+        return self._query("SELECT usage_count FROM licenses WHERE client_id = 'HOTEL003'")[0][0]
+
+    def test_repeated_validation_is_served_from_cache(self):
+        for _ in range(5):
+            self.assertTrue(self.lic.validate_license("HOTEL003", self.key)["valid"])
+        stats = self.lic.get_validation_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (4, 1, 1))
+
+        self.assertFalse(self.lic.validate_license("HOTEL003", "napačen")["valid"])
+        self.assertEqual(self.lic.get_validation_cache_stats()["entries"], 1)
+
+    def test_cache_entry_expires_after_ttl(self):
+        self.lic.validation_cache_ttl = 0
+        self.lic.validate_license("HOTEL003", self.key)
+        self.lic.validate_license("HOTEL003", self.key)
+        self.assertEqual(self.lic.get_validation_cache_stats()["hits"], 0)
+
+    def test_license_changes_invalidate_cache(self):
+        changes = [
+            lambda: self.lic.suspend_license("HOTEL003"),
+            lambda: self.lic.extend_license("HOTEL003", 10),
+            lambda: self.lic.deactivate_license("HOTEL003"),
+        ]
+        for change in changes:
+            self.lic.reactivate_license("HOTEL003")
+            self.assertTrue(self.lic.validate_license("HOTEL003", self.key)["valid"])
+            change()
+            self.assertEqual(self.lic.get_validation_cache_stats()["entries"], 0)
+
+        self.assertFalse(self.lic.validate_license("HOTEL003", self.key)["valid"])
+
+    def test_invalidation_during_lookup_is_not_cached(self):
+        original = self.lic.handle_hardware_activation
+
+        def activation_with_concurrent_suspend(*args, **kwargs):
+            # Licenca se spremeni med branjem iz baze
+            self.lic.invalidate_validation_cache("HOTEL003")
+            return original(*args, **kwargs)
+
+        with mock.patch.object(self.lic, "handle_hardware_activation", activation_with_concurrent_suspend):
+            self.assertTrue(self.lic.validate_license("HOTEL003", self.key, "device-1")["valid"])
+        self.assertEqual(self.lic.get_validation_cache_stats()["entries"], 0)
+
+        self.assertTrue(self.lic.validate_license("HOTEL003", self.key, "device-1")["valid"])
+        self.assertEqual(self.lic.get_validation_cache_stats()["entries"], 1)
+
+    def test_usage_is_aggregated_into_one_batch(self):
+        before = self._usage_count()
+        for _ in range(20):
+            self.lic.validate_license("HOTEL003", self.key, "device-1")
+
+        self.assertEqual(self._usage_count(), before)
+        # usage + audit za vsako preverjanje, audit aktivacije naprave
+        self.assertEqual(self.lic.flush_pending_writes(), 41)
+        self.assertEqual(self._usage_count(), before + 20)
+        validated = self._query("SELECT COUNT(*) FROM audit_logs WHERE action = 'LICENSE_VALIDATED'")[0][0]
+        self.assertEqual(validated, 20)
+        self.assertEqual(self.lic.flush_pending_writes(), 0)
+
+    def test_failed_flush_requeues_writes(self):
+        before = self._usage_count()
+        for _ in range(3):
+            self.lic.validate_license("HOTEL003", self.key)
+        self._query("ALTER TABLE audit_logs RENAME TO audit_logs_off")
+
+        self.assertEqual(self.lic.flush_pending_writes(), 0)
+        self.assertEqual(self.lic.pending_writes.qsize(), 6)
+        self.assertEqual(self._usage_count(), before)
+
+        self._query("ALTER TABLE audit_logs_off RENAME TO audit_logs")
+        self.assertEqual(self.lic.flush_pending_writes(), 6)
+        self.assertEqual(self._usage_count(), before + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Testi za append-only dnevnik spominov (omni.core.memory.journal)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.core.engine import OmniCore
+
+
+class TestJournaledMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _core(self):
+        return OmniCore(data_dir=self.data_dir, memory_backend="journal")
+
+    def test_append_and_reload(self):
+        core = self._core()
+        for i in range(50):
+            core.add_memory(f"spomin {i}", "test", 0.5, {"i": i})
+        self.assertEqual(len(core.memory), 50)
+        self.assertEqual(core.memory[-1].content, "spomin 49")
+        core.shutdown()
+
+        core = self._core()
+        self.assertEqual(len(core.memory), 50)
+        self.assertEqual(core.memory[10].metadata, {"i": 10})
+        self.assertEqual([m.content for m in core.search_memory("spomin 4")][0][:8], "spomin 4")
+        core.shutdown()
+
+    def test_background_compaction_keeps_order(self):
+        core = self._core()
+        core.memory_store.compact_threshold = 512
+        for i in range(200):
+            core.add_memory(f"vnos {i}", "test")
+        core.memory_store.compact(wait=True)
+        self.assertEqual([m.content for m in core.memory], [f"vnos {i}" for i in range(200)])
+        self.assertEqual(core.memory_store.get_stats()["snapshot_records"], 200)
+        core.shutdown()
+
+    def test_uncompacted_journal_recovered_after_crash(self):
+        core = self._core()
+        for i in range(5):
+            core.add_memory(f"pred padcem {i}")
+        core.memory_store.flush()
+        # Brez shutdown(): dnevnik ostane nekompaktiran
+        core = self._core()
+        self.assertEqual(len(core.memory), 5)
+        core.shutdown()
+
+    def test_legacy_json_file_is_migrated(self):
+        legacy = OmniCore(data_dir=self.data_dir)
+        legacy.add_memory("star spomin", "legacy", 0.9)
+        legacy.shutdown()
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, "memory", "long_term.json")))
+
+        core = self._core()
+        self.assertEqual(len(core.memory), 1)
+        self.assertEqual(core.memory[0].category, "legacy")
+        core.add_memory("nov spomin")
+        core.shutdown()
+
+        with open(os.path.join(self.data_dir, "memory", "long_term.json"), encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 1)
+        core = self._core()
+        self.assertEqual(len(core.memory), 2)
+        core.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
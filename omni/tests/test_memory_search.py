@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Testi za FTS5 iskanje v OmniMemoryManager
+"""
+
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.core.memory.manager import OmniMemoryManager
+
+
+class TestMemorySearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = OmniMemoryManager(data_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_multi_term_ranked_search(self):
+        self.manager.add_memory("Rezervacija hotela v Ljubljani", "tourism", 0.4)
+        self.manager.add_memory("Hotel Bled ima prosto sobo, hotel je ob jezeru", "tourism", 0.4)
+        self.manager.add_memory("Računovodstvo za podjetje", "finance", 0.9)
+
+        results = self.manager.search_memory("hotel")
+        self.assertEqual(len(results), 2)
+        self.assertIn("Bled", results[0].content)
+
+        results = self.manager.search_memory("hotel ljubljani")
+        self.assertEqual([r.category for r in results], ["tourism"])
+        self.assertEqual(self.manager.search_memory("hotel", category="finance"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        memory_id = self.manager.add_memory("Stari zapis o vremenu", "general", 0.1)
+        self.manager.working_memory[0].content = "Nov zapis o prometu"
+        self.manager._save_to_long_term(self.manager.working_memory[0])
+        self.assertEqual(self.manager.search_memory("vremenu"), [])
+        self.assertEqual(self.manager.search_memory("prometu")[0].id, memory_id)
+
+        self.manager.forget_old_memories(days_old=-1, min_importance=0.5)
+        self.assertEqual(self.manager.search_memory("prometu"), [])
+
+    def test_access_stats_flushed_in_batch(self):
+        memory_id = self.manager.add_memory("Statistika dostopa", "general", 0.5)
+        self.manager.search_memory("statistika")
+        self.manager.search_memory("dostopa")
+        with sqlite3.connect(self.manager.db_path) as conn:
+            count = conn.execute("SELECT access_count FROM memories WHERE id = ?", (memory_id,)).fetchone()[0]
+        self.assertEqual(count, 3)
+        self.assertEqual(self.manager._pending_access, {})
+
+    def test_existing_database_is_indexed(self):
+        with sqlite3.connect(self.manager.db_path) as conn:
+            # Simuliraj bazo iz časa pred FTS indeksom
+            for trigger in ("memories_fts_ai", "memories_fts_ad", "memories_fts_au"):
+                conn.execute(f"DROP TRIGGER {trigger}")
+            conn.execute("DROP TABLE memories_fts")
+            conn.execute("INSERT INTO memories VALUES ('x1', 'Obstoječ spomin', '2024-01-01T00:00:00', "
+                         "'general', 0.5, 0, '2024-01-01T00:00:00', '{}', NULL)")
+        manager = OmniMemoryManager(data_dir=self.tmp.name)
+        self.assertEqual(manager.search_memory("obstojec")[0].id, "x1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Testi za semantično iskanje (omni.core.memory.vectors)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.core.memory.manager import OmniMemoryManager
+from omni.core.memory.vectors import HashingEmbedder, VectorStore
+
+
+class TestVectorStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exact_and_ivf_agree_on_nearest(self):
+        rng = np.random.default_rng(1)
+        centers = rng.normal(size=(20, 32))
+        data = np.repeat(centers, 200, axis=0) + rng.normal(scale=0.05, size=(4000, 32))
+        store = VectorStore(self.tmp.name, 32, ivf_threshold=1000, nprobe=4)
+        store.add([f"v{i}" for i in range(len(data))], data)
+
+        queries = data[[5, 1234, 3999]]
+        exact = store.search(queries, k=1, exact=True)
+        approx = store.search(queries, k=1)
+        self.assertEqual([hits[0][0] for hits in exact], ["v5", "v1234", "v3999"])
+        self.assertEqual([hits[0][0] for hits in approx], ["v5", "v1234", "v3999"])
+
+    def test_persistence_and_removal(self):
+        store = VectorStore(self.tmp.name, 8)
+        store.add(["a", "b"], np.eye(8)[:2])
+        store.remove(["a"])
+
+        reopened = VectorStore(self.tmp.name, 8)
+        self.assertNotIn("a", reopened)
+        self.assertEqual(reopened.search(np.eye(8)[0], k=2)[0][0][0], "b")
+        with self.assertRaises(ValueError):
+            VectorStore(self.tmp.name, 16)
+
+    def test_orphan_ids_after_crash_are_truncated(self):
+        store = VectorStore(self.tmp.name, 8)
+        store.add(["a", "b"], np.eye(8)[:2])
+        # Prekinitev po dopisu ID-jev, preden se zapiše meta
+        with open(store.ids_path, 'a', encoding='utf-8') as f:
+            f.write("lost1\nlost2\npart")
+
+        reopened = VectorStore(self.tmp.name, 8)
+        self.assertEqual(reopened.ids, ["a", "b"])
+        reopened.add(["c"], np.eye(8)[2:3])
+
+        again = VectorStore(self.tmp.name, 8)
+        self.assertEqual(again.ids, ["a", "b", "c"])
+        self.assertEqual(again.search(np.eye(8)[2], k=1)[0][0][0], "c")
+
+    def test_deleted_rows_do_not_shrink_results(self):
+        store = VectorStore(self.tmp.name, 8, compact_ratio=1.0)
+        store.add([f"v{i}" for i in range(8)], np.eye(8) + 0.1)
+        store.remove(["v0", "v1", "v2"])
+        with open(store.meta_path, encoding='utf-8') as f:
+            self.assertNotIn("deleted", f.read())
+
+        hits = store.search(np.eye(8)[0] + 0.1, k=5, exact=True)[0]
+        self.assertEqual(len(hits), 5)
+        self.assertFalse({"v0", "v1", "v2"} & {memory_id for memory_id, _ in hits})
+        self.assertEqual(len(store.search(np.eye(8)[0], k=10, exact=True)[0]), 5)
+        self.assertEqual(VectorStore(self.tmp.name, 8, compact_ratio=1.0).deleted, {0, 1, 2})
+
+    def test_legacy_deleted_rows_in_meta_are_kept(self):
+        store = VectorStore(self.tmp.name, 8, compact_ratio=1.0)
+        store.add(["a", "b", "c"], np.eye(8)[:3])
+        with open(store.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({"dim": 8, "count": 3, "deleted": [0]}, f)
+
+        reopened = VectorStore(self.tmp.name, 8, compact_ratio=1.0)
+        reopened.add(["d"], np.eye(8)[3:4])
+        self.assertNotIn("a", VectorStore(self.tmp.name, 8, compact_ratio=1.0))
+
+    def test_compaction_drops_deleted_rows(self):
+        rng = np.random.default_rng(2)
+        data = rng.normal(size=(3000, 16))
+        store = VectorStore(self.tmp.name, 16, ivf_threshold=1000, nprobe=16)
+        store.add([f"v{i}" for i in range(len(data))], data)
+        store.search(data[0], k=1)  # zgradi IVF
+        store.remove([f"v{i}" for i in range(0, 1000, 2)])
+        self.assertEqual(store.count, 3000)
+
+        store.remove([f"v{i}" for i in range(1, 500, 2)])
+        self.assertEqual((store.count, store.deleted), (2250, set()))
+        self.assertEqual(sum(len(rows) for rows in store._lists), 2250)
+        for index in (501, 777, 2999):
+            self.assertEqual(store.search(data[index], k=1)[0][0][0], f"v{index}")
+
+        reopened = VectorStore(self.tmp.name, 16, ivf_threshold=1000)
+        with open(reopened.ids_path, encoding='utf-8') as f:
+            self.assertEqual(len(f.read().splitlines()), 2250)
+        self.assertNotIn("v2", reopened)
+        self.assertEqual(reopened.search(data[2999], k=1, exact=True)[0][0][0], "v2999")
+        reopened.add(["new"], data[:1])
+        self.assertEqual(reopened.search(data[0], k=1, exact=True)[0][0][0], "new")
+
+    def test_interrupted_compaction_is_finished_on_load(self):
+        store = VectorStore(self.tmp.name, 8, compact_ratio=1.0)
+        store.add(list("abcd"), np.eye(8)[:4])
+        store.remove(["a", "b"])
+        # Prekinitev po zapisu meta z oznako, pred zamenjavo datotek
+        replace = os.replace
+        calls = []
+
+        def crash_after_meta(src, dst):
+            calls.append(dst)
+            if len(calls) > 1:
+                raise OSError("crash")
+            replace(src, dst)
+
+        with mock.patch("os.replace", crash_after_meta):
+            with self.assertRaises(OSError):
+                store.compact()
+        self.assertEqual(calls, [store.meta_path, store.matrix_path])
+
+        reopened = VectorStore(self.tmp.name, 8)
+        self.assertEqual((reopened.ids, reopened.deleted), (["c", "d"], set()))
+        self.assertEqual(reopened.search(np.eye(8)[3], k=1)[0][0][0], "d")
+
+
+class TestSemanticSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = OmniMemoryManager(data_dir=self.tmp.name, embedder=HashingEmbedder(dim=128))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_related_memories(self):
+        existing = self.manager.add_memory("Rezervacija hotelske sobe na Bledu", "tourism")
+        self.manager.add_memory("Mesečno računovodsko poročilo", "finance")
+        # Prvo iskanje vektorizira obstoječe spomine, nadaljnji se dodajajo sproti
+        results = self.manager.semantic_search("hotelska rezervacija")
+        self.assertEqual(results[0][0].id, existing)
+
+        later = self.manager.add_memory("Rezervirana hotelska soba v Piranu", "tourism")
+        related = self.manager.find_related_memories(existing, limit=1)
+        self.assertEqual(related[0][0].id, later)
+        self.assertEqual(self.manager.semantic_search("hotel", category="finance", min_score=0.5), [])
+
+    def test_forgotten_memories_leave_index(self):
+        memory_id = self.manager.add_memory("Zastarel zapis", "general", 0.1)
+        self.assertEqual(self.manager.semantic_search("zastarel")[0][0].id, memory_id)
+        self.manager.forget_old_memories(days_old=-1, min_importance=0.5)
+        self.assertEqual(self.manager.semantic_search("zastarel"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Testi za indeks vzorcev in inkrementalno shranjevanje v OmniAdaptiveLearning
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.core.learning.adaptive import OmniAdaptiveLearning
+from omni.core.learning.pattern_index import PatternIndex
+
+
+class TestPatternIndex(unittest.TestCase):
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(7)
+        vocabulary = [f"beseda{i}" for i in range(60)] + ["v", "za", "hotel"]
+        learning = OmniAdaptiveLearning.__new__(OmniAdaptiveLearning)
+        index = PatternIndex(rare_limit=20)
+        stored = {}
+        for i in range(2000):
+            data = {'query': ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 6)))}
+            stored[f"p{i}"] = data
+            index.add(f"p{i}", data)
+
+        for _ in range(200):
+            query = {'query': ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 6)))}
+            expected = {pid for pid, data in stored.items()
+                        if learning._calculate_similarity(query, data) > 0.3}
+            self.assertEqual({pid for pid, _ in index.query(query, 0.3)}, expected)
+
+    def test_remove(self):
+        index = PatternIndex()
+        index.add("a", {'query': 'hotel ljubljana'})
+        index.remove("a")
+        self.assertEqual(index.query({'query': 'hotel ljubljana'}), [])
+        self.assertEqual(index.postings, {})
+
+
+class TestIncrementalPatternStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _interaction(self, query):
+        return {'type': 'tourism', 'input': {'query': query}, 'output': {'hotel': query}}
+
+    def test_changes_survive_restart_without_full_rewrite(self):
+        learning = OmniAdaptiveLearning(data_dir=self.tmp.name)
+        learning.learn_from_interaction(self._interaction("hotel v ljubljani"), 0.9)
+        learning.learn_from_interaction(self._interaction("kamp na bledu"), 0.7)
+        recommendation = learning.get_recommendation({'query': 'hotel v ljubljani'})
+        self.assertEqual(recommendation['recommendation'], {'hotel': 'hotel v ljubljani'})
+        self.assertFalse(os.path.exists(learning._patterns_file))
+
+        reloaded = OmniAdaptiveLearning(data_dir=self.tmp.name)
+        self.assertEqual(len(reloaded.patterns), 2)
+        self.assertEqual(reloaded.patterns[recommendation['pattern_id']].usage_count, 2)
+        self.assertEqual(reloaded.get_recommendation({'query': 'kamp na bledu'})['recommendation'],
+                         {'hotel': 'kamp na bledu'})
+
+    def test_log_is_compacted_into_snapshot(self):
+        learning = OmniAdaptiveLearning(data_dir=self.tmp.name)
+        learning.pattern_compact_after = 5
+        for i in range(4):
+            learning.learn_from_interaction(self._interaction(f"poizvedba {i}"), 0.8)
+        for _ in range(10):
+            learning.get_recommendation({'query': 'poizvedba 1'})
+        self.assertTrue(os.path.exists(learning._patterns_file))
+        self.assertLessEqual(learning._pattern_log_entries, 5)
+
+        reloaded = OmniAdaptiveLearning(data_dir=self.tmp.name)
+        self.assertEqual(len(reloaded.patterns), 4)
+        self.assertEqual(reloaded.patterns[learning.find_similar_patterns({'query': 'poizvedba 1'})[0].id].usage_count, 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
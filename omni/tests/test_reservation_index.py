@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Testi za indeks zasedenosti v ReservationSystem
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.modules.tourism.reservation_system import (
+    ReservationStatus, ReservationSystem, ReservationType, Resource
+)
+
+logging.disable(logging.CRITICAL)
+
+BASE = datetime(2025, 6, 6, 0, 0)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def sql_conflicts(db_path, resource_id, start, end):
+    """Prejšnje preverjanje prekrivanja v bazi"""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('''
+            SELECT COUNT(*) FROM reservations
+            WHERE resource_id = ? AND status NOT IN ('cancelled', 'no_show')
+            AND start_datetime < ? AND end_datetime > ?
+        ''', (resource_id, end.isoformat(), start.isoformat())).fetchone()[0]
+
+
+class TestReservationIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "reservations.db")
+        self.system = ReservationSystem(self.db_path)
+        for i in range(6):
+            self.system.add_resource(Resource(f"ROOM{i}", f"Soba {i}", ReservationType.ROOM, 2 + i % 3,
+                                              ["balkon"], 80.0))
+        self.system.add_resource(Resource("TABLE0", "Miza 0", ReservationType.TABLE, 4, [], 0.0))
+
+    def reserve(self, resource_id, start_hours, hours):
+        start = BASE + timedelta(hours=start_hours)
+        return self.system.create_reservation({
+            "customer_id": "CUST001",
+            "resource_id": resource_id,
+            "reservation_type": ReservationType.ROOM.value,
+            "start_datetime": start.isoformat(),
+            "end_datetime": (start + timedelta(hours=hours)).isoformat(),
+            "party_size": 2
+        })
+
+    def test_matches_database_after_random_changes(self):
+        rng = random.Random(7)
+        created = []
+        for _ in range(300):
+            result = self.reserve(f"ROOM{rng.randrange(6)}", rng.randrange(0, 500), rng.randrange(1, 48))
+            if result["success"]:
+                created.append(result["reservation_id"])
+        for reservation_id in rng.sample(created, len(created) // 3):
+            self.system.update_reservation_status(reservation_id, rng.choice(
+                [ReservationStatus.CANCELLED, ReservationStatus.NO_SHOW, ReservationStatus.CONFIRMED]))
+
+        reloaded = ReservationSystem(self.db_path)
+        for _ in range(300):
+            resource_id = f"ROOM{rng.randrange(6)}"
+            start = BASE + timedelta(hours=rng.randrange(-10, 550), minutes=rng.choice([0, 30]))
+            end = start + timedelta(hours=rng.randrange(1, 72))
+            expected = sql_conflicts(self.db_path, resource_id, start, end)
+            self.assertEqual(self.system.check_availability(resource_id, start, end)["conflicts"], expected)
+            self.assertEqual(reloaded.check_availability(resource_id, start, end)["conflicts"], expected)
+
+            free = {r["resource_id"] for r in self.system.find_available_resources(
+                ReservationType.ROOM, start, end, 3)}
+            expected_free = {f"ROOM{i}" for i in range(6)
+                             if 2 + i % 3 >= 3 and sql_conflicts(self.db_path, f"ROOM{i}", start, end) == 0}
+            self.assertEqual(free, expected_free)
+
+    def test_cancel_and_reactivate(self):
+        reservation_id = self.reserve("ROOM1", 10, 24)["reservation_id"]
+        self.assertFalse(self.reserve("ROOM1", 20, 2)["success"])
+        self.assertTrue(self.reserve("ROOM1", 34, 2)["success"])  # začne se ob koncu prejšnje
+
+        self.system.update_reservation_status(reservation_id, ReservationStatus.CANCELLED)
+        self.assertTrue(self.system.check_availability("ROOM1", BASE + timedelta(hours=12),
+                                                       BASE + timedelta(hours=14))["available"])
+        self.system.update_reservation_status(reservation_id, ReservationStatus.CONFIRMED)
+        self.assertEqual(self.system.check_availability("ROOM1", BASE + timedelta(hours=12),
+                                                        BASE + timedelta(hours=14))["conflicts"], 1)
+
+    def test_inactive_and_unknown_resources(self):
+        self.system.add_resource(Resource("ROOM9", "Soba 9", ReservationType.ROOM, 4, [], 80.0, is_active=False))
+        start, end = BASE, BASE + timedelta(hours=1)
+        self.assertEqual(self.system.check_availability("ROOM9", start, end)["reason"], "Vir ni aktiven")
+        self.assertEqual(self.system.check_availability("NOPE", start, end)["reason"], "Vir ne obstaja")
+        free = self.system.find_available_resources(ReservationType.ROOM, start, end, 1)
+        self.assertNotIn("ROOM9", {r["resource_id"] for r in free})
+        self.assertEqual(free[0]["features"], ["balkon"])
+
+    def test_availability_calendar(self):
+        self.reserve("ROOM0", 2, 3)      # 02:00-05:00
+        self.reserve("ROOM0", 7.5, 1)    # 07:30-08:30
+        self.reserve("ROOM1", 20, 10)    # sega čez konec obdobja
+
+        calendar = self.system.get_availability_calendar(BASE, BASE + timedelta(days=1), ReservationType.ROOM)
+        self.assertEqual(calendar["slots"], 24)
+        self.assertEqual(set(calendar["resources"]), {f"ROOM{i}" for i in range(6)})
+        self.assertEqual(calendar["resources"]["ROOM0"]["occupancy"], "001110011" + "0" * 15)
+        self.assertEqual(calendar["resources"]["ROOM1"]["occupancy"], "0" * 20 + "1111")
+        self.assertEqual(calendar["resources"]["ROOM2"]["occupancy_rate"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
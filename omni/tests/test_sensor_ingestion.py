@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Testi za paketni zapis senzorskih podatkov z agregati
+"""
+
+import sqlite3
+import sys
+import tempfile
+import unittest
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.iot.sensor_ingestion import SensorIngestionPipeline
+
+
+@dataclass
+class Reading:
+    device_id: str
+    sensor_type: str
+    value: float
+    unit: str
+    timestamp: datetime
+    quality: str = "good"
+
+
+@dataclass
+class Status:
+    device_id: str
+    online: bool
+    last_seen: datetime
+    battery_level: float = None
+    signal_strength: float = None
+    uptime: int = None
+
+
+class TestSensorIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / "monitoring.db"
+        self.pipeline = SensorIngestionPipeline(self.db_path, batch_size=50, flush_interval=0.05)
+
+    def tearDown(self):
+        self.pipeline.close()
+        self.tmp.cleanup()
+
+    def _query(self, sql, params=()):
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_rollups_match_raw_data(self):
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(300):
+            self.pipeline.submit_reading(Reading("dev1", "temp", float(i % 7), "C", start + timedelta(seconds=i)))
+        self.pipeline.flush()
+
+        self.assertEqual(self._query("SELECT COUNT(*) FROM sensor_data")[0][0], 300)
+        self.assertGreater(self.pipeline.get_stats()['batches'], 1)
+
+        raw = self._query("SELECT SUM(value), MIN(value), MAX(value) FROM sensor_data")[0]
+        for table, buckets in (("sensor_rollup_1m", 5), ("sensor_rollup_1h", 1), ("sensor_rollup_1d", 1)):
+            rows = self._query(f"SELECT SUM(count), SUM(sum), MIN(min), MAX(max), COUNT(*) FROM {table}")[0]
+            self.assertEqual(rows[0], 300)
+            self.assertEqual(rows[1:4], raw)
+            self.assertEqual(rows[4], buckets)
+
+    def test_latest_and_status(self):
+        now = datetime.now()
+        self.pipeline.submit_reading(Reading("dev1", "temp", 21.0, "C", now))
+        self.pipeline.submit_reading(Reading("dev1", "temp", 19.0, "C", now - timedelta(minutes=5)))
+        self.pipeline.submit_status(Status("dev1", False, now))
+        self.pipeline.submit_status(Status("dev1", True, now, battery_level=80.0))
+        self.pipeline.flush()
+
+        self.assertEqual(self._query("SELECT value FROM sensor_latest WHERE device_id = 'dev1'"), [(21.0,)])
+        self.assertEqual(self._query("SELECT online, battery_level FROM device_status"), [(1, 80.0)])
+
+    def test_drop_overflow(self):
+        self.pipeline.close()
+        self.pipeline = SensorIngestionPipeline(self.db_path, max_queue=1, overflow="drop")
+        self.pipeline.close()  # ustavljena pisalna nit: vrsta se ne prazni
+        results = [self.pipeline.submit_reading(Reading("d", "t", 1.0, "C", datetime.now())) for _ in range(5)]
+        self.assertEqual(results, [True, False, False, False, False])
+        self.assertEqual(self.pipeline.get_stats()['dropped'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
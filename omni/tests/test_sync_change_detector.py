@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Testi za zaznavanje sprememb datotek v Omni Cloud Sync
+"""
+
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.modules.tourism import sync_change_detector as scd
+
+logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+class TestFileChecksum(unittest.TestCase):
+
+    def test_matches_md5_for_small_and_mmap_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in (0, 1000, scd.MMAP_THRESHOLD + 12345):
+                path = os.path.join(tmp, f"f{size}")
+                data = os.urandom(size)
+                Path(path).write_bytes(data)
+                self.assertEqual(scd.file_checksum(path), hashlib.md5(data).hexdigest())
+            self.assertIsNone(scd.file_checksum(os.path.join(tmp, "missing")))
+
+
+class TestFileChangeDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.detector = scd.FileChangeDetector(hash_workers=2)
+        self.addCleanup(self.detector.stop)
+        self.paths = []
+        old = time.time() - 60
+        for i in range(20):
+            path = os.path.join(self.tmp.name, f"m{i}.py")
+            Path(path).write_text(f"x = {i}\n")
+            os.utime(path, (old, old))
+            self.detector.record(path)
+            self.paths.append(path)
+
+    def test_idle_cycle_hashes_nothing(self):
+        self.assertEqual(self.detector.changed_paths(self.paths), {})
+        self.assertEqual(self.detector.stats["hashed_files"], 0)
+
+    def test_detects_modified_and_deleted_files(self):
+        Path(self.paths[3]).write_text("x = 'spremenjeno'\n")
+        os.remove(self.paths[5])
+
+        changed = self.detector.changed_paths(self.paths)
+        self.assertEqual(set(changed), {self.paths[3], self.paths[5]})
+        self.assertIsNone(changed[self.paths[5]])
+
+        checksums = self.detector.hash_files(changed)
+        self.assertEqual(checksums, {self.paths[3]: hashlib.md5(b"x = 'spremenjeno'\n").hexdigest()})
+        self.assertNotIn(self.paths[5], self.detector.signatures)
+
+    def test_recently_modified_file_is_rechecked(self):
+        # Sprememba v isti sekundi kot zapis podpisa (enak size in mtime) ne sme uiti
+        path = self.paths[0]
+        now = time.time()
+        os.utime(path, (now, now))
+        self.detector.record(path)
+        stat = os.stat(path)
+        Path(path).write_text("x = 9\n")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIn(path, self.detector.changed_paths(self.paths))
+
+    def test_watched_cycle_only_checks_dirty_paths(self):
+        self.detector.observer = object()  # opazovanje brez watchdog: dogodki preko mark_dirty
+        self.addCleanup(setattr, self.detector, "observer", None)
+        self.detector.changed_paths(self.paths)  # prvi cikel je poln pregled
+        stat_calls = self.detector.stats["stat_calls"]
+
+        Path(self.paths[7]).write_text("x = 'novo'\n")
+        self.detector.mark_dirty(self.paths[7])
+        self.assertEqual(set(self.detector.changed_paths(self.paths)), {self.paths[7]})
+        self.assertEqual(self.detector.stats["stat_calls"] - stat_calls, 1)
+        self.assertEqual(self.detector.stats["watched_cycles"], 1)
+
+        self.detector.request_full_scan()
+        self.detector.changed_paths(self.paths)
+        self.assertEqual(self.detector.stats["full_scans"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
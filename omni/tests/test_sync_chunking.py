@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Testi za delta prenos po kosih in inkrementalno sinhronizacijo vozlišč Omni Cloud Sync
+"""
+
+import hashlib
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.modules.tourism import sync_chunking as sc
+
+try:
+    from werkzeug.serving import make_server
+    from omni.modules.tourism.omni_cloud_sync import OmniCloudSync
+except ImportError:
+    OmniCloudSync = None
+
+logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def _edited(data: bytes, position: int, insert: bytes, remove: int = 0) -> bytes:
+    return data[:position] + insert + data[position + remove:]
+
+
+class TestChunking(unittest.TestCase):
+
+    def setUp(self):
+        self.data = random.Random(7).randbytes(3 * 1024 * 1024)
+
+    def test_chunks_cover_data_within_size_limits(self):
+        manifest = sc.build_manifest(self.data)
+        sizes = [chunk["size"] for chunk in manifest["chunks"]]
+        self.assertEqual(sum(sizes), len(self.data))
+        self.assertTrue(all(size <= sc.MAX_CHUNK_SIZE for size in sizes))
+        self.assertTrue(all(size >= sc.MIN_CHUNK_SIZE for size in sizes[:-1]))
+        self.assertEqual(manifest["checksum"], hashlib.md5(self.data).hexdigest())
+        self.assertEqual(sc.build_manifest(b""), {"size": 0, "checksum": hashlib.md5(b"").hexdigest(), "chunks": []})
+
+    def test_boundaries_do_not_depend_on_block_size(self):
+        expected = sc.chunk_boundaries(self.data)
+        original = sc.BLOCK_SIZE
+        try:
+            sc.BLOCK_SIZE = 100_000
+            self.assertEqual(sc.chunk_boundaries(self.data), expected)
+        finally:
+            sc.BLOCK_SIZE = original
+
+    def test_insertion_transfers_only_nearby_chunks(self):
+        local_manifest = sc.build_manifest(self.data)
+        edited = _edited(self.data, 1_500_000, b"nova vsebina", remove=3)
+        remote_manifest = sc.build_manifest(edited)
+
+        missing = sc.missing_chunks(remote_manifest, local_manifest)
+        self.assertLessEqual(sum(chunk["size"] for chunk in missing), 2 * sc.MAX_CHUNK_SIZE)
+
+        payload = b"".join(edited[c["offset"]:c["offset"] + c["size"]] for c in missing)
+        fetched = sc.split_chunks(payload, missing)
+        self.assertEqual(sc.assemble(remote_manifest, fetched, self.data, local_manifest), edited)
+
+    def test_corrupted_chunks_are_rejected(self):
+        manifest = sc.build_manifest(self.data)
+        chunk = manifest["chunks"][0]
+        with self.assertRaises(ValueError):
+            sc.split_chunks(b"\0" * chunk["size"], [chunk])
+        with self.assertRaises(ValueError):
+            sc.assemble(dict(manifest, checksum="0" * 32), {}, self.data, manifest)
+
+
+@unittest.skipUnless(OmniCloudSync is not None, "odvisnosti Omni Cloud Sync niso nameščene")
+class TestTwoNodeSync(unittest.TestCase):
+    """Dve vozlišči na različnih vratih, vsako s svojim sync_root"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.roots = {}
+        self.nodes = {}
+        for name in ("a", "b"):
+            root = Path(self.tmp.name) / name
+            (root / "tourism").mkdir(parents=True)
+            self.roots[name] = root
+        self.large = random.Random(3).randbytes(1024 * 1024)
+        (self.roots["a"] / "tourism" / "data.txt").write_bytes(self.large)
+        (self.roots["a"] / "tourism" / "config.json").write_text('{"rooms": 12}')
+
+        for name in ("a", "b"):
+            node = OmniCloudSync(db_path=os.path.join(self.tmp.name, f"{name}.db"), node_id=name,
+                                 sync_root=str(self.roots[name]))
+            self.addCleanup(node.stop)
+            server = make_server("127.0.0.1", 0, node.app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.addCleanup(server.shutdown)
+            self.nodes[name] = (node, f"http://127.0.0.1:{server.server_port}")
+
+        node_a, endpoint_a = self.nodes["a"]
+        node_b, endpoint_b = self.nodes["b"]
+        node_a.register_node("b", "Vozlišče B", endpoint_b)
+        node_b.register_node("a", "Vozlišče A", endpoint_a)
+
+    def _file(self, name: str, filename: str) -> Path:
+        return self.roots[name] / "tourism" / filename
+
+    def test_new_files_are_replicated(self):
+        node_b = self.nodes["b"][0]
+        node_b.sync_with_nodes()
+        self.assertEqual(self._file("b", "data.txt").read_bytes(), self.large)
+        self.assertEqual(self._file("b", "config.json").read_text(), '{"rooms": 12}')
+        self.assertEqual(node_b.transfer_stats["full_downloads"], 2)
+
+    def test_edit_is_transferred_as_delta_and_list_is_incremental(self):
+        node_a, endpoint_a = self.nodes["a"]
+        node_b = self.nodes["b"][0]
+        node_b.sync_with_nodes()
+        node_a.sync_with_nodes()  # A potrdi, da ima B enako vsebino
+
+        _, sequence = node_b.node_sequences["a"]
+        edited = _edited(self.large, 400_000, b"sprememba na vozliscu A")
+        self._file("a", "data.txt").write_bytes(edited)
+        node_a.check_for_changes()
+
+        changes = node_a.get_items_since(sequence, node_b.node_sequences["a"][0])
+        self.assertEqual([item["metadata"]["sync_path"] for item in changes["items"]], ["tourism/data.txt"])
+
+        transferred = node_b.transfer_stats["bytes_transferred"]
+        node_b.sync_with_nodes()
+        self.assertEqual(self._file("b", "data.txt").read_bytes(), edited)
+        self.assertEqual(node_b.transfer_stats["delta_downloads"], 1)
+        self.assertLess(node_b.transfer_stats["bytes_transferred"] - transferred, len(edited) // 10)
+
+        # B sprememb nima, zato A ne prenese ničesar in ne ustvari konflikta
+        node_a.sync_with_nodes()
+        self.assertEqual(node_a.transfer_stats["bytes_transferred"], 0)
+        self.assertEqual(node_a.sync_conflicts, {})
+
+    def test_concurrent_edits_create_conflict(self):
+        node_a = self.nodes["a"][0]
+        node_b = self.nodes["b"][0]
+        node_b.sync_with_nodes()
+        node_a.sync_with_nodes()
+
+        self._file("a", "config.json").write_text('{"rooms": 14}')
+        self._file("b", "config.json").write_text('{"rooms": 10}')
+        node_a.check_for_changes()
+        node_b.check_for_changes()
+        node_b.sync_with_nodes()
+
+        self.assertEqual(self._file("b", "config.json").read_text(), '{"rooms": 10}')
+        self.assertEqual(len(node_b.sync_conflicts), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Testi za VRP razporejanje dostav po vozilih
+"""
+
+import itertools
+import logging
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from omni.modules.logistics import logistics_optimizer as lo
+from omni.modules.logistics.vrp import assign_vehicles, distance_matrix, route_distance, solve_vrp
+
+logging.disable(logging.CRITICAL)
+
+DEPOT = {"lat": 46.0569, "lng": 14.5058}
+VEHICLES = [
+    {"id": "VEH001", "capacity": {"weight": 1000, "volume": 10}, "current_location": DEPOT},
+    {"id": "VEH002", "capacity": {"weight": 300, "volume": 3}, "current_location": DEPOT}
+]
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def random_stops(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{"lat": 46.05 + rng.normal(0, 0.2), "lng": 14.5 + rng.normal(0, 0.3),
+             "weight": float(rng.integers(5, 60)), "volume": float(rng.uniform(0.01, 0.2))}
+            for _ in range(count)]
+
+
+class TestSolveVrp(unittest.TestCase):
+
+    def assert_valid(self, result, stops):
+        served = sorted(s for route in result["routes"] for s in route["stops"])
+        self.assertEqual(sorted(served + result["unassigned"]), list(range(len(stops))))
+        capacities = {v["id"]: v["capacity"] for v in VEHICLES}
+        for route in result["routes"]:
+            capacity = capacities[route["vehicle_id"]]
+            self.assertLessEqual(route["load"]["weight"], capacity["weight"])
+            self.assertLessEqual(route["load"]["volume"], capacity["volume"] + 1e-9)
+            self.assertAlmostEqual(route["load"]["weight"], sum(stops[s]["weight"] for s in route["stops"]))
+
+    def test_small_instance_is_optimal(self):
+        stops = random_stops(6, seed=1)
+        vehicles = [{"id": "V", "capacity": {"weight": 10_000, "volume": 100}}]
+        result = solve_vrp(stops, vehicles, depot=DEPOT)
+        self.assertEqual(len(result["routes"]), 1)
+
+        coords = np.array([[DEPOT["lat"], DEPOT["lng"]]] + [[s["lat"], s["lng"]] for s in stops])
+        dist = distance_matrix(coords)
+        best = min(route_distance([p + 1 for p in perm], dist) for perm in itertools.permutations(range(6)))
+        self.assertAlmostEqual(result["total_distance_km"], best, delta=0.01)
+
+    def test_capacity_and_coverage(self):
+        stops = random_stops(300, seed=2)
+        result = solve_vrp(stops, VEHICLES, time_budget=5.0)
+        self.assert_valid(result, stops)
+        self.assertEqual(result["unassigned"], [])
+        self.assertLessEqual(result["total_distance_km"], result["initial_distance_km"] + 1e-6)
+        # Obe vozili sta uporabljeni, težje poti gredo večjemu vozilu
+        self.assertEqual({r["vehicle_id"] for r in result["routes"]}, {"VEH001", "VEH002"})
+        self.assertTrue(any(r["trip"] > 1 for r in result["routes"]))
+
+    def test_oversized_stop_is_unassigned(self):
+        stops = random_stops(20, seed=3)
+        stops[5]["weight"] = 5000
+        result = solve_vrp(stops, VEHICLES)
+        self.assertEqual(result["unassigned"], [5])
+        self.assert_valid(result, stops)
+
+    def test_mixed_fleet_routes_fit_real_vehicles(self):
+        # Maksimum po dimenzijah (1000 kg / 50 m³) ni nobeno dejansko vozilo
+        vehicles = [{"id": "TRUCK", "capacity": {"weight": 1000, "volume": 5}},
+                    {"id": "VAN", "capacity": {"weight": 100, "volume": 50}}]
+        stops = [{"lat": 46.06, "lng": 14.51, "weight": 80, "volume": 4},
+                 {"lat": 46.061, "lng": 14.511, "weight": 80, "volume": 4}]
+        result = solve_vrp(stops, vehicles, depot=DEPOT)
+        self.assertEqual(result["unassigned"], [])
+        self.assertEqual(len(result["routes"]), 2)
+
+        stops = random_stops(200, seed=5)
+        for i, stop in enumerate(stops):
+            stop["volume"] = 3.0 if i % 4 == 0 else 0.5
+        result = solve_vrp(stops, vehicles, depot=DEPOT, time_budget=2.0)
+        capacities = {v["id"]: v["capacity"] for v in vehicles}
+        served = sorted(s for route in result["routes"] for s in route["stops"])
+        self.assertEqual(sorted(served + result["unassigned"]), list(range(200)))
+        self.assertEqual(result["unassigned"], [])
+        for route in result["routes"]:
+            capacity = capacities[route["vehicle_id"]]
+            self.assertLessEqual(route["load"]["weight"], capacity["weight"])
+            self.assertLessEqual(route["load"]["volume"], capacity["volume"] + 1e-9)
+
+    def test_assign_vehicles_splits_route_no_vehicle_can_take(self):
+        vehicles = [{"id": "TRUCK", "capacity": {"weight": 1000, "volume": 5}},
+                    {"id": "VAN", "capacity": {"weight": 100, "volume": 50}}]
+        coords = np.array([[DEPOT["lat"], DEPOT["lng"]], [46.06, 14.51], [46.07, 14.52], [46.08, 14.53]])
+        demand = np.array([[0, 0], [80, 4], [80, 4], [2000, 1]], dtype=float)
+        assigned, unassigned = assign_vehicles([[1, 2, 3]], distance_matrix(coords), demand, vehicles)
+        self.assertEqual(unassigned, [3])
+        self.assertEqual(sorted(stop for route in assigned for stop in route["stops"]), [1, 2])
+        self.assertEqual(len(assigned), 2)
+
+    def test_requires_vehicle(self):
+        with self.assertRaises(ValueError):
+            solve_vrp(random_stops(3), [])
+
+
+class TestOptimizeDeliveryRoutes(unittest.TestCase):
+
+    def test_vehicle_routes(self):
+        stops = random_stops(40, seed=4)
+        deliveries = [{"product": f"P{i % 3}", "quantity": int(s["weight"]), "destination": f"D{i}",
+                       "location": {"lat": s["lat"], "lng": s["lng"]}, "volume": s["volume"]}
+                      for i, s in enumerate(stops)]
+        result = lo.optimize_delivery_routes(deliveries, vehicles=VEHICLES, depot=DEPOT, time_budget=2.0)
+
+        self.assertEqual(result["total_deliveries"], 40)
+        self.assertEqual(sum(r["delivery_count"] for r in result["optimized_routes"]), 40)
+        self.assertEqual(result["unassigned_deliveries"], [])
+        for route in result["optimized_routes"]:
+            self.assertEqual(route["total_quantity"], route["load"]["weight"])
+            self.assertGreater(route["distance_km"], 0)
+
+    def test_without_vehicles_groups_by_destination(self):
+        deliveries = [{"product": "A", "quantity": 5, "destination": "Ljubljana"},
+                      {"product": "B", "quantity": 3, "destination": "Ljubljana"}]
+        result = lo.optimize_delivery_routes(deliveries)
+        self.assertEqual(len(result["optimized_routes"]), 1)
+        self.assertNotIn("vehicle_id", result["optimized_routes"][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
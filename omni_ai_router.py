@@ -5,9 +5,11 @@ Inteligentno usmerjanje zahtev z OpenAI GPT-4
 """
 
 import os
+import re
 import json
 import asyncio
 import logging
+from functools import lru_cache
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
@@ -22,6 +24,37 @@ import uvicorn
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("omni_ai_router")
 
+# Rule-based usmerjanje: (modul, ključne besede, razlog), prvo ujemajoče se pravilo zmaga
+RULE_BASED_ROUTES = [
+    ("finance", ['denar', 'račun', 'plačilo', 'stroški', 'proračun', 'finance', 'invoice'],
+     "Rule-based: finančne ključne besede"),
+    ("analytics", ['analiza', 'poročilo', 'statistika', 'graf', 'podatki', 'metrics'],
+     "Rule-based: analytics ključne besede"),
+    ("task_calendar", ['naloga', 'sestanek', 'koledar', 'opomnik', 'task', 'meeting'],
+     "Rule-based: task/calendar ključne besede"),
+    ("logistics", ['dostava', 'transport', 'skladišče', 'logistika', 'shipping'],
+     "Rule-based: logistics ključne besede"),
+]
+
+# En regex za vsa pravila: lookahead se preizkusi na vsakem mestu poizvedbe in tam
+# vrne pravilo z najvišjo prioriteto, zato zadostuje en prehod čez besedilo
+_RULE_MATCHER = re.compile("(?=(?:" + "|".join(
+    f"(?P<r{position}>{'|'.join(map(re.escape, keywords))})"
+    for position, (_, keywords, _) in enumerate(RULE_BASED_ROUTES)
+) + "))")
+
+@lru_cache(maxsize=1024)
+def _match_rule_route(query_lower: str) -> Optional[int]:
+    """Indeks prvega pravila iz RULE_BASED_ROUTES, ki se ujema s poizvedbo"""
+    best = None
+    for match in _RULE_MATCHER.finditer(query_lower):
+        position = int(match.lastgroup[1:])
+        if best is None or position < best:
+            best = position
+            if best == 0:
+                break
+    return best
+
 class ModuleType(Enum):
     FINANCE = "finance"
     ANALYTICS = "analytics"
@@ -240,23 +273,10 @@ Confidence naj bo med 0.0 in 1.0, kjer 1.0 pomeni popolno gotovost.
     
     def _rule_based_routing(self, request: RoutingRequest) -> tuple[str, float, str]:
         """Preprost rule-based routing kot fallback"""
-        query_lower = request.query.lower()
-        
-        # Finančne ključne besede
-        if any(word in query_lower for word in ['denar', 'račun', 'plačilo', 'stroški', 'proračun', 'finance', 'invoice']):
-            return "finance", 0.8, "Rule-based: finančne ključne besede"
-        
-        # Analytics ključne besede
-        if any(word in query_lower for word in ['analiza', 'poročilo', 'statistika', 'graf', 'podatki', 'metrics']):
-            return "analytics", 0.8, "Rule-based: analytics ključne besede"
-        
-        # Task/Calendar ključne besede
-        if any(word in query_lower for word in ['naloga', 'sestanek', 'koledar', 'opomnik', 'task', 'meeting']):
-            return "task_calendar", 0.8, "Rule-based: task/calendar ključne besede"
-        
-        # Logistics ključne besede
-        if any(word in query_lower for word in ['dostava', 'transport', 'skladišče', 'logistika', 'shipping']):
-            return "logistics", 0.8, "Rule-based: logistics ključne besede"
+        position = _match_rule_route(request.query.lower())
+        if position is not None:
+            module, _, reason = RULE_BASED_ROUTES[position]
+            return module, 0.8, reason
         
         # Default na general
         return "general", 0.5, "Rule-based: splošna zahteva"
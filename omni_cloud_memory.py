@@ -12,16 +12,62 @@ import redis
 import hashlib
 import gzip
 import pickle
+import fnmatch
+import base64
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 import threading
 import time
 from pathlib import Path
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 logger = logging.getLogger('OmniCloudMemory')
 
+# Serializacija in kompresija vrednosti v SQLite: ime -> (kodiraj, dekodiraj).
+# Uporabljeni kodek se shrani v stolpec ``codec`` (npr. "pickle+gzip", "msgpack+zstd").
+SERIALIZERS = {
+    "pickle": (lambda value: pickle.dumps(value, pickle.HIGHEST_PROTOCOL), pickle.loads),
+}
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = (
+        lambda value: msgpack.packb(value, use_bin_type=True, default=str),
+        lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+    )
+
+COMPRESSORS = {
+    "gzip": (gzip.compress, gzip.decompress),
+}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = (
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+COMPRESS_THRESHOLD_BYTES = 1024  # Kompresija za podatke > 1KB
+
+
+def encode_cursor(created_at: Any, data_id: str) -> str:
+    """Kazalec za keyset paginacijo: zadnji (created_at, id) na strani"""
+    raw = json.dumps([str(created_at), data_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    created_at, data_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return created_at, data_id
+
 class DataCategory(Enum):
     TRANSACTIONS = "transactions"
     RESERVATIONS = "reservations"
@@ -49,65 +95,314 @@ class DataEntry:
     storage_type: StorageType = StorageType.PERSISTENT
     compressed: bool = False
 
+class EmbeddedRedis:
+    """
+    Lokalni nadomestek za Redis (podmnožica ukazov redis-py z decode_responses=True).
+    Uporablja se, ko Redis ni dosegljiv; podatki živijo samo v procesu.
+    Potekli ključi se odstranijo leno ob dostopu in ob ``keys``/``dbsize``.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, str] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, name: str) -> bool:
+        deadline = self._expires.get(name)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(name, None)
+            del self._expires[name]
+            return False
+        return name in self._data
+
+    def _purge(self):
+        now = time.monotonic()
+        for name in [name for name, deadline in self._expires.items() if deadline <= now]:
+            self._data.pop(name, None)
+            del self._expires[name]
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            return self._data[name] if self._alive(name) else None
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None, px: Optional[int] = None,
+            nx: bool = False, xx: bool = False) -> Optional[bool]:
+        with self._lock:
+            exists = self._alive(name)
+            if (nx and exists) or (xx and not exists):
+                return None
+            self._data[name] = value if isinstance(value, str) else str(value)
+            self._expires.pop(name, None)
+            if ex is not None:
+                self._expires[name] = time.monotonic() + ex
+            elif px is not None:
+                self._expires[name] = time.monotonic() + px / 1000
+            return True
+
+    def expire(self, name: str, time_seconds: int) -> bool:
+        with self._lock:
+            if not self._alive(name):
+                return False
+            self._expires[name] = time.monotonic() + time_seconds
+            return True
+
+    def ttl(self, name: str) -> int:
+        with self._lock:
+            if not self._alive(name):
+                return -2
+            deadline = self._expires.get(name)
+            return -1 if deadline is None else max(0, int(round(deadline - time.monotonic())))
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            deleted = 0
+            for name in names:
+                if self._alive(name):
+                    del self._data[name]
+                    self._expires.pop(name, None)
+                    deleted += 1
+            return deleted
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._alive(name))
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        with self._lock:
+            self._purge()
+            return [name for name in self._data if fnmatch.fnmatchcase(name, pattern)]
+
+    def dbsize(self) -> int:
+        with self._lock:
+            self._purge()
+            return len(self._data)
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return True
+
+    def close(self):
+        pass
+
+
+class L1Cache:
+    """
+    Predpomnilnik v procesu pred Redis in SQLite: LRU po kategorijah z omejenim
+    številom zapisov in TTL. Zapis nikoli ne živi dlje od svojega ``expires_at``.
+    Pri ``copy_on_read`` se hrani serializirana vrednost, da klicatelj ne more
+    spremeniti predpomnjene kopije.
+    """
+
+    def __init__(self, limits: Dict[DataCategory, Tuple[int, float]], copy_on_read: bool = True):
+        self.limits = limits
+        self.copy_on_read = copy_on_read
+        self._entries: Dict[DataCategory, "OrderedDict[str, Tuple[Any, float]]"] = {
+            category: OrderedDict() for category in limits
+        }
+        self._category_of: Dict[str, DataCategory] = {}
+        self._lock = threading.Lock()
+        self.stats = {category: {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+                      for category in limits}
+        self.misses_unknown = 0
+
+    def put(self, category: DataCategory, data_id: str, value: Any,
+            expires_at: Optional[datetime] = None):
+        max_entries, ttl_seconds = self.limits.get(category, (0, 0))
+        if max_entries <= 0 or ttl_seconds <= 0:
+            return
+        deadline = time.monotonic() + ttl_seconds
+        if expires_at is not None:
+            remaining = (expires_at - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return
+            deadline = min(deadline, time.monotonic() + remaining)
+        stored = pickle.dumps(value, pickle.HIGHEST_PROTOCOL) if self.copy_on_read else value
+
+        with self._lock:
+            previous = self._category_of.get(data_id)
+            if previous is not None and previous != category:
+                self._entries[previous].pop(data_id, None)
+            entries = self._entries[category]
+            entries[data_id] = (stored, deadline)
+            entries.move_to_end(data_id)
+            self._category_of[data_id] = category
+            while len(entries) > max_entries:
+                evicted, _ = entries.popitem(last=False)
+                del self._category_of[evicted]
+                self.stats[category]["evictions"] += 1
+
+    def get(self, data_id: str, category: Optional[DataCategory] = None) -> Tuple[bool, Any]:
+        """Vrne (zadetek, vrednost)"""
+        with self._lock:
+            cached_category = self._category_of.get(data_id)
+            if cached_category is None or (category is not None and category != cached_category):
+                if category is not None and category in self.stats:
+                    self.stats[category]["misses"] += 1
+                else:
+                    self.misses_unknown += 1
+                return False, None
+            entries = self._entries[cached_category]
+            stored, deadline = entries[data_id]
+            if deadline <= time.monotonic():
+                del entries[data_id]
+                del self._category_of[data_id]
+                self.stats[cached_category]["expirations"] += 1
+                self.stats[cached_category]["misses"] += 1
+                return False, None
+            entries.move_to_end(data_id)
+            self.stats[cached_category]["hits"] += 1
+        return True, pickle.loads(stored) if self.copy_on_read else stored
+
+    def invalidate(self, data_id: str, category: Optional[DataCategory] = None):
+        with self._lock:
+            cached_category = self._category_of.get(data_id)
+            if cached_category is None or (category is not None and category != cached_category):
+                return
+            del self._entries[cached_category][data_id]
+            del self._category_of[data_id]
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        purged = 0
+        with self._lock:
+            for category, entries in self._entries.items():
+                for data_id in [key for key, (_, deadline) in entries.items() if deadline <= now]:
+                    del entries[data_id]
+                    del self._category_of[data_id]
+                    self.stats[category]["expirations"] += 1
+                    purged += 1
+        return purged
+
+    def clear(self):
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+            self._category_of.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            categories = {}
+            hits = misses = 0
+            for category, counters in self.stats.items():
+                max_entries, ttl_seconds = self.limits[category]
+                categories[category.value] = dict(counters, entries=len(self._entries[category]),
+                                                  max_entries=max_entries, ttl_seconds=ttl_seconds)
+                hits += counters["hits"]
+                misses += counters["misses"]
+            misses += self.misses_unknown
+            return {
+                "entries": len(self._category_of),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "copy_on_read": self.copy_on_read,
+                "categories": categories,
+            }
+
 class OmniCloudMemory:
     """Centralni oblačni pomnilniški sistem"""
     
-    def __init__(self, redis_host="localhost", redis_port=6379, db_path="omni_cloud_memory.db"):
+    def __init__(self, redis_host="localhost", redis_port=6379, db_path="omni_cloud_memory.db",
+                 redis_fallback: str = "sqlite", cache_copy_on_read: bool = True,
+                 serializer: str = "pickle", compressor: str = "gzip"):
         self.redis_host = redis_host
         self.redis_port = redis_port
         self.db_path = db_path
         self.redis_client = None
+        self.redis_backend = None  # "redis", "embedded" ali None
+        # Ko Redis ni dosegljiv: "sqlite" (MEMORY podatki gredo v SQLite) ali "embedded"
+        self.redis_fallback = redis_fallback
         self.sqlite_conn = None
         
+        # Kodek za nove zapise v SQLite (obstoječi zapisi se berejo po svojem stolpcu codec)
+        if serializer not in SERIALIZERS:
+            logger.warning(f"Serializacija {serializer} ni na voljo, uporabljam pickle")
+            serializer = "pickle"
+        if compressor not in COMPRESSORS:
+            logger.warning(f"Kompresija {compressor} ni na voljo, uporabljam gzip")
+            compressor = "gzip"
+        self.serializer = serializer
+        self.compressor = compressor
+        
         # Konfiguracija shranjevanja po kategorijah
         self.storage_config = {
             DataCategory.TRANSACTIONS: {
                 "storage_type": StorageType.PERSISTENT,
                 "retention_days": 365,
-                "compress_after_days": 30
+                "compress_after_days": 30,
+                "cache_entries": 1000,
+                "cache_ttl_seconds": 300
             },
             DataCategory.RESERVATIONS: {
                 "storage_type": StorageType.PERSISTENT,
                 "retention_days": 180,
-                "compress_after_days": 30
+                "compress_after_days": 30,
+                "cache_entries": 1000,
+                "cache_ttl_seconds": 300
             },
             DataCategory.LOGS: {
                 "storage_type": StorageType.MEMORY,
                 "retention_days": 7,
-                "compress_after_days": 1
+                "compress_after_days": 1,
+                "cache_entries": 500,
+                "cache_ttl_seconds": 60
             },
             DataCategory.TASKS: {
                 "storage_type": StorageType.MEMORY,
                 "retention_days": 30,
-                "compress_after_days": 7
+                "compress_after_days": 7,
+                "cache_entries": 1000,
+                "cache_ttl_seconds": 120
             },
             DataCategory.ANALYTICS: {
                 "storage_type": StorageType.PERSISTENT,
                 "retention_days": 90,
-                "compress_after_days": 14
+                "compress_after_days": 14,
+                "cache_entries": 500,
+                "cache_ttl_seconds": 300
             },
             DataCategory.LEARNING_PATTERNS: {
                 "storage_type": StorageType.PERSISTENT,
                 "retention_days": -1,  # Nikoli ne izbriši
-                "compress_after_days": 90
+                "compress_after_days": 90,
+                "cache_entries": 2000,
+                "cache_ttl_seconds": 1800
             },
             DataCategory.USER_DATA: {
                 "storage_type": StorageType.PERSISTENT,
                 "retention_days": -1,
-                "compress_after_days": -1
+                "compress_after_days": -1,
+                "cache_entries": 2000,
+                "cache_ttl_seconds": 600
             },
             DataCategory.SYSTEM_METRICS: {
                 "storage_type": StorageType.MEMORY,
                 "retention_days": 14,
-                "compress_after_days": 3
+                "compress_after_days": 3,
+                "cache_entries": 500,
+                "cache_ttl_seconds": 60
             },
             DataCategory.CACHE: {
                 "storage_type": StorageType.MEMORY,
                 "retention_days": 1,
-                "compress_after_days": -1
+                "compress_after_days": -1,
+                "cache_entries": 5000,
+                "cache_ttl_seconds": 600
             }
         }
         
+        # L1 predpomnilnik v procesu (pred Redis in SQLite)
+        self.l1_cache = L1Cache(
+            {category: (config["cache_entries"], config["cache_ttl_seconds"])
+             for category, config in self.storage_config.items()},
+            copy_on_read=cache_copy_on_read
+        )
+        
         self.is_running = False
         self.cleanup_thread = None
         
@@ -122,10 +417,16 @@ class OmniCloudMemory:
                 socket_connect_timeout=5
             )
             self.redis_client.ping()
+            self.redis_backend = "redis"
             logger.info("Redis povezava uspešna")
         except Exception as e:
-            logger.warning(f"Redis ni dosegljiv, uporabljam samo SQLite: {e}")
-            self.redis_client = None
+            if self.redis_fallback == "embedded":
+                logger.warning(f"Redis ni dosegljiv, uporabljam vgrajen nadomestek: {e}")
+                self.redis_client = EmbeddedRedis()
+                self.redis_backend = "embedded"
+            else:
+                logger.warning(f"Redis ni dosegljiv, uporabljam samo SQLite: {e}")
+                self.redis_client = None
         
         # Inicializacija SQLite
         self.init_sqlite_database()
@@ -154,12 +455,19 @@ class OmniCloudMemory:
                 storage_type TEXT,
                 compressed BOOLEAN DEFAULT 0,
                 data_hash TEXT,
-                size_bytes INTEGER
+                size_bytes INTEGER,
+                codec TEXT
             )
         ''')
         
+        # Starejše baze nimajo stolpca codec (NULL pomeni pickle, po potrebi gzip)
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(cloud_data)')}
+        if 'codec' not in columns:
+            cursor.execute('ALTER TABLE cloud_data ADD COLUMN codec TEXT')
+        
         # Indeksi za hitrejše iskanje
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON cloud_data(category)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_category_created ON cloud_data(category, created_at, id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON cloud_data(created_at)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_expires_at ON cloud_data(expires_at)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_storage_type ON cloud_data(storage_type)')
@@ -222,6 +530,8 @@ class OmniCloudMemory:
         else:
             await self._store_in_sqlite(entry)
         
+        self.l1_cache.put(category, data_id, data, expires_at)
+        
         # Posodobi statistike
         await self._update_stats(category, len(str(data)))
         
@@ -256,20 +566,14 @@ class OmniCloudMemory:
         try:
             cursor = self.sqlite_conn.cursor()
             
-            # Kompresija podatkov če so veliki
-            data_bytes = pickle.dumps(entry.data)
-            compressed = False
-            
-            if len(data_bytes) > 1024:  # Kompresija za podatke > 1KB
-                data_bytes = gzip.compress(data_bytes)
-                compressed = True
+            data_bytes, compressed, codec = self._encode(entry.data)
             
             data_hash = hashlib.sha256(data_bytes).hexdigest()
             
             cursor.execute('''
                 INSERT OR REPLACE INTO cloud_data 
-                (id, category, data, metadata, created_at, expires_at, storage_type, compressed, data_hash, size_bytes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                (id, category, data, metadata, created_at, expires_at, storage_type, compressed, data_hash, size_bytes, codec)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 entry.id,
                 entry.category.value,
@@ -280,7 +584,8 @@ class OmniCloudMemory:
                 entry.storage_type.value,
                 compressed,
                 data_hash,
-                len(data_bytes)
+                len(data_bytes),
+                codec
             ))
             
             self.sqlite_conn.commit()
@@ -289,26 +594,42 @@ class OmniCloudMemory:
             logger.error(f"Napaka pri shranjevanju v SQLite: {e}")
             raise
     
+    def _encode(self, data: Any) -> Tuple[bytes, bool, str]:
+        """Serializiraj in po potrebi stisni; vrne (bajti, stisnjeno, kodek)"""
+        data_bytes = SERIALIZERS[self.serializer][0](data)
+        if len(data_bytes) > COMPRESS_THRESHOLD_BYTES:
+            return COMPRESSORS[self.compressor][0](data_bytes), True, f"{self.serializer}+{self.compressor}"
+        return data_bytes, False, self.serializer
+    
+    @staticmethod
+    def _decode(data_bytes: bytes, compressed: bool, codec: Optional[str]) -> Any:
+        if codec is None:
+            codec = "pickle+gzip" if compressed else "pickle"
+        serializer, _, compressor = codec.partition("+")
+        if compressor:
+            data_bytes = COMPRESSORS[compressor][1](data_bytes)
+        return SERIALIZERS[serializer][1](data_bytes)
+    
     async def retrieve_data(self, data_id: str, category: Optional[DataCategory] = None) -> Optional[Any]:
         """Pridobi podatke iz oblačnega pomnilnika"""
         
-        # Poskusi Redis najprej
+        # L1 predpomnilnik: brez omrežja in brez SQLite
+        hit, value = self.l1_cache.get(data_id, category)
+        if hit:
+            return value
+        
+        # Poskusi Redis
         if self.redis_client:
             try:
-                if category:
-                    key = f"omni:{category.value}:{data_id}"
+                categories = [category] if category else list(DataCategory)
+                for cat in categories:
+                    key = f"omni:{cat.value}:{data_id}"
                     result = self.redis_client.get(key)
                     if result:
                         data = json.loads(result)
+                        expires_at = datetime.fromisoformat(data["expires_at"]) if data.get("expires_at") else None
+                        self.l1_cache.put(cat, data_id, data["data"], expires_at)
                         return data["data"]
-                else:
-                    # Išči po vseh kategorijah
-                    for cat in DataCategory:
-                        key = f"omni:{cat.value}:{data_id}"
-                        result = self.redis_client.get(key)
-                        if result:
-                            data = json.loads(result)
-                            return data["data"]
             except Exception as e:
                 logger.warning(f"Napaka pri branju iz Redis: {e}")
         
@@ -318,85 +639,178 @@ class OmniCloudMemory:
             
             if category:
                 cursor.execute(
-                    'SELECT data, compressed FROM cloud_data WHERE id = ? AND category = ?',
+                    'SELECT data, compressed, codec, category, expires_at FROM cloud_data WHERE id = ? AND category = ?',
                     (data_id, category.value)
                 )
             else:
                 cursor.execute(
-                    'SELECT data, compressed FROM cloud_data WHERE id = ?',
+                    'SELECT data, compressed, codec, category, expires_at FROM cloud_data WHERE id = ?',
                     (data_id,)
                 )
             
             result = cursor.fetchone()
             if result:
-                data_bytes, compressed = result
-                
-                if compressed:
-                    data_bytes = gzip.decompress(data_bytes)
-                
-                return pickle.loads(data_bytes)
+                data_bytes, compressed, codec, category_value, expires_at = result
+                data = self._decode(data_bytes, compressed, codec)
+                expires_at = datetime.fromisoformat(expires_at) if expires_at else None
+                self.l1_cache.put(DataCategory(category_value), data_id, data, expires_at)
+                return data
                 
         except Exception as e:
             logger.error(f"Napaka pri branju iz SQLite: {e}")
         
         return None
     
+    def _select_rows(self, category: DataCategory, filters: Optional[Dict[str, Any]], columns: str,
+                     limit: int, offset: int = 0, cursor: Optional[str] = None) -> List[tuple]:
+        """Ena stran vrstic kategorije, urejena po (created_at, id) padajoče"""
+        query = f'SELECT {columns} FROM cloud_data WHERE category = ?'
+        params: List[Any] = [category.value]
+        
+        # Dodaj filtre
+        if filters:
+            for key, value in filters.items():
+                if key == "created_after":
+                    query += " AND created_at > ?"
+                    params.append(value)
+                elif key == "created_before":
+                    query += " AND created_at < ?"
+                    params.append(value)
+        
+        # Keyset: nadaljuj za zadnjim zapisom prejšnje strani (indeks category, created_at, id)
+        if cursor:
+            query += " AND (created_at, id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        if offset:
+            query += " OFFSET ?"
+            params.append(offset)
+        
+        return self.sqlite_conn.execute(query, params).fetchall()
+    
+    def _row_to_dict(self, row: tuple, include_data: bool = True) -> Dict[str, Any]:
+        if include_data:
+            data_id, metadata_str, created_at, data_bytes, compressed, codec = row
+        else:
+            data_id, metadata_str, created_at = row
+        result = {
+            "id": data_id,
+            "metadata": json.loads(metadata_str) if metadata_str else {},
+            "created_at": created_at
+        }
+        if include_data:
+            result["data"] = self._decode(data_bytes, compressed, codec)
+        return result
+    
+    @staticmethod
+    def _row_columns(include_data: bool) -> str:
+        return "id, metadata, created_at, data, compressed, codec" if include_data else "id, metadata, created_at"
+    
     async def query_data(self, category: DataCategory, filters: Optional[Dict[str, Any]] = None, 
                         limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """Poizvedba podatkov po kategoriji"""
+        """Poizvedba podatkov po kategoriji (za globoke strani uporabi query_page ali iter_data)"""
         results = []
         
         try:
-            cursor = self.sqlite_conn.cursor()
-            
-            query = '''
-                SELECT id, data, metadata, created_at, compressed 
-                FROM cloud_data 
-                WHERE category = ?
-            '''
-            params = [category.value]
-            
-            # Dodaj filtre
-            if filters:
-                for key, value in filters.items():
-                    if key == "created_after":
-                        query += " AND created_at > ?"
-                        params.append(value)
-                    elif key == "created_before":
-                        query += " AND created_at < ?"
-                        params.append(value)
-            
-            query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                data_id, data_bytes, metadata_str, created_at, compressed = row
-                
-                # Dekompresija če potrebno
-                if compressed:
-                    data_bytes = gzip.decompress(data_bytes)
-                
-                data = pickle.loads(data_bytes)
-                metadata = json.loads(metadata_str) if metadata_str else {}
-                
-                results.append({
-                    "id": data_id,
-                    "data": data,
-                    "metadata": metadata,
-                    "created_at": created_at
-                })
-                
+            rows = self._select_rows(category, filters, self._row_columns(True), limit, offset)
+            results = [self._row_to_dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Napaka pri poizvedbi: {e}")
         
         return results
     
+    async def query_page(self, category: DataCategory, filters: Optional[Dict[str, Any]] = None,
+                         limit: int = 100, cursor: Optional[str] = None,
+                         include_data: bool = True) -> Dict[str, Any]:
+        """
+        Keyset paginacija: vrne {"items": [...], "next_cursor": ...}.
+        Cena strani je neodvisna od globine; ``next_cursor`` je None na zadnji strani.
+        """
+        try:
+            rows = self._select_rows(category, filters, self._row_columns(include_data), limit, cursor=cursor)
+        except Exception as e:
+            logger.error(f"Napaka pri poizvedbi: {e}")
+            return {"items": [], "next_cursor": None}
+        
+        items = [self._row_to_dict(row, include_data) for row in rows]
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1][2], rows[-1][0])
+        return {"items": items, "next_cursor": next_cursor}
+    
+    async def iter_data(self, category: DataCategory, filters: Optional[Dict[str, Any]] = None,
+                        batch_size: int = 500, include_data: bool = True):
+        """
+        Pretočno branje celotne kategorije po paketih (async generator).
+        V pomnilniku je naenkrat največ ``batch_size`` vrstic.
+        """
+        cursor = None
+        while True:
+            page = await self.query_page(category, filters, batch_size, cursor, include_data)
+            for item in page["items"]:
+                yield item
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+            await asyncio.sleep(0)
+    
+    async def export_metadata_columns(self, category: DataCategory, fields: List[str],
+                                      filters: Optional[Dict[str, Any]] = None,
+                                      batch_size: int = 10000) -> Dict[str, "np.ndarray"]:
+        """
+        Stolpčni izvoz metapodatkov: {"id", "created_at", *fields} -> NumPy polja.
+        Polja se preberejo z json_extract v SQLite, zato se podatki (data) ne dekodirajo.
+        Številska polja so float64 (manjkajoče = NaN), ostala object; rezultat se lahko
+        neposredno poda v pyarrow.table() ali pandas.DataFrame.
+        """
+        extracts = ", ".join("json_extract(metadata, ?)" for _ in fields)
+        paths = ['$."{}"'.format(field.replace('"', '\\"')) for field in fields]
+        query = f"SELECT id, created_at{', ' + extracts if fields else ''} FROM cloud_data WHERE category = ?"
+        params: List[Any] = paths + [category.value]
+        if filters:
+            if "created_after" in filters:
+                query += " AND created_at > ?"
+                params.append(filters["created_after"])
+            if "created_before" in filters:
+                query += " AND created_at < ?"
+                params.append(filters["created_before"])
+        query += " ORDER BY created_at DESC, id DESC"
+        
+        columns: List[List[Any]] = [[] for _ in range(len(fields) + 2)]
+        try:
+            cursor = self.sqlite_conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for column, values in zip(columns, zip(*rows)):
+                    column.extend(values)
+        except Exception as e:
+            logger.error(f"Napaka pri stolpčnem izvozu: {e}")
+            columns = [[] for _ in range(len(fields) + 2)]
+        
+        # NumPy je potreben le za stolpčni izvoz, zato se uvozi šele tu
+        import numpy as np
+        
+        result = {
+            "id": np.array(columns[0], dtype=object),
+            "created_at": np.array(columns[1], dtype="datetime64[us]"),
+        }
+        for field, values in zip(fields, columns[2:]):
+            numeric = all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+                          for value in values)
+            if numeric:
+                result[field] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            else:
+                result[field] = np.array(values, dtype=object)
+        return result
+    
     async def delete_data(self, data_id: str, category: Optional[DataCategory] = None) -> bool:
         """Izbriši podatke"""
         success = False
+        self.l1_cache.invalidate(data_id, category)
         
         # Izbriši iz Redis
         if self.redis_client:
@@ -465,6 +879,8 @@ class OmniCloudMemory:
                 "total_size_mb": round((total_size or 0) / 1024 / 1024, 2),
                 "categories": category_stats,
                 "redis_connected": self.redis_client is not None,
+                "redis_backend": self.redis_backend,
+                "l1_cache": self.l1_cache.get_stats(),
                 "last_updated": datetime.now().isoformat()
             }
             
@@ -505,6 +921,7 @@ class OmniCloudMemory:
     
     def _cleanup_expired_data(self):
         """Počisti potekle podatke"""
+        self.l1_cache.purge_expired()
         try:
             cursor = self.sqlite_conn.cursor()
             
@@ -586,6 +1003,8 @@ class OmniCloudMemory:
         if self.redis_client:
             self.redis_client.close()
         
+        self.l1_cache.clear()
+        
         logger.info("Omni Cloud Memory zaustavljen")
 
 # Testne funkcije
@@ -7,7 +7,9 @@ fallback sistem in hot-reload funkcionalnost za razvoj.
 """
 
 import os
+import re
 import sys
+import threading
 import importlib
 import importlib.util
 import inspect
@@ -18,6 +20,8 @@ from hot_reload_plugins import HotReloadManager
 import logging
 import time
 import json
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime
 
 # Nastavi logging
@@ -222,12 +226,131 @@ class PluginManager:
         
         return plugins_info
 
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def normalize_query(query: str) -> str:
+    """Normaliziraj zahtevo za ključ predpomnilnika (male črke, samo besede)"""
+    return " ".join(_TOKEN_RE.findall(query.lower()))
+
+def query_shingles(normalized: str, size: int = 2) -> frozenset:
+    """Množica besednih shingle-ov (n-gramov besed) normalizirane zahteve"""
+    tokens = normalized.split()
+    if len(tokens) < size:
+        return frozenset([" ".join(tokens)]) if tokens else frozenset()
+    return frozenset(" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+class RoutingCache:
+    """
+    Predpomnilnik AI routing odločitev
+
+    Ključ je normalizirana zahteva; če natančnega zadetka ni, se poišče najbolj
+    podobna shranjena zahteva po Jaccardovi podobnosti shingle-ov. Vnosi imajo
+    TTL, velikost je omejena (LRU). Invertni indeks shingle -> ključi omeji
+    primerjavo podobnosti na zahteve, ki si delijo vsaj en shingle.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0,
+                 similarity_threshold: float = 0.8):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Tuple[Optional[str], frozenset, float]]" = OrderedDict()
+        self._shingle_index: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0,
+                      "evictions": 0, "expired": 0, "invalidations": 0}
+
+    def get(self, normalized: str) -> Tuple[bool, Optional[str]]:
+        """Vrni (zadetek, plugin); plugin je None, če AI ni izbral nobenega"""
+        if self.max_entries <= 0:
+            return False, None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is not None:
+                if entry[2] > now:
+                    self._entries.move_to_end(normalized)
+                    self.stats["hits"] += 1
+                    return True, entry[0]
+                self._remove(normalized)
+                self.stats["expired"] += 1
+
+            if self.similarity_threshold < 1.0:
+                shingles = query_shingles(normalized)
+                best_key, best_score = None, self.similarity_threshold
+                candidates = set()
+                for shingle in shingles:
+                    candidates |= self._shingle_index.get(shingle, set())
+                for key in candidates:
+                    other = self._entries[key][1]
+                    score = len(shingles & other) / len(shingles | other)
+                    if score >= best_score:
+                        best_key, best_score = key, score
+                if best_key is not None:
+                    plugin_name, _, expires_at = self._entries[best_key]
+                    if expires_at > now:
+                        self._entries.move_to_end(best_key)
+                        self.stats["similar_hits"] += 1
+                        return True, plugin_name
+                    self._remove(best_key)
+                    self.stats["expired"] += 1
+
+            self.stats["misses"] += 1
+            return False, None
+
+    def put(self, normalized: str, plugin_name: Optional[str]):
+        """Shrani odločitev za normalizirano zahtevo"""
+        if self.max_entries <= 0:
+            return
+        shingles = query_shingles(normalized)
+        with self._lock:
+            if normalized in self._entries:
+                self._remove(normalized)
+            self._entries[normalized] = (plugin_name, shingles, time.monotonic() + self.ttl_seconds)
+            for shingle in shingles:
+                self._shingle_index.setdefault(shingle, set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self):
+        """Izprazni predpomnilnik (npr. ob hot-reload plugin-ov)"""
+        with self._lock:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._shingle_index.clear()
+
+    def _remove(self, normalized: str):
+        _, shingles, _ = self._entries.pop(normalized)
+        for shingle in shingles:
+            keys = self._shingle_index.get(shingle)
+            if keys is not None:
+                keys.discard(normalized)
+                if not keys:
+                    del self._shingle_index[shingle]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Vrni statistike predpomnilnika"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["similar_hits"] + self.stats["misses"]
+            hit_rate = (self.stats["hits"] + self.stats["similar_hits"]) / lookups if lookups else 0.0
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hit_rate": round(hit_rate, 4)
+            }
+
 class OmniCorePlugins:
     """
     Glavni OmniCore Plugin sistem z AI routing in hot-reload
     """
     
-    def __init__(self, plugins_path: str = "plugins", openai_api_key: str = None, enable_hot_reload: bool = True):
+    def __init__(self, plugins_path: str = "plugins", openai_api_key: str = None, enable_hot_reload: bool = True,
+                 routing_cache_size: int = 512, routing_cache_ttl: float = 3600.0,
+                 similarity_threshold: float = 0.8, batch_window: float = 0.0, max_batch_size: int = 16):
         """
         Inicializiraj OmniCore Plugin sistem
         
@@ -235,6 +358,11 @@ class OmniCorePlugins:
             plugins_path: Direktorij z plugin-i
             openai_api_key: OpenAI API ključ
             enable_hot_reload: Ali omogočiti hot-reload funkcionalnost
+            routing_cache_size: Največje število AI routing odločitev v predpomnilniku (0 = izklopljeno)
+            routing_cache_ttl: Življenjska doba odločitve v sekundah
+            similarity_threshold: Jaccardova podobnost shingle-ov za približen zadetek (1.0 = samo natančni)
+            batch_window: Okno v sekundah za združevanje sočasnih AI routing zahtev (0 = brez združevanja)
+            max_batch_size: Največ zahtev v enem klicu klasifikacije
         """
         self.plugin_manager = PluginManager(plugins_path)
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
@@ -245,12 +373,24 @@ class OmniCorePlugins:
         self.enable_hot_reload = enable_hot_reload
         self.hot_reload_manager = None
         
+        # Predpomnilnik AI routing odločitev in združevanje klicev
+        self.routing_cache = RoutingCache(routing_cache_size, routing_cache_ttl, similarity_threshold)
+        self.batch_window = batch_window
+        self.max_batch_size = max(1, max_batch_size)
+        self._plugins_signature = None
+        self._plugins_prompt = ""
+        self._batch_lock = threading.Lock()
+        self._batch_full = threading.Event()
+        self._batch_pending: Dict[str, Tuple[str, Future]] = {}
+        
         # Statistike
         self.stats = {
             "total_requests": 0,
             "ai_routing_requests": 0,
             "fallback_routing_requests": 0,
             "plugin_usage": {},
+            "llm_calls": 0,
+            "llm_routed_queries": 0,
             "start_time": time.time()
         }
         
@@ -325,16 +465,50 @@ class OmniCorePlugins:
             }
     
     def _ai_route(self, query: str) -> Tuple[Optional[str], float]:
-        """AI routing z OpenAI"""
+        """AI routing z OpenAI (s predpomnilnikom in opcijskim združevanjem klicev)"""
         try:
-            # Pripravi seznam plugin-ov
-            plugins_info = []
-            for name, plugin in self.plugin_manager.plugins.items():
-                info = plugin.get_info() if hasattr(plugin, 'get_info') else {"description": "Ni opisa"}
-                plugins_info.append(f"- {name}: {info.get('description', 'Ni opisa')}")
-            
-            plugins_text = "\n".join(plugins_info)
+            self._check_plugins_changed()
+            normalized = normalize_query(query)
+            hit, plugin_name = self.routing_cache.get(normalized)
+            if not hit:
+                if self.batch_window > 0:
+                    plugin_name = self._classify_batched(normalized, query)
+                else:
+                    plugin_name = self._classify([query])[0]
+                self.routing_cache.put(normalized, plugin_name)
             
+            # Preveri, če plugin obstaja
+            if plugin_name and plugin_name in self.plugin_manager.plugins:
+                return plugin_name, 0.8
+            else:
+                return None, 0.0
+                
+        except Exception as e:
+            self.logger.error(f"AI routing napaka: {e}")
+            return None, 0.0
+    
+    def _check_plugins_changed(self):
+        """Ob spremembi plugin-ov (hot-reload, dodajanje) izprazni predpomnilnik in obnovi opis plugin-ov"""
+        signature = tuple((name, id(plugin)) for name, plugin in self.plugin_manager.plugins.items())
+        if signature == self._plugins_signature:
+            return
+        
+        plugins_info = []
+        for name, plugin in self.plugin_manager.plugins.items():
+            info = plugin.get_info() if hasattr(plugin, 'get_info') else {"description": "Ni opisa"}
+            plugins_info.append(f"- {name}: {info.get('description', 'Ni opisa')}")
+        self._plugins_prompt = "\n".join(plugins_info)
+        
+        if self._plugins_signature is not None:
+            self.routing_cache.invalidate()
+            self.logger.info("🔄 Plugin-i spremenjeni - routing predpomnilnik izpraznjen")
+        self._plugins_signature = signature
+    
+    def _classify(self, queries: List[str]) -> List[Optional[str]]:
+        """En klic OpenAI za eno ali več zahtev; vrne ime plugin-a (ali None) za vsako zahtevo"""
+        plugins_text = self._plugins_prompt
+        
+        if len(queries) == 1:
             # AI prompt
             prompt = f"""
 Analiziraj uporabniško zahtevo in izberi najprimernejši plugin.
@@ -342,30 +516,84 @@ Analiziraj uporabniško zahtevo in izberi najprimernejši plugin.
 Dostopni plugin-i:
 {plugins_text}
 
-Uporabniška zahteva: "{query}"
+Uporabniška zahteva: "{queries[0]}"
 
 Odgovori SAMO z imenom plugin-a (brez dodatnih besed).
 Če noben plugin ni primeren, odgovori z "task".
 """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=50,
-                temperature=0.1
-            )
-            
-            plugin_name = response.choices[0].message.content.strip().lower()
-            
-            # Preveri, če plugin obstaja
-            if plugin_name in self.plugin_manager.plugins:
-                return plugin_name, 0.8
+            max_tokens = 50
+        else:
+            numbered = "\n".join(f'{i}. "{query}"' for i, query in enumerate(queries, 1))
+            prompt = f"""
+Analiziraj uporabniške zahteve in za vsako izberi najprimernejši plugin.
+
+Dostopni plugin-i:
+{plugins_text}
+
+Uporabniške zahteve:
+{numbered}
+
+Za vsako zahtevo odgovori v svoji vrstici v obliki "številka: ime plugin-a" (brez dodatnih besed).
+Če noben plugin ni primeren, odgovori z "task".
+"""
+            max_tokens = 20 * len(queries) + 20
+        
+        response = self.client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.1
+        )
+        self.stats["llm_calls"] += 1
+        self.stats["llm_routed_queries"] += len(queries)
+        
+        content = response.choices[0].message.content.strip().lower()
+        if len(queries) == 1:
+            return [content]
+        
+        answers: List[Optional[str]] = [None] * len(queries)
+        for line in content.splitlines():
+            match = re.match(r"\s*(\d+)\s*[:.)-]\s*([\w-]+)", line)
+            if match and 1 <= int(match.group(1)) <= len(queries):
+                answers[int(match.group(1)) - 1] = match.group(2)
+        return answers
+    
+    def _classify_batched(self, normalized: str, query: str) -> Optional[str]:
+        """
+        Združi sočasne zahteve v en klic klasifikacije
+        
+        Prva zahteva v oknu postane vodja: počaka batch_window (ali do max_batch_size
+        zahtev), nato z enim klicem razvrsti vse čakajoče. Enake normalizirane zahteve
+        si delijo rezultat.
+        """
+        with self._batch_lock:
+            pending = self._batch_pending.get(normalized)
+            if pending is None:
+                future = Future()
+                self._batch_pending[normalized] = (query, future)
+                leader = len(self._batch_pending) == 1
+                if len(self._batch_pending) >= self.max_batch_size:
+                    self._batch_full.set()
             else:
-                return None, 0.0
-                
-        except Exception as e:
-            self.logger.error(f"AI routing napaka: {e}")
-            return None, 0.0
+                future, leader = pending[1], False
+        
+        if leader:
+            self._batch_full.wait(self.batch_window)
+            with self._batch_lock:
+                batch = list(self._batch_pending.values())
+                self._batch_pending = {}
+                self._batch_full.clear()
+            for offset in range(0, len(batch), self.max_batch_size):
+                chunk = batch[offset:offset + self.max_batch_size]
+                try:
+                    answers = self._classify([q for q, _ in chunk])
+                    for (_, pending_future), answer in zip(chunk, answers):
+                        pending_future.set_result(answer)
+                except Exception as e:
+                    for _, pending_future in chunk:
+                        pending_future.set_exception(e)
+        
+        return future.result()
     
     def _fallback_route(self, query: str) -> str:
         """Fallback routing na osnovi ključnih besed"""
@@ -461,7 +689,10 @@ Odgovori SAMO z imenom plugin-a (brez dodatnih besed).
             "fallback_routing": self.stats["fallback_routing_requests"],
             "plugin_usage": self.stats["plugin_usage"],
             "uptime_seconds": time.time() - self.stats["start_time"],
-            "ai_enabled": self.ai_enabled
+            "ai_enabled": self.ai_enabled,
+            "llm_calls": self.stats["llm_calls"],
+            "llm_routed_queries": self.stats["llm_routed_queries"],
+            "routing_cache": self.routing_cache.get_stats()
         }
     
     def cleanup(self):
@@ -474,6 +705,7 @@ Odgovori SAMO z imenom plugin-a (brez dodatnih besed).
         """Ponovno naloži vse plugin-e (API za ročno reload)"""
         if self.hot_reload_manager:
             self.hot_reload_manager.reload_all_plugins()
+            self.routing_cache.invalidate()
         else:
             self.logger.warning("⚠️ Hot-reload sistem ni aktiven")
     
@@ -482,6 +714,7 @@ Odgovori SAMO z imenom plugin-a (brez dodatnih besed).
         if self.hot_reload_manager:
             plugin_file = f"{plugin_name}_plugin"
             self.hot_reload_manager.handler.reload_plugin(plugin_name, plugin_file)
+            self.routing_cache.invalidate()
         else:
             self.logger.warning("⚠️ Hot-reload sistem ni aktiven")
     
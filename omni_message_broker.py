@@ -6,13 +6,15 @@ Enterprise-grade event streaming with Kafka/RabbitMQ
 import asyncio
 import json
 import logging
+import os
+import re
 import secrets
 import time
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Any, Callable
 from dataclasses import dataclass, asdict
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 import threading
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -39,6 +41,12 @@ class EventPriority(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+class OverflowPolicy(Enum):
+    """What to do when a subscriber's delivery queue is full"""
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DISCONNECT = "disconnect"
+
 @dataclass
 class OmniEvent:
     """Standard event structure for OmniCore system"""
@@ -54,16 +62,398 @@ class OmniEvent:
     retry_count: int = 0
     max_retries: int = 3
 
+def event_to_dict(event: OmniEvent) -> Dict[str, Any]:
+    """Serialize event to a JSON-compatible dict"""
+    return {
+        "event_id": event.event_id,
+        "event_type": event.event_type.value,
+        "priority": event.priority.value,
+        "tenant_id": event.tenant_id,
+        "source_service": event.source_service,
+        "target_service": event.target_service,
+        "payload": event.payload,
+        "timestamp": event.timestamp.isoformat(),
+        "correlation_id": event.correlation_id,
+        "retry_count": event.retry_count,
+        "max_retries": event.max_retries
+    }
+
+def event_from_dict(data: Dict[str, Any]) -> OmniEvent:
+    """Inverse of event_to_dict"""
+    return OmniEvent(
+        event_id=data["event_id"],
+        event_type=EventType(data["event_type"]),
+        priority=EventPriority(data["priority"]),
+        tenant_id=data["tenant_id"],
+        source_service=data["source_service"],
+        target_service=data.get("target_service"),
+        payload=data.get("payload", {}),
+        timestamp=datetime.fromisoformat(data["timestamp"]),
+        correlation_id=data.get("correlation_id"),
+        retry_count=data.get("retry_count", 0),
+        max_retries=data.get("max_retries", 3)
+    )
+
+class WindowedCounters:
+    """Per-minute event counters over a sliding window (maintained on publish)"""
+    
+    def __init__(self, window_seconds: int = 3600, bucket_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.buckets: Dict[int, Dict[str, Counter]] = {}
+        
+    def _prune(self, now: float):
+        oldest = int((now - self.window_seconds) // self.bucket_seconds)
+        for key in [key for key in self.buckets if key <= oldest]:
+            del self.buckets[key]
+            
+    def add(self, event: OmniEvent):
+        ts = event.timestamp.timestamp()
+        now = time.time()
+        if ts <= now - self.window_seconds:
+            return
+        key = int(ts // self.bucket_seconds)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self._prune(now)
+            bucket = self.buckets[key] = {"types": Counter(), "tenants": Counter(), "priorities": Counter()}
+        bucket["types"][event.event_type.value] += 1
+        bucket["tenants"][event.tenant_id] += 1
+        bucket["priorities"][event.priority.value] += 1
+        
+    def summary(self) -> Dict[str, Counter]:
+        self._prune(time.time())
+        totals = {"types": Counter(), "tenants": Counter(), "priorities": Counter()}
+        for bucket in self.buckets.values():
+            for name, counter in bucket.items():
+                totals[name].update(counter)
+        return totals
+
+class Subscription:
+    """
+    One subscriber (callback or WebSocket) with its own bounded queue and delivery task,
+    so a slow consumer only delays itself.
+    """
+    
+    def __init__(self, deliver: Callable, name: str, queue_size: int = 1000,
+                 overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 on_disconnect: Optional[Callable] = None, disconnect_on_error: bool = False):
+        self.deliver = deliver
+        self.name = name
+        self.overflow = overflow
+        self.on_disconnect = on_disconnect
+        self.disconnect_on_error = disconnect_on_error
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+            
+    def offer(self, item: Any) -> bool:
+        """Enqueue without waiting; apply the overflow policy when full"""
+        if self.closed:
+            return False
+        self.start()
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            pass
+        
+        if self.overflow == OverflowPolicy.DROP_NEWEST:
+            self.dropped += 1
+            return False
+        if self.overflow == OverflowPolicy.DISCONNECT:
+            self.dropped += 1
+            self.close(reason="queue overflow")
+            return False
+        # DROP_OLDEST
+        try:
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+        except asyncio.QueueEmpty:
+            pass
+        self.queue.put_nowait(item)
+        return True
+    
+    async def _run(self):
+        while not self.closed:
+            item = await self.queue.get()
+            try:
+                await self.deliver(item)
+                self.delivered += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                if self.disconnect_on_error:
+                    self.close(reason=str(e) or type(e).__name__)
+                else:
+                    logger.error(f"Subscriber callback failed: {str(e)}")
+            finally:
+                self.queue.task_done()
+                
+    def close(self, reason: str = "closed"):
+        if self.closed:
+            return
+        self.closed = True
+        # Release anything still waiting in drain()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+        if self.on_disconnect:
+            self.on_disconnect(self, reason)
+            
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "queued": self.queue.qsize(),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "closed": self.closed
+        }
+
+# Topic names become directory names under data_dir/topics, so only a safe subset is allowed
+TOPIC_NAME_RE = re.compile(r"^[A-Za-z0-9._-]{1,200}$")
+
+def validate_topic_name(topic: str) -> str:
+    """Raise ValueError unless the topic name is safe to use as a directory name"""
+    if not isinstance(topic, str) or not TOPIC_NAME_RE.match(topic) or topic in (".", ".."):
+        raise ValueError(f"Invalid topic name: {topic!r}")
+    return topic
+
+class TopicLog:
+    """
+    Bounded in-memory ring of recent events, backed by append-only segment files.
+    
+    Every event gets a monotonically increasing offset. The newest ``retention_events``
+    stay in memory; older ones are read back from ``<base_offset>.log`` segments
+    (JSON lines) until the segment falls out of ``retention_segments``.
+    """
+    
+    def __init__(self, name: str, directory: Optional[str], retention_events: int = 10_000,
+                 segment_max_bytes: int = 8 * 1024 * 1024, retention_segments: int = 8):
+        self.name = name
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.retention_segments = retention_segments
+        self.ring: deque = deque(maxlen=retention_events)  # (offset, event)
+        self.next_offset = 0
+        self.total_events = 0
+        self.last_event_time: Optional[datetime] = None
+        self.window = WindowedCounters()
+        self.segments: List[int] = []  # base offsets, ascending
+        self._segment_file = None
+        self._segment_size = 0
+        self._lock = threading.Lock()
+        
+        if directory and os.path.isdir(directory):
+            self._recover()
+            
+    # ---- persistence ----
+    
+    def _segment_path(self, base_offset: int) -> str:
+        return os.path.join(self.directory, f"{base_offset:020d}.log")
+    
+    def _recover(self):
+        """Rebuild offsets and the in-memory tail from segment files"""
+        self.segments = sorted(
+            int(name[:-4]) for name in os.listdir(self.directory)
+            if name.endswith(".log") and name[:-4].isdigit()
+        )
+        tail: List[tuple] = []
+        for base_offset in reversed(self.segments):
+            records = list(self._read_segment(base_offset))
+            if records and self.next_offset == 0:
+                self.next_offset = records[-1][0] + 1
+            tail = records + tail
+            if len(tail) >= (self.ring.maxlen or 0):
+                break
+        self.ring.extend(tail)  # deque keeps only the newest maxlen
+        self.total_events = self.next_offset
+        if self.ring:
+            self.last_event_time = self.ring[-1][1].timestamp
+        for _, event in self.ring:
+            self.window.add(event)
+        if self.segments:
+            self._segment_size = os.path.getsize(self._segment_path(self.segments[-1]))
+            
+    def _read_segment(self, base_offset: int, from_offset: int = 0):
+        try:
+            with open(self._segment_path(base_offset), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line after crash
+                    if record["offset"] >= from_offset:
+                        yield record["offset"], event_from_dict(record["event"])
+        except FileNotFoundError:
+            return
+        
+    def _append_to_segment(self, offset: int, event: OmniEvent):
+        if self._segment_file is None or self._segment_size >= self.segment_max_bytes:
+            self._roll_segment(offset)
+        line = json.dumps({"offset": offset, "event": event_to_dict(event)}, ensure_ascii=False) + "\n"
+        self._segment_file.write(line)
+        self._segment_file.flush()
+        self._segment_size += len(line.encode('utf-8'))
+        
+    def _roll_segment(self, offset: int):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._segment_file is not None:
+            self._segment_file.close()
+        if not self.segments or self._segment_size >= self.segment_max_bytes:
+            self.segments.append(offset)
+            self._segment_size = 0
+        self._segment_file = open(self._segment_path(self.segments[-1]), 'a', encoding='utf-8')
+        # Retention: drop whole segments beyond the limit
+        while len(self.segments) > self.retention_segments:
+            os.remove(self._segment_path(self.segments.pop(0)))
+            
+    def close(self):
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+                
+    # ---- append / read ----
+    
+    def append(self, event: OmniEvent) -> int:
+        with self._lock:
+            offset = self.next_offset
+            self.next_offset += 1
+            self.ring.append((offset, event))
+            if self.directory:
+                self._append_to_segment(offset, event)
+            self.total_events += 1
+            self.last_event_time = event.timestamp
+            self.window.add(event)
+            return offset
+        
+    @property
+    def earliest_offset(self) -> int:
+        """Oldest offset still readable (memory or disk)"""
+        candidates = [self.next_offset]
+        if self.segments:
+            candidates.append(self.segments[0])
+        if self.ring:
+            candidates.append(self.ring[0][0])
+        return min(candidates)
+    
+    def read(self, offset: int, max_events: int = 100) -> List[tuple]:
+        """Return up to ``max_events`` (offset, event) pairs starting at ``offset``"""
+        with self._lock:
+            offset = max(offset, self.earliest_offset)
+            if offset >= self.next_offset or max_events <= 0:
+                return []
+            if self.ring and offset >= self.ring[0][0]:
+                start = offset - self.ring[0][0]
+                return [self.ring[i] for i in range(start, min(len(self.ring), start + max_events))]
+            # Older than the ring: replay from segments
+            result = []
+            for i, base_offset in enumerate(self.segments):
+                next_base = self.segments[i + 1] if i + 1 < len(self.segments) else self.next_offset
+                if next_base <= offset:
+                    continue
+                for record in self._read_segment(base_offset, offset):
+                    result.append(record)
+                    if len(result) >= max_events:
+                        return result
+            return result
+        
+    def __len__(self) -> int:
+        return len(self.ring)
+
 class MessageBroker:
     """Enterprise message broker with Kafka-like functionality"""
     
-    def __init__(self):
-        self.topics: Dict[str, List[OmniEvent]] = {}
-        self.subscribers: Dict[str, List[Callable]] = {}
-        self.event_store: List[OmniEvent] = []
-        self.websocket_connections: List[WebSocket] = []
+    def __init__(self, data_dir: Optional[str] = "data/message_broker", retention_events: int = 10_000,
+                 segment_max_bytes: int = 8 * 1024 * 1024, retention_segments: int = 8,
+                 event_store_limit: int = 10_000, subscriber_queue_size: int = 1000,
+                 websocket_queue_size: int = 1000,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 websocket_overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST):
+        self.data_dir = data_dir
+        self.retention_events = retention_events
+        self.segment_max_bytes = segment_max_bytes
+        self.retention_segments = retention_segments
+        self.subscriber_queue_size = subscriber_queue_size
+        self.websocket_queue_size = websocket_queue_size
+        self.overflow_policy = overflow_policy
+        self.websocket_overflow_policy = websocket_overflow_policy
+        self.topics: Dict[str, TopicLog] = {}
+        self.subscribers: Dict[str, List[Subscription]] = {}
+        self.event_store: deque = deque(maxlen=event_store_limit)  # recent events across topics
+        self.total_events = 0
+        self.global_window = WindowedCounters()
+        self.consumer_offsets: Dict[str, Dict[str, int]] = {}  # group -> topic -> next offset
+        self.websocket_connections: Dict[WebSocket, Subscription] = {}
+        self.disconnected_websockets = 0
+        self._load_existing_topics()
+        self._load_consumer_offsets()
         self.setup_default_topics()
         
+    def _topic_dir(self, topic: str) -> Optional[str]:
+        if not self.data_dir:
+            return None
+        return os.path.join(self.data_dir, "topics", topic)
+    
+    def _get_or_create_topic(self, topic: str) -> TopicLog:
+        log = self.topics.get(topic)
+        if log is None:
+            validate_topic_name(topic)
+            log = self.topics[topic] = TopicLog(
+                topic, self._topic_dir(topic), self.retention_events,
+                self.segment_max_bytes, self.retention_segments
+            )
+            self.subscribers.setdefault(topic, [])
+        return log
+    
+    def _load_existing_topics(self):
+        """Reopen topics persisted by a previous run so consumers can replay"""
+        topics_dir = os.path.join(self.data_dir, "topics") if self.data_dir else None
+        if not topics_dir or not os.path.isdir(topics_dir):
+            return
+        for name in sorted(os.listdir(topics_dir)):
+            if not TOPIC_NAME_RE.match(name) or name in (".", ".."):
+                logger.warning(f"Skipping topic directory with invalid name: {name!r}")
+                continue
+            log = self._get_or_create_topic(name)
+            self.total_events += log.total_events
+            
+    @property
+    def _offsets_path(self) -> Optional[str]:
+        return os.path.join(self.data_dir, "consumer_offsets.json") if self.data_dir else None
+    
+    def _load_consumer_offsets(self):
+        path = self._offsets_path
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.consumer_offsets = json.load(f)
+            except Exception as e:
+                logger.error(f"Failed to load consumer offsets: {str(e)}")
+                
+    def _save_consumer_offsets(self):
+        path = self._offsets_path
+        if not path:
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.consumer_offsets, f)
+        os.replace(tmp_path, path)
+        
     def setup_default_topics(self):
         """Initialize default topics for OmniCore system"""
         default_topics = [
@@ -82,21 +472,19 @@ class MessageBroker:
         ]
         
         for topic in default_topics:
-            self.topics[topic] = []
-            self.subscribers[topic] = []
+            self._get_or_create_topic(topic)
             
     async def publish_event(self, topic: str, event: OmniEvent) -> bool:
-        """Publish event to topic"""
+        """Publish event to topic; raises ValueError for an invalid topic name"""
+        validate_topic_name(topic)
         try:
-            if topic not in self.topics:
-                self.topics[topic] = []
-                self.subscribers[topic] = []
-                
-            # Add to topic queue
-            self.topics[topic].append(event)
+            # Append to topic log (ring buffer + segment file)
+            self._get_or_create_topic(topic).append(event)
             
-            # Add to event store for persistence
+            # Recent events across topics (bounded)
             self.event_store.append(event)
+            self.total_events += 1
+            self.global_window.add(event)
             
             # Notify subscribers
             await self._notify_subscribers(topic, event)
@@ -111,13 +499,60 @@ class MessageBroker:
             logger.error(f"Failed to publish event: {str(e)}")
             return False
             
-    async def subscribe(self, topic: str, callback: Callable) -> bool:
-        """Subscribe to topic"""
+    def poll(self, topic: str, offset: int, max_events: int = 100) -> Dict[str, Any]:
+        """Offset-based read; returns events and the offset to continue from"""
+        log = self.topics.get(topic)
+        if log is None:
+            return {"topic": topic, "events": [], "next_offset": offset, "error": "Topic not found"}
+        records = log.read(offset, max_events)
+        return {
+            "topic": topic,
+            "events": [{"offset": record_offset, "event": event} for record_offset, event in records],
+            "next_offset": records[-1][0] + 1 if records else max(offset, log.earliest_offset),
+            "earliest_offset": log.earliest_offset,
+            "latest_offset": log.next_offset
+        }
+        
+    def poll_group(self, group_id: str, topic: str, max_events: int = 100,
+                   auto_commit: bool = False) -> Dict[str, Any]:
+        """Read from the consumer group's committed offset"""
+        committed = self.consumer_offsets.get(group_id, {}).get(topic, 0)
+        result = self.poll(topic, committed, max_events)
+        if auto_commit and result["events"]:
+            self.commit_offset(group_id, topic, result["next_offset"])
+        return result
+    
+    def commit_offset(self, group_id: str, topic: str, offset: int) -> bool:
+        """Commit the next offset the group should read"""
+        try:
+            self.consumer_offsets.setdefault(group_id, {})[topic] = offset
+            self._save_consumer_offsets()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to commit offset for {group_id}/{topic}: {str(e)}")
+            return False
+        
+    def get_consumer_lag(self, group_id: str) -> Dict[str, int]:
+        return {
+            topic: max(0, self.topics[topic].next_offset - offset)
+            for topic, offset in self.consumer_offsets.get(group_id, {}).items()
+            if topic in self.topics
+        }
+        
+    async def subscribe(self, topic: str, callback: Callable, queue_size: Optional[int] = None,
+                        overflow: Optional[OverflowPolicy] = None) -> bool:
+        """Subscribe to topic; callback runs in its own delivery task"""
         try:
             if topic not in self.subscribers:
                 self.subscribers[topic] = []
                 
-            self.subscribers[topic].append(callback)
+            subscription = Subscription(
+                callback, getattr(callback, "__name__", repr(callback)),
+                queue_size or self.subscriber_queue_size, overflow or self.overflow_policy,
+                on_disconnect=lambda sub, reason: self._remove_subscription(topic, sub, reason)
+            )
+            self.subscribers[topic].append(subscription)
+            subscription.start()
             logger.info(f"New subscriber added to {topic}")
             return True
             
@@ -125,17 +560,50 @@ class MessageBroker:
             logger.error(f"Failed to subscribe to {topic}: {str(e)}")
             return False
             
+    def _remove_subscription(self, topic: str, subscription: Subscription, reason: str):
+        if subscription in self.subscribers.get(topic, []):
+            self.subscribers[topic].remove(subscription)
+            logger.warning(f"Subscriber {subscription.name} removed from {topic}: {reason}")
+            
+    async def add_websocket(self, websocket: WebSocket, queue_size: Optional[int] = None,
+                            overflow: Optional[OverflowPolicy] = None) -> Subscription:
+        """Register an accepted WebSocket with its own send queue"""
+        subscription = Subscription(
+            websocket.send_text, f"websocket-{id(websocket)}",
+            queue_size or self.websocket_queue_size, overflow or self.websocket_overflow_policy,
+            on_disconnect=lambda sub, reason: self._drop_websocket(websocket, reason),
+            disconnect_on_error=True
+        )
+        self.websocket_connections[websocket] = subscription
+        subscription.start()
+        return subscription
+    
+    def remove_websocket(self, websocket: WebSocket):
+        subscription = self.websocket_connections.get(websocket)
+        if subscription is not None:
+            subscription.close(reason="client disconnected")
+            
+    def _drop_websocket(self, websocket: WebSocket, reason: str):
+        if self.websocket_connections.pop(websocket, None) is not None:
+            self.disconnected_websockets += 1
+            if reason != "client disconnected":
+                logger.warning(f"WebSocket dropped: {reason}")
+                asyncio.ensure_future(self._close_websocket(websocket))
+                
+    @staticmethod
+    async def _close_websocket(websocket: WebSocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+        
     async def _notify_subscribers(self, topic: str, event: OmniEvent):
-        """Notify all subscribers of topic"""
-        if topic in self.subscribers:
-            for callback in self.subscribers[topic]:
-                try:
-                    await callback(event)
-                except Exception as e:
-                    logger.error(f"Subscriber callback failed: {str(e)}")
+        """Hand the event to every subscriber's queue (never waits on a callback)"""
+        for subscription in list(self.subscribers.get(topic, [])):
+            subscription.offer(event)
                     
     async def _broadcast_to_websockets(self, topic: str, event: OmniEvent):
-        """Broadcast event to WebSocket connections"""
+        """Broadcast event to WebSocket connections (encoded once, queued per socket)"""
         if self.websocket_connections:
             message = {
                 "topic": topic,
@@ -150,82 +618,99 @@ class MessageBroker:
                     "timestamp": event.timestamp.isoformat()
                 }
             }
+            text = json.dumps(message)
             
-            disconnected = []
-            for websocket in self.websocket_connections:
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except:
-                    disconnected.append(websocket)
-                    
-            # Remove disconnected WebSockets
-            for ws in disconnected:
-                self.websocket_connections.remove(ws)
+            for subscription in list(self.websocket_connections.values()):
+                subscription.offer(text)
                 
+    async def drain(self):
+        """Wait until every subscriber and WebSocket queue is empty"""
+        subscriptions = [sub for subs in self.subscribers.values() for sub in subs]
+        subscriptions.extend(self.websocket_connections.values())
+        await asyncio.gather(*(sub.queue.join() for sub in subscriptions if not sub.closed))
+        
+    def get_delivery_stats(self) -> Dict[str, Any]:
+        """Queue depth and drop counters for subscribers and WebSockets"""
+        subscriptions = [sub for subs in self.subscribers.values() for sub in subs]
+        websockets = list(self.websocket_connections.values())
+        return {
+            "subscriber_queued": sum(sub.queue.qsize() for sub in subscriptions),
+            "subscriber_dropped": sum(sub.dropped for sub in subscriptions),
+            "websocket_queued": sum(sub.queue.qsize() for sub in websockets),
+            "websocket_dropped": sum(sub.dropped for sub in websockets),
+            "websockets_disconnected": self.disconnected_websockets,
+            "slowest_websockets": sorted(
+                (sub.stats() for sub in websockets), key=lambda stats: stats["queued"], reverse=True
+            )[:5]
+        }
+        
     def get_topic_stats(self, topic: str) -> Dict[str, Any]:
         """Get statistics for specific topic"""
         if topic not in self.topics:
             return {"error": "Topic not found"}
             
-        events = self.topics[topic]
-        recent_events = [e for e in events if (datetime.now() - e.timestamp).seconds < 3600]  # Last hour
+        log = self.topics[topic]
+        recent = log.window.summary()
         
         return {
             "topic": topic,
-            "total_events": len(events),
-            "recent_events_1h": len(recent_events),
+            "total_events": log.total_events,
+            "retained_events": len(log),
+            "earliest_offset": log.earliest_offset,
+            "latest_offset": log.next_offset,
+            "recent_events_1h": sum(recent["types"].values()),
             "subscribers_count": len(self.subscribers.get(topic, [])),
-            "last_event": events[-1].timestamp.isoformat() if events else None,
-            "event_types": list(set(e.event_type.value for e in recent_events)),
-            "priorities": list(set(e.priority.value for e in recent_events))
+            "last_event": log.last_event_time.isoformat() if log.last_event_time else None,
+            "event_types": list(recent["types"]),
+            "priorities": list(recent["priorities"])
         }
         
     def get_global_stats(self) -> Dict[str, Any]:
         """Get global message broker statistics"""
-        total_events = sum(len(events) for events in self.topics.values())
         total_subscribers = sum(len(subs) for subs in self.subscribers.values())
         
-        # Recent activity (last hour)
-        recent_events = [e for e in self.event_store if (datetime.now() - e.timestamp).seconds < 3600]
+        # Recent activity (last hour), from counters maintained on publish
+        recent = self.global_window.summary()
+        events_last_hour = sum(recent["types"].values())
         
         return {
             "broker_status": "operational",
             "total_topics": len(self.topics),
-            "total_events": total_events,
+            "total_events": self.total_events,
             "total_subscribers": total_subscribers,
             "active_websockets": len(self.websocket_connections),
+            "delivery": self.get_delivery_stats(),
             "recent_activity": {
-                "events_last_hour": len(recent_events),
-                "events_per_minute": len(recent_events) / 60 if recent_events else 0,
-                "top_event_types": self._get_top_event_types(recent_events),
-                "top_tenants": self._get_top_tenants(recent_events)
+                "events_last_hour": events_last_hour,
+                "events_per_minute": events_last_hour / 60,
+                "top_event_types": self._get_top_event_types(recent["types"]),
+                "top_tenants": self._get_top_tenants(recent["tenants"])
             },
             "timestamp": datetime.now().isoformat()
         }
         
-    def _get_top_event_types(self, events: List[OmniEvent]) -> List[Dict[str, Any]]:
-        """Get top event types from events list"""
-        type_counts = {}
-        for event in events:
-            event_type = event.event_type.value
-            type_counts[event_type] = type_counts.get(event_type, 0) + 1
-            
+    def _get_top_event_types(self, type_counts: Counter) -> List[Dict[str, Any]]:
+        """Get top event types from windowed counters"""
         return [
             {"type": event_type, "count": count}
-            for event_type, count in sorted(type_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+            for event_type, count in type_counts.most_common(5)
         ]
         
-    def _get_top_tenants(self, events: List[OmniEvent]) -> List[Dict[str, Any]]:
-        """Get top tenants from events list"""
-        tenant_counts = {}
-        for event in events:
-            tenant_id = event.tenant_id
-            tenant_counts[tenant_id] = tenant_counts.get(tenant_id, 0) + 1
-            
+    def _get_top_tenants(self, tenant_counts: Counter) -> List[Dict[str, Any]]:
+        """Get top tenants from windowed counters"""
         return [
             {"tenant_id": tenant_id, "events": count}
-            for tenant_id, count in sorted(tenant_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+            for tenant_id, count in tenant_counts.most_common(5)
         ]
+        
+    def close(self):
+        """Stop delivery tasks and close segment files"""
+        for subscription in [sub for subs in self.subscribers.values() for sub in subs]:
+            subscription.close()
+        for subscription in list(self.websocket_connections.values()):
+            subscription.close()
+        for log in self.topics.values():
+            log.close()
 
 class EventGenerator:
     """Generate sample events for testing and demonstration"""
@@ -352,10 +837,11 @@ async def get_topics():
         "topics": [
             {
                 "name": topic,
-                "events_count": len(events),
+                "events_count": log.total_events,
+                "latest_offset": log.next_offset,
                 "subscribers_count": len(message_broker.subscribers.get(topic, []))
             }
-            for topic, events in message_broker.topics.items()
+            for topic, log in message_broker.topics.items()
         ]
     }
 
@@ -364,6 +850,34 @@ async def get_topic_stats(topic: str):
     """Get statistics for specific topic"""
     return message_broker.get_topic_stats(topic)
 
+@app.get("/topics/{topic}/poll")
+async def poll_topic(topic: str, offset: int = 0, max_events: int = 100):
+    """Offset-based read from topic log"""
+    result = message_broker.poll(topic, offset, max_events)
+    result["events"] = [
+        {"offset": item["offset"], "event": event_to_dict(item["event"])}
+        for item in result["events"]
+    ]
+    return result
+
+@app.get("/consumers/{group_id}/poll/{topic}")
+async def poll_consumer_group(group_id: str, topic: str, max_events: int = 100, auto_commit: bool = False):
+    """Read from the consumer group's committed offset"""
+    result = message_broker.poll_group(group_id, topic, max_events, auto_commit)
+    result["events"] = [
+        {"offset": item["offset"], "event": event_to_dict(item["event"])}
+        for item in result["events"]
+    ]
+    return result
+
+@app.post("/consumers/{group_id}/commit/{topic}")
+async def commit_consumer_offset(group_id: str, topic: str, offset: int):
+    """Commit next offset for consumer group"""
+    if not message_broker.commit_offset(group_id, topic, offset):
+        raise HTTPException(status_code=500, detail="Failed to commit offset")
+    return {"group_id": group_id, "topic": topic, "offset": offset,
+            "lag": message_broker.get_consumer_lag(group_id).get(topic)}
+
 @app.post("/publish")
 async def publish_event(request: PublishEventRequest):
     """Publish event to topic"""
@@ -392,7 +906,7 @@ async def publish_event(request: PublishEventRequest):
             raise HTTPException(status_code=500, detail="Failed to publish event")
             
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Invalid event type or priority: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid topic, event type or priority: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Publishing failed: {str(e)}")
 
@@ -400,23 +914,22 @@ async def publish_event(request: PublishEventRequest):
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time event streaming"""
     await websocket.accept()
-    message_broker.websocket_connections.append(websocket)
+    await message_broker.add_websocket(websocket)
     
     try:
         while True:
             # Keep connection alive
             await websocket.receive_text()
     except WebSocketDisconnect:
-        message_broker.websocket_connections.remove(websocket)
+        pass
+    finally:
+        message_broker.remove_websocket(websocket)
 
 @app.get("/events/recent")
 async def get_recent_events(limit: int = 50):
     """Get recent events from event store"""
-    recent_events = sorted(
-        message_broker.event_store,
-        key=lambda e: e.timestamp,
-        reverse=True
-    )[:limit]
+    # event_store is kept in publish order, newest last
+    recent_events = list(message_broker.event_store)[-limit:][::-1] if limit > 0 else []
     
     return {
         "events": [
@@ -432,7 +945,7 @@ async def get_recent_events(limit: int = 50):
             }
             for event in recent_events
         ],
-        "total_events": len(message_broker.event_store)
+        "total_events": message_broker.total_events
     }
 
 @app.on_event("startup")
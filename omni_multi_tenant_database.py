@@ -11,11 +11,14 @@ import secrets
 import hashlib
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import sqlite3
 import threading
+import queue
+import time
+from concurrent.futures import Future
 from contextlib import contextmanager
 from fastapi import FastAPI, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
@@ -82,19 +85,163 @@ class TenantMetrics:
     compliance_score: float
     performance_score: float
 
+Statement = Tuple[str, tuple]
+
+_STOP = object()
+
+class TenantConnectionPool:
+    """
+    Connection pool for one tenant database.
+    
+    The database runs in WAL mode so readers never block the writer. Reads borrow
+    one of ``readers`` connections. All writes go through a single writer thread
+    that owns its own connection and group-commits: every unit of work queued
+    while the previous transaction was committing is applied in the next one.
+    Each unit runs inside a savepoint, so a failing unit does not affect the
+    rest of the batch.
+    """
+    
+    def __init__(self, db_path: str, readers: int = 4, max_batch: int = 512,
+                 busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.busy_timeout_ms = busy_timeout_ms
+        self.stats = {"units": 0, "transactions": 0, "failed_units": 0, "max_batch_seen": 0}
+        
+        self._writer_conn = self._connect()
+        self._writer_conn.execute("PRAGMA journal_mode=WAL")
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self.reader_count = readers
+        for _ in range(readers):
+            self._readers.put(self._connect())
+        
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name=f"tenant-writer:{Path(db_path).stem}",
+                                        daemon=True)
+        self._writer.start()
+        
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+        
+    @contextmanager
+    def reader(self):
+        """Borrow a read connection (autocommit)"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+            
+    def submit(self, statements: List[Statement]) -> Future:
+        """Queue statements that must be committed together; the future resolves after commit"""
+        future: Future = Future()
+        self._queue.put((statements, future))
+        return future
+        
+    def write(self, statements: List[Statement], timeout: Optional[float] = None):
+        """Blocking variant of ``submit``"""
+        return self.submit(statements).result(timeout)
+        
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            # Everything that queued up during the previous commit joins this transaction
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            # Units whose caller already gave up (cancelled future) are dropped;
+            # the rest are marked running so they can no longer be cancelled
+            batch = [unit for unit in batch if unit[1].set_running_or_notify_cancel()]
+            if batch:
+                try:
+                    self._commit_batch(batch)
+                except Exception as e:
+                    # Never let one batch take the writer thread down
+                    logger.error(f"Writer error for {self.db_path}: {e}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+            if stop:
+                return
+                
+    def _commit_batch(self, batch: List[Tuple[List[Statement], Future]]):
+        conn = self._writer_conn
+        outcomes: List[Optional[BaseException]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for statements, _ in batch:
+                conn.execute("SAVEPOINT unit")
+                try:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+                    conn.execute("RELEASE unit")
+                    outcomes.append(None)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO unit")
+                    conn.execute("RELEASE unit")
+                    outcomes.append(e)
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.error(f"Group commit failed for {self.db_path}: {e}")
+            outcomes = [e] * len(batch)
+            
+        self.stats["units"] += len(batch)
+        self.stats["transactions"] += 1
+        self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+        for (_, future), error in zip(batch, outcomes):
+            if error is None:
+                future.set_result(True)
+            else:
+                self.stats["failed_units"] += 1
+                future.set_exception(error)
+                
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["queue_size"] = self._queue.qsize()
+        stats["idle_readers"] = self._readers.qsize()
+        return stats
+        
+    def close(self):
+        """Drain pending writes, stop the writer and close all connections"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._writer_conn.close()
+        for _ in range(self.reader_count):
+            self._readers.get().close()
+
 class MultiTenantDatabase:
     """Multi-tenant database manager with complete data isolation"""
     
-    def __init__(self, db_path: str = "omni_multitenant.db"):
+    def __init__(self, db_path: str = "omni_multitenant.db", tenant_dir: str = ".",
+                 readers_per_tenant: int = 4, load_samples: bool = True):
         self.db_path = db_path
+        self.tenant_dir = Path(tenant_dir)
+        self.readers_per_tenant = readers_per_tenant
         self.tenants: Dict[str, TenantConfig] = {}
-        self.tenant_connections: Dict[str, sqlite3.Connection] = {}
+        self.tenant_pools: Dict[str, TenantConnectionPool] = {}
         self.encryption_keys: Dict[str, str] = {}
         self.access_logs: List[Dict] = []
         self.metrics: Dict[str, TenantMetrics] = {}
         self.lock = threading.RLock()
         self.setup_database()
-        self.load_sample_tenants()
+        if load_samples:
+            self.load_sample_tenants()
         
     def setup_database(self):
         """Initialize database structure"""
@@ -151,7 +298,7 @@ class MultiTenantDatabase:
             
     def create_tenant_schema(self, tenant_id: str):
         """Create isolated schema for tenant"""
-        tenant_db_path = f"tenant_{tenant_id}.db"
+        tenant_db_path = str(self.tenant_dir / f"tenant_{tenant_id}.db")
         
         with sqlite3.connect(tenant_db_path) as conn:
             # Finance module tables
@@ -216,9 +363,28 @@ class MultiTenantDatabase:
                 )
             """)
             
+            # Tenant audit trail, written in the same transaction as the data it describes
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS access_logs (
+                    log_id TEXT PRIMARY KEY,
+                    tenant_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    resource TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    ip_address TEXT,
+                    user_agent TEXT,
+                    success BOOLEAN NOT NULL
+                )
+            """)
+            
             conn.commit()
             
-        self.tenant_connections[tenant_id] = sqlite3.connect(tenant_db_path, check_same_thread=False)
+        with self.lock:
+            old_pool = self.tenant_pools.pop(tenant_id, None)
+            self.tenant_pools[tenant_id] = TenantConnectionPool(tenant_db_path, readers=self.readers_per_tenant)
+        if old_pool:
+            old_pool.close()
         
     def load_sample_tenants(self):
         """Load sample tenant configurations"""
@@ -265,7 +431,7 @@ class MultiTenantDatabase:
         ]
         
         for tenant_data in sample_tenants:
-            tenant_config = TenantConfig(
+            self.register_tenant(TenantConfig(
                 tenant_id=tenant_data["tenant_id"],
                 name=tenant_data["name"],
                 type=tenant_data["type"],
@@ -278,23 +444,25 @@ class MultiTenantDatabase:
                 compliance_requirements=tenant_data["compliance_requirements"],
                 encryption_level=tenant_data["encryption_level"],
                 backup_frequency=tenant_data["backup_frequency"]
-            )
-            
-            self.tenants[tenant_config.tenant_id] = tenant_config
-            self.encryption_keys[tenant_config.tenant_id] = secrets.token_urlsafe(32)
-            self.create_tenant_schema(tenant_config.tenant_id)
-            
-            # Initialize metrics
-            self.metrics[tenant_config.tenant_id] = TenantMetrics(
-                tenant_id=tenant_config.tenant_id,
-                storage_used_gb=round(secrets.randbelow(tenant_config.max_storage_gb), 2),
-                active_users=secrets.randbelow(tenant_config.max_users),
-                api_calls_today=secrets.randbelow(10000),
-                last_activity=datetime.utcnow(),
-                compliance_score=95.0 + secrets.randbelow(5),
-                performance_score=90.0 + secrets.randbelow(10)
-            )
+            ))
             
+    def register_tenant(self, tenant_config: TenantConfig):
+        """Register a tenant and open its isolated database"""
+        self.tenants[tenant_config.tenant_id] = tenant_config
+        self.encryption_keys[tenant_config.tenant_id] = secrets.token_urlsafe(32)
+        self.create_tenant_schema(tenant_config.tenant_id)
+        
+        # Initialize metrics
+        self.metrics[tenant_config.tenant_id] = TenantMetrics(
+            tenant_id=tenant_config.tenant_id,
+            storage_used_gb=round(secrets.randbelow(tenant_config.max_storage_gb), 2),
+            active_users=secrets.randbelow(tenant_config.max_users),
+            api_calls_today=secrets.randbelow(10000),
+            last_activity=datetime.utcnow(),
+            compliance_score=95.0 + secrets.randbelow(5),
+            performance_score=90.0 + secrets.randbelow(10)
+        )
+        
     def encrypt_data(self, tenant_id: str, data: str) -> str:
         """Encrypt sensitive data for tenant"""
         # Simplified encryption using base64 encoding
@@ -311,23 +479,53 @@ class MultiTenantDatabase:
         """Calculate data checksum for integrity"""
         return hashlib.sha256(data.encode()).hexdigest()
         
+    def _get_pool(self, tenant_id: str) -> TenantConnectionPool:
+        pool = self.tenant_pools.get(tenant_id)
+        if pool is None:
+            raise HTTPException(status_code=404, detail=f"Tenant {tenant_id} not found")
+        return pool
+        
     @contextmanager
     def get_tenant_connection(self, tenant_id: str):
-        """Get database connection for specific tenant"""
-        if tenant_id not in self.tenant_connections:
-            raise HTTPException(status_code=404, detail=f"Tenant {tenant_id} not found")
+        """Get a pooled (autocommit) database connection for specific tenant"""
+        with self._get_pool(tenant_id).reader() as conn:
+            yield conn
             
-        with self.lock:
-            conn = self.tenant_connections[tenant_id]
-            try:
-                yield conn
-            finally:
-                conn.commit()
-                
+    def _insert_statement(self, module: str, data_type: str, record_id: str, data: Dict[str, Any],
+                          classification: DataClassification, encrypted_data: str,
+                          checksum: str) -> Optional[Statement]:
+        """INSERT for the module table, or None if the module/data type has no table"""
+        if module == "finance" and data_type == "transaction":
+            return ("""
+                INSERT INTO finance_transactions 
+                (transaction_id, amount, currency, type, description, account_id, 
+                 created_at, classification, encrypted_data, checksum)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                record_id, data.get("amount", 0), data.get("currency", "EUR"),
+                data.get("type", "unknown"), data.get("description", ""),
+                data.get("account_id", ""), datetime.utcnow().isoformat(),
+                classification.value, encrypted_data, checksum
+            ))
+        if module == "logistics" and data_type == "shipment":
+            return ("""
+                INSERT INTO logistics_shipments 
+                (shipment_id, origin, destination, status, tracking_number, 
+                 estimated_delivery, created_at, classification, encrypted_data, checksum)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                record_id, data.get("origin", ""), data.get("destination", ""),
+                data.get("status", "pending"), data.get("tracking_number", ""),
+                data.get("estimated_delivery", ""), datetime.utcnow().isoformat(),
+                classification.value, encrypted_data, checksum
+            ))
+        return None
+        
     async def store_data(self, tenant_id: str, module: str, data_type: str, 
                         data: Dict[str, Any], user_id: str, 
                         classification: DataClassification = DataClassification.INTERNAL) -> str:
         """Store data with tenant isolation"""
+        pool = self._get_pool(tenant_id)
         record_id = secrets.token_urlsafe(16)
         
         # Encrypt sensitive data
@@ -335,40 +533,19 @@ class MultiTenantDatabase:
         encrypted_data = self.encrypt_data(tenant_id, data_json) if classification in [DataClassification.CONFIDENTIAL, DataClassification.RESTRICTED] else data_json
         checksum = self.calculate_checksum(data_json)
         
-        with self.get_tenant_connection(tenant_id) as conn:
-            if module == "finance" and data_type == "transaction":
-                conn.execute("""
-                    INSERT INTO finance_transactions 
-                    (transaction_id, amount, currency, type, description, account_id, 
-                     created_at, classification, encrypted_data, checksum)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    record_id, data.get("amount", 0), data.get("currency", "EUR"),
-                    data.get("type", "unknown"), data.get("description", ""),
-                    data.get("account_id", ""), datetime.utcnow().isoformat(),
-                    classification.value, encrypted_data, checksum
-                ))
-            elif module == "logistics" and data_type == "shipment":
-                conn.execute("""
-                    INSERT INTO logistics_shipments 
-                    (shipment_id, origin, destination, status, tracking_number, 
-                     estimated_delivery, created_at, classification, encrypted_data, checksum)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    record_id, data.get("origin", ""), data.get("destination", ""),
-                    data.get("status", "pending"), data.get("tracking_number", ""),
-                    data.get("estimated_delivery", ""), datetime.utcnow().isoformat(),
-                    classification.value, encrypted_data, checksum
-                ))
-                
-        # Log access
-        await self.log_access(tenant_id, user_id, "CREATE", f"{module}/{data_type}", True)
+        # Data row and its audit record are committed together by the tenant writer
+        statements = []
+        insert = self._insert_statement(module, data_type, record_id, data, classification,
+                                        encrypted_data, checksum)
+        if insert:
+            statements.append(insert)
+        log_entry = self._new_log_entry(tenant_id, user_id, "CREATE", f"{module}/{data_type}", True)
+        statements.append(self._audit_statement(log_entry))
+        await asyncio.wrap_future(pool.submit(statements))
         
         return record_id
         
-    async def retrieve_data(self, tenant_id: str, module: str, data_type: str, 
-                           filters: Dict[str, Any] = None, user_id: str = "") -> List[Dict[str, Any]]:
-        """Retrieve data with tenant isolation"""
+    def _read_records(self, tenant_id: str, module: str, data_type: str) -> List[Dict[str, Any]]:
         results = []
         
         with self.get_tenant_connection(tenant_id) as conn:
@@ -399,15 +576,22 @@ class MultiTenantDatabase:
                         "classification": row[8]
                     })
                     
+        return results
+        
+    async def retrieve_data(self, tenant_id: str, module: str, data_type: str, 
+                           filters: Dict[str, Any] = None, user_id: str = "") -> List[Dict[str, Any]]:
+        """Retrieve data with tenant isolation"""
+        self._get_pool(tenant_id)
+        # Reads run on a pooled connection off the event loop
+        results = await asyncio.to_thread(self._read_records, tenant_id, module, data_type)
+        
         # Log access
         await self.log_access(tenant_id, user_id, "READ", f"{module}/{data_type}", True)
         
         return results
         
-    async def log_access(self, tenant_id: str, user_id: str, action: str, 
-                        resource: str, success: bool, ip_address: str = "", 
-                        user_agent: str = ""):
-        """Log access for audit trail"""
+    def _new_log_entry(self, tenant_id: str, user_id: str, action: str, resource: str,
+                       success: bool, ip_address: str = "", user_agent: str = "") -> Dict[str, Any]:
         log_entry = {
             "log_id": secrets.token_urlsafe(16),
             "tenant_id": tenant_id,
@@ -419,20 +603,39 @@ class MultiTenantDatabase:
             "user_agent": user_agent,
             "success": success
         }
-        
         self.access_logs.append(log_entry)
+        return log_entry
+        
+    @staticmethod
+    def _audit_statement(log_entry: Dict[str, Any]) -> Statement:
+        return ("""
+            INSERT INTO access_logs 
+            (log_id, tenant_id, user_id, action, resource, timestamp, ip_address, user_agent, success)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            log_entry["log_id"], log_entry["tenant_id"], log_entry["user_id"],
+            log_entry["action"], log_entry["resource"], log_entry["timestamp"],
+            log_entry["ip_address"], log_entry["user_agent"], log_entry["success"]
+        ))
         
-        # Store in database
+    def _write_master_audit(self, statement: Statement):
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO access_logs 
-                (log_id, tenant_id, user_id, action, resource, timestamp, ip_address, user_agent, success)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                log_entry["log_id"], log_entry["tenant_id"], log_entry["user_id"],
-                log_entry["action"], log_entry["resource"], log_entry["timestamp"],
-                log_entry["ip_address"], log_entry["user_agent"], log_entry["success"]
-            ))
+            conn.execute(*statement)
+            
+    async def log_access(self, tenant_id: str, user_id: str, action: str, 
+                        resource: str, success: bool, ip_address: str = "", 
+                        user_agent: str = ""):
+        """Log access for audit trail"""
+        log_entry = self._new_log_entry(tenant_id, user_id, action, resource, success,
+                                        ip_address, user_agent)
+        statement = self._audit_statement(log_entry)
+        
+        # Store in the tenant database through its group-commit writer
+        pool = self.tenant_pools.get(tenant_id)
+        if pool:
+            await asyncio.wrap_future(pool.submit([statement]))
+        else:
+            await asyncio.to_thread(self._write_master_audit, statement)
             
     def get_tenant_metrics(self, tenant_id: str) -> TenantMetrics:
         """Get tenant usage metrics"""
@@ -444,6 +647,18 @@ class MultiTenantDatabase:
             for key, value in updates.items():
                 if hasattr(self.metrics[tenant_id], key):
                     setattr(self.metrics[tenant_id], key, value)
+                    
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Group-commit and reader statistics per tenant"""
+        return {tenant_id: pool.get_stats() for tenant_id, pool in self.tenant_pools.items()}
+        
+    def close(self):
+        """Flush pending writes and close all tenant pools"""
+        with self.lock:
+            pools = list(self.tenant_pools.values())
+            self.tenant_pools.clear()
+        for pool in pools:
+            pool.close()
 
 # Initialize database
 db_manager = MultiTenantDatabase()
@@ -587,9 +802,14 @@ async def health_check():
         "timestamp": datetime.utcnow().isoformat(),
         "database": "connected",
         "tenants": len(db_manager.tenants),
-        "active_connections": len(db_manager.tenant_connections)
+        "active_connections": sum(pool.reader_count + 1 for pool in db_manager.tenant_pools.values())
     }
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush queued writes before exit"""
+    db_manager.close()
+
 if __name__ == "__main__":
     print("🗄️  Zaganjam OmniCore Multi-Tenant Database...")
     print("🏢 Complete tenant isolation: Enterprise ready")
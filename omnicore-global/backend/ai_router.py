@@ -4,23 +4,162 @@ OmniCore AI Router - Inteligentno usmerjanje poizvedb
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, Tuple
 import re
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+_WORD_RUN = re.compile(r'\w+')
+
+class KeywordIndex:
+    """
+    Aho-Corasick avtomat nad ključnimi besedami vseh modulov.
+    
+    En prehod čez poizvedbo najde vse pojavitve vseh ključnih besed (tudi prekrivajoče),
+    zato je cena usmerjanja odvisna od dolžine poizvedbe, ne od števila modulov in besed.
+    Za vsako najdeno besedo se ugotovi, ali se ujema s celo poizvedbo in ali ima katera
+    pojavitev mejo besede na obeh straneh (enako kot ``\\b...\\b``).
+    """
+    
+    def __init__(self):
+        self.keywords: List[str] = []
+        self.weights: List[Dict[str, int]] = []  # ID besede -> {modul: število pojavitev v pravilih}
+        self._keyword_ids: Dict[str, int] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[int] = [-1]  # ID besede, ki se konča v vozlišču
+        self._output: List[Tuple[int, ...]] = [()]
+        self._built = True
+    
+    def __len__(self) -> int:
+        return sum(sum(weights.values()) for weights in self.weights)
+    
+    def add(self, module: str, keyword: str):
+        """Dodaj ključno besedo modulu (ponovitve se štejejo večkrat, kot v pravilih)"""
+        if not keyword:
+            return
+        keyword_id = self._keyword_ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = self._keyword_ids[keyword] = len(self.keywords)
+            self.keywords.append(keyword)
+            self.weights.append({})
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._terminal.append(-1)
+                    self._output.append(())
+                node = next_node
+            self._terminal[node] = keyword_id
+            self._built = False
+        weights = self.weights[keyword_id]
+        weights[module] = weights.get(module, 0) + 1
+    
+    def _build(self):
+        """Izračunaj povezave ob neuspehu in izhodne množice (BFS po trie-ju)"""
+        queue = []
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+        self._output[0] = ()
+        for node in queue:
+            own = (self._terminal[node],) if self._terminal[node] >= 0 else ()
+            self._output[node] = own + self._output[self._fail[node]]
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                queue.append(child)
+        self._built = True
+    
+    def find(self, text: str) -> Dict[int, int]:
+        """Najdene besede: ID -> točke (10 cela poizvedba, 5 meja besede, 1 vsebovanje)"""
+        if not self._built:
+            self._build()
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        boundaries = None
+        found: Dict[int, int] = {}
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for keyword_id in output[node]:
+                if found.get(keyword_id, 0) >= 5:
+                    continue
+                start = end - len(keywords[keyword_id])
+                if start == 0 and end == len(text):
+                    found[keyword_id] = 10
+                    continue
+                if boundaries is None:
+                    boundaries = set()
+                    for match in _WORD_RUN.finditer(text):
+                        boundaries.add(match.start())
+                        boundaries.add(match.end())
+                found[keyword_id] = 5 if start in boundaries and end in boundaries else 1
+        return found
+    
+    def score(self, text: str) -> Dict[str, int]:
+        """Točke po modulih za poizvedbo"""
+        scores: Dict[str, int] = {}
+        for keyword_id, points in self.find(text).items():
+            for module, count in self.weights[keyword_id].items():
+                scores[module] = scores.get(module, 0) + points * count
+        return scores
+
 class AIRouter:
     """AI-powered router za usmerjanje poizvedb v ustrezne module"""
     
-    def __init__(self, modules: Dict[str, Any], config: Any):
+    def __init__(self, modules: Dict[str, Any], config: Any, route_cache_size: int = 1024):
         self.modules = modules
         self.config = config
         self.routing_rules = self._initialize_routing_rules()
-        self.learning_data = []
+        self.learning_data = deque(maxlen=1000)  # Ohrani samo zadnjih 1000 odločitev
+        
+        # Predpomnilnik zadnjih normaliziranih poizvedb -> (modul, zaupanje) ali None (fallback)
+        self.route_cache_size = route_cache_size
+        self.route_cache: "OrderedDict[str, Optional[Tuple[str, float]]]" = OrderedDict()
+        self.route_cache_stats = {"hits": 0, "misses": 0}
+        self._rebuild_routing_index()
         
         logger.info("🤖 AI Router inicializiran")
     
+    def _rules_signature(self) -> Tuple[Tuple[str, int, int], ...]:
+        return tuple((module, id(keywords), len(keywords)) for module, keywords in self.routing_rules.items())
+    
+    def _rebuild_routing_index(self):
+        """Zgradi indeks ključnih besed iz routing_rules"""
+        self.routing_index = KeywordIndex()
+        self._module_order = {module: position for position, module in enumerate(self.routing_rules)}
+        for module_name, keywords in self.routing_rules.items():
+            for keyword in keywords:
+                self.routing_index.add(module_name, keyword)
+        self._index_signature = self._rules_signature()
+        self.route_cache.clear()
+    
+    def _add_routing_keyword(self, module: str, keyword: str):
+        """Dodaj besedo v pravila in indeks hkrati"""
+        self.routing_rules[module].append(keyword)
+        self.routing_index.add(module, keyword)
+        self._index_signature = self._rules_signature()
+        self.route_cache.clear()
+    
+    def _score_modules(self, normalized_query: str) -> Dict[str, int]:
+        """Točke modulov v vrstnem redu routing_rules (za enako izbiro ob izenačenju)"""
+        # Varovalka, če je kdo pravila spremenil mimo update_routing_rules
+        if self._rules_signature() != self._index_signature:
+            self._rebuild_routing_index()
+        scores = self.routing_index.score(normalized_query)
+        return dict(sorted(scores.items(), key=lambda item: self._module_order[item[0]]))
+    
     def _initialize_routing_rules(self) -> Dict[str, List[str]]:
         """Inicializacija pravil za usmerjanje"""
         return {
@@ -69,30 +208,26 @@ class AIRouter:
                     logger.info(f"🎯 Kontekstno usmerjanje: {preferred}")
                     return preferred
             
-            # 2. Keyword-based routing
-            module_scores = {}
-            
-            for module_name, keywords in self.routing_rules.items():
-                score = 0
-                for keyword in keywords:
-                    if keyword in normalized_query:
-                        # Večji score za natančno ujemanje
-                        if keyword == normalized_query:
-                            score += 10
-                        # Manjši score za delno ujemanje
-                        elif re.search(r'\b' + re.escape(keyword) + r'\b', normalized_query):
-                            score += 5
-                        # Najmanši score za vsebovanje
-                        else:
-                            score += 1
-                
-                if score > 0:
-                    module_scores[module_name] = score
+            # 2. Keyword-based routing: natančno ujemanje 10, meja besede 5, vsebovanje 1
+            if normalized_query in self.route_cache:
+                self.route_cache.move_to_end(normalized_query)
+                self.route_cache_stats["hits"] += 1
+                decision = self.route_cache[normalized_query]
+            else:
+                self.route_cache_stats["misses"] += 1
+                module_scores = self._score_modules(normalized_query)
+                decision = None
+                if module_scores:
+                    best_module = max(module_scores, key=module_scores.get)
+                    decision = (best_module, module_scores[best_module] / max(module_scores.values()))
+                if self.route_cache_size > 0:
+                    self.route_cache[normalized_query] = decision
+                    if len(self.route_cache) > self.route_cache_size:
+                        self.route_cache.popitem(last=False)
             
             # 3. Izbira modula z najvišjim score-om
-            if module_scores:
-                best_module = max(module_scores, key=module_scores.get)
-                confidence = module_scores[best_module] / max(module_scores.values())
+            if decision:
+                best_module, confidence = decision
                 
                 logger.info(f"🎯 AI Routing: {best_module} (confidence: {confidence:.2f})")
                 
@@ -120,24 +255,17 @@ class AIRouter:
         }
         
         self.learning_data.append(decision)
-        
-        # Ohrani samo zadnjih 1000 odločitev
-        if len(self.learning_data) > 1000:
-            self.learning_data = self.learning_data[-1000:]
     
     async def get_routing_suggestions(self, query: str) -> List[Dict[str, Any]]:
         """Pridobi predloge za usmerjanje"""
         normalized_query = query.lower().strip()
         suggestions = []
         
-        for module_name, keywords in self.routing_rules.items():
-            score = 0
-            matched_keywords = []
-            
-            for keyword in keywords:
-                if keyword in normalized_query:
-                    score += 1
-                    matched_keywords.append(keyword)
+        found = {self.routing_index.keywords[keyword_id]
+                 for keyword_id in self.routing_index.find(normalized_query)}
+        for module_name in self._score_modules(normalized_query):
+            matched_keywords = [keyword for keyword in self.routing_rules[module_name] if keyword in found]
+            score = len(matched_keywords)
             
             if score > 0:
                 suggestions.append({
@@ -160,7 +288,7 @@ class AIRouter:
             
             for word in words:
                 if len(word) > 3 and word not in self.routing_rules[expected_module]:
-                    self.routing_rules[expected_module].append(word)
+                    self._add_routing_keyword(expected_module, word)
             
             logger.info(f"📚 Učenje: dodal ključne besede za {expected_module}")
             
@@ -207,7 +335,7 @@ class AIRouter:
                 # Dodaj nove ključne besede
                 for keyword in keywords:
                     if keyword not in self.routing_rules[module]:
-                        self.routing_rules[module].append(keyword.lower())
+                        self._add_routing_keyword(module, keyword.lower())
                 
                 logger.info(f"📝 Posodobil pravila za {module}: {keywords}")
                 return True
@@ -230,5 +358,6 @@ class AIRouter:
             "modules_count": len(self.modules),
             "routing_rules_count": sum(len(keywords) for keywords in self.routing_rules.values()),
             "learning_data_count": len(self.learning_data),
+            "route_cache": {**self.route_cache_stats, "size": len(self.route_cache)},
             "last_check": datetime.now().isoformat()
         }
\ No newline at end of file
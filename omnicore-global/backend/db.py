@@ -4,26 +4,211 @@ Multi-tenant database management z podporo za različne baze
 """
 
 import asyncio
-import asyncpg
 import sqlite3
 import logging
-from typing import Dict, Any, Optional, List, Union
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime
 import json
 import os
 from contextlib import asynccontextmanager
 
+try:
+    import asyncpg
+except ImportError:  # SQLite način ga ne potrebuje
+    asyncpg = None
+
 logger = logging.getLogger(__name__)
 
+REQUEST_INSERT = """
+    INSERT INTO requests (id, tenant_id, user_id, module, query, response, execution_time, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Zgornje meje razredov histograma časa izvajanja (sekunde); zadnji razred je odprt
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTOGRAM_COLUMNS = [f"h{i}" for i in range(len(LATENCY_BUCKETS) + 1)]
+PERCENTILES = (50, 95, 99)
+
+_AGGREGATE_COLUMNS = ", ".join(["request_count", "sum_time", "max_time"] + HISTOGRAM_COLUMNS)
+_AGGREGATE_DEFS = ",\n".join(
+    ["request_count INTEGER NOT NULL", "sum_time REAL NOT NULL", "max_time REAL NOT NULL"]
+    + [f"{column} INTEGER NOT NULL DEFAULT 0" for column in HISTOGRAM_COLUMNS]
+)
+_AGGREGATE_MERGE = ", ".join(
+    ["request_count = request_count + excluded.request_count",
+     "sum_time = sum_time + excluded.sum_time",
+     "max_time = MAX(max_time, excluded.max_time)"]
+    + [f"{column} = {column} + excluded.{column}" for column in HISTOGRAM_COLUMNS]
+)
+_AGGREGATE_PLACEHOLDERS = ", ".join("?" for _ in range(3 + len(HISTOGRAM_COLUMNS)))
+
+# Agregati po minutah (za okna) in skupni agregati (za celotno zgodovino)
+ROLLUP_UPSERT = f"""
+    INSERT INTO request_rollups (tenant_id, module, bucket, {_AGGREGATE_COLUMNS})
+    VALUES (?, ?, ?, {_AGGREGATE_PLACEHOLDERS})
+    ON CONFLICT(tenant_id, module, bucket) DO UPDATE SET {_AGGREGATE_MERGE}
+"""
+TOTALS_UPSERT = f"""
+    INSERT INTO request_totals (tenant_id, module, {_AGGREGATE_COLUMNS})
+    VALUES (?, ?, {_AGGREGATE_PLACEHOLDERS})
+    ON CONFLICT(tenant_id, module) DO UPDATE SET {_AGGREGATE_MERGE}
+"""
+
+
+def latency_bucket(execution_time: float) -> int:
+    """Indeks razreda histograma za čas izvajanja"""
+    for index, upper in enumerate(LATENCY_BUCKETS):
+        if execution_time <= upper:
+            return index
+    return len(LATENCY_BUCKETS)
+
+
+def minute_bucket(timestamp: str) -> str:
+    """'YYYY-MM-DD HH:MM:SS' (ali ISO s 'T') -> 'YYYY-MM-DD HH:MM:00'"""
+    return str(timestamp)[:16].replace("T", " ") + ":00"
+
+
+def histogram_percentile(histogram: List[int], count: int, percentile: float, max_time: float) -> Optional[float]:
+    """Ocena percentila iz histograma: zgornja meja razreda (v odprtem razredu max_time)"""
+    if not count:
+        return None
+    target = count * percentile / 100
+    cumulative = 0
+    for index, bucket_count in enumerate(histogram):
+        cumulative += bucket_count
+        if cumulative >= target:
+            return min(LATENCY_BUCKETS[index], max_time) if index < len(LATENCY_BUCKETS) else max_time
+    return max_time
+
+
+def aggregate_rows(rows: List[tuple]) -> Tuple[Dict[Tuple[str, str, str], list], Dict[Tuple[str, str], list]]:
+    """Vrstice requests -> agregati po (tenant, modul, minuta) in po (tenant, modul)"""
+    rollups: Dict[Tuple[str, str, str], list] = {}
+    totals: Dict[Tuple[str, str], list] = {}
+    for _, tenant_id, _, module, _, _, execution_time, timestamp in rows:
+        tenant_id, module = tenant_id or "", module or ""
+        execution_time = execution_time or 0.0
+        bucket = latency_bucket(execution_time)
+        for aggregates, key in ((rollups, (tenant_id, module, minute_bucket(timestamp))),
+                                (totals, (tenant_id, module))):
+            agg = aggregates.get(key)
+            if agg is None:
+                agg = aggregates[key] = [0, 0.0, 0.0] + [0] * len(HISTOGRAM_COLUMNS)
+            agg[0] += 1
+            agg[1] += execution_time
+            agg[2] = max(agg[2], execution_time)
+            agg[3 + bucket] += 1
+    return rollups, totals
+
+
+class SQLiteExecutor:
+    """
+    Ena izvajalna nit na SQLite bazo.
+    
+    Povezava živi ves čas v tej niti, zato se pripravljeni stavki ponovno uporabijo
+    (sqlite3 jih hrani v ``cached_statements`` po besedilu poizvedbe). Klici iz
+    async metod tečejo v niti, event loop pa medtem ni blokiran.
+    """
+    
+    def __init__(self, db_path: str, cached_statements: int = 256):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sqlite:{os.path.basename(db_path)}")
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements,
+                                         check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+    
+    def _fetch(self, query: str, params: tuple) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._connection().execute(query, params).fetchall()]
+    
+    def _execute(self, command: str, params: tuple):
+        conn = self._connection()
+        try:
+            conn.execute(command, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def _executemany(self, command: str, rows: List[tuple]):
+        conn = self._connection()
+        try:
+            conn.executemany(command, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def _executemany_all(self, batches: List[Tuple[str, List[tuple]]]):
+        conn = self._connection()
+        try:
+            for command, rows in batches:
+                conn.executemany(command, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+    
+    async def fetch(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        return await self._run(self._fetch, query, params)
+    
+    async def execute(self, command: str, params: tuple = ()):
+        await self._run(self._execute, command, params)
+    
+    async def executemany(self, command: str, rows: List[tuple]):
+        await self._run(self._executemany, command, rows)
+    
+    async def executemany_all(self, batches: List[Tuple[str, List[tuple]]]):
+        """Več executemany v eni transakciji"""
+        await self._run(self._executemany_all, batches)
+    
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+
 class DatabaseManager:
     """Multi-tenant database manager"""
     
-    def __init__(self, config):
+    def __init__(self, config, data_dir: str = "data/databases",
+                 log_flush_interval: float = 0.25, log_batch_size: int = 500):
         self.config = config
         self.db_config = config.get_database_config()
+        self.data_dir = data_dir
         self.connections = {}
         self.tenant_databases = {}
         
+        # SQLite: ena izvajalna nit na bazo (po poti)
+        self.executors: Dict[str, SQLiteExecutor] = {}
+        self._executors_lock = threading.Lock()
+        
+        # Medpomnilnik za log_request (SQLite): paketni INSERT vsakih log_flush_interval s.
+        # Zahteve vseh tenant-ov gredo kot prej v privzeto bazo, kjer jih berejo analitika in čiščenje
+        self.log_flush_interval = log_flush_interval
+        self.log_batch_size = log_batch_size
+        self._request_buffer: List[tuple] = []
+        self._flush_wakeup: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.request_log_stats = {"buffered": 0, "flushed": 0, "flushes": 0, "failed": 0}
+        
         # SQLite fallback za development
         self.use_sqlite = self.db_config.host == "localhost" and not self._check_postgres_available()
         
@@ -54,14 +239,14 @@ class DatabaseManager:
     async def _initialize_sqlite(self):
         """Inicializacija SQLite baz"""
         # Ustvari direktorij za baze
-        os.makedirs("data/databases", exist_ok=True)
+        os.makedirs(self.data_dir, exist_ok=True)
         
         # Glavna baza
-        self.main_db_path = "data/databases/omnicore_main.db"
+        self.main_db_path = os.path.join(self.data_dir, "omnicore_main.db")
         await self._create_sqlite_tables(self.main_db_path)
         
         # Tenant baze
-        self.tenant_databases["default"] = "data/databases/tenant_default.db"
+        self.tenant_databases["default"] = os.path.join(self.data_dir, "tenant_default.db")
         await self._create_sqlite_tables(self.tenant_databases["default"])
     
     async def _initialize_postgres(self):
@@ -146,6 +331,36 @@ class DatabaseManager:
             )
         """)
         
+        # Agregati zahtev: po minutah in skupaj (tenant, modul)
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'request_rollups'")
+        backfill = cursor.fetchone() is None
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS request_rollups (
+                tenant_id TEXT NOT NULL,
+                module TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                {_AGGREGATE_DEFS},
+                PRIMARY KEY (tenant_id, module, bucket)
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS request_totals (
+                tenant_id TEXT NOT NULL,
+                module TEXT NOT NULL,
+                {_AGGREGATE_DEFS},
+                PRIMARY KEY (tenant_id, module)
+            )
+        """)
+        if backfill:
+            # Obstoječa zgodovina zahtev se enkrat pretvori v agregate
+            rows = cursor.execute("""
+                SELECT id, tenant_id, user_id, module, query, response, execution_time, timestamp
+                FROM requests
+            """).fetchall()
+            rollups, totals = aggregate_rows(rows)
+            cursor.executemany(ROLLUP_UPSERT, [key + tuple(agg) for key, agg in rollups.items()])
+            cursor.executemany(TOTALS_UPSERT, [key + tuple(agg) for key, agg in totals.items()])
+        
         # Vstavi default tenant
         cursor.execute("""
             INSERT OR IGNORE INTO tenants (id, name, settings) 
@@ -230,18 +445,25 @@ class DatabaseManager:
             async with self.pool.acquire() as conn:
                 yield conn
     
+    def get_executor(self, tenant_id: str = "default") -> SQLiteExecutor:
+        """Izvajalna nit za bazo tenant-a (SQLite način)"""
+        db_path = self.tenant_databases.get(tenant_id, self.tenant_databases["default"])
+        executor = self.executors.get(db_path)
+        if executor is None:
+            with self._executors_lock:
+                executor = self.executors.get(db_path)
+                if executor is None:
+                    executor = self.executors[db_path] = SQLiteExecutor(db_path)
+        return executor
+    
     async def execute_query(self, query: str, params: tuple = (), tenant_id: str = "default") -> List[Dict[str, Any]]:
         """Izvršitev poizvedbe"""
         try:
+            if self.use_sqlite:
+                return await self.get_executor(tenant_id).fetch(query, params)
             async with self.get_connection(tenant_id) as conn:
-                if self.use_sqlite:
-                    cursor = conn.cursor()
-                    cursor.execute(query, params)
-                    rows = cursor.fetchall()
-                    return [dict(row) for row in rows]
-                else:
-                    rows = await conn.fetch(query, *params)
-                    return [dict(row) for row in rows]
+                rows = await conn.fetch(query, *params)
+                return [dict(row) for row in rows]
                     
         except Exception as e:
             logger.error(f"Napaka pri izvršitvi poizvedbe: {e}")
@@ -250,15 +472,12 @@ class DatabaseManager:
     async def execute_command(self, command: str, params: tuple = (), tenant_id: str = "default") -> bool:
         """Izvršitev ukaza (INSERT, UPDATE, DELETE)"""
         try:
+            if self.use_sqlite:
+                await self.get_executor(tenant_id).execute(command, params)
+                return True
             async with self.get_connection(tenant_id) as conn:
-                if self.use_sqlite:
-                    cursor = conn.cursor()
-                    cursor.execute(command, params)
-                    conn.commit()
-                    return True
-                else:
-                    await conn.execute(command, *params)
-                    return True
+                await conn.execute(command, *params)
+                return True
                     
         except Exception as e:
             logger.error(f"Napaka pri izvršitvi ukaza: {e}")
@@ -271,7 +490,7 @@ class DatabaseManager:
             
             if self.use_sqlite:
                 # Ustvari novo SQLite bazo za tenant
-                tenant_db_path = f"data/databases/tenant_{tenant_id}.db"
+                tenant_db_path = os.path.join(self.data_dir, f"tenant_{tenant_id}.db")
                 self.tenant_databases[tenant_id] = tenant_db_path
                 await self._create_sqlite_tables(tenant_db_path)
             
@@ -307,11 +526,17 @@ class DatabaseManager:
     
     async def log_request(self, tenant_id: str, user_id: str, module: str, 
                          query: str, response: Any, execution_time: float) -> bool:
-        """Zabeleži zahtevo"""
+        """Zabeleži zahtevo (v SQLite načinu v medpomnilnik, ki se zapiše paketno)"""
         try:
-            request_id = f"req_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{tenant_id}"
+            request_id = f"req_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{tenant_id}_{uuid.uuid4().hex[:8]}"
             response_json = json.dumps(response) if response else None
             
+            if self.use_sqlite:
+                timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+                self._buffer_request((request_id, tenant_id, user_id, module, query,
+                                      response_json, execution_time, timestamp))
+                return True
+            
             command = """
                 INSERT INTO requests (id, tenant_id, user_id, module, query, response, execution_time)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -326,6 +551,47 @@ class DatabaseManager:
             logger.error(f"Napaka pri beleženju zahteve: {e}")
             return False
     
+    def _buffer_request(self, row: tuple):
+        self._request_buffer.append(row)
+        self.request_log_stats["buffered"] += 1
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_wakeup = asyncio.Event()
+            self._flush_task = asyncio.get_running_loop().create_task(self._request_log_flusher())
+        if len(self._request_buffer) >= self.log_batch_size:
+            self._flush_wakeup.set()
+    
+    async def _request_log_flusher(self):
+        """Zapisuje medpomnilnik zahtev vsakih log_flush_interval s (ali prej, ko je poln)"""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), self.log_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            await self.flush_request_log()
+    
+    async def flush_request_log(self) -> int:
+        """Takoj zapiši vse zahteve iz medpomnilnika; vrne število zapisanih"""
+        rows, self._request_buffer = self._request_buffer, []
+        if not rows:
+            return 0
+        # Surove vrstice in njihovi agregati v isti transakciji
+        rollups, totals = aggregate_rows(rows)
+        try:
+            await self.get_executor().executemany_all([
+                (REQUEST_INSERT, rows),
+                (ROLLUP_UPSERT, [key + tuple(agg) for key, agg in rollups.items()]),
+                (TOTALS_UPSERT, [key + tuple(agg) for key, agg in totals.items()]),
+            ])
+        except Exception as e:
+            self.request_log_stats["failed"] += len(rows)
+            logger.error(f"Napaka pri paketnem beleženju zahtev ({len(rows)}): {e}")
+            return 0
+        self.request_log_stats["flushed"] += len(rows)
+        self.request_log_stats["flushes"] += 1
+        return len(rows)
+    
     async def save_module_data(self, tenant_id: str, module: str, data_type: str, 
                               data: Dict[str, Any]) -> bool:
         """Shrani podatke modula"""
@@ -370,6 +636,9 @@ class DatabaseManager:
                                 start_date: Optional[datetime] = None,
                                 end_date: Optional[datetime] = None) -> Dict[str, Any]:
         """Pridobi analitične podatke"""
+        if self.use_sqlite:
+            return await self._get_rollup_analytics(tenant_id, start_date, end_date)
+        
         try:
             # Osnovne statistike zahtev
             query = """
@@ -428,6 +697,77 @@ class DatabaseManager:
             logger.error(f"Napaka pri pridobivanju analitičnih podatkov: {e}")
             return {}
     
+    @staticmethod
+    def _summarize(row: Dict[str, Any]) -> Dict[str, Any]:
+        count = row["request_count"] or 0
+        histogram = [row[column] or 0 for column in HISTOGRAM_COLUMNS]
+        max_time = row["max_time"]
+        summary = {
+            "request_count": count,
+            "avg_execution_time": row["sum_time"] / count if count else None,
+            "max_execution_time": max_time,
+        }
+        for percentile in PERCENTILES:
+            summary[f"p{percentile}_execution_time"] = histogram_percentile(histogram, count, percentile, max_time)
+        return summary
+    
+    async def _get_rollup_analytics(self, tenant_id: str, start_date: Optional[datetime],
+                                    end_date: Optional[datetime]) -> Dict[str, Any]:
+        """Analitika iz agregatov: cena je odvisna od okna in števila modulov, ne od zgodovine"""
+        try:
+            await self.flush_request_log()
+            merged = ", ".join(["SUM(request_count) AS request_count", "SUM(sum_time) AS sum_time",
+                                "MAX(max_time) AS max_time"]
+                               + [f"SUM({column}) AS {column}" for column in HISTOGRAM_COLUMNS])
+            if start_date or end_date:
+                query = f"SELECT module, {merged} FROM request_rollups WHERE tenant_id = ?"
+                params = [tenant_id]
+                if start_date:
+                    query += " AND bucket >= ?"
+                    params.append(start_date.strftime('%Y-%m-%d %H:%M:00'))
+                if end_date:
+                    query += " AND bucket <= ?"
+                    params.append(end_date.strftime('%Y-%m-%d %H:%M:00'))
+                query += " GROUP BY module"
+            else:
+                query = f"SELECT module, {merged} FROM request_totals WHERE tenant_id = ? GROUP BY module"
+                params = [tenant_id]
+            
+            rows = await self.execute_query(query, tuple(params))
+            
+            module_stats = []
+            total = {"request_count": 0, "sum_time": 0.0, "max_time": None}
+            total.update({column: 0 for column in HISTOGRAM_COLUMNS})
+            for row in rows:
+                module_stats.append({"module": row["module"], **self._summarize(row)})
+                total["request_count"] += row["request_count"]
+                total["sum_time"] += row["sum_time"]
+                total["max_time"] = row["max_time"] if total["max_time"] is None else max(total["max_time"], row["max_time"])
+                for column in HISTOGRAM_COLUMNS:
+                    total[column] += row[column]
+            
+            summary = self._summarize(total)
+            total_statistics = {
+                "total_requests": summary.pop("request_count"),
+                "avg_response_time": summary.pop("avg_execution_time"),
+                "max_response_time": summary.pop("max_execution_time"),
+            }
+            for percentile in PERCENTILES:
+                total_statistics[f"p{percentile}_response_time"] = summary[f"p{percentile}_execution_time"]
+            
+            return {
+                "module_statistics": module_stats,
+                "total_statistics": total_statistics,
+                "period": {
+                    "start_date": start_date.isoformat() if start_date else None,
+                    "end_date": end_date.isoformat() if end_date else None
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Napaka pri pridobivanju analitičnih podatkov: {e}")
+            return {}
+    
     async def health_check(self) -> Dict[str, Any]:
         """Zdravstveno preverjanje baze"""
         try:
@@ -455,12 +795,43 @@ class DatabaseManager:
             cutoff_date = datetime.now().replace(day=datetime.now().day - days)
             
             # Počisti stare zahteve
+            if self.use_sqlite:
+                await self.flush_request_log()
             command = "DELETE FROM requests WHERE timestamp < ?"
             await self.execute_command(command, (cutoff_date.isoformat(),))
+            if self.use_sqlite:
+                # Agregati sledijo surovim zahtevam: odstrani stare minute in preračunaj skupne
+                merged = ", ".join(["SUM(request_count)", "SUM(sum_time)", "MAX(max_time)"]
+                                   + [f"SUM({column})" for column in HISTOGRAM_COLUMNS])
+                await self.get_executor().executemany_all([
+                    ("DELETE FROM request_rollups WHERE bucket < ?", [(cutoff_date.strftime('%Y-%m-%d %H:%M:00'),)]),
+                    ("DELETE FROM request_totals", [()]),
+                    (f"""
+                        INSERT INTO request_totals (tenant_id, module, {_AGGREGATE_COLUMNS})
+                        SELECT tenant_id, module, {merged} FROM request_rollups GROUP BY tenant_id, module
+                    """, [()]),
+                ])
             
             logger.info(f"🧹 Počiščeni podatki starejši od {days} dni")
             return True
             
         except Exception as e:
             logger.error(f"Napaka pri čiščenju podatkov: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    async def close(self):
+        """Zapiši medpomnilnik in zapri povezave"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self.use_sqlite:
+            await self.flush_request_log()
+            for executor in list(self.executors.values()):
+                await executor.close()
+            self.executors.clear()
+        elif getattr(self, "pool", None) is not None:
+            await self.pool.close()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Testi za indeks ključnih besed (Aho-Corasick) in predpomnilnik v omnicore-global AIRouter.
+"""
+
+import asyncio
+import os
+import random
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "omnicore-global", "backend"))
+
+from ai_router import AIRouter, KeywordIndex
+
+
+def legacy_scores(routing_rules, normalized_query):
+    """Prejšnji izračun: zanka čez vse module in besede"""
+    module_scores = {}
+    for module_name, keywords in routing_rules.items():
+        score = 0
+        for keyword in keywords:
+            if keyword in normalized_query:
+                if keyword == normalized_query:
+                    score += 10
+                elif re.search(r'\b' + re.escape(keyword) + r'\b', normalized_query):
+                    score += 5
+                else:
+                    score += 1
+        if score > 0:
+            module_scores[module_name] = score
+    return module_scores
+
+
+class TestKeywordIndex(unittest.TestCase):
+
+    def test_overlapping_and_boundaries(self):
+        index = KeywordIndex()
+        for keyword in ("he", "she", "hers", "rok", "c++"):
+            index.add("m", keyword)
+        found = {index.keywords[k]: points for k, points in index.find("ushers rok c++ x").items()}
+        self.assertEqual(found, {"he": 1, "she": 1, "hers": 1, "rok": 5, "c++": 1})
+        self.assertEqual(index.find("rok"), {index.keywords.index("rok"): 10})
+
+    def test_matches_legacy_scoring(self):
+        router = AIRouter({}, None, route_cache_size=0)
+        rng = random.Random(7)
+        vocabulary = [k for keywords in router.routing_rules.values() for k in keywords] + \
+                     ["the", "please", "prokura", "hotelir", "budgeting", "c++", "!", "?"]
+        for _ in range(500):
+            query = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 6)))
+            if rng.random() < 0.3:
+                query = query.replace(" ", rng.choice(["", "-", ", "]))
+            self.assertEqual(router._score_modules(query), legacy_scores(router.routing_rules, query), query)
+
+
+class TestAIRouterRouting(unittest.TestCase):
+
+    def test_route_cache_and_rule_updates(self):
+        router = AIRouter({}, None, route_cache_size=2)
+
+        async def run():
+            self.assertEqual(await router.route("Pay the INVOICE"), "finance")
+            self.assertEqual(await router.route("pay the invoice "), "finance")
+            self.assertEqual(router.route_cache_stats["hits"], 1)
+
+            self.assertEqual(await router.route("quarterly kpi"), "analytics")  # fallback
+            await router.update_routing_rules("task", ["KPI"])
+            self.assertEqual(await router.route("quarterly kpi"), "task")
+
+            await router.learn_from_feedback("book a ferry crossing", "tourism", "analytics")
+            self.assertEqual(await router.route("ferry"), "tourism")
+
+            # Neposredna sprememba pravil se zazna ob naslednjem usmerjanju
+            router.routing_rules["healthcare"].append("clinic")
+            self.assertEqual(await router.route("clinic"), "healthcare")
+
+            suggestions = await router.get_routing_suggestions("hotel booking trip")
+            self.assertEqual(suggestions[0]["module"], "tourism")
+            self.assertEqual(suggestions[0]["matched_keywords"], ["hotel", "booking", "trip", "hotel", "book"])
+
+        asyncio.run(run())
+        self.assertLessEqual(len(router.route_cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
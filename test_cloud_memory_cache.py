@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Testi za L1 predpomnilnik in vgrajen Redis nadomestek v OmniCloudMemory.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from omni_cloud_memory import DataCategory, EmbeddedRedis, L1Cache, OmniCloudMemory
+
+
+class TestL1Cache(unittest.TestCase):
+
+    def test_lru_eviction_per_category(self):
+        cache = L1Cache({DataCategory.LOGS: (2, 60), DataCategory.TASKS: (2, 60)})
+        for i in range(3):
+            cache.put(DataCategory.LOGS, f"log{i}", {"i": i})
+        cache.put(DataCategory.TASKS, "task0", {"t": 0})
+
+        self.assertEqual(cache.get("log0"), (False, None))
+        self.assertEqual(cache.get("log2"), (True, {"i": 2}))
+        self.assertEqual(cache.get("task0", DataCategory.TASKS), (True, {"t": 0}))
+        self.assertEqual(cache.get("task0", DataCategory.LOGS), (False, None))
+        stats = cache.get_stats()
+        self.assertEqual(stats["categories"]["logs"]["evictions"], 1)
+        self.assertEqual(stats["hits"], 2)
+
+    def test_expires_at_and_ttl(self):
+        cache = L1Cache({DataCategory.LOGS: (10, 60), DataCategory.CACHE: (10, 0.05)})
+        cache.put(DataCategory.LOGS, "past", 1, datetime.now() - timedelta(seconds=1))
+        cache.put(DataCategory.LOGS, "soon", 2, datetime.now() + timedelta(seconds=0.05))
+        cache.put(DataCategory.CACHE, "ttl", 3)
+        self.assertFalse(cache.get("past")[0])
+        self.assertTrue(cache.get("soon")[0])
+        time.sleep(0.1)
+        self.assertFalse(cache.get("soon")[0])
+        self.assertFalse(cache.get("ttl")[0])
+
+    def test_copy_on_read(self):
+        cache = L1Cache({DataCategory.LOGS: (10, 60)})
+        cache.put(DataCategory.LOGS, "a", {"items": [1]})
+        _, value = cache.get("a")
+        value["items"].append(2)
+        self.assertEqual(cache.get("a")[1], {"items": [1]})
+
+
+class TestEmbeddedRedis(unittest.TestCase):
+
+    def test_commands_and_expiry(self):
+        client = EmbeddedRedis()
+        self.assertTrue(client.ping())
+        client.set("omni:logs:a", "1")
+        client.set("omni:tasks:b", "2", ex=60)
+        self.assertEqual(client.get("omni:logs:a"), "1")
+        self.assertEqual(client.ttl("omni:logs:a"), -1)
+        self.assertEqual(sorted(client.keys("omni:*")), ["omni:logs:a", "omni:tasks:b"])
+        self.assertIsNone(client.set("omni:logs:a", "x", nx=True))
+
+        client.set("short", "v", px=20)
+        time.sleep(0.05)
+        self.assertIsNone(client.get("short"))
+        self.assertEqual(client.exists("omni:logs:a", "short"), 1)
+        self.assertEqual(client.delete("omni:logs:a", "missing"), 1)
+        self.assertEqual(client.dbsize(), 1)
+
+
+class TestCloudMemoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "cloud.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _memory(self, **kwargs):
+        # Neobstoječ port, da Redis zagotovo ni dosegljiv
+        return OmniCloudMemory(redis_port=1, db_path=self.db_path, **kwargs)
+
+    def test_hot_reads_skip_sqlite(self):
+        async def run():
+            memory = self._memory()
+            await memory.initialize()
+            data_id = await memory.store_data(DataCategory.USER_DATA, {"name": "ana"}, custom_id="u1")
+
+            # Ko je zapis v L1, SQLite ni več potreben
+            connection = memory.sqlite_conn
+            memory.sqlite_conn = None
+            for _ in range(5):
+                self.assertEqual(await memory.retrieve_data(data_id), {"name": "ana"})
+            memory.sqlite_conn = connection
+
+            memory.l1_cache.clear()
+            self.assertEqual(await memory.retrieve_data(data_id, DataCategory.USER_DATA), {"name": "ana"})
+            self.assertEqual(await memory.retrieve_data(data_id), {"name": "ana"})
+
+            self.assertTrue(await memory.delete_data(data_id))
+            self.assertIsNone(await memory.retrieve_data(data_id))
+
+            stats = await memory.get_storage_stats()
+            self.assertIsNone(stats["redis_backend"])
+            self.assertEqual(stats["l1_cache"]["hits"], 6)
+            self.assertEqual(stats["l1_cache"]["categories"]["user_data"]["misses"], 1)
+            await memory.shutdown()
+
+        asyncio.run(run())
+
+    def test_embedded_redis_fallback(self):
+        async def run():
+            memory = self._memory(redis_fallback="embedded")
+            await memory.initialize()
+            self.assertIsInstance(memory.redis_client, EmbeddedRedis)
+            data_id = await memory.store_data(DataCategory.LOGS, {"event": "login"}, custom_id="l1")
+
+            # MEMORY kategorija gre v nadomestek, ne v SQLite
+            count = memory.sqlite_conn.execute("SELECT COUNT(*) FROM cloud_data").fetchone()[0]
+            self.assertEqual(count, 0)
+            self.assertGreater(memory.redis_client.ttl("omni:logs:l1"), 0)
+
+            memory.l1_cache.clear()
+            self.assertEqual(await memory.retrieve_data(data_id), {"event": "login"})
+            self.assertEqual(memory.l1_cache.get_stats()["entries"], 1)
+
+            stats = await memory.get_storage_stats()
+            self.assertEqual(stats["redis_backend"], "embedded")
+            await memory.shutdown()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
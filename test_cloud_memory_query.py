@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Testi za keyset paginacijo, pretočno branje, stolpčni izvoz in kodeke v OmniCloudMemory.
+"""
+
+import asyncio
+import gzip
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from omni_cloud_memory import SERIALIZERS, COMPRESSORS, DataCategory, OmniCloudMemory
+
+
+class TestCloudMemoryQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.memory = OmniCloudMemory(db_path=os.path.join(self.tmp.name, "cloud.db"))
+        self.memory.init_sqlite_database()
+
+    def tearDown(self):
+        self.memory.sqlite_conn.close()
+        self.tmp.cleanup()
+
+    def _insert(self, count, created_at=None, codec="pickle"):
+        rows = []
+        for i in range(count):
+            rows.append((f"row{i:04d}", DataCategory.ANALYTICS.value, pickle.dumps({"i": i}),
+                         f'{{"score": {i}, "tag": "t{i % 3}"}}', created_at or datetime(2026, 1, 1, 0, 0, i % 60),
+                         False, codec))
+        self.memory.sqlite_conn.executemany('''
+            INSERT INTO cloud_data (id, category, data, metadata, created_at, compressed, codec)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.memory.sqlite_conn.commit()
+
+    def test_keyset_pages_cover_all_rows_with_equal_timestamps(self):
+        # Vsi zapisi imajo enak created_at, vrstni red določa id
+        self._insert(25, created_at=datetime(2026, 1, 1))
+
+        async def run():
+            seen, cursor = [], None
+            while True:
+                page = await self.memory.query_page(DataCategory.ANALYTICS, limit=10, cursor=cursor)
+                seen.extend(item["id"] for item in page["items"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return seen
+
+        seen = asyncio.run(run())
+        self.assertEqual(seen, sorted((f"row{i:04d}" for i in range(25)), reverse=True))
+
+    def test_iter_data_matches_query_data(self):
+        self._insert(120)
+
+        async def run():
+            streamed = [item async for item in self.memory.iter_data(DataCategory.ANALYTICS, batch_size=7)]
+            listed = await self.memory.query_data(DataCategory.ANALYTICS, limit=1000)
+            light = [item async for item in self.memory.iter_data(DataCategory.ANALYTICS, include_data=False)]
+            return streamed, listed, light
+
+        streamed, listed, light = asyncio.run(run())
+        self.assertEqual(streamed, listed)
+        self.assertEqual(len(streamed), 120)
+        self.assertNotIn("data", light[0])
+
+    def test_export_metadata_columns(self):
+        self._insert(10)
+        columns = asyncio.run(self.memory.export_metadata_columns(DataCategory.ANALYTICS, ["score", "tag", "missing"]))
+        self.assertEqual(columns["score"].dtype, np.float64)
+        self.assertEqual(sorted(columns["score"].tolist()), list(range(10)))
+        self.assertEqual(columns["tag"].dtype, object)
+        self.assertTrue(np.isnan(columns["missing"]).all())
+        self.assertEqual(columns["created_at"].dtype, np.dtype("datetime64[us]"))
+        self.assertEqual(len(columns["id"]), 10)
+
+    def test_legacy_rows_without_codec(self):
+        blob = gzip.compress(pickle.dumps({"legacy": True}))
+        self.memory.sqlite_conn.execute('''
+            INSERT INTO cloud_data (id, category, data, metadata, created_at, compressed)
+            VALUES ('old', 'analytics', ?, '{}', ?, 1)
+        ''', (blob, datetime(2025, 1, 1)))
+        self.memory.sqlite_conn.commit()
+        self.assertEqual(asyncio.run(self.memory.retrieve_data("old")), {"legacy": True})
+
+    @unittest.skipUnless("msgpack" in SERIALIZERS and "zstd" in COMPRESSORS, "msgpack/zstandard ni nameščen")
+    def test_msgpack_zstd_codec(self):
+        memory = OmniCloudMemory(db_path=os.path.join(self.tmp.name, "packed.db"),
+                                 serializer="msgpack", compressor="zstd")
+        memory.init_sqlite_database()
+
+        async def run():
+            data_id = await memory.store_data(DataCategory.ANALYTICS, {"values": list(range(1000))})
+            memory.l1_cache.clear()
+            return await memory.retrieve_data(data_id)
+
+        self.assertEqual(asyncio.run(run()), {"values": list(range(1000))})
+        codec = memory.sqlite_conn.execute("SELECT codec FROM cloud_data").fetchone()[0]
+        self.assertEqual(codec, "msgpack+zstd")
+        memory.sqlite_conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Testi za predpomnilnik AI routing odločitev in združevanje klicev v OmniCorePlugins.
+"""
+
+import os
+import re
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _dependency_stubs():
+    """openai in watchdog sta neobvezna; za teste zadostujejo nadomestki"""
+    openai = types.ModuleType("openai")
+    openai.OpenAI = lambda api_key=None: None
+    watchdog = types.ModuleType("watchdog")
+    observers = types.ModuleType("watchdog.observers")
+    observers.Observer = object
+    events = types.ModuleType("watchdog.events")
+    events.FileSystemEventHandler = object
+    return {"openai": openai, "watchdog": watchdog, "watchdog.observers": observers, "watchdog.events": events}
+
+
+with mock.patch.dict(sys.modules, _dependency_stubs()):
+    from omni_core_plugins import OmniCorePlugins, PluginBase, RoutingCache, normalize_query
+
+
+class EchoPlugin(PluginBase):
+
+    def __init__(self, name):
+        self.name = name
+        self.description = f"Plugin {name}"
+
+    def handle(self, query, context=None):
+        return f"{self.name}: {query}"
+
+
+class FakeCompletions:
+    """Odgovarja kot LLM: finance za zahteve z 'račun', sicer task"""
+
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _pick(query):
+        return "finance" if "račun" in query else "task"
+
+    def create(self, model, messages, max_tokens, temperature):
+        prompt = messages[0]["content"]
+        with self.lock:
+            self.prompts.append(prompt)
+        numbered = re.findall(r'^(\d+)\. "(.*)"$', prompt, re.MULTILINE)
+        if numbered:
+            content = "\n".join(f"{i}: {self._pick(query)}" for i, query in numbered)
+        else:
+            content = self._pick(re.search(r'Uporabniška zahteva: "(.*)"', prompt).group(1))
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def make_system(**kwargs):
+    tmp = tempfile.TemporaryDirectory()
+    system = OmniCorePlugins(plugins_path=tmp.name, openai_api_key="test", enable_hot_reload=False, **kwargs)
+    for name in ("task", "finance"):
+        system.add_plugin_runtime(name, EchoPlugin(name))
+    completions = FakeCompletions()
+    system.client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    return system, completions, tmp
+
+
+class TestRoutingCache(unittest.TestCase):
+
+    def test_exact_and_similar_hits(self):
+        cache = RoutingCache(similarity_threshold=0.5)
+        cache.put(normalize_query("Pokaži račun za marec 2024"), "finance")
+
+        self.assertEqual(cache.get(normalize_query("pokaži RAČUN za marec, 2024!")), (True, "finance"))
+        self.assertEqual(cache.get(normalize_query("pokaži račun za marec 2025")), (True, "finance"))
+        self.assertEqual(cache.get(normalize_query("dodaj nalogo za jutri")), (False, None))
+
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["similar_hits"], stats["misses"]), (1, 1, 1))
+
+    def test_exact_only_when_threshold_is_one(self):
+        cache = RoutingCache(similarity_threshold=1.0)
+        cache.put("pokaži račun za marec 2024", "finance")
+        self.assertEqual(cache.get("pokaži račun za marec 2025"), (False, None))
+
+    def test_expired_entries_are_dropped(self):
+        cache = RoutingCache(ttl_seconds=0)
+        cache.put("pokaži račun", "finance")
+        self.assertEqual(cache.get("pokaži račun"), (False, None))
+        stats = cache.get_stats()
+        self.assertEqual((stats["expired"], stats["entries"]), (1, 0))
+
+    def test_lru_eviction_and_invalidation(self):
+        cache = RoutingCache(max_entries=2, similarity_threshold=1.0)
+        cache.put("a", "task")
+        cache.put("b", "task")
+        cache.get("a")
+        cache.put("c", "finance")
+        self.assertEqual(cache.get("b"), (False, None))
+        self.assertEqual(cache.get("a"), (True, "task"))
+
+        cache.invalidate()
+        self.assertEqual(cache.get("a"), (False, None))
+        self.assertEqual(cache.get_stats()["invalidations"], 1)
+        self.assertEqual(cache._shingle_index, {})
+
+
+class TestAIRouting(unittest.TestCase):
+
+    def test_repeated_query_uses_cache(self):
+        system, completions, tmp = make_system()
+        self.addCleanup(tmp.cleanup)
+        for _ in range(3):
+            result = system.route("Pokaži račun za marec")
+            self.assertEqual((result["plugin_used"], result["routing_method"]), ("finance", "ai"))
+        self.assertEqual(len(completions.prompts), 1)
+        self.assertEqual(system.get_stats()["routing_cache"]["hits"], 2)
+
+    def test_plugin_change_invalidates_cache(self):
+        system, completions, tmp = make_system()
+        self.addCleanup(tmp.cleanup)
+        system.route("Pokaži račun za marec")
+        system.add_plugin_runtime("calendar", EchoPlugin("calendar"))
+        system.route("Pokaži račun za marec")
+        self.assertEqual(len(completions.prompts), 2)
+        self.assertIn("- calendar: Plugin calendar", completions.prompts[-1])
+
+    def test_batch_answers_are_parsed_by_number(self):
+        system, completions, tmp = make_system()
+        self.addCleanup(tmp.cleanup)
+        answers = system._classify(["dodaj nalogo", "pokaži račun", "nekaj tretjega"])
+        self.assertEqual(answers, ["task", "finance", "task"])
+        self.assertEqual(system.get_stats()["llm_routed_queries"], 3)
+
+        completions.create = lambda **kwargs: types.SimpleNamespace(choices=[types.SimpleNamespace(
+            message=types.SimpleNamespace(content="2) finance\nšum\n7: task\n1. task"))])
+        self.assertEqual(system._classify(["a", "b", "c"]), ["task", "finance", None])
+
+    def test_concurrent_requests_share_one_classification(self):
+        system, completions, tmp = make_system(batch_window=0.3, max_batch_size=32)
+        self.addCleanup(tmp.cleanup)
+        queries = [f"{'pokaži račun' if i % 2 else 'dodaj nalogo'} številka {i % 10}" for i in range(20)]
+        barrier = threading.Barrier(len(queries))
+        results = [None] * len(queries)
+
+        def worker(i):
+            barrier.wait()
+            results[i] = system.route(queries[i])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(queries))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(completions.prompts), 1)
+        for query, result in zip(queries, results):
+            self.assertEqual(result["plugin_used"], "finance" if "račun" in query else "task")
+        stats = system.get_stats()
+        self.assertEqual((stats["llm_calls"], stats["llm_routed_queries"]), (1, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
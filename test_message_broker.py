@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Testi za topic log MessageBroker-ja: omejen ring buffer, segmenti na disku,
+offset branje in consumer group offseti.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from omni_message_broker import EventPriority, EventType, MessageBroker, OmniEvent, OverflowPolicy
+
+
+def make_event(i: int, tenant: str = "tenant_a") -> OmniEvent:
+    return OmniEvent(
+        event_id=str(uuid.uuid4()),
+        event_type=EventType.FINANCE if i % 2 else EventType.LOGISTICS,
+        priority=EventPriority.MEDIUM,
+        tenant_id=tenant,
+        source_service="test",
+        target_service=None,
+        payload={"i": i},
+        timestamp=datetime.now()
+    )
+
+
+class TestTopicLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _broker(self, **kwargs):
+        options = dict(data_dir=self.tmp.name, retention_events=20, segment_max_bytes=2000,
+                       retention_segments=50)
+        options.update(kwargs)
+        return MessageBroker(**options)
+
+    def _publish(self, broker, topic, count, start=0):
+        async def run():
+            for i in range(start, start + count):
+                await broker.publish_event(topic, make_event(i))
+        asyncio.run(run())
+
+    def test_ring_is_bounded_and_old_offsets_come_from_disk(self):
+        broker = self._broker()
+        self._publish(broker, "t", 100)
+        log = broker.topics["t"]
+
+        self.assertEqual(len(log), 20)
+        self.assertEqual(log.next_offset, 100)
+        self.assertGreater(len(log.segments), 1)
+
+        result = broker.poll("t", 0, 10)
+        self.assertEqual([item["event"].payload["i"] for item in result["events"]], list(range(10)))
+        self.assertEqual(result["next_offset"], 10)
+
+        tail = broker.poll("t", 95, 10)
+        self.assertEqual([item["offset"] for item in tail["events"]], [95, 96, 97, 98, 99])
+
+        stats = broker.get_topic_stats("t")
+        self.assertEqual(stats["total_events"], 100)
+        self.assertEqual(stats["recent_events_1h"], 100)
+        broker.close()
+
+    def test_retention_drops_old_segments(self):
+        broker = self._broker(retention_segments=2)
+        self._publish(broker, "t", 200)
+        log = broker.topics["t"]
+        self.assertLessEqual(len(log.segments), 2)
+        self.assertGreater(log.earliest_offset, 0)
+        result = broker.poll("t", 0, 5)
+        self.assertEqual(result["events"][0]["offset"], log.earliest_offset)
+        broker.close()
+
+    def test_consumer_group_replays_after_restart(self):
+        broker = self._broker()
+        self._publish(broker, "orders", 50)
+        first = broker.poll_group("billing", "orders", max_events=30, auto_commit=True)
+        self.assertEqual(first["next_offset"], 30)
+        broker.close()
+
+        restarted = self._broker()
+        self.assertEqual(restarted.topics["orders"].next_offset, 50)
+        self.assertEqual(restarted.get_consumer_lag("billing"), {"orders": 20})
+        rest = restarted.poll_group("billing", "orders", max_events=100)
+        self.assertEqual([item["event"].payload["i"] for item in rest["events"]], list(range(30, 50)))
+
+        self._publish(restarted, "orders", 1, start=50)
+        self.assertEqual(restarted.poll("orders", 50)["events"][0]["offset"], 50)
+        restarted.close()
+
+    def test_topic_names_cannot_leave_topics_dir(self):
+        broker = self._broker()
+        for topic in ("..", ".", "../..", "a/b", "a\\b", "", "x" * 201):
+            with self.assertRaises(ValueError):
+                asyncio.run(broker.publish_event(topic, make_event(0)))
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith(".log")])
+        self.assertNotIn("..", broker.topics)
+        broker.close()
+
+    def test_distinct_topics_keep_separate_logs(self):
+        broker = self._broker()
+        self._publish(broker, "a_b", 2)
+        self._publish(broker, "a.b", 3)
+        # Prej se je "a/b" zapisal v isti segment kot "a_b"
+        with self.assertRaises(ValueError):
+            self._publish(broker, "a/b", 1)
+        broker.close()
+
+        restarted = self._broker()
+        self.assertEqual(restarted.topics["a_b"].next_offset, 2)
+        self.assertEqual(restarted.topics["a.b"].next_offset, 3)
+        restarted.close()
+
+    def test_global_stats_from_counters(self):
+        broker = self._broker(data_dir=None)
+        self._publish(broker, "a", 7)
+        stats = broker.get_global_stats()
+        self.assertEqual(stats["total_events"], 7)
+        self.assertEqual(stats["recent_activity"]["events_last_hour"], 7)
+        self.assertEqual(stats["recent_activity"]["top_event_types"][0], {"type": "logistics", "count": 4})
+        self.assertEqual(stats["recent_activity"]["top_tenants"], [{"tenant_id": "tenant_a", "events": 7}])
+        self.assertEqual(len(broker.event_store), 7)
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.messages = []
+        self.closed = False
+
+    async def send_text(self, text: str):
+        if self.fail:
+            raise ConnectionError("gone")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.messages.append(text)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestFanOut(unittest.TestCase):
+
+    def test_slow_socket_does_not_block_publish(self):
+        async def run():
+            broker = MessageBroker(data_dir=None, websocket_queue_size=5)
+            fast = [FakeWebSocket() for _ in range(20)]
+            slow = FakeWebSocket(delay=0.5)
+            for ws in fast + [slow]:
+                await broker.add_websocket(ws)
+
+            started = asyncio.get_running_loop().time()
+            for i in range(10):
+                await broker.publish_event("t", make_event(i))
+                await asyncio.sleep(0)  # drugi odjemalci med objavami
+            publish_time = asyncio.get_running_loop().time() - started
+            await asyncio.gather(*(broker.websocket_connections[ws].queue.join() for ws in fast))
+
+            self.assertLess(publish_time, 0.2)
+            self.assertTrue(all(len(ws.messages) == 10 for ws in fast))
+            # Isti kodiran niz za vse vtičnice
+            self.assertIs(fast[0].messages[0], fast[1].messages[0])
+            self.assertGreater(broker.websocket_connections[slow].dropped, 0)
+            broker.close()
+        asyncio.run(run())
+
+    def test_overflow_policies(self):
+        async def run():
+            broker = MessageBroker(data_dir=None)
+            received = {"newest": [], "oldest": []}
+            gate = asyncio.Event()
+
+            def collector(name):
+                async def callback(event):
+                    await gate.wait()
+                    received[name].append(event.payload["i"])
+                return callback
+
+            await broker.subscribe("t", collector("newest"), queue_size=2, overflow=OverflowPolicy.DROP_NEWEST)
+            await broker.subscribe("t", collector("oldest"), queue_size=2, overflow=OverflowPolicy.DROP_OLDEST)
+            await broker.subscribe("t", collector("x"), queue_size=2, overflow=OverflowPolicy.DISCONNECT)
+            await asyncio.sleep(0)
+
+            for i in range(6):
+                await broker.publish_event("t", make_event(i))
+            gate.set()
+            await broker.drain()
+
+            self.assertEqual(received["newest"], [0, 1])
+            self.assertEqual(received["oldest"], [4, 5])
+            self.assertEqual(len(broker.subscribers["t"]), 2)
+            broker.close()
+        asyncio.run(run())
+
+    def test_failing_socket_is_disconnected(self):
+        async def run():
+            broker = MessageBroker(data_dir=None)
+            ws = FakeWebSocket(fail=True)
+            await broker.add_websocket(ws)
+            await broker.publish_event("t", make_event(0))
+            await asyncio.sleep(0.01)
+            self.assertNotIn(ws, broker.websocket_connections)
+            self.assertEqual(broker.get_delivery_stats()["websockets_disconnected"], 1)
+            self.assertTrue(ws.closed)
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
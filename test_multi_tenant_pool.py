@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Testi za TenantConnectionPool in group commit v MultiTenantDatabase.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Modul ob uvozu ustvari privzeto bazo v trenutni mapi
+_IMPORT_DIR = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+os.chdir(_IMPORT_DIR.name)
+try:
+    from omni_multi_tenant_database import (MultiTenantDatabase, TenantConfig, TenantConnectionPool,
+                                            TenantType, db_manager)
+finally:
+    os.chdir(_cwd)
+
+
+def tearDownModule():
+    db_manager.close()
+    _IMPORT_DIR.cleanup()
+
+
+def make_tenant(tenant_id: str) -> TenantConfig:
+    return TenantConfig(
+        tenant_id=tenant_id, name=tenant_id, type=TenantType.SME, created_at=datetime.utcnow(),
+        subscription_tier="Professional", data_retention_days=365, max_users=10, max_storage_gb=10,
+        features_enabled=["finance"], compliance_requirements=["GDPR"], encryption_level="AES-256",
+        backup_frequency="daily"
+    )
+
+
+class TestTenantPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = MultiTenantDatabase(db_path=os.path.join(self.tmp.name, "master.db"),
+                                      tenant_dir=self.tmp.name, readers_per_tenant=2, load_samples=False)
+        for i in range(3):
+            self.db.register_tenant(make_tenant(f"tenant-{i}"))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def _count(self, tenant_id: str, table: str) -> int:
+        with sqlite3.connect(os.path.join(self.tmp.name, f"tenant_{tenant_id}.db")) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_concurrent_writes_are_group_committed_with_audit(self):
+        async def run():
+            await asyncio.gather(*[
+                self.db.store_data(f"tenant-{i % 3}", "finance", "transaction", {"amount": i}, "user")
+                for i in range(300)
+            ])
+            return await self.db.retrieve_data("tenant-0", "finance", "transaction", user_id="user")
+
+        rows = asyncio.run(run())
+        self.assertEqual(len(rows), 100)
+        for i in range(3):
+            self.assertEqual(self._count(f"tenant-{i}", "finance_transactions"), 100)
+        # CREATE za vsak zapis + READ
+        self.assertEqual(self._count("tenant-0", "access_logs"), 101)
+
+        stats = self.db.get_pool_stats()["tenant-0"]
+        self.assertEqual(stats["units"], 101)
+        self.assertLess(stats["transactions"], stats["units"])
+
+    def test_failing_unit_does_not_affect_batch(self):
+        pool = self.db.tenant_pools["tenant-1"]
+        insert = ("INSERT INTO tenant_users (user_id, username, email, role, permissions, created_at) "
+                  "VALUES (?, ?, ?, 'admin', '[]', '2026-01-01')")
+        futures = [
+            pool.submit([(insert, ("u1", "ana", "ana@example.com"))]),
+            # Enak e-mail: unit se razveljavi v celoti, vključno s prvim stavkom
+            pool.submit([(insert, ("u2", "bor", "bor@example.com")),
+                         (insert, ("u3", "cene", "ana@example.com"))]),
+            pool.submit([(insert, ("u4", "dana", "dana@example.com"))]),
+        ]
+        self.assertTrue(futures[0].result(5))
+        with self.assertRaises(sqlite3.IntegrityError):
+            futures[1].result(5)
+        self.assertTrue(futures[2].result(5))
+
+        with self.db.get_tenant_connection("tenant-1") as conn:
+            users = [row[0] for row in conn.execute("SELECT user_id FROM tenant_users ORDER BY user_id")]
+        self.assertEqual(users, ["u1", "u4"])
+
+    def test_cancelled_write_does_not_stop_writer(self):
+        pool = self.db.tenant_pools["tenant-0"]
+        # Druga povezava drži pisalno zaklepanje, da zapis ostane v čakalni vrsti
+        blocker = sqlite3.connect(os.path.join(self.tmp.name, "tenant_tenant-0.db"), isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+
+        async def run():
+            task = asyncio.ensure_future(
+                self.db.store_data("tenant-0", "finance", "transaction", {"amount": 1}, "user"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            blocker.execute("ROLLBACK")
+            await asyncio.wait_for(
+                self.db.store_data("tenant-0", "finance", "transaction", {"amount": 2}, "user"), 5)
+
+        try:
+            asyncio.run(run())
+        finally:
+            blocker.close()
+        self.assertTrue(pool._writer.is_alive())
+
+        # Preklic še nezačete enote na ravni bazena
+        pool.submit([("SELECT 1", ())]).cancel()
+        self.assertTrue(pool.write([("SELECT 1", ())], timeout=5))
+        self.assertTrue(pool._writer.is_alive())
+
+    def test_pool_uses_wal(self):
+        pool = self.db.tenant_pools["tenant-2"]
+        with pool.reader() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertIsInstance(pool, TenantConnectionPool)
+
+
+if __name__ == '__main__':
+    unittest.main()
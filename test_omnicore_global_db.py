@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Testi za SQLite način DatabaseManager-ja v omnicore-global: izvajalna nit na bazo
+in paketno beleženje zahtev (log_request).
+"""
+
+import asyncio
+import importlib.util
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "omnicore-global", "backend")
+
+
+def _load_backend_module(name):
+    """Naloži modul iz backend/ pod lastnim imenom; ``config`` je tudi paket v korenu repozitorija"""
+    spec = importlib.util.spec_from_file_location(f"omnicore_global_{name}", os.path.join(BACKEND_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+Config = _load_backend_module("config").Config
+_db = _load_backend_module("db")
+DatabaseManager, histogram_percentile = _db.DatabaseManager, _db.histogram_percentile
+
+
+class TestSQLiteDatabaseManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = DatabaseManager(Config(), data_dir=self.tmp.name, log_flush_interval=0.05)
+        self.manager.use_sqlite = True
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_queries_run_on_one_thread_per_database(self):
+        async def run():
+            await self.manager.initialize()
+            await self.manager.create_tenant("acme", "ACME")
+            await self.manager.save_module_data("acme", "finance", "invoice", {"amount": 10})
+            rows = await self.manager.get_module_data("acme", "finance")
+            tenant = await self.manager.get_tenant("acme")
+            await self.manager.close()
+            return rows, tenant
+
+        rows, tenant = asyncio.run(run())
+        self.assertEqual(rows[0]["data"], {"amount": 10})
+        self.assertEqual(tenant["name"], "ACME")
+        self.assertFalse(any(t.name.startswith("sqlite:") for t in threading.enumerate()))
+
+    def test_log_request_is_buffered_and_bulk_inserted(self):
+        async def run():
+            await self.manager.initialize()
+            for i in range(120):
+                self.assertTrue(await self.manager.log_request("default", "user", "finance",
+                                                               f"q{i}", {"i": i}, 0.01))
+            # Zapis še ni v bazi, dokler se medpomnilnik ne izprazni
+            before = await self.manager.execute_query("SELECT COUNT(*) AS n FROM requests")
+            await asyncio.sleep(0.2)
+            after = await self.manager.execute_query("SELECT COUNT(*) AS n FROM requests")
+            analytics = await self.manager.get_analytics_data("default")
+            await self.manager.log_request("default", "user", "task", "zadnja", None, 0.02)
+            await self.manager.close()
+            return before[0]["n"], after[0]["n"], analytics
+
+        before, after, analytics = asyncio.run(run())
+        self.assertEqual(before, 0)
+        self.assertEqual(after, 120)
+        self.assertEqual(analytics["total_statistics"]["total_requests"], 120)
+        self.assertLess(self.manager.request_log_stats["flushes"], 10)
+
+        # close() zapiše še preostanek medpomnilnika
+        with sqlite3.connect(os.path.join(self.tmp.name, "tenant_default.db")) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0], 121)
+
+    def test_analytics_from_rollups_match_raw_scan(self):
+        async def run():
+            await self.manager.initialize()
+            for i in range(200):
+                module = "finance" if i % 4 else "task"
+                await self.manager.log_request("default", "user", module, f"q{i}", None, (i % 50) / 100)
+            analytics = await self.manager.get_analytics_data("default")
+            window = await self.manager.get_analytics_data(
+                "default", start_date=datetime.utcnow() - timedelta(minutes=5),
+                end_date=datetime.utcnow() + timedelta(minutes=1))
+            empty = await self.manager.get_analytics_data("default", start_date=datetime.utcnow() + timedelta(hours=1))
+            raw = await self.manager.execute_query("""
+                SELECT module, COUNT(*) AS request_count, AVG(execution_time) AS avg_execution_time,
+                       MAX(execution_time) AS max_execution_time
+                FROM requests GROUP BY module
+            """)
+            await self.manager.close()
+            return analytics, window, empty, raw
+
+        analytics, window, empty, raw = asyncio.run(run())
+        by_module = {row["module"]: row for row in analytics["module_statistics"]}
+        for row in raw:
+            stats = by_module[row["module"]]
+            self.assertEqual(stats["request_count"], row["request_count"])
+            self.assertAlmostEqual(stats["avg_execution_time"], row["avg_execution_time"])
+            self.assertEqual(stats["max_execution_time"], row["max_execution_time"])
+            self.assertLessEqual(stats["p50_execution_time"], stats["p99_execution_time"])
+        self.assertEqual(analytics["total_statistics"]["total_requests"], 200)
+        self.assertEqual(window["total_statistics"]["total_requests"], 200)
+        self.assertEqual(empty["total_statistics"]["total_requests"], 0)
+
+    def test_existing_requests_are_backfilled(self):
+        path = os.path.join(self.tmp.name, "tenant_default.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("""
+                CREATE TABLE requests (id TEXT PRIMARY KEY, tenant_id TEXT, user_id TEXT, module TEXT, query TEXT,
+                                       response TEXT, execution_time REAL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+            """)
+            conn.executemany("INSERT INTO requests (id, tenant_id, module, execution_time) VALUES (?, 'default', 'finance', ?)",
+                             [(f"r{i}", 0.02) for i in range(30)])
+
+        async def run():
+            await self.manager.initialize()
+            analytics = await self.manager.get_analytics_data("default")
+            await self.manager.close()
+            return analytics
+
+        self.assertEqual(asyncio.run(run())["total_statistics"]["total_requests"], 30)
+
+    def test_tenant_requests_are_logged_to_default_database(self):
+        async def run():
+            await self.manager.initialize()
+            await self.manager.create_tenant("acme", "ACME")
+            for i in range(10):
+                await self.manager.log_request("acme", "user", "finance", f"q{i}", None, 0.01)
+            analytics = await self.manager.get_analytics_data("acme")
+            other = await self.manager.get_analytics_data("default")
+            await self.manager.close()
+            return analytics, other
+
+        analytics, other = asyncio.run(run())
+        self.assertEqual(analytics["total_statistics"]["total_requests"], 10)
+        self.assertEqual(other["total_statistics"]["total_requests"], 0)
+        with sqlite3.connect(os.path.join(self.tmp.name, "tenant_default.db")) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM requests WHERE tenant_id = 'acme'").fetchone()[0], 10)
+
+    def test_histogram_percentile(self):
+        # 90 v razredu <= 5 ms, 10 v odprtem razredu
+        histogram = [90] + [0] * 10 + [10]
+        self.assertEqual(histogram_percentile(histogram, 100, 50, 30.0), 0.005)
+        self.assertEqual(histogram_percentile(histogram, 100, 99, 30.0), 30.0)
+        self.assertIsNone(histogram_percentile(histogram, 0, 50, 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
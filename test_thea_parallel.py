@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+🧪 Test vzporedne obdelave Thea Advanced Queue System
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from thea_advanced_queue_system import Priority, PromptStatus, TheaAdvancedQueueSystem
+
+logging.getLogger('TheaAdvancedQueue').setLevel(logging.WARNING)
+
+
+class TestTheaParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "queue.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fill(self, thea):
+        priorities = [Priority.LOW, Priority.HIGH, Priority.MEDIUM, Priority.CRITICAL]
+        topics = ["analiza podatkov", "finance poročilo", "hotel turizem", "iot senzor", "splošno"]
+        return [thea.add_prompt(f"{topics[i % 5]} #{i}", priorities[i % 4]) for i in range(40)]
+
+    def _check_run(self, mode):
+        thea = TheaAdvancedQueueSystem(self.db_path)
+        self._fill(thea)
+        result = thea.process_queue_parallel(workers=4, mode=mode, batch_size=4)
+        self.assertEqual(result["processed"], 40)
+
+        # Enak vrstni red kot sekvenčna obdelava: prioriteta, nato čas
+        expected = sorted(thea.queue.values(), key=lambda p: (-p.priority.value, p.timestamp))
+        self.assertEqual([r["id"] for r in result["results"]], [p.id for p in expected])
+
+        # Viri se v paketu naložijo enkrat: 4 vrste virov, vse kasneje iz cache
+        self.assertEqual(thea.stats["cache_misses"], 4)
+
+        reloaded = TheaAdvancedQueueSystem(self.db_path)
+        self.assertTrue(all(p.status == PromptStatus.DONE for p in reloaded.queue.values()))
+        self.assertTrue(all(p.result for p in reloaded.queue.values()))
+
+    def test_thread_mode(self):
+        self._check_run("thread")
+
+    def test_asyncio_mode(self):
+        self._check_run("asyncio")
+
+    def test_errors_are_recorded(self):
+        thea = TheaAdvancedQueueSystem(self.db_path)
+        bad = thea.add_prompt("pokvarjen prompt", Priority.HIGH)
+        good = thea.add_prompt("dober prompt", Priority.HIGH)
+        original = thea._process_single_prompt
+
+        def flaky(prompt, resources=None):
+            if prompt.id == bad:
+                raise Exception("simulirana napaka")
+            return original(prompt, resources)
+
+        thea._process_single_prompt = flaky
+        result = thea.process_queue_parallel(workers=2)
+        self.assertEqual((result["processed"], result["failed"]), (1, 1))
+        self.assertEqual(thea.queue[bad].status, PromptStatus.ERROR)
+        self.assertEqual(TheaAdvancedQueueSystem(self.db_path).queue[good].status, PromptStatus.DONE)
+
+
+if __name__ == '__main__':
+    unittest.main()
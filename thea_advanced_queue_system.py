@@ -6,19 +6,22 @@ Auto Queue + Merge on Demand Implementation
 Funkcionalnosti:
 1️⃣ Auto-shranjevanje vseh promptov v queue
 2️⃣ Sekvenčna obdelava po ukazu "OBDELATI NAJ ZDALEČE"
+2️⃣➕ Vzporedna obdelava (thread/asyncio workerji, paketni zapisi statusov)
 3️⃣ Merge on demand z ukazom "ZDruži vse skupaj"
 4️⃣ Lazy loading za optimalno porabo virov
 5️⃣ Napredni monitoring in logging
 """
 
 import asyncio
+import heapq
 import json
 import time
 import uuid
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import logging
@@ -190,6 +193,35 @@ class TheaAdvancedQueueSystem:
         except Exception as e:
             logger.error(f"❌ Napaka pri shranjevanju prompt: {e}")
     
+    @staticmethod
+    def _prompt_row(prompt: PromptItem) -> Tuple:
+        return (
+            prompt.id,
+            prompt.content,
+            prompt.status.value,
+            prompt.priority.value,
+            prompt.timestamp,
+            json.dumps(prompt.metadata),
+            prompt.result,
+            prompt.error,
+            prompt.processing_time,
+            json.dumps(prompt.resources_loaded)
+        )
+    
+    def _save_prompts_to_storage(self, prompts: List[PromptItem]):
+        """Shrani več promptov v eni transakciji"""
+        if not prompts:
+            return
+        try:
+            with sqlite3.connect(self.storage_path) as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO prompt_queue 
+                    (id, content, status, priority, timestamp, metadata, result, error, processing_time, resources_loaded)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [self._prompt_row(prompt) for prompt in prompts])
+        except Exception as e:
+            logger.error(f"❌ Napaka pri paketnem shranjevanju promptov: {e}")
+    
     def add_prompt(self, content: str, priority: Priority = Priority.MEDIUM, metadata: Dict = None) -> str:
         """
         🔄 AUTO-SHRANJEVANJE PROMPTOV
@@ -221,36 +253,48 @@ class TheaAdvancedQueueSystem:
         
         return prompt_id
     
-    def _lazy_load_resources(self, prompt: PromptItem) -> Dict[str, Any]:
+    # Vir -> ključne besede v promptu, ki ga zahtevajo
+    RESOURCE_KEYWORDS = {
+        'analytics': ['analiza', 'podatki', 'statistika'],
+        'finance': ['finance', 'denar', 'proračun'],
+        'tourism': ['turizem', 'potovanje', 'hotel'],
+        'iot': ['iot', 'senzor', 'naprava'],
+    }
+    
+    def _resource_loaders(self) -> Dict[str, Callable[[], Dict]]:
+        return {
+            'analytics': self._load_analytics_data,
+            'finance': self._load_finance_data,
+            'tourism': self._load_tourism_data,
+            'iot': self._load_iot_data,
+        }
+    
+    def _lazy_load_resources(self, prompt: PromptItem, shared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         🔄 LAZY LOADING VIROV
         
-        Naloži le potrebne vire za trenutni prompt
+        Naloži le potrebne vire za trenutni prompt. Če je podan ``shared``
+        (viri trenutnega paketa), se vsak vir v paketu naloži le enkrat.
         """
         resources = {}
+        loaders = self._resource_loaders()
         
         # Analiziraj prompt za potrebne vire
         content_lower = prompt.content.lower()
         
         # Določi potrebne vire na podlagi vsebine
-        if any(keyword in content_lower for keyword in ['analiza', 'podatki', 'statistika']):
-            resources['analytics'] = self._load_analytics_data()
-            prompt.resources_loaded.append('analytics')
-            
-        if any(keyword in content_lower for keyword in ['finance', 'denar', 'proračun']):
-            resources['finance'] = self._load_finance_data()
-            prompt.resources_loaded.append('finance')
-            
-        if any(keyword in content_lower for keyword in ['turizem', 'potovanje', 'hotel']):
-            resources['tourism'] = self._load_tourism_data()
-            prompt.resources_loaded.append('tourism')
+        for resource_type, keywords in self.RESOURCE_KEYWORDS.items():
+            if any(keyword in content_lower for keyword in keywords):
+                if shared is None:
+                    resources[resource_type] = loaders[resource_type]()
+                else:
+                    if resource_type not in shared:
+                        shared[resource_type] = loaders[resource_type]()
+                    resources[resource_type] = shared[resource_type]
+                prompt.resources_loaded.append(resource_type)
             
-        if any(keyword in content_lower for keyword in ['iot', 'senzor', 'naprava']):
-            resources['iot'] = self._load_iot_data()
-            prompt.resources_loaded.append('iot')
-            
-        # Cache hit/miss tracking
-        for resource_type in resources:
+        # Cache hit/miss tracking (pri paketu ga vodi _run_batch, enkrat na vir)
+        for resource_type in (resources if shared is None else ()):
             if resource_type in self.resource_cache:
                 self.stats['cache_hits'] += 1
             else:
@@ -297,7 +341,7 @@ class TheaAdvancedQueueSystem:
             'alerts': 3
         }
     
-    def _process_single_prompt(self, prompt: PromptItem) -> str:
+    def _process_single_prompt(self, prompt: PromptItem, resources: Optional[Dict[str, Any]] = None) -> str:
         """
         🔄 OBDELAVA POSAMEZNEGA PROMPTA
         
@@ -306,8 +350,9 @@ class TheaAdvancedQueueSystem:
         start_time = time.time()
         
         try:
-            # Lazy load potrebnih virov
-            resources = self._lazy_load_resources(prompt)
+            # Lazy load potrebnih virov (vzporedna obdelava jih naloži vnaprej za cel paket)
+            if resources is None:
+                resources = self._lazy_load_resources(prompt)
             
             # Simulacija AI obdelave
             result_parts = []
@@ -424,6 +469,150 @@ class TheaAdvancedQueueSystem:
             finally:
                 self.is_processing = False
     
+    def process_queue_parallel(self, workers: int = 4, mode: str = "thread",
+                               batch_size: int = 256) -> Dict[str, Any]:
+        """
+        ⚡ VZPOREDNA OBDELAVA QUEUE
+        
+        Pending prompti gredo v prioritetno kopico (višja prioriteta, nato starejši prvi).
+        Paket vsebuje prompte le enega razreda prioritete, zato se nižji razred začne šele,
+        ko je višji v celoti obdelan; znotraj razreda so rezultati in zapisi v vrstnem redu
+        oddaje. Statusi paketa se zapišejo v dveh transakcijah (processing, done/error).
+        
+        mode: "thread" (ThreadPoolExecutor) ali "asyncio" (workerji nad asyncio.Queue,
+        obdelava prek ``_process_prompt_async``).
+        """
+        if mode not in ("thread", "asyncio"):
+            return {"error": f"Neznan način obdelave: {mode}", "status": "invalid"}
+        if self.is_processing:
+            return {"error": "Obdelava že poteka", "status": "busy"}
+        
+        with self.processing_lock:
+            self.is_processing = True
+            
+            try:
+                heap = [
+                    (-p.priority.value, p.timestamp, seq, p)
+                    for seq, p in enumerate(self.queue.values())
+                    if p.status == PromptStatus.PENDING
+                ]
+                
+                if not heap:
+                    return {"message": "Ni pending promptov za obdelavo", "processed": 0}
+                
+                heapq.heapify(heap)
+                total = len(heap)
+                processed_count = 0
+                results = []
+                started = time.time()
+                
+                logger.info(f"🚀 Začenjam vzporedno obdelavo {total} promptov ({workers} workerjev, {mode})")
+                
+                executor = ThreadPoolExecutor(max_workers=workers) if mode == "thread" else None
+                try:
+                    while heap:
+                        # Naslednji paket: isti razred prioritete, v vrstnem redu kopice
+                        priority_class = heap[0][0]
+                        batch = []
+                        while heap and heap[0][0] == priority_class and len(batch) < batch_size:
+                            batch.append(heapq.heappop(heap)[3])
+                        
+                        outcomes = self._run_batch(batch, workers, mode, executor)
+                        
+                        for prompt, (result, error) in zip(batch, outcomes):
+                            if error is None:
+                                prompt.result = result
+                                prompt.status = PromptStatus.DONE
+                                processed_count += 1
+                                self.stats['processed_prompts'] += 1
+                                results.append({
+                                    'id': prompt.id,
+                                    'content': prompt.content[:100] + "..." if len(prompt.content) > 100 else prompt.content,
+                                    'result': result,
+                                    'processing_time': prompt.processing_time,
+                                    'resources_used': prompt.resources_loaded
+                                })
+                            else:
+                                prompt.status = PromptStatus.ERROR
+                                prompt.error = error
+                                self.stats['failed_prompts'] += 1
+                                logger.error(f"❌ Napaka pri obdelavi prompt {prompt.id[:8]}: {error}")
+                        
+                        self._save_prompts_to_storage(batch)
+                finally:
+                    if executor is not None:
+                        executor.shutdown(wait=True)
+                
+                elapsed = time.time() - started
+                logger.info(f"🎯 Vzporedna obdelava končana: {processed_count} promptov v {elapsed:.2f}s")
+                
+                return {
+                    "message": f"Uspešno obdelanih {processed_count} promptov",
+                    "processed": processed_count,
+                    "failed": total - processed_count,
+                    "elapsed": elapsed,
+                    "results": results,
+                    "stats": self.get_stats()
+                }
+                
+            finally:
+                self.is_processing = False
+    
+    def _run_batch(self, batch: List[PromptItem], workers: int, mode: str,
+                   executor: Optional[ThreadPoolExecutor]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Obdelaj paket; vrne (rezultat, napaka) v vrstnem redu paketa"""
+        for prompt in batch:
+            prompt.status = PromptStatus.PROCESSING
+        self._save_prompts_to_storage(batch)
+        
+        # Viri se naložijo enkrat za cel paket, preden gredo prompti workerjem
+        shared: Dict[str, Any] = {}
+        prepared = [(prompt, self._lazy_load_resources(prompt, shared)) for prompt in batch]
+        for resource_type in shared:
+            if resource_type in self.resource_cache:
+                self.stats['cache_hits'] += 1
+            else:
+                self.stats['cache_misses'] += 1
+                self.resource_cache[resource_type] = shared[resource_type]
+        
+        if mode == "thread":
+            futures = [executor.submit(self._process_single_prompt, prompt, resources)
+                       for prompt, resources in prepared]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append((future.result(), None))
+                except Exception as e:
+                    outcomes.append((None, str(e)))
+            return outcomes
+        
+        return asyncio.run(self._run_batch_async(prepared, workers))
+    
+    async def _run_batch_async(self, prepared: List[Tuple[PromptItem, Dict[str, Any]]],
+                               workers: int) -> List[Tuple[Optional[str], Optional[str]]]:
+        work: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(prepared):
+            work.put_nowait((index, item))
+        outcomes: List[Tuple[Optional[str], Optional[str]]] = [(None, None)] * len(prepared)
+        
+        async def worker():
+            while True:
+                try:
+                    index, (prompt, resources) = work.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    outcomes[index] = (await self._process_prompt_async(prompt, resources), None)
+                except Exception as e:
+                    outcomes[index] = (None, str(e))
+        
+        await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(prepared))))))
+        return outcomes
+    
+    async def _process_prompt_async(self, prompt: PromptItem, resources: Dict[str, Any]) -> str:
+        """Asinhrona obdelava prompta; privzeto sinhrona obdelava v niti"""
+        return await asyncio.to_thread(self._process_single_prompt, prompt, resources)
+    
     def merge_all_results(self) -> Dict[str, Any]:
         """
         🔄 MERGE ON DEMAND